@@ -5,6 +5,7 @@ import arc.exceptions
 import arc.main
 from arc.main import ARC
 import arc.common
+import arc.journal
 import arc.parser
 import arc.plotter
 import arc.processor
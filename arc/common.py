@@ -464,6 +464,44 @@ def initialize_job_types(job_types, specific_job_type=''):
     return job_types
 
 
+def read_lines_reversed(path, block_size=8192):
+    """
+    Generate the lines of a text file from the last line to the first.
+    The file is read block-wise from its end, so only the consumed part of the file is read,
+    and memory usage is bounded by the block size (and the longest line) regardless of the file size.
+
+    Args:
+        path (str): The file path.
+        block_size (int, optional): The number of bytes read at a time.
+
+    Yields:
+        str: The lines of the file in reversed order, including their line endings (as returned by readlines()).
+    """
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder, last_line = b'', True
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            pieces = (f.read(read_size) + remainder).split(b'\n')
+            # the first piece might be the end of a line which started in a preceding block
+            remainder = pieces.pop(0)
+            for piece in reversed(pieces):
+                if last_line:
+                    # the last line of the file has no line ending (it is empty if the file ends with one)
+                    last_line = False
+                    if piece:
+                        yield piece.decode('utf-8', errors='replace')
+                    continue
+                yield piece.rstrip(b'\r').decode('utf-8', errors='replace') + '\n'
+        if last_line:
+            if remainder:
+                yield remainder.decode('utf-8', errors='replace')
+        else:
+            yield remainder.rstrip(b'\r').decode('utf-8', errors='replace') + '\n'
+
+
 def determine_ess(log_file):
     """
     Determine the ESS to which the log file belongs.
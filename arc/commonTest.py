@@ -7,6 +7,7 @@ This module contains unit tests for ARC's common module
 
 import copy
 import os
+import tempfile
 import time
 import unittest
 
@@ -312,6 +313,24 @@ H 	2.951	-3.078	-4.102""")
         self.assertEqual(common.determine_ess(qchem), 'qchem')
         self.assertEqual(common.determine_ess(molpro), 'molpro')
 
+    def test_read_lines_reversed(self):
+        """Test reading the lines of a file from the last line to the first"""
+        path = os.path.join(arc_path, 'arc', 'testing', 'C2H6_freq_QChem.out')
+        with open(path, 'r') as f:
+            lines = f.readlines()
+        self.assertEqual(list(common.read_lines_reversed(path)), lines[::-1])
+        self.assertEqual(list(common.read_lines_reversed(path, block_size=7)), lines[::-1])
+
+        with tempfile.TemporaryDirectory() as scratch_path:
+            path = os.path.join(scratch_path, 'reversed_lines.txt')
+            for content, expected in [('', []),
+                                      ('a', ['a']),
+                                      ('a\n\nbc\n', ['bc\n', '\n', 'a\n']),
+                                      ('a\r\nbc', ['bc', 'a\n'])]:
+                with open(path, 'w', newline='') as f:
+                    f.write(content)
+                self.assertEqual(list(common.read_lines_reversed(path, block_size=2)), expected)
+
     def test_sort_two_lists_by_the_first(self):
         """Test the sort_two_lists_by_the_first function"""
         list1 = [5, 2, 8, 1, 0]
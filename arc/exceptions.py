@@ -90,6 +90,13 @@ class ServerError(Exception):
     pass
 
 
+class ServerUnavailableError(ServerError):
+    """
+    An exception raised when a server is temporarily unavailable, and operations on it are deferred.
+    """
+    pass
+
+
 class SettingsError(Exception):
     """
     An exception raised when dealing with settings.
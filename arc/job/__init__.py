@@ -1,9 +1,21 @@
 #!/usr/bin/env python3
 # encoding: utf-8
 
+import arc.job.array
+import arc.job.artifacts
+import arc.job.cache
+import arc.job.executor
 import arc.job.inputs
 import arc.job.job
+import arc.job.ledger
 import arc.job.local
+import arc.job.monitor
+import arc.job.pipeline
+import arc.job.placement
+import arc.job.predictor
+import arc.job.retry
+import arc.job.simulator
+import arc.job.snapshot
 import arc.job.ssh
 import arc.job.submit
 import arc.job.trsh
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for submitting several ARC jobs with a single cluster submission:
+
+- As the tasks of an array job (e.g., all points of a brute force directed rotor scan).
+  Once submitted, each task Job is assigned a job ID of the form '<array job ID>_<task ID>', which is tracked
+  by the Scheduler via the same queue status check as any other job.
+- Packed into one job running the tasks sequentially (or in parallel) on a single node
+  (e.g., many short conformer optimizations of a small species). All task Jobs are assigned the packed job ID.
+
+Each task is a regular Job with its own job folder, input file, submit script, and output file
+(so it can be parsed, troubleshot, and re-submitted individually). The array/packed job folder contains
+the submit script and a task table mapping the task IDs to the task job folders.
+"""
+
+import os
+
+from arc.common import get_logger
+from arc.exceptions import JobError
+from arc.job.executor import is_local_executor
+from arc.job.job import run_jobs
+from arc.job.local import submit_job
+from arc.job.snapshot import queue_snapshot
+from arc.job.ssh import SSHClient
+from arc.job.submit import submit_scripts
+from arc.settings import servers, submit_filename, array_job_directive, array_task_id_variable, \
+    array_tasks_filename, array_job_min_tasks, job_packing_max_tasks, job_packing_max_runtime, job_packing_parallel, \
+    packed_job_minutes_per_heavy_atom
+
+
+logger = get_logger()
+
+
+class ArrayJob(object):
+    """
+    A cluster array job executing several ARC jobs with a single submission.
+    All tasks must run on the same server using the same software and the same resources.
+
+    Args:
+        jobs (list): The Job objects to execute as the array tasks.
+
+    Attributes:
+        tasks (list): The Job objects executed as the array tasks, task IDs are the 1-indexed positions in this list.
+        server (str): The server name.
+        software (str): The electronic structure software used by all tasks.
+        name (str): The array job name on the server.
+        local_path (str): The local path to the array job folder.
+        remote_path (str): The remote path to the array job folder.
+        submit (str): The array job submit script.
+        job_id (int): The array job ID determined by the server.
+
+    Raises:
+        JobError: If the jobs cannot be executed as a single array job.
+    """
+    description = 'array job'
+
+    def __init__(self, jobs):
+        if not jobs:
+            raise JobError('Cannot create an array job without jobs')
+        self.tasks = list(jobs)
+        first_task = self.tasks[0]
+        self.server = first_task.server
+        self.software = first_task.software
+        parameters = get_array_parameters(first_task)
+        for task in self.tasks[1:]:
+            if get_array_parameters(task) != parameters:
+                raise JobError('All tasks of an array job must run on the same server using the same software and '
+                               'resources, got {0} and {1}'.format(first_task.job_name, task.job_name))
+        self.name = first_task.job_server_name
+        folder_name = '{0}_{1}_{2}'.format(first_task.job_type, self.description.split()[0],
+                                           first_task.job_server_name)
+        self.local_path = os.path.join(os.path.dirname(first_task.local_path), folder_name)
+        self.remote_path = os.path.join(os.path.dirname(first_task.remote_path), folder_name)
+        self.submit = ''
+        self.job_id = 0
+
+    def __repr__(self):
+        return '<{0} {1} ({2} tasks on {3})>'.format(self.__class__.__name__, self.name, len(self.tasks), self.server)
+
+    def write_submit_script(self):
+        """
+        Write the array job submit script and the task table.
+        """
+        cluster_soft = servers[self.server]['cluster_soft']
+        parameters = self.tasks[0].get_submit_script_parameters()
+        parameters['name'] = self.name
+        self.submit = self.get_submit_script(template=submit_scripts[self.server][self.software.lower()],
+                                             parameters=parameters, cluster_soft=cluster_soft)
+        if not os.path.isdir(self.local_path):
+            os.makedirs(self.local_path)
+        with open(os.path.join(self.local_path, submit_filename[cluster_soft]), 'w') as f:
+            f.write(self.submit)
+        with open(os.path.join(self.local_path, array_tasks_filename), 'w') as f:
+            f.write(self.get_task_table())
+
+    def get_submit_script(self, template, parameters, cluster_soft):
+        """
+        Make the submit script from the regular submit script template.
+
+        Args:
+            template (str): The submit script template of the server and software.
+            parameters (dict): The values of the template fields, 'name' is the array job name.
+            cluster_soft (str): The cluster software of the server.
+
+        Returns:
+            str: The submit script.
+        """
+        return get_array_submit_script(template=template, parameters=parameters, num_tasks=len(self.tasks),
+                                       cluster_soft=cluster_soft)
+
+    def get_task_table(self):
+        """
+        Get the task table, the job folder of the n-th task is in the n-th line.
+        Remote folders are relative to the user's home directory on the server.
+
+        Returns:
+            str: The task table.
+        """
+        return ''.join(task.local_path + '\n' if self.server == 'local' else task.remote_path + '\n'
+                       for task in self.tasks)
+
+    def get_file_manifest(self):
+        """
+        Get the manifest of all files to stage on the remote server for this array job, including all task files.
+
+        Returns:
+            list: Entries are dictionaries with a 'remote' file path, and either a 'local' file path
+                  or a 'content' string.
+        """
+        manifest = [{'remote': os.path.join(self.remote_path, submit_filename[servers[self.server]['cluster_soft']]),
+                     'content': self.submit},
+                    {'remote': os.path.join(self.remote_path, array_tasks_filename),
+                     'content': self.get_task_table()}]
+        for task in self.tasks:
+            manifest.extend(task.get_file_manifest())
+        return manifest
+
+    def run(self):
+        """
+        Write the files of all tasks, stage them on the server in a single session, and submit the array job.
+        """
+        logger.info('Running {kind} {name} on {server} with {num} tasks for {label}: {first} to {last}'.format(
+            kind=self.description, name=self.name, server=self.server, num=len(self.tasks),
+            label=self.tasks[0].species_name, first=self.tasks[0].job_name, last=self.tasks[-1].job_name))
+        for task in self.tasks:
+            task.write_submit_script()
+            task.write_input_file(stage=False)
+        self.write_submit_script()
+        if self.tasks[0].testing:
+            return
+        if self.server != 'local':
+            ssh = SSHClient(self.server)
+            modified_times = ssh.stage_files(manifest=self.get_file_manifest())
+            for task in self.tasks:
+                task.initial_time = modified_times.get(
+                    os.path.join(task.remote_path, submit_filename[servers[self.server]['cluster_soft']]), None)
+                task.copy_check_file_on_server()
+            job_status, self.job_id = ssh.submit_job(remote_path=self.remote_path)
+        else:
+            job_status, self.job_id = submit_job(path=self.local_path)
+        for task_id, task in enumerate(self.tasks, start=1):
+            task.job_status[0] = job_status
+            if job_status == 'running':
+                task.job_id = self.get_task_job_id(task_id)
+                queue_snapshot.add_job(job_id=task.job_id, server=self.server)
+
+    def get_task_job_id(self, task_id):
+        """
+        Get the job ID by which the server tracks a task.
+
+        Args:
+            task_id (int): The 1-indexed task ID.
+
+        Returns:
+            str: The task job ID.
+        """
+        return '{0}_{1}'.format(self.job_id, task_id)
+
+
+class PackedJob(ArrayJob):
+    """
+    A single cluster job executing several ARC jobs one after the other (or concurrently) on one node.
+    All tasks must run on the same server using the same software and the same resources.
+
+    Args:
+        jobs (list): The Job objects to execute as the packed tasks.
+        parallel (bool, optional): Whether to execute the tasks concurrently, requesting the CPUs of all tasks,
+                                   ``None`` to use ``job_packing_parallel``.
+
+    Attributes:
+        tasks (list): The Job objects executed as the packed tasks.
+        parallel (bool): Whether the tasks are executed concurrently.
+        server (str): The server name.
+        software (str): The electronic structure software used by all tasks.
+        name (str): The packed job name on the server.
+        local_path (str): The local path to the packed job folder.
+        remote_path (str): The remote path to the packed job folder.
+        submit (str): The packed job submit script.
+        job_id (int): The packed job ID determined by the server.
+
+    Raises:
+        JobError: If the jobs cannot be executed as a single packed job.
+    """
+    description = 'packed job'
+
+    def __init__(self, jobs, parallel=None):
+        super(PackedJob, self).__init__(jobs=jobs)
+        self.parallel = parallel if parallel is not None else job_packing_parallel
+
+    def get_submit_script(self, template, parameters, cluster_soft):
+        """
+        Make the submit script from the regular submit script template.
+
+        Args:
+            template (str): The submit script template of the server and software.
+            parameters (dict): The values of the template fields, 'name' is the packed job name.
+            cluster_soft (str): The cluster software of the server.
+
+        Returns:
+            str: The submit script.
+        """
+        return get_packed_submit_script(template=template, parameters=parameters, num_tasks=len(self.tasks),
+                                        parallel=self.parallel)
+
+    def get_task_job_id(self, task_id):
+        """
+        Get the job ID by which the server tracks a task, all tasks are tracked by the packed job ID.
+
+        Args:
+            task_id (int): The 1-indexed task ID.
+
+        Returns:
+            int: The packed job ID.
+        """
+        return self.job_id
+
+
+def get_array_submit_script(template, parameters, num_tasks, cluster_soft):
+    """
+    Make an array job submit script from a regular submit script template.
+    The template directives are formatted with the array job name, and the array directive is added.
+    Each task changes directory to its job folder (using the task table) before executing the template body,
+    in which the job name is suffixed by the task ID to keep the scratch folders of concurrent tasks apart.
+
+    Args:
+        template (str): The submit script template of the server and software.
+        parameters (dict): The values of the template fields, 'name' is the array job name.
+        num_tasks (int): The number of array tasks.
+        cluster_soft (str): The cluster software of the server.
+
+    Returns:
+        str: The array job submit script.
+    """
+    task_id_variable = array_task_id_variable[cluster_soft]
+    header, body = split_submit_template(template)
+    body_parameters = dict(parameters, name='{0}_${1}'.format(parameters['name'], task_id_variable))
+    directive = array_job_directive[cluster_soft].format(num_tasks=num_tasks)
+    change_dir = '\nTaskDir=$(sed -n "${{{0}}}p" {1})\ncd $HOME\ncd "$TaskDir"\n'.format(
+        task_id_variable, array_tasks_filename)
+    return header.format(**parameters) + directive + '\n' + change_dir + body.format(**body_parameters)
+
+
+def get_packed_submit_script(template, parameters, num_tasks, parallel=False):
+    """
+    Make a packed job submit script from a regular submit script template.
+    The template directives are formatted with the packed job name (and the CPUs of all tasks if run in parallel).
+    The template body is executed for each task in a sub-shell after changing directory to the task job folder
+    (using the task table), with the job name (also the Slurm job name variable) suffixed by the task number
+    to keep the scratch folders apart.
+
+    Args:
+        template (str): The submit script template of the server and software.
+        parameters (dict): The values of the template fields, 'name' is the packed job name.
+        num_tasks (int): The number of packed tasks.
+        parallel (bool, optional): Whether to execute the tasks concurrently.
+
+    Returns:
+        str: The packed job submit script.
+    """
+    header, body = split_submit_template(template)
+    header_parameters = dict(parameters, cpus=parameters['cpus'] * num_tasks) if parallel else parameters
+    body_parameters = dict(parameters, name='{0}_$TaskIndex'.format(parameters['name']))
+    loop = '\nTaskIndex=0\nwhile read -u 3 TaskDir; do\nTaskIndex=$((TaskIndex+1))\n(\ncd $HOME\ncd "$TaskDir"\n' \
+           'export SLURM_JOB_NAME={0}_$TaskIndex\n'.format(parameters['name'])
+    end_loop = '){0}\ndone 3< {1}\nwait\n'.format(' &' if parallel else '', array_tasks_filename)
+    return header.format(**header_parameters) + loop + body.format(**body_parameters) + end_loop
+
+
+def split_submit_template(template):
+    """
+    Split a submit script template into the header (the shebang and the cluster software directives)
+    and the body (the commands).
+
+    Args:
+        template (str): The submit script template.
+
+    Returns:
+        tuple: The header (``str``) and the body (``str``).
+    """
+    lines = template.splitlines(True)
+    last_directive_index = 0
+    for i, line in enumerate(lines):
+        if i and line.strip() and not line.startswith('#SBATCH') and not line.startswith('#$'):
+            break
+        if line.startswith('#SBATCH') or line.startswith('#$'):
+            last_directive_index = i
+    return ''.join(lines[:last_directive_index + 1]), ''.join(lines[last_directive_index + 1:])
+
+
+def get_array_parameters(job):
+    """
+    Get the parameters which must be identical for jobs to be executed as tasks of the same array job.
+
+    Args:
+        job (Job): The job object.
+
+    Returns:
+        tuple: The server, software, and submit script parameters (excluding the job name).
+    """
+    parameters = job.get_submit_script_parameters()
+    del parameters['name']
+    return (job.server, job.software) + tuple(sorted(parameters.items()))
+
+
+def run_array_jobs(jobs, min_tasks=None):
+    """
+    Execute several jobs, submitting jobs with identical servers, software, and resources as array jobs.
+    Jobs which do not form a large enough group are executed as regular jobs.
+
+    Args:
+        jobs (list): Entries are Job objects.
+        min_tasks (int, optional): The minimal number of jobs to submit as an array job,
+                                   ``None`` to use ``array_job_min_tasks``.
+    """
+    min_tasks = min_tasks if min_tasks is not None else array_job_min_tasks
+    if min_tasks is None:
+        run_jobs(jobs)
+        return
+    groups, regular_jobs = dict(), list()
+    for job in jobs:
+        if is_local_executor(job.server):
+            # the local executor runs jobs concurrently anyway
+            regular_jobs.append(job)
+        else:
+            groups.setdefault(get_array_parameters(job), list()).append(job)
+    for group in groups.values():
+        if len(group) >= max(min_tasks, 2):
+            ArrayJob(jobs=group).run()
+        else:
+            regular_jobs.extend(group)
+    if regular_jobs:
+        run_jobs(regular_jobs)
+
+
+def estimate_packed_runtime(job):
+    """
+    Roughly estimate the run time of a small job to be packed, based on its number of heavy atoms.
+
+    Args:
+        job (Job): The job object.
+
+    Returns:
+        float: The estimated run time in hours.
+    """
+    heavy_atoms = len([symbol for symbol in job.xyz['symbols'] if symbol != 'H']) if job.xyz is not None else 1
+    return max(heavy_atoms, 1) * packed_job_minutes_per_heavy_atom / 60.0
+
+
+def pack_jobs(jobs, max_tasks=None, max_runtime=None):
+    """
+    Bundle jobs with identical servers, software, and resources into packs.
+    A pack is limited by the number of jobs and by the total estimated run time of its jobs.
+
+    Args:
+        jobs (list): Entries are Job objects.
+        max_tasks (int, optional): The maximal number of jobs per pack, ``None`` to use ``job_packing_max_tasks``.
+        max_runtime (float, optional): The maximal total estimated run time (in hours) of a pack,
+                                       ``None`` to use ``job_packing_max_runtime``.
+
+    Returns:
+        list: Entries are lists of Job objects, each list is a pack (might be a single job).
+    """
+    max_tasks = max_tasks if max_tasks is not None else job_packing_max_tasks
+    max_runtime = max_runtime if max_runtime is not None else job_packing_max_runtime
+    groups, packs = dict(), list()
+    for job in jobs:
+        if is_local_executor(job.server):
+            # the local executor runs jobs concurrently anyway
+            packs.append([job])
+        else:
+            groups.setdefault(get_array_parameters(job), list()).append(job)
+    for group in groups.values():
+        pack, pack_runtime = list(), 0
+        for job in group:
+            runtime = estimate_packed_runtime(job)
+            if pack and (len(pack) >= max_tasks or pack_runtime + runtime > max_runtime):
+                packs.append(pack)
+                pack, pack_runtime = list(), 0
+            pack.append(job)
+            pack_runtime += runtime
+        packs.append(pack)
+    return packs
+
+
+def run_packed_jobs(jobs, max_tasks=None, max_runtime=None):
+    """
+    Execute several jobs, packing small jobs with identical servers, software, and resources into single submissions.
+    Jobs which could not be packed with other jobs are executed as regular jobs.
+
+    Args:
+        jobs (list): Entries are Job objects.
+        max_tasks (int, optional): The maximal number of jobs per pack, ``None`` to use ``job_packing_max_tasks``.
+        max_runtime (float, optional): The maximal total estimated run time (in hours) of a pack,
+                                       ``None`` to use ``job_packing_max_runtime``.
+    """
+    if (max_tasks if max_tasks is not None else job_packing_max_tasks) is None:
+        run_jobs(jobs)
+        return
+    regular_jobs = list()
+    for pack in pack_jobs(jobs, max_tasks=max_tasks, max_runtime=max_runtime):
+        if len(pack) > 1:
+            PackedJob(jobs=pack).run()
+        else:
+            regular_jobs.extend(pack)
+    if regular_jobs:
+        run_jobs(regular_jobs)
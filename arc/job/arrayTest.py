@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.array module
+"""
+
+import os
+import shutil
+import unittest
+
+from arc.exceptions import JobError
+from arc.job.array import ArrayJob, PackedJob, get_array_submit_script, get_packed_submit_script, pack_jobs
+from arc.job.job import Job
+from arc.job.submit import submit_scripts
+from arc.settings import arc_path
+
+
+class TestArrayJob(unittest.TestCase):
+    """
+    Contains unit tests for the ArrayJob class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.ess_settings = {'gaussian': ['server1'], 'molpro': ['server2']}
+        cls.project_directory = os.path.join(arc_path, 'Projects', 'arc_project_for_testing_delete_after_usage4')
+        cls.xyz = {'symbols': ('C',), 'isotopes': (12,), 'coords': ((0.0, 0.0, 0.0),)}
+        cls.jobs = [Job(project='arc_project_for_testing_delete_after_usage4', ess_settings=cls.ess_settings,
+                        species_name='tst_spc', xyz=cls.xyz, job_type='directed_scan', level_of_theory='b3lyp/6-31g',
+                        multiplicity=1, job_num=200 + i, directed_scan_type='brute_force_sp',
+                        directed_scans=[[1, 2, 3, 4]], directed_dihedrals=[float(i * 8)], rotor_index=0,
+                        testing=True, project_directory=cls.project_directory) for i in range(3)]
+
+    def test_array_job(self):
+        """Test creating an array job"""
+        array_job = ArrayJob(jobs=self.jobs)
+        self.assertEqual(array_job.server, 'server1')
+        self.assertEqual(array_job.name, 'a200')
+        self.assertEqual(os.path.basename(array_job.remote_path), 'directed_scan_array_a200')
+        self.assertEqual(os.path.dirname(array_job.remote_path), os.path.dirname(self.jobs[0].remote_path))
+        self.assertEqual(array_job.get_task_table().splitlines(), [job.remote_path for job in self.jobs])
+
+        job = Job(project='arc_project_for_testing_delete_after_usage4', ess_settings=self.ess_settings,
+                  species_name='tst_spc', xyz=self.xyz, job_type='directed_scan', level_of_theory='b3lyp/6-31g',
+                  multiplicity=1, job_num=210, directed_scan_type='brute_force_sp', directed_scans=[[1, 2, 3, 4]],
+                  directed_dihedrals=[0.0], rotor_index=0, total_job_memory_gb=28,
+                  testing=True, project_directory=self.project_directory)
+        with self.assertRaises(JobError):
+            ArrayJob(jobs=self.jobs + [job])
+
+    def test_get_array_submit_script(self):
+        """Test making an array job submit script from a regular submit script template"""
+        parameters = {'name': 'a200', 'un': 'user', 't_max': '120:00:00', 'memory': 14336, 'cpus': 8,
+                      'architecture': '', 'size': None}
+        submit = get_array_submit_script(template=submit_scripts['pharos']['gaussian'], parameters=parameters,
+                                         num_tasks=46, cluster_soft='OGE')
+        lines = submit.splitlines()
+        self.assertIn('#$ -N a200', lines)
+        self.assertIn('#$ -t 1-46', lines)
+        self.assertLess(lines.index('#$ -e err.txt'), lines.index('#$ -t 1-46'))
+        self.assertIn('TaskDir=$(sed -n "${SGE_TASK_ID}p" tasks.txt)', lines)
+        self.assertIn('GAUSS_SCRDIR=/scratch/user/a200_$SGE_TASK_ID', lines)
+        self.assertLess(lines.index('cd "$TaskDir"'), lines.index('g16 input.gjf'))
+
+        submit = get_array_submit_script(template=submit_scripts['rmg']['gaussian'], parameters=parameters,
+                                         num_tasks=2116, cluster_soft='Slurm')
+        lines = submit.splitlines()
+        self.assertIn('#SBATCH -J a200', lines)
+        self.assertIn('#SBATCH --array=1-2116', lines)
+        self.assertIn('TaskDir=$(sed -n "${SLURM_ARRAY_TASK_ID}p" tasks.txt)', lines)
+        self.assertLess(lines.index('cd "$TaskDir"'), lines.index('SubmitDir=`pwd`'))
+
+    def test_packed_job(self):
+        """Test creating a packed job"""
+        packed_job = PackedJob(jobs=self.jobs, parallel=False)
+        self.assertEqual(os.path.basename(packed_job.remote_path), 'directed_scan_packed_a200')
+        packed_job.job_id = 14428
+        self.assertEqual(packed_job.get_task_job_id(2), 14428)
+
+    def test_get_packed_submit_script(self):
+        """Test making a packed job submit script from a regular submit script template"""
+        parameters = {'name': 'a200', 'un': 'user', 't_max': '120:00:00', 'memory': 14336, 'cpus': 8,
+                      'architecture': '', 'size': None}
+        submit = get_packed_submit_script(template=submit_scripts['pharos']['qchem'], parameters=parameters,
+                                          num_tasks=4, parallel=False)
+        lines = submit.splitlines()
+        self.assertIn('#$ -pe singlenode 8', lines)
+        self.assertIn('while read -u 3 TaskDir; do', lines)
+        self.assertIn('export QCSCRATCH=/scratch/user/a200_$TaskIndex', lines)
+        self.assertIn('qchem -nt 8 input.in output.out', lines)
+        self.assertIn(')', lines)
+        self.assertLess(lines.index('cd "$TaskDir"'), lines.index('qchem -nt 8 input.in output.out'))
+        self.assertLess(lines.index('qchem -nt 8 input.in output.out'), lines.index('done 3< tasks.txt'))
+
+        submit = get_packed_submit_script(template=submit_scripts['pharos']['qchem'], parameters=parameters,
+                                          num_tasks=4, parallel=True)
+        lines = submit.splitlines()
+        self.assertIn('#$ -pe singlenode 32', lines)
+        self.assertIn('qchem -nt 8 input.in output.out', lines)
+        self.assertIn(') &', lines)
+        self.assertEqual(lines[-1], 'wait')
+
+    def test_pack_jobs(self):
+        """Test bundling jobs into packs by count and by estimated run time"""
+        packs = pack_jobs(self.jobs, max_tasks=2, max_runtime=1)
+        self.assertEqual([[job.job_name for job in pack] for pack in packs],
+                         [['directed_scan_a200', 'directed_scan_a201'], ['directed_scan_a202']])
+        packs = pack_jobs(self.jobs, max_tasks=8, max_runtime=0.1)
+        self.assertEqual([len(pack) for pack in packs], [1, 1, 1])
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        if os.path.isdir(cls.project_directory):
+            shutil.rmtree(cls.project_directory)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for tracking large files left on servers by completed jobs (e.g., Gaussian check files, orbitals files).
+
+Such artifacts are not downloaded when a job terminates. Instead, a handle recording where the file lives is kept
+in a process-wide registry (``remote_artifacts``), keyed by the local path the file would have been downloaded to.
+The file is fetched only when a consumer needs it locally, or copied directly on the server
+if the consuming job runs on the same server, so it never round-trips through the ARC host.
+The registry is shared by the Scheduler thread and the threads of the completion pipeline, so it is locked.
+"""
+
+import os
+import threading
+
+from arc.common import get_logger
+from arc.job.ssh import SSHClient
+
+
+logger = get_logger()
+
+
+class RemoteArtifact(object):
+    """
+    A handle to a file on a server.
+
+    Args:
+        server (str): The server name.
+        remote_path (str): The path to the file on the server.
+        local_path (str): The local path to download the file to.
+
+    Attributes:
+        server (str): The server name.
+        remote_path (str): The path to the file on the server.
+        local_path (str): The local path to download the file to.
+    """
+    def __init__(self, server, remote_path, local_path):
+        self.server = server
+        self.remote_path = remote_path
+        self.local_path = local_path
+
+    def __repr__(self):
+        return '<RemoteArtifact {0}:{1}>'.format(self.server, self.remote_path)
+
+    def as_dict(self):
+        """A helper function for dumping this object as a dictionary in a YAML file for restarting ARC"""
+        return {'server': self.server, 'remote_path': self.remote_path, 'local_path': self.local_path}
+
+    def is_local(self):
+        """
+        Check whether the artifact was already downloaded.
+
+        Returns:
+            bool: Whether the file exists locally.
+        """
+        return os.path.isfile(self.local_path)
+
+    def fetch(self):
+        """
+        Download the artifact, unless it already exists locally.
+
+        Returns:
+            bool: Whether the file exists locally.
+        """
+        if self.is_local():
+            return True
+        if not os.path.isdir(os.path.dirname(self.local_path)):
+            os.makedirs(os.path.dirname(self.local_path))
+        logger.debug('Downloading {0} from {1}'.format(self.remote_path, self.server))
+        ssh = SSHClient(self.server)
+        ssh.download_file(remote_file_path=self.remote_path, local_file_path=self.local_path)
+        if not self.is_local():
+            logger.warning('Could not download {0} from {1}'.format(self.remote_path, self.server))
+            return False
+        return True
+
+    def copy_on_server(self, remote_path):
+        """
+        Copy the artifact to another path on the same server, without downloading it.
+
+        Args:
+            remote_path (str): The destination path on the server.
+
+        Returns:
+            bool: Whether the file was successfully copied.
+        """
+        ssh = SSHClient(self.server)
+        _, stderr = ssh.send_command_to_server(command='cp {0} {1}'.format(self.remote_path, remote_path))
+        if stderr:
+            logger.warning('Could not copy {0} to {1} on {2}, got: {3}'.format(
+                self.remote_path, remote_path, self.server, stderr))
+            return False
+        return True
+
+
+class ArtifactRegistry(object):
+    """
+    A registry of remote artifacts, keyed by their local paths.
+
+    Attributes:
+        artifacts (dict): Keys are local file paths, values are RemoteArtifact objects.
+        lock (threading.RLock): Guards the artifacts. It is not held while files are downloaded or copied.
+    """
+    def __init__(self):
+        self.artifacts = dict()
+        self.lock = threading.RLock()
+
+    def register(self, server, remote_path, local_path):
+        """
+        Record the location of a file left on a server.
+
+        Args:
+            server (str): The server name.
+            remote_path (str): The path to the file on the server.
+            local_path (str): The local path to download the file to.
+
+        Returns:
+            RemoteArtifact: The artifact handle.
+        """
+        artifact = RemoteArtifact(server=server, remote_path=remote_path, local_path=local_path)
+        with self.lock:
+            self.artifacts[local_path] = artifact
+        return artifact
+
+    def get(self, local_path):
+        """
+        Get the handle of an artifact.
+
+        Args:
+            local_path (str): The local path of the artifact.
+
+        Returns:
+            RemoteArtifact: The artifact handle, ``None`` if it is not registered.
+        """
+        with self.lock:
+            return self.artifacts.get(local_path, None)
+
+    def discard(self, local_path):
+        """
+        Stop tracking an artifact (e.g., when the job is re-checked and its artifacts are re-registered).
+
+        Args:
+            local_path (str): The local path of the artifact.
+        """
+        with self.lock:
+            self.artifacts.pop(local_path, None)
+
+    def exists(self, local_path):
+        """
+        Check whether a file is available, either locally or as a remote artifact.
+
+        Args:
+            local_path (str): The local path of the file.
+
+        Returns:
+            bool: Whether the file is available.
+        """
+        if os.path.isfile(local_path):
+            return True
+        with self.lock:
+            return local_path in self.artifacts
+
+    def fetch(self, local_path):
+        """
+        Make sure a file exists locally, downloading it if it is a remote artifact.
+
+        Args:
+            local_path (str): The local path of the file.
+
+        Returns:
+            bool: Whether the file exists locally.
+        """
+        if os.path.isfile(local_path):
+            return True
+        artifact = self.get(local_path)
+        if artifact is None:
+            return False
+        return artifact.fetch()
+
+    def fetch_all(self, directory, file_name=None):
+        """
+        Download all remote artifacts under a local directory (e.g., to keep them once ARC terminates).
+
+        Args:
+            directory (str): The local directory to which artifacts are downloaded.
+            file_name (str, optional): Only fetch artifacts with this file name (e.g., 'check.chk').
+
+        Returns:
+            int: The number of artifacts which exist locally under the directory.
+        """
+        directory = os.path.join(os.path.abspath(directory), '')
+        fetched = 0
+        with self.lock:
+            local_paths = list(self.artifacts.keys())
+        for local_path in local_paths:
+            if not os.path.abspath(local_path).startswith(directory) \
+                    or (file_name is not None and os.path.basename(local_path) != file_name):
+                continue
+            if self.fetch(local_path):
+                fetched += 1
+        return fetched
+
+    def copy_on_server(self, local_path, server, remote_path):
+        """
+        Copy a remote artifact directly on the server if it lives on the requested server.
+
+        Args:
+            local_path (str): The local path of the artifact.
+            server (str): The server on which the file is needed.
+            remote_path (str): The destination path on the server.
+
+        Returns:
+            bool: Whether the file was copied on the server. If ``False``, the consumer should upload the file
+                  after fetching it.
+        """
+        artifact = self.get(local_path)
+        if artifact is None or artifact.server != server or server == 'local':
+            return False
+        return artifact.copy_on_server(remote_path=remote_path)
+
+    def as_dict(self):
+        """A helper function for dumping the registry in a YAML file for restarting ARC"""
+        with self.lock:
+            return [artifact.as_dict() for artifact in self.artifacts.values()]
+
+    def from_dict(self, artifacts_list):
+        """
+        Restore the registry from a restart file.
+
+        Args:
+            artifacts_list (list): Entries are dictionaries representing RemoteArtifact objects.
+        """
+        for artifact_dict in artifacts_list:
+            self.register(**artifact_dict)
+
+
+# A process-wide registry shared by the Scheduler and all Job objects
+remote_artifacts = ArtifactRegistry()
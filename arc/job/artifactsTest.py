@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.artifacts module
+"""
+
+import os
+import shutil
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from arc.job.artifacts import ArtifactRegistry, RemoteArtifact
+from arc.settings import arc_path
+
+
+class TestArtifactRegistry(unittest.TestCase):
+    """
+    Contains unit tests for the ArtifactRegistry class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.scratch_path = os.path.join(arc_path, 'scratch_artifacts')
+        if not os.path.isdir(cls.scratch_path):
+            os.makedirs(cls.scratch_path)
+        cls.local_path = os.path.join(cls.scratch_path, 'check.chk')
+        cls.remote_path = 'runs/ARC_Projects/project/H2O/opt_a101/check.chk'
+
+    def setUp(self):
+        """
+        A method that is run before each unit test in this class.
+        """
+        self.registry = ArtifactRegistry()
+        self.registry.register(server='server1', remote_path=self.remote_path, local_path=self.local_path)
+
+    def test_register(self):
+        """Test registering a remote artifact"""
+        artifact = self.registry.get(self.local_path)
+        self.assertIsInstance(artifact, RemoteArtifact)
+        self.assertEqual(artifact.server, 'server1')
+        self.assertEqual(artifact.remote_path, self.remote_path)
+        self.assertFalse(artifact.is_local())
+        self.assertIsNone(self.registry.get(os.path.join(self.scratch_path, 'orbitals.fchk')))
+
+    def test_exists(self):
+        """Test checking whether a file is available locally or remotely"""
+        self.assertTrue(self.registry.exists(self.local_path))
+        self.assertFalse(self.registry.exists(os.path.join(self.scratch_path, 'orbitals.fchk')))
+        self.registry.discard(self.local_path)
+        self.assertFalse(self.registry.exists(self.local_path))
+
+    def test_fetch_local_file(self):
+        """Test that fetching a file which already exists locally does not access the server"""
+        local_path = os.path.join(self.scratch_path, 'input.FChk')
+        with open(local_path, 'w') as f:
+            f.write('orbitals')
+        self.registry.register(server='server1', remote_path='runs/input.FChk', local_path=local_path)
+        self.assertTrue(self.registry.fetch(local_path))
+        self.assertFalse(self.registry.fetch(os.path.join(self.scratch_path, 'missing.chk')))
+
+    def test_fetch_all(self):
+        """Test fetching all artifacts under a directory, filtered by their file name"""
+        local_path = os.path.join(self.scratch_path, 'sp_a102', 'check.chk')
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(local_path, 'w') as f:
+            f.write('check')
+        self.registry.discard(self.local_path)
+        self.registry.register(server='server1', remote_path='runs/check.chk', local_path=local_path)
+        self.registry.register(server='server1', remote_path='runs/input.FChk',
+                               local_path=os.path.join(self.scratch_path, 'input.FChk'))
+        self.registry.register(server='server1', remote_path='runs/other/check.chk',
+                               local_path=os.path.join(arc_path, 'other_project', 'check.chk'))
+        # only the existing check file under the scratch directory is considered, no server is accessed
+        self.assertEqual(self.registry.fetch_all(directory=self.scratch_path, file_name='check.chk'), 1)
+
+    def test_concurrent_register(self):
+        """Test registering and discarding artifacts from several threads while they are listed"""
+        local_paths = [os.path.join(self.scratch_path, 'opt_a{0}'.format(i), 'check.chk') for i in range(200)]
+
+        def register(local_path):
+            self.registry.register(server='server1', remote_path='runs/check.chk', local_path=local_path)
+            self.registry.as_dict()
+            self.registry.discard(local_path)
+            self.registry.register(server='server1', remote_path='runs/check.chk', local_path=local_path)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(register, local_paths))
+        self.assertEqual(len(self.registry.as_dict()), len(local_paths) + 1)
+        self.assertTrue(all(self.registry.exists(local_path) for local_path in local_paths))
+
+    def test_copy_on_server(self):
+        """Test that artifacts are not copied on a different server"""
+        self.assertFalse(self.registry.copy_on_server(local_path=self.local_path, server='server2',
+                                                      remote_path='runs/ARC_Projects/project/H2O/sp_a102/check.chk'))
+        self.assertFalse(self.registry.copy_on_server(local_path=os.path.join(self.scratch_path, 'missing.chk'),
+                                                      server='server1', remote_path='runs/check.chk'))
+
+    def test_as_dict_and_from_dict(self):
+        """Test dumping and restoring the registry"""
+        artifacts_list = self.registry.as_dict()
+        self.assertEqual(artifacts_list, [{'server': 'server1',
+                                           'remote_path': self.remote_path,
+                                           'local_path': self.local_path}])
+        registry = ArtifactRegistry()
+        registry.from_dict(artifacts_list)
+        self.assertEqual(registry.get(self.local_path).remote_path, self.remote_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        shutil.rmtree(cls.scratch_path)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for the computation cache, a content-addressed store of successful job outputs shared by all ARC projects.
+
+A job's cache key is a hash of everything determining its result: the canonical geometry, charge, multiplicity,
+level of theory, ESS, job type, and the troubleshooting keywords which modify the input file.
+Before a job is submitted, the Scheduler looks it up in the cache, and on a hit the job is "hydrated": the cached
+output file is copied to the job's folder and the job is marked as done, so it is handled (and parsed) exactly as if
+it ran on a server. The cache is bounded in size, the least recently used entries are evicted first.
+
+Each entry is a folder named by its key, holding the output file and an ``entry.yml`` metadata file.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import yaml
+
+from arc.common import get_logger, read_yaml_file, save_yaml_file
+from arc.exceptions import InputError
+from arc.settings import computation_cache_path, computation_cache_max_size
+
+
+logger = get_logger()
+
+# The job types whose results could be reused
+cacheable_job_types = ['conformer', 'opt', 'freq', 'optfreq', 'sp', 'composite']
+
+# Troubleshooting methods which only change the job's resources, not its result
+resource_trsh_methods = ['memory', 'cpu', 'walltime', 'restart_due_to_file_not_found']
+
+entry_filename = 'entry.yml'
+output_filename = 'output.out'
+
+
+class ComputationCache(object):
+    """
+    The computation cache.
+
+    Args:
+        path (str, optional): The cache folder, ``computation_cache_path`` by default.
+        max_size (float, optional): The maximal cache size in GB, ``computation_cache_max_size`` by default.
+
+    Attributes:
+        path (str): The cache folder, ``None`` if the cache is disabled.
+        max_size (float): The maximal cache size in GB.
+    """
+    def __init__(self, path=None, max_size=None):
+        self.path = path if path is not None else computation_cache_path
+        self.max_size = max_size if max_size is not None else computation_cache_max_size
+
+    def get_entry_path(self, key):
+        """
+        Get the folder of a cache entry.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            str: The entry folder.
+        """
+        return os.path.join(self.path, key[:2], key)
+
+    def lookup(self, job):
+        """
+        Look up a job in the cache.
+        Also sets the job's ``cache_key``, so it must be called before the job is executed.
+
+        Args:
+            job (Job): The job object.
+
+        Returns:
+            str: The cache key if the job's results are cached, ``None`` otherwise.
+        """
+        if self.path is None or not is_cacheable(job):
+            return None
+        job.cache_key = get_cache_key(job)
+        if not os.path.isfile(os.path.join(self.get_entry_path(job.cache_key), output_filename)):
+            return None
+        return job.cache_key
+
+    def hydrate(self, job):
+        """
+        Populate a job with cached results (if cached) instead of executing it.
+        The cached output file is copied to the job's local folder and the job is marked as done.
+
+        Args:
+            job (Job): The job object.
+
+        Returns:
+            bool: Whether the job was hydrated from the cache.
+        """
+        key = self.lookup(job)
+        if key is None:
+            return False
+        entry_path = self.get_entry_path(key)
+        output_dir = os.path.dirname(job.local_path_to_output_file)
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+        try:
+            shutil.copyfile(os.path.join(entry_path, output_filename), job.local_path_to_output_file)
+            entry = read_yaml_file(os.path.join(entry_path, entry_filename))
+        except (IOError, InputError) as e:
+            # the entry might have been concurrently evicted
+            logger.debug('Could not read cache entry {0}, got: {1}'.format(key, e))
+            return False
+        entry['last_used'] = datetime.datetime.now().isoformat()
+        entry['hits'] = entry.get('hits', 0) + 1
+        save_yaml_file(path=os.path.join(entry_path, entry_filename), content=entry)
+        job.from_cache = True
+        job.job_status = ['done', {'status': 'done', 'keywords': list(), 'error': '', 'line': ''}]
+        job.initial_time = job.final_time = datetime.datetime.now()
+        job.run_time = job.final_time - job.initial_time
+        logger.info('Using the cached results of job {0} for {1} (computed in project {2})'.format(
+            job.job_name, job.species_name, entry.get('project', '')))
+        return True
+
+    def store(self, job):
+        """
+        Store the output of a successfully terminated job in the cache.
+
+        Args:
+            job (Job): The job object.
+
+        Returns:
+            str: The cache key, ``None`` if the job was not stored.
+        """
+        if self.path is None or job.cache_key is None or job.from_cache \
+                or job.job_status[0] != 'done' or job.job_status[1]['status'] != 'done' \
+                or not os.path.isfile(job.local_path_to_output_file):
+            return None
+        key = job.cache_key
+        entry_path = self.get_entry_path(key)
+        if os.path.isdir(entry_path):
+            return key
+        now = datetime.datetime.now().isoformat()
+        entry = dict(key=key, level_of_theory=job.level_of_theory, software=job.software, job_type=job.job_type,
+                     project=job.project, species_name=job.species_name, job_name=job.job_name,
+                     created=now, last_used=now, hits=0, size=os.path.getsize(job.local_path_to_output_file))
+        if not os.path.isdir(os.path.dirname(entry_path)):
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        # write the entry in a temporary folder and move it into place, so concurrent readers never see partial entries
+        tmp_path = tempfile.mkdtemp(dir=os.path.dirname(entry_path))
+        try:
+            shutil.copyfile(job.local_path_to_output_file, os.path.join(tmp_path, output_filename))
+            save_yaml_file(path=os.path.join(tmp_path, entry_filename), content=entry)
+            os.rename(tmp_path, entry_path)
+        except OSError:
+            # another process stored this entry in the meantime
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict()
+        return key
+
+    def get_entries(self):
+        """
+        Get the metadata of all cache entries.
+
+        Returns:
+            list: Entries are dictionaries.
+        """
+        entries = list()
+        if self.path is None or not os.path.isdir(self.path):
+            return entries
+        for prefix in os.scandir(self.path):
+            if not prefix.is_dir():
+                continue
+            for entry_dir in os.scandir(prefix.path):
+                entry_file = os.path.join(entry_dir.path, entry_filename)
+                if entry_dir.is_dir() and os.path.isfile(entry_file):
+                    try:
+                        entries.append(read_yaml_file(entry_file))
+                    except (IOError, InputError, yaml.YAMLError) as e:
+                        logger.debug('Could not read cache entry {0}, got: {1}'.format(entry_file, e))
+        return entries
+
+    def get_size(self, entries=None):
+        """
+        Get the total size of the cached outputs.
+
+        Args:
+            entries (list, optional): The entries metadata, read from the cache if not given.
+
+        Returns:
+            int: The size in bytes.
+        """
+        entries = entries if entries is not None else self.get_entries()
+        return sum(entry.get('size', 0) for entry in entries)
+
+    def remove(self, key):
+        """
+        Remove an entry from the cache.
+
+        Args:
+            key (str): The cache key.
+        """
+        shutil.rmtree(self.get_entry_path(key), ignore_errors=True)
+
+    def evict(self, max_size=None):
+        """
+        Remove the least recently used entries until the cache is not larger than its maximal size.
+
+        Args:
+            max_size (float, optional): The maximal cache size in GB, ``self.max_size`` by default.
+
+        Returns:
+            list: The removed keys.
+        """
+        max_size = max_size if max_size is not None else self.max_size
+        if max_size is None:
+            return list()
+        entries = self.get_entries()
+        size, max_bytes = self.get_size(entries), max_size * 1024 ** 3
+        removed = list()
+        for entry in sorted(entries, key=lambda e: e.get('last_used', '')):
+            if size <= max_bytes:
+                break
+            self.remove(entry['key'])
+            size -= entry.get('size', 0)
+            removed.append(entry['key'])
+        if removed:
+            logger.debug('Evicted {0} entries from the computation cache'.format(len(removed)))
+        return removed
+
+    def prune(self, older_than=None, project=None, species_name=None):
+        """
+        Remove entries from the cache.
+
+        Args:
+            older_than (float, optional): Remove entries not used in the last ``older_than`` days.
+            project (str, optional): Remove entries computed in this project.
+            species_name (str, optional): Remove entries of species with this label.
+
+        Returns:
+            list: The removed keys.
+        """
+        removed = list()
+        threshold = (datetime.datetime.now() - datetime.timedelta(days=older_than)).isoformat() \
+            if older_than is not None else None
+        for entry in self.get_entries():
+            if (threshold is None or entry.get('last_used', '') < threshold) \
+                    and (project is None or entry.get('project', None) == project) \
+                    and (species_name is None or entry.get('species_name', None) == species_name):
+                self.remove(entry['key'])
+                removed.append(entry['key'])
+        return removed
+
+
+def is_cacheable(job):
+    """
+    Check whether the results of a job could be reused.
+
+    Args:
+        job (Job): The job object.
+
+    Returns:
+        bool: Whether the job is cacheable.
+    """
+    return job.job_type in cacheable_job_types and job.xyz is not None and job.software is not None
+
+
+def get_canonical_geometry(xyz):
+    """
+    Get a canonical representation of a geometry, insensitive to numerical noise below 1e-4 Angstrom.
+    The atom order is kept, since it determines the atom order in the output file.
+
+    Args:
+        xyz (dict): The ARC xyz dictionary.
+
+    Returns:
+        str: The canonical geometry.
+    """
+    lines = list()
+    for symbol, isotope, coords in zip(xyz['symbols'], xyz['isotopes'], xyz['coords']):
+        # adding 0.0 turns -0.0 into 0.0
+        lines.append('{0} {1} {2}'.format(symbol, isotope, ' '.join('{0:.4f}'.format(round(c, 4) + 0.0)
+                                                                     for c in coords)))
+    return '\n'.join(lines)
+
+
+def get_cache_key_fields(job):
+    """
+    Get the job attributes determining its results (i.e., its input file), before the job is executed.
+
+    Args:
+        job (Job): The job object.
+
+    Returns:
+        dict: The attributes.
+    """
+    return {'geometry': get_canonical_geometry(job.xyz),
+            'charge': job.charge,
+            'multiplicity': job.multiplicity,
+            'level_of_theory': job.level_of_theory.lower(),
+            'software': job.software.lower(),
+            'job_type': job.job_type,
+            'fine': job.fine,
+            'is_ts': job.is_ts,
+            'shift': job.shift,
+            'trsh': job.trsh or job.initial_trsh.get(job.software, ''),
+            'ess_trsh_methods': sorted(str(method) for method in job.ess_trsh_methods
+                                       if method not in resource_trsh_methods),
+            'number_of_radicals': job.number_of_radicals,
+            'occ': job.occ,
+            'bath_gas': job.bath_gas,
+            'scan': job.scan,
+            'scan_res': job.scan_res,
+            'scan_trsh': job.scan_trsh,
+            'directed_scan_type': job.directed_scan_type,
+            'directed_scans': job.directed_scans,
+            'directed_dihedrals': job.directed_dihedrals,
+            }
+
+
+def get_cache_key(job):
+    """
+    Get the content-addressed cache key of a job.
+
+    Args:
+        job (Job): The job object.
+
+    Returns:
+        str: The SHA-256 hash of the job attributes determining its results.
+    """
+    fields = json.dumps(get_cache_key_fields(job), sort_keys=True)
+    return hashlib.sha256(fields.encode()).hexdigest()
+
+
+# The process-wide computation cache
+computation_cache = ComputationCache()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.cache module
+"""
+
+import os
+import shutil
+import unittest
+
+from arc.common import read_yaml_file, save_yaml_file
+from arc.job.cache import ComputationCache, get_cache_key, get_canonical_geometry, entry_filename
+from arc.job.job import Job
+from arc.settings import arc_path
+
+
+class TestComputationCache(unittest.TestCase):
+    """
+    Contains unit tests for the ComputationCache class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.ess_settings = {'gaussian': ['server1'], 'molpro': ['server2']}
+        cls.project_directory = os.path.join(arc_path, 'Projects', 'arc_project_for_testing_delete_after_usage7')
+        cls.cache_path = os.path.join(arc_path, 'scratch_computation_cache')
+        cls.xyz = {'symbols': ('O', 'H', 'H'), 'isotopes': (16, 1, 1),
+                   'coords': ((0.0, 0.0, 0.1173), (0.0, 0.7572, -0.4692), (0.0, -0.7572, -0.4692))}
+        cls.output = os.path.join(arc_path, 'arc', 'testing', 'methylamine_conformer_0.out')
+
+    def setUp(self):
+        """
+        A method that is run before each unit test in this class.
+        """
+        if os.path.isdir(self.cache_path):
+            shutil.rmtree(self.cache_path)
+        self.cache = ComputationCache(path=self.cache_path, max_size=1)
+
+    def get_job(self, job_num, xyz=None, level_of_theory='b3lyp/6-31g', job_type='opt'):
+        """A helper function for creating a job"""
+        return Job(project='arc_project_for_testing_delete_after_usage7', ess_settings=self.ess_settings,
+                   species_name='H2O', xyz=xyz or self.xyz, job_type=job_type, level_of_theory=level_of_theory,
+                   multiplicity=1, job_num=job_num, testing=True, project_directory=self.project_directory)
+
+    def run_job(self, job):
+        """A helper function for mocking a successful job execution"""
+        if not os.path.isdir(job.local_path):
+            os.makedirs(job.local_path)
+        shutil.copyfile(self.output, job.local_path_to_output_file)
+        job.job_status = ['done', {'status': 'done', 'keywords': list(), 'error': '', 'line': ''}]
+
+    def test_cache_key(self):
+        """Test that the cache key only depends on the attributes determining the job's results"""
+        key = get_cache_key(self.get_job(job_num=500))
+        noisy_xyz = {'symbols': ('O', 'H', 'H'), 'isotopes': (16, 1, 1),
+                     'coords': ((-0.000001, 0.0, 0.117300001), (0.0, 0.7572, -0.4692), (0.0, -0.7572, -0.4692))}
+        self.assertEqual(get_canonical_geometry(noisy_xyz), get_canonical_geometry(self.xyz))
+        self.assertEqual(get_cache_key(self.get_job(job_num=501, xyz=noisy_xyz)), key)
+        self.assertEqual(get_cache_key(self.get_job(job_num=502, level_of_theory='B3LYP/6-31G')), key)
+        self.assertNotEqual(get_cache_key(self.get_job(job_num=503, level_of_theory='b3lyp/6-311g')), key)
+        self.assertNotEqual(get_cache_key(self.get_job(job_num=504, job_type='freq')), key)
+        job = self.get_job(job_num=505)
+        job.ess_trsh_methods = ['memory']
+        self.assertEqual(get_cache_key(job), key)
+        job.ess_trsh_methods = ['memory', 'scf=qc']
+        self.assertNotEqual(get_cache_key(job), key)
+        job = self.get_job(job_num=506)
+        job.number_of_radicals = 2  # an unrestricted calculation
+        self.assertNotEqual(get_cache_key(job), key)
+        job = self.get_job(job_num=507)
+        job.scan_res = 4.0
+        self.assertNotEqual(get_cache_key(job), key)
+
+    def test_store_and_hydrate(self):
+        """Test storing a job's output and hydrating an identical job"""
+        job1 = self.get_job(job_num=510)
+        self.assertFalse(self.cache.hydrate(job1))
+        self.run_job(job1)
+        key = self.cache.store(job1)
+        self.assertEqual(key, job1.cache_key)
+        entries = self.cache.get_entries()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]['project'], 'arc_project_for_testing_delete_after_usage7')
+        self.assertEqual(entries[0]['size'], os.path.getsize(self.output))
+
+        job2 = self.get_job(job_num=511)
+        self.assertTrue(self.cache.hydrate(job2))
+        self.assertTrue(job2.from_cache)
+        self.assertEqual(job2.job_status[1]['status'], 'done')
+        with open(job2.local_path_to_output_file, 'r') as f, open(self.output, 'r') as g:
+            self.assertEqual(f.read(), g.read())
+        job2.determine_job_status()  # does not query the server
+        self.assertEqual(job2.job_status[0], 'done')
+        self.assertIsNone(self.cache.store(job2))
+        self.assertEqual(self.cache.get_entries()[0]['hits'], 1)
+
+        job3 = self.get_job(job_num=512, job_type='freq')
+        self.assertFalse(self.cache.hydrate(job3))
+        job3.job_status = ['done', {'status': 'errored', 'keywords': ['SCF'], 'error': '', 'line': ''}]
+        self.assertIsNone(self.cache.store(job3))
+
+    def test_evict_and_prune(self):
+        """Test evicting the least recently used entries and pruning entries"""
+        keys = list()
+        for i, level in enumerate(['b3lyp/6-31g', 'b3lyp/6-311g', 'b3lyp/def2tzvp']):
+            job = self.get_job(job_num=520 + i, level_of_theory=level)
+            self.cache.lookup(job)
+            self.run_job(job)
+            keys.append(self.cache.store(job))
+        self.assertEqual(len(self.cache.get_entries()), 3)
+        # mark the first entry as the most recently used
+        entry_path = os.path.join(self.cache.get_entry_path(keys[0]), entry_filename)
+        entry = read_yaml_file(entry_path)
+        entry['last_used'] = '2100-01-01T00:00:00'
+        save_yaml_file(path=entry_path, content=entry)
+        size = os.path.getsize(self.output)
+        removed = self.cache.evict(max_size=2.5 * size / 1024 ** 3)
+        self.assertEqual(removed, [keys[1]])
+        self.assertEqual(sorted(entry['key'] for entry in self.cache.get_entries()), sorted([keys[0], keys[2]]))
+
+        self.assertEqual(self.cache.prune(older_than=1), list())
+        self.assertEqual(sorted(self.cache.prune(project='arc_project_for_testing_delete_after_usage7')),
+                         sorted([keys[0], keys[2]]))
+        self.assertEqual(self.cache.get_entries(), list())
+
+    def test_disabled_cache(self):
+        """Test that a cache without a path does nothing"""
+        cache = ComputationCache(path=None)
+        cache.path = None
+        job = self.get_job(job_num=530)
+        self.assertFalse(cache.hydrate(job))
+        self.run_job(job)
+        self.assertIsNone(cache.store(job))
+        self.assertEqual(cache.get_entries(), list())
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        for path in [cls.project_directory, cls.cache_path]:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for running jobs on the local machine without a queue system.
+
+If the ``cluster_soft`` of the 'local' server is 'Local', ARC executes the submit scripts itself as managed
+subprocesses instead of submitting them to OGE or Slurm. Jobs are started in the order they were submitted as long as
+the CPU cores and memory they request are available on the machine (a job requesting more than the entire machine
+is started once no other job is running), and further jobs wait in a pending queue, like in a queue system.
+Job IDs are synthetic, and job statuses are determined by polling the subprocesses, without shelling out.
+"""
+
+import atexit
+import collections
+import itertools
+import os
+import signal
+import subprocess
+import threading
+import time
+
+from arc.common import get_logger
+from arc.settings import servers, submit_filename
+
+
+logger = get_logger()
+
+
+def is_local_executor(server):
+    """
+    Check whether jobs on a server are executed by ARC's built-in local executor.
+
+    Args:
+        server (str): The server name.
+
+    Returns:
+        bool: Whether the server is the local machine with no queue system.
+    """
+    return server == 'local' and server in servers and servers[server].get('cluster_soft', '').lower() == 'local'
+
+
+def get_machine_memory():
+    """
+    Get the physical memory of the local machine.
+
+    Returns:
+        float: The memory in GB, ``None`` if it could not be determined.
+    """
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024 ** 3
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class LocalProcess(object):
+    """
+    A job executed by the local executor.
+
+    Args:
+        job_id (int): The synthetic job ID.
+        path (str): The job folder, where the submit script is located.
+        cpus (int): The number of CPU cores requested by the job.
+        memory (float): The memory (in GB) requested by the job.
+
+    Attributes:
+        job_id (int): The synthetic job ID.
+        path (str): The job folder, where the submit script is located.
+        cpus (int): The number of CPU cores requested by the job.
+        memory (float): The memory (in GB) requested by the job.
+        process (subprocess.Popen): The subprocess, ``None`` while the job is pending.
+        returncode (int): The exit code of the subprocess, ``None`` while the job is pending or running.
+    """
+    def __init__(self, job_id, path, cpus, memory):
+        self.job_id = job_id
+        self.path = path
+        self.cpus = cpus
+        self.memory = memory
+        self.process = None
+        self.returncode = None
+
+    def start(self):
+        """
+        Execute the job's submit script in a new process group, writing its stdout and stderr to the job folder
+        (``out.txt`` and ``err.txt``, as in OGE).
+        """
+        env = dict(os.environ, ARC_JOB_ID=str(self.job_id), ARC_CPUS=str(self.cpus))
+        with open(os.path.join(self.path, 'out.txt'), 'w') as out, open(os.path.join(self.path, 'err.txt'), 'w') as err:
+            self.process = subprocess.Popen(['bash', submit_filename[servers['local']['cluster_soft']]], cwd=self.path,
+                                            stdout=out, stderr=err, env=env, start_new_session=True)
+
+    def poll(self):
+        """
+        Check whether the job terminated.
+
+        Returns:
+            bool: Whether the job terminated.
+        """
+        if self.returncode is None and self.process is not None:
+            self.returncode = self.process.poll()
+        return self.returncode is not None
+
+    def terminate(self):
+        """
+        Terminate the job, including all processes it spawned.
+        """
+        if self.process is not None and self.returncode is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+            except OSError:
+                pass
+            self.returncode = self.process.wait()
+
+
+class LocalExecutor(object):
+    """
+    A built-in executor running jobs as subprocesses of ARC with a CPU and memory aware admission limit.
+
+    Args:
+        cpus (int, optional): The number of CPU cores available for jobs.
+        memory (float, optional): The memory (in GB) available for jobs.
+
+    Attributes:
+        cpus (int): The number of CPU cores available for jobs, by default the ``cpus`` of the 'local' server
+                    or all cores of the machine.
+        memory (float): The memory (in GB) available for jobs, by default the ``memory`` of the 'local' server
+                        or the physical memory of the machine. ``None`` if memory is not limited.
+        jobs (dict): Keys are job IDs, values are LocalProcess objects of pending and running jobs.
+        pending (collections.deque): The IDs of jobs waiting to be started, in submission order.
+        finished (dict): Keys are job IDs of terminated jobs, values are their exit codes.
+        job_ids (itertools.count): Hands out the synthetic job IDs, unique across ARC runs.
+    """
+    def __init__(self, cpus=None, memory=None):
+        local_server = servers.get('local', dict())
+        self.cpus = cpus or local_server.get('cpus', None) or os.cpu_count() or 1
+        self.memory = memory or local_server.get('memory', None) or get_machine_memory()
+        self.jobs = dict()
+        self.pending = collections.deque()
+        self.finished = dict()
+        # seeded by the time in milliseconds, so IDs of jobs submitted before ARC was restarted are not handed out again
+        self.job_ids = itertools.count(int(time.time() * 1000))
+        self.lock = threading.RLock()
+
+    def submit(self, path, cpus=1, memory=0):
+        """
+        Submit a job, starting it right away if enough resources are available.
+
+        Args:
+            path (str): The job folder, where the submit script is located.
+            cpus (int, optional): The number of CPU cores requested by the job.
+            memory (float, optional): The memory (in GB) requested by the job.
+
+        Returns:
+            int: The synthetic job ID.
+        """
+        with self.lock:
+            job_id = next(self.job_ids)
+            self.jobs[job_id] = LocalProcess(job_id=job_id, path=path, cpus=cpus or 1, memory=memory or 0)
+            self.pending.append(job_id)
+            self.update()
+        return job_id
+
+    def update(self):
+        """
+        Collect terminated jobs and start pending jobs, in submission order, as long as resources are available.
+        """
+        with self.lock:
+            for job_id, job in list(self.jobs.items()):
+                if job_id not in self.pending and job.poll():
+                    self.finished[job_id] = job.returncode
+                    del self.jobs[job_id]
+            while self.pending:
+                job = self.jobs[self.pending[0]]
+                used_cpus, used_memory = self.get_used_resources()
+                if used_cpus and (used_cpus + job.cpus > self.cpus
+                                  or self.memory is not None and used_memory + job.memory > self.memory):
+                    break
+                self.pending.popleft()
+                try:
+                    job.start()
+                except OSError as e:
+                    logger.error('Could not start job {0} in {1}, got: {2}'.format(job.job_id, job.path, e))
+                    self.finished[job.job_id] = -1
+                    del self.jobs[job.job_id]
+
+    def get_used_resources(self):
+        """
+        Get the resources requested by the running jobs.
+
+        Returns:
+            tuple: The number of CPU cores and the memory (in GB).
+        """
+        running_jobs = [job for job_id, job in self.jobs.items() if job_id not in self.pending]
+        return sum(job.cpus for job in running_jobs), sum(job.memory for job in running_jobs)
+
+    def get_job_status(self, job_id):
+        """
+        Get the status of a job. A job not known to the executor (e.g., submitted before ARC was restarted)
+        is considered done, as a job which is not in the queue of a queue system.
+
+        Args:
+            job_id (int): The job ID.
+
+        Returns:
+            str: Either 'running' (also for pending jobs) or 'done'.
+        """
+        with self.lock:
+            self.update()
+            return 'running' if job_id in self.jobs else 'done'
+
+    def get_running_job_ids(self):
+        """
+        Get the IDs of all pending and running jobs.
+
+        Returns:
+            list: The job IDs.
+        """
+        with self.lock:
+            self.update()
+            return list(self.jobs.keys())
+
+    def delete(self, job_id):
+        """
+        Delete a pending or running job.
+
+        Args:
+            job_id (int): The job ID.
+        """
+        with self.lock:
+            job = self.jobs.pop(job_id, None)
+            if job is None:
+                return
+            if job_id in self.pending:
+                self.pending.remove(job_id)
+            job.terminate()
+            self.finished[job_id] = job.returncode
+            self.update()
+
+    def delete_all(self):
+        """
+        Delete all pending and running jobs.
+        """
+        with self.lock:
+            for job_id in list(self.jobs.keys()):
+                self.delete(job_id)
+
+
+# The process-wide local executor. Jobs are subprocesses of ARC, and are terminated if ARC exits
+local_executor = LocalExecutor()
+atexit.register(local_executor.delete_all)
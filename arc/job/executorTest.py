@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.executor module
+"""
+
+import os
+import shutil
+import time
+import unittest
+
+from arc.job.executor import LocalExecutor, is_local_executor
+from arc.settings import arc_path
+
+
+class TestLocalExecutor(unittest.TestCase):
+    """
+    Contains unit tests for the LocalExecutor class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.scratch_path = os.path.join(arc_path, 'scratch_executor')
+        cls.job_paths = list()
+        for i in range(3):
+            job_path = os.path.join(cls.scratch_path, 'job{0}'.format(i))
+            if not os.path.isdir(job_path):
+                os.makedirs(job_path)
+            with open(os.path.join(job_path, 'submit.sh'), 'w') as f:
+                f.write('#!/bin/bash\nsleep 0.3\necho "job $ARC_JOB_ID on $ARC_CPUS cores" > output.out\n')
+            cls.job_paths.append(job_path)
+
+    def wait(self, executor, timeout=10):
+        """Wait until all jobs of an executor terminate"""
+        t0 = time.time()
+        while executor.get_running_job_ids() and time.time() - t0 < timeout:
+            time.sleep(0.05)
+
+    def test_is_local_executor(self):
+        """Test identifying servers without a queue system"""
+        self.assertFalse(is_local_executor('local'))  # the testing 'local' server uses OGE
+        self.assertFalse(is_local_executor('server1'))
+
+    def test_admission_limit(self):
+        """Test that jobs are started only when enough resources are available"""
+        executor = LocalExecutor(cpus=2, memory=10)
+        job_ids = [executor.submit(path=job_path, cpus=1, memory=4) for job_path in self.job_paths]
+        self.assertEqual(job_ids, [job_ids[0], job_ids[0] + 1, job_ids[0] + 2])
+        self.assertEqual(list(executor.pending), [job_ids[2]])
+        self.assertEqual(executor.get_used_resources(), (2, 8))
+        self.assertEqual(executor.get_job_status(job_ids[2]), 'running')
+        self.wait(executor)
+        self.assertEqual([executor.get_job_status(job_id) for job_id in job_ids], ['done'] * 3)
+        self.assertEqual(executor.finished, {job_id: 0 for job_id in job_ids})
+        with open(os.path.join(self.job_paths[2], 'output.out'), 'r') as f:
+            self.assertEqual(f.read(), 'job {0} on 1 cores\n'.format(job_ids[2]))
+        # an executor started after ARC was restarted does not hand out the IDs of jobs submitted before
+        self.assertGreater(next(LocalExecutor(cpus=2, memory=10).job_ids), job_ids[2])
+
+    def test_oversized_job(self):
+        """Test that a job requesting more than the entire machine runs alone"""
+        executor = LocalExecutor(cpus=2, memory=10)
+        job_id1 = executor.submit(path=self.job_paths[0], cpus=4, memory=4)
+        job_id2 = executor.submit(path=self.job_paths[1], cpus=1, memory=4)
+        self.assertEqual(list(executor.pending), [job_id2])
+        self.wait(executor)
+        self.assertEqual(executor.get_job_status(job_id1), 'done')
+        self.assertEqual(executor.get_job_status(job_id2), 'done')
+
+    def test_delete(self):
+        """Test deleting running and pending jobs"""
+        executor = LocalExecutor(cpus=1, memory=None)
+        job_id1 = executor.submit(path=self.job_paths[0], cpus=1)
+        job_id2 = executor.submit(path=self.job_paths[1], cpus=1)
+        executor.delete(job_id2)
+        self.assertNotIn(job_id2, executor.pending)
+        executor.delete(job_id1)
+        self.assertEqual(executor.get_running_job_ids(), list())
+        self.assertNotEqual(executor.finished[job_id1], 0)
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        shutil.rmtree(cls.scratch_path)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -5,7 +5,6 @@
 The ARC Job module
 """
 
-import csv
 import datetime
 import math
 import os
@@ -13,14 +12,21 @@ import shutil
 
 from arc.common import get_logger, calculate_dihedral_angle
 from arc.exceptions import JobError, InputError
+from arc.job.artifacts import remote_artifacts
 from arc.job.inputs import input_files
+from arc.job.ledger import job_ledger
 from arc.job.local import get_last_modified_time, submit_job, delete_job, execute_command, check_job_status, \
-    rename_output
+    rename_output, read_file_increment
+from arc.job.placement import placement_engine
+from arc.job.predictor import get_cpu_cores, get_max_job_time, get_number_of_heavy_atoms, job_size_predictor
 from arc.job.submit import submit_scripts
+from arc.job.snapshot import queue_snapshot
 from arc.job.ssh import SSHClient
-from arc.job.trsh import determine_ess_status, trsh_job_on_server
+from arc.job.trsh import determine_ess_status, determine_ess_status_from_lines, is_tail_ess_status_conclusive, \
+    trsh_job_on_server
+from arc.parser import parse_ess_run_time
 from arc.settings import arc_path, servers, submit_filename, t_max_format, input_filename, output_filename, \
-    rotor_scan_resolution, levels_ess
+    rotor_scan_resolution, levels_ess, ess_tail_window, ess_tail_max_window, errored_output_max_download
 from arc.species.converter import xyz_to_str, str_to_xyz, check_xyz_dict
 
 
@@ -127,6 +133,7 @@ class Job(object):
         initial_time (datetime): The date-time this job was initiated.
         final_time (datetime): The date-time this job was initiated.
         run_time (timedelta): Job execution time.
+        ess_run_time (float): The wall time (in seconds) reported by the ESS, excluding the time spent in the queue.
         job_status (list): The job's server and ESS statuses.
                            The job server status is in job.job_status[0] and can be either 'initializing' / 'running'
                            / 'errored' / 'done'. The job ESS status is in job.job_status[1] is a dictionary of
@@ -161,6 +168,11 @@ class Job(object):
         directed_dihedrals (list): The dihedral angles of a directed scan job corresponding to ``directed_scans``.
         directed_scan_type (str): The type of the directed scan.
         rotor_index (int): The 0-indexed rotor number (key) in the species.rotors_dict dictionary.
+        cache_key (str): The computation cache key, determined before the job is executed (the input file
+                         writing modifies ``trsh``).
+        from_cache (bool): Whether the job was hydrated from the computation cache instead of being executed.
+        predicted_size (dict): The resources predicted from similar completed jobs and the requested 'max_job_time',
+                               ``None`` if not predicted.
     """
     def __init__(self, project='', ess_settings=None, species_name='', xyz=None, job_type='', level_of_theory='',
                  multiplicity=None, project_directory='', charge=0, conformer=-1, fine=False, shift='', software=None,
@@ -231,6 +243,8 @@ class Job(object):
             self.software = software
             self.cpu_cores = cpu_cores
             self.total_job_memory_gb = total_job_memory_gb
+            self.cache_key = None
+            self.from_cache = False
         # allowed job types:
         job_types = ['conformer', 'opt', 'freq', 'optfreq', 'sp', 'composite', 'bde', 'scan', 'directed_scan',
                      'gsm', 'irc', 'ts_guess', 'orbitals', 'onedmin', 'ff_param_fit', 'gromacs']
@@ -268,10 +282,19 @@ class Job(object):
         else:
             self.deduce_software()
         if self.server is None:  # might have been set in from_dict()
-            self.server = server if server is not None else self.ess_settings[self.software][0]
+            if server is not None:
+                self.server = server
+            elif self.testing:
+                self.server = self.ess_settings[self.software][0]
+            else:
+                self.server = placement_engine.choose_server(job=self, candidates=self.ess_settings[self.software])
 
         self.spin = self.multiplicity - 1
         self.n_atoms = len(self.xyz['symbols']) if self.xyz is not None else None
+        # only size new jobs, restarted jobs were already submitted
+        self.predicted_size = job_size_predictor.predict(self) \
+            if job_dict is None and job_num is None and not self.testing else None
+        self.ess_run_time = None
         self.submit = ''
         self.input = ''
         self.submit_script_memory = None
@@ -357,6 +380,10 @@ class Job(object):
             job_dict['conformers'] = self.conformers
         if self.radius is not None:
             job_dict['radius'] = self.radius
+        if self.cache_key is not None:
+            job_dict['cache_key'] = self.cache_key
+        if self.from_cache:
+            job_dict['from_cache'] = self.from_cache
         return job_dict
 
     def from_dict(self, job_dict):
@@ -413,79 +440,75 @@ class Job(object):
         self.directed_scans = job_dict['directed_scans'] if 'directed_scans' in job_dict else None
         self.directed_scan_type = job_dict['directed_scan_type'] if 'directed_scan_type' in job_dict else None
         self.rotor_index = job_dict['rotor_index'] if 'rotor_index' in job_dict else None
+        self.cache_key = job_dict['cache_key'] if 'cache_key' in job_dict else None
+        self.from_cache = job_dict['from_cache'] if 'from_cache' in job_dict else False
 
     def _set_job_number(self):
         """
         Used as the entry number in the database, as well as the job name on the server.
         """
-        csv_path = os.path.join(arc_path, 'initiated_jobs.csv')
-        if not os.path.isfile(csv_path):
-            # check file, make index file and write headers if file doesn't exists
-            with open(csv_path, 'w') as f:
-                writer = csv.writer(f, dialect='excel')
-                row = ['job_num', 'project', 'species_name', 'conformer', 'is_ts', 'charge', 'multiplicity', 'job_type',
-                       'job_name', 'job_id', 'server', 'software', 'memory', 'method', 'basis_set', 'comments']
-                writer.writerow(row)
-        with open(csv_path, 'r') as f:
-            reader = csv.reader(f, dialect='excel')
-            job_num = 0
-            for _ in reader:
-                job_num += 1
-                if job_num == 100000:
-                    job_num = 0
-            self.job_num = job_num
+        self.job_num = job_ledger.get_job_number()
 
     def _write_initiated_job_to_csv_file(self):
         """
-        Write an initiated ARCJob into the initiated_jobs.csv file.
+        Record an initiated ARCJob in the job ledger.
         """
-        csv_path = os.path.join(arc_path, 'initiated_jobs.csv')
-        if self.conformer < 0:  # this is not a conformer search job
-            conformer = '-'
-        else:
-            conformer = str(self.conformer)
-        with open(csv_path, 'a') as f:
-            writer = csv.writer(f, dialect='excel')
-            row = [self.job_num, self.project, self.species_name, conformer, self.is_ts, self.charge,
-                   self.multiplicity, self.job_type, self.job_name, self.job_id, self.server, self.software,
-                   self.total_job_memory_gb, self.method, self.basis_set, self.comments]
-            writer.writerow(row)
+        job_ledger.record_initiated_job(self.get_ledger_row())
 
     def write_completed_job_to_csv_file(self):
         """
-        Write a completed ARCJob into the completed_jobs.csv file.
+        Record a completed ARCJob in the job ledger.
         """
         if self.job_status[0] != 'done' or self.job_status[1]['status'] != 'done':
             self.determine_job_status()
-        csv_path = os.path.join(arc_path, 'completed_jobs.csv')
-        if not os.path.isfile(csv_path):
-            # check file, make index file and write headers if file doesn't exists
-            with open(csv_path, 'w') as f:
-                writer = csv.writer(f, dialect='excel')
-                row = ['job_num', 'project', 'species_name', 'conformer', 'is_ts', 'charge', 'multiplicity', 'job_type',
-                       'job_name', 'job_id', 'server', 'software', 'memory', 'method', 'basis_set', 'initial_time',
-                       'final_time', 'run_time', 'job_status_(server)', 'job_status_(ESS)',
-                       'ESS troubleshooting methods used', 'comments']
-                writer.writerow(row)
-        csv_path = os.path.join(arc_path, 'completed_jobs.csv')
-        if self.conformer < 0:  # this is not a conformer search job
-            conformer = '-'
-        else:
-            conformer = str(self.conformer)
-        with open(csv_path, 'a') as f:
-            writer = csv.writer(f, dialect='excel')
-            job_type = self.job_type
-            if self.fine:
-                job_type += ' (fine)'
-            row = [self.job_num, self.project, self.species_name, conformer, self.is_ts, self.charge,
-                   self.multiplicity, job_type, self.job_name, self.job_id, self.server, self.software,
-                   self.total_job_memory_gb, self.method, self.basis_set, self.initial_time, self.final_time, self.run_time,
-                   self.job_status[0], self.job_status[1]['status'], self.ess_trsh_methods, self.comments]
-            writer.writerow(row)
+        row = self.get_ledger_row()
+        if self.fine:
+            row['job_type'] += ' (fine)'
+        row.update({'initial_time': self.initial_time,
+                    'final_time': self.final_time,
+                    'run_time': self.run_time,
+                    'ess_run_time': self.ess_run_time,
+                    'server_status': self.job_status[0],
+                    'ess_status': self.job_status[1]['status'],
+                    'ess_trsh_methods': self.ess_trsh_methods})
+        job_ledger.record_completed_job(row)
+
+    def get_ledger_row(self):
+        """
+        Get the job attributes recorded in the job ledger for both initiated and completed jobs.
 
-    def write_submit_script(self):
+        Returns:
+            dict: Keys are job ledger columns.
         """
-        Write the Job's submit script.
+        return {'job_num': self.job_num,
+                'project': self.project,
+                'species_name': self.species_name,
+                'conformer': str(self.conformer) if self.conformer >= 0 else '-',
+                'is_ts': self.is_ts,
+                'charge': self.charge,
+                'multiplicity': self.multiplicity,
+                'job_type': self.job_type,
+                'job_name': self.job_name,
+                'job_id': self.job_id,
+                'server': self.server,
+                'software': self.software,
+                'memory': self.total_job_memory_gb,
+                'method': self.method,
+                'basis_set': self.basis_set,
+                'n_atoms': self.n_atoms,
+                'n_heavy_atoms': get_number_of_heavy_atoms(self.xyz),
+                'cpus': self.cpu_cores,
+                'comments': self.comments}
+
+    def get_submit_script_parameters(self):
+        """
+        Get the values of the fields in the submit script template of the Job's server and software.
+
+        Raises:
+            JobError: If the format of the maximal job time could not be determined.
+
+        Returns:
+            dict: Keys are the template fields, values are the respective values for this Job.
         """
         un = servers[self.server]['un']  # user name
         size = int(self.radius * 4) if self.radius is not None else None
@@ -510,10 +533,16 @@ class Job(object):
                 architecture = '\n#$ -l harpertown'
             else:
                 architecture = '\n#$ -l magnycours'
+        return {'name': self.job_server_name, 'un': un, 't_max': t_max, 'memory': int(self.submit_script_memory),
+                'cpus': self.cpu_cores, 'architecture': architecture, 'size': size}
+
+    def write_submit_script(self):
+        """
+        Write the Job's submit script.
+        """
+        parameters = self.get_submit_script_parameters()
         try:
-            self.submit = submit_scripts[self.server][self.software.lower()].format(
-                name=self.job_server_name, un=un, t_max=t_max, memory=int(self.submit_script_memory), cpus=self.cpu_cores,
-                architecture=architecture, size=size)
+            self.submit = submit_scripts[self.server][self.software.lower()].format(**parameters)
         except KeyError:
             submit_scripts_for_printing = dict()
             for server, values in submit_scripts.items():
@@ -531,13 +560,16 @@ class Job(object):
             os.makedirs(self.local_path)
         with open(os.path.join(self.local_path, submit_filename[servers[self.server]['cluster_soft']]), 'w') as f:
             f.write(self.submit)
-        if self.server != 'local' and not self.testing:
-            self._upload_submit_file()
 
-    def write_input_file(self):
+    def write_input_file(self, stage=True):
         """
         Write a software-specific, job-specific input file.
         Save the file locally and also upload it to the server.
+        For a remote job, all job files (including the submit script) are staged on the server in a single session.
+
+        Args:
+            stage (bool, optional): Whether to stage the job files on a remote server. ``False`` is used when the files
+                                    of several jobs are staged together (see ``stage_job_files()``).
         """
         if self.initial_trsh and not self.trsh:
             # use the default trshs defined by the user in the initial_trsh dictionary
@@ -870,7 +902,8 @@ $end
                 with open(os.path.join(self.local_path, input_filename[self.software]), 'w') as f:
                     f.write(self.input)
             if self.server != 'local':
-                self._upload_input_file()
+                if stage:
+                    self._stage_files()
             else:
                 self.initial_time = get_last_modified_time(
                     file_path=os.path.join(self.local_path, submit_filename[servers[self.server]['cluster_soft']]))
@@ -883,35 +916,69 @@ $end
                     elif up_file['source'] == 'input_files':
                         with open(os.path.join(self.local_path, up_file['name']), 'w') as f:
                             f.write(input_files[up_file['local']])
+                if self.checkfile is not None and remote_artifacts.fetch(self.checkfile):
+                    self._upload_check_file(local_check_file_path=self.checkfile)
 
-            if self.checkfile is not None and os.path.isfile(self.checkfile):
-                self._upload_check_file(local_check_file_path=self.checkfile)
+    def get_file_manifest(self):
+        """
+        Get the manifest of all files to stage on a remote server for this job.
 
-    def _upload_submit_file(self):
-        ssh = SSHClient(self.server)
-        ssh.send_command_to_server(command='mkdir -p {0}'.format(self.remote_path))
-        remote_file_path = os.path.join(self.remote_path, submit_filename[servers[self.server]['cluster_soft']])
-        ssh.upload_file(remote_file_path=remote_file_path, file_string=self.submit)
+        Raises:
+            JobError: If the source of an additional file to upload is unclear.
 
-    def _upload_input_file(self):
-        ssh = SSHClient(self.server)
-        ssh.send_command_to_server(command='mkdir -p {0}'.format(self.remote_path))
+        Returns:
+            list: Entries are dictionaries with a 'remote' file path, either a 'local' file path or a 'content' string,
+                  and optionally a 'mode' (the permission bits).
+        """
+        manifest = [{'remote': os.path.join(self.remote_path, submit_filename[servers[self.server]['cluster_soft']]),
+                     'content': self.submit}]
         if self.input is not None:
-            remote_file_path = os.path.join(self.remote_path, input_filename[self.software])
-            ssh.upload_file(remote_file_path=remote_file_path, file_string=self.input)
+            manifest.append({'remote': os.path.join(self.remote_path, input_filename[self.software]),
+                             'content': self.input})
         for up_file in self.additional_files_to_upload:
+            entry = {'remote': up_file['remote'], 'mode': 0o755 if up_file['make_x'] else None}
             if up_file['source'] == 'path':
-                local_file_path = up_file['local']
+                entry['local'] = up_file['local']
             elif up_file['source'] == 'input_files':
-                local_file_path = input_files[up_file['local']]
+                entry['content'] = input_files[up_file['local']]
             else:
                 raise JobError('Unclear file source for {0}. Should either be "path" of "input_files", '
                                'got: {1}'.format(up_file['name'], up_file['source']))
-            ssh.upload_file(remote_file_path=up_file['remote'], local_file_path=local_file_path)
-            if up_file['make_x']:
-                ssh.send_command_to_server(command='chmod +x {0}'.format(up_file['name']), remote_path=self.remote_path)
-        self.initial_time = ssh.get_last_modified_time(
-            remote_file_path=os.path.join(self.remote_path, submit_filename[servers[self.server]['cluster_soft']]))
+            manifest.append(entry)
+        if self.checkfile is not None and self.software.lower() == 'gaussian' and not self._is_check_file_on_server():
+            if remote_artifacts.fetch(self.checkfile):
+                manifest.append({'remote': os.path.join(self.remote_path, 'check.chk'), 'local': self.checkfile})
+        return manifest
+
+    def _is_check_file_on_server(self):
+        """
+        Check whether the previous Gaussian check file was not downloaded and remains on this job's server,
+        in which case it is copied on the server rather than uploaded.
+
+        Returns:
+            bool: Whether the check file should be copied on the server.
+        """
+        artifact = remote_artifacts.get(self.checkfile) if self.checkfile is not None else None
+        return artifact is not None and artifact.server == self.server and not artifact.is_local()
+
+    def copy_check_file_on_server(self):
+        """
+        Copy the previous Gaussian check file to the remote job folder directly on the server, if relevant.
+        Falls back to fetching and uploading the check file if the copy failed.
+        """
+        if self.checkfile is None or self.software.lower() != 'gaussian' or not self._is_check_file_on_server():
+            return
+        remote_check_file_path = os.path.join(self.remote_path, 'check.chk')
+        if not remote_artifacts.copy_on_server(local_path=self.checkfile, server=self.server,
+                                               remote_path=remote_check_file_path):
+            if remote_artifacts.fetch(self.checkfile):
+                self._upload_check_file(local_check_file_path=self.checkfile)
+
+    def _stage_files(self):
+        """
+        Stage all job files on the remote server in a single session, and set the job's initial time.
+        """
+        stage_job_files([self])
 
     def _upload_check_file(self, local_check_file_path=None):
         if self.server != 'local':
@@ -927,9 +994,60 @@ $end
             new_check_file_path = os.path.join(self.local_path, 'check.chk')
             shutil.copyfile(local_check_file_path, new_check_file_path)
 
-    def _download_output_file(self):
+    def _probe_remote_ess_status(self):
+        """
+        Determine the ESS status of a remote job by reading only the tail of its output file.
+        The window read from the end of the file grows until the troubleshooting patterns determine the status,
+        up to ``ess_tail_max_window`` bytes.
+
+        Returns:
+            tuple: The (status, keywords, error, line) ESS status (``None`` if it could not be conclusively determined),
+                   the trailing lines of the output file that were read (``list``),
+                   and the size of the remote output file in bytes (0 if it could not be read).
+        """
+        if self.software not in ['gaussian', 'qchem', 'molpro']:
+            return None, list(), 0
+        ssh = SSHClient(self.server)
+        remote_file_path = os.path.join(self.remote_path, output_filename[self.software])
+        window = ess_tail_window
+        while window <= ess_tail_max_window:
+            try:
+                tail, size = ssh.read_remote_tail(remote_file_path=remote_file_path, num_bytes=window)
+            except IOError:
+                return None, list(), 0
+            ess_status = determine_ess_status_from_lines(lines=tail, species_label=self.species_name,
+                                                         job_type=self.job_type, software=self.software)
+            if window >= size or is_tail_ess_status_conclusive(status=ess_status[0], keywords=ess_status[1],
+                                                               lines=tail, job_type=self.job_type,
+                                                               software=self.software):
+                return ess_status, tail, size
+            window *= 8
+        return None, list(), 0
+
+    def _save_remote_output_tail(self, tail):
+        """
+        Save the tail of a remote output file as the local output file (instead of downloading the entire file).
+
+        Args:
+            tail (list): The trailing lines of the remote output file.
+        """
+        ssh = SSHClient(self.server)
+        remote_file_path = os.path.join(self.remote_path, output_filename[self.software])
+        logger.info('Only downloaded the tail of the output file of errored job {0}, the full output file is '
+                    'available on {1} at {2}'.format(self.job_name, self.server, remote_file_path))
+        with open(self.local_path_to_output_file, 'w') as f:
+            f.writelines(tail)
+        self.final_time = ssh.get_last_modified_time(remote_file_path=remote_file_path)
+
+    def _download_output_file(self, artifacts=True):
         """
-        Download ESS output, orbitals check file, and the Gaussian check file, if relevant.
+        Download ESS output and additional files, if relevant.
+        The orbitals FChk file and the Gaussian check file are not downloaded, they are registered as remote artifacts
+        and only fetched on demand.
+
+        Args:
+            artifacts (bool, optional): Whether to also consider the additional files (check file, orbitals file,
+                                        Lennard-Jones data, Molpro log) besides the output file.
         """
         ssh = SSHClient(self.server)
 
@@ -939,21 +1057,27 @@ $end
         if not os.path.isfile(self.local_path_to_output_file):
             raise JobError('output file for {0} was not downloaded properly'.format(self.job_name))
         self.final_time = ssh.get_last_modified_time(remote_file_path=remote_file_path)
+        if not artifacts:
+            return
 
-        # download orbitals FChk file
+        # register orbitals FChk file
         if self.job_type == 'orbitals':
             remote_file_path = os.path.join(self.remote_path, 'input.FChk')
-            ssh.download_file(remote_file_path=remote_file_path, local_file_path=self.local_path_to_orbitals_file)
-            if not os.path.isfile(self.local_path_to_orbitals_file):
-                logger.warning('Orbitals FChk file for {0} was not downloaded properly '
-                               '(this is not the Gaussian formatted check file...)'.format(self.job_name))
+            if ssh.get_last_modified_time(remote_file_path=remote_file_path) is not None:
+                remote_artifacts.register(server=self.server, remote_path=remote_file_path,
+                                          local_path=self.local_path_to_orbitals_file)
+            else:
+                logger.warning('Orbitals FChk file for {0} was not found on {1} '
+                               '(this is not the Gaussian formatted check file...)'.format(self.job_name, self.server))
 
-        # download Gaussian check file
+        # register Gaussian check file
         if self.software.lower() == 'gaussian':
             remote_check_file_path = os.path.join(self.remote_path, 'check.chk')
-            ssh.download_file(remote_file_path=remote_check_file_path, local_file_path=self.local_path_to_check_file)
-            if not os.path.isfile(self.local_path_to_check_file):
-                logger.warning('Gaussian check file for {0} was not downloaded properly'.format(self.job_name))
+            if ssh.get_last_modified_time(remote_file_path=remote_check_file_path) is not None:
+                remote_artifacts.register(server=self.server, remote_path=remote_check_file_path,
+                                          local_path=self.local_path_to_check_file)
+            else:
+                logger.warning('Gaussian check file for {0} was not found on {1}'.format(self.job_name, self.server))
 
         # download Lennard_Jones data file
         if self.software.lower() == 'onedmin':
@@ -975,6 +1099,17 @@ $end
         """
         Execute the Job.
         """
+        self.log_run()
+        logger.debug('writing submit script...')
+        self.write_submit_script()
+        logger.debug('writing input file...')
+        self.write_input_file()
+        self.submit_to_queue()
+
+    def log_run(self):
+        """
+        Report that the Job is being executed.
+        """
         if self.fine:
             logger.info('Running job {name} for {label} (fine opt)'.format(
                 name=self.job_name, label=self.species_name))
@@ -987,10 +1122,11 @@ $end
                 name=self.job_name, label=self.species_name, pivots=self.pivots))
         else:
             logger.info('Running job {name} for {label}'.format(name=self.job_name, label=self.species_name))
-        logger.debug('writing submit script...')
-        self.write_submit_script()
-        logger.debug('writing input file...')
-        self.write_input_file()
+
+    def submit_to_queue(self):
+        """
+        Submit the Job, assuming its files were already written (and staged on a remote server).
+        """
         if self.server != 'local':
             ssh = SSHClient(self.server)
             logger.debug('submitting job...')
@@ -1004,7 +1140,10 @@ $end
                 self.job_status[0], self.job_id = ssh.submit_job(remote_path=self.remote_path)
         else:
             # running locally
-            self.job_status[0], self.job_id = submit_job(path=self.local_path)
+            self.job_status[0], self.job_id = submit_job(path=self.local_path, cpus=self.cpu_cores,
+                                                         memory=self.total_job_memory_gb)
+        if self.job_status[0] == 'running':
+            queue_snapshot.add_job(job_id=self.job_id, server=self.server)
 
     def delete(self):
         """
@@ -1019,6 +1158,54 @@ $end
             logger.debug('deleting job locally...')
             delete_job(job_id=self.job_id)
 
+    def abort(self, keywords, error, line=''):
+        """
+        Abort a running Job (e.g., if its progress stalled). The job is deleted and its output file is fetched,
+        and its ESS status is set as if the ESS terminated with the given error, so it is troubleshot accordingly.
+
+        Args:
+            keywords (list): The standardized error keywords (see ``determine_ess_status()``).
+            error (str): The error message.
+            line (str, optional): The line from the output file indicating the error.
+        """
+        self.delete()
+        self.job_status[0] = 'done'
+        self.job_status[1] = {'status': 'errored', 'keywords': keywords, 'error': error, 'line': line}
+        if self.server != 'local':
+            try:
+                self._download_output_file(artifacts=False)
+            except (IOError, JobError) as e:
+                logger.warning('Could not download the output file of aborted job {0}, got: {1}'.format(
+                    self.job_name, e))
+        else:
+            self.final_time = get_last_modified_time(
+                file_path=os.path.join(self.local_path, output_filename[self.software]))
+            rename_output(local_file_path=self.local_path_to_output_file, software=self.software)
+        self.determine_run_time()
+
+    def read_output_increment(self, offset, max_bytes):
+        """
+        Read the part of the output file of a running Job written since it was last read (for monitoring its progress).
+
+        Args:
+            offset (int): The offset (in bytes) to read from.
+            max_bytes (int): The maximal number of bytes to read, only the trailing ``max_bytes`` bytes are read
+                             if more were written since ``offset``.
+
+        Raises:
+            IOError: If the output file could not be read (e.g., if the job did not start yet).
+
+        Returns:
+            tuple: The content read (``bytes``), and the offset (``int``, in bytes) it was read from.
+        """
+        if self.server != 'local':
+            ssh = SSHClient(self.server)
+            return ssh.read_remote_increment(
+                remote_file_path=os.path.join(self.remote_path, output_filename[self.software]),
+                offset=offset, max_bytes=max_bytes)
+        return read_file_increment(file_path=os.path.join(self.local_path, output_filename[self.software]),
+                                   offset=offset, max_bytes=max_bytes)
+
     def determine_job_status(self):
         """
         Determine the Job's status. Updates self.job_status.
@@ -1026,7 +1213,7 @@ $end
         Raises:
             IOError: If the output file and any additional server information cannot be found.
         """
-        if self.job_status[0] == 'errored':
+        if self.job_status[0] == 'errored' or self.from_cache:
             return
         self.job_status[0] = self._check_job_server_status()
         if self.job_status[0] == 'done':
@@ -1044,10 +1231,20 @@ $end
                         if 'cancelled' in line.lower() and 'due to time limit' in line.lower():
                             logger.warning('Looks like the job was cancelled on {0} due to time limit. '
                                            'Got: {1}'.format(self.server, line))
-                            new_max_job_time = self.max_job_time - 24 if self.max_job_time > 25 else 1
-                            logger.warning('Setting max job time to {0} (was {1})'.format(new_max_job_time,
-                                                                                          self.max_job_time))
-                            self.max_job_time = new_max_job_time
+                            if self.predicted_size is not None:
+                                # the job was longer than predicted, its rerun requests the original max job time
+                                # (and is not sized again, since 'walltime' was tried)
+                                logger.warning('Job {0} exceeded its predicted run time of {1} hours, setting max job '
+                                               'time to {2}'.format(self.job_name, self.max_job_time,
+                                                                    self.predicted_size['max_job_time']))
+                                self.max_job_time = self.predicted_size['max_job_time']
+                                if 'walltime' not in self.ess_trsh_methods:
+                                    self.ess_trsh_methods.append('walltime')
+                            else:
+                                new_max_job_time = self.max_job_time - 24 if self.max_job_time > 25 else 1
+                                logger.warning('Setting max job time to {0} (was {1})'.format(new_max_job_time,
+                                                                                              self.max_job_time))
+                                self.max_job_time = new_max_job_time
                             self.job_status[1]['status'] = 'errored'
                             self.job_status[1]['keywords'] = ['ServerTimeLimit']
                             self.job_status[1]['error'] = 'Job cancelled by the server since it reached the maximal ' \
@@ -1123,6 +1320,10 @@ $end
         """
         Possible statuses: `initializing`, `running`, `errored on node xx`, `done`.
         """
+        status = queue_snapshot.get_job_status(job_id=self.job_id, server=self.server)
+        if status is not None:
+            return status
+        # the queue snapshot could not be refreshed, query the server directly (with a retry mechanism)
         if self.server != 'local':
             ssh = SSHClient(self.server)
             return ssh.check_job_status(self.job_id)
@@ -1134,6 +1335,7 @@ $end
         Check the status of the job ran by the electronic structure software (ESS).
         Possible statuses: `initializing`, `running`, `errored: {error type / message}`, `unconverged`, `done`.
         """
+        ess_status = None
         if self.server != 'local':
             if os.path.exists(self.local_path_to_output_file):
                 os.remove(self.local_path_to_output_file)
@@ -1141,7 +1343,15 @@ $end
                 os.remove(self.local_path_to_orbitals_file)
             if os.path.exists(self.local_path_to_check_file):
                 os.remove(self.local_path_to_check_file)
-            self._download_output_file()  # also downloads the Gaussian check file and orbital file if exist
+            remote_artifacts.discard(self.local_path_to_orbitals_file)
+            remote_artifacts.discard(self.local_path_to_check_file)
+            ess_status, tail, size = self._probe_remote_ess_status()
+            if ess_status is None or ess_status[0] == 'done' or size <= errored_output_max_download * 1024 ** 2:
+                # also downloads the Gaussian check file and orbital file if exist (only for jobs which are done)
+                self._download_output_file(artifacts=ess_status is None or ess_status[0] == 'done')
+            else:
+                # a large output of an errored job, only keep its tail
+                self._save_remote_output_tail(tail=tail)
         else:
             # If running locally, just rename the output file to "output.out" for consistency between software
             if self.final_time is None:
@@ -1149,9 +1359,12 @@ $end
                     file_path=os.path.join(self.local_path, output_filename[self.software]))
             rename_output(local_file_path=self.local_path_to_output_file, software=self.software)
         self.determine_run_time()
-        status, keywords, error, line = determine_ess_status(output_path=self.local_path_to_output_file,
-                                                             species_label=self.species_name, job_type=self.job_type,
-                                                             software=self.software)
+        self.ess_run_time = parse_ess_run_time(self.local_path_to_output_file)
+        if ess_status is None:
+            ess_status = determine_ess_status(output_path=self.local_path_to_output_file,
+                                              species_label=self.species_name, job_type=self.job_type,
+                                              software=self.software)
+        status, keywords, error, line = ess_status
         self.job_status[1]['status'] = status
         self.job_status[1]['keywords'] = keywords
         self.job_status[1]['error'] = error
@@ -1348,6 +1561,17 @@ $end
         Set the amount of cpus and memory based on ESS and cluster software.
         """
         self.cpu_cores = 8 if self.cpu_cores is None else servers[self.server].get('cpus', 8)  # set to 8 by default
+        if self.predicted_size is not None:
+            self.predicted_size.setdefault('max_job_time', self.max_job_time)  # the requested max job time
+            self.cpu_cores = get_cpu_cores(self.predicted_size, max_cpu_cores=self.cpu_cores)
+            self.max_job_time = get_max_job_time(self.predicted_size, cpu_cores=self.cpu_cores,
+                                                 max_job_time=self.max_job_time)
+            if self.predicted_size['memory'] is not None and self.predicted_size['memory'] > self.total_job_memory_gb:
+                logger.info(f'Similar jobs to {self.job_name} required more memory, '
+                            f'setting it to {self.predicted_size["memory"]} GB (was {self.total_job_memory_gb} GB)')
+                self.total_job_memory_gb = self.predicted_size['memory']
+            logger.debug(f'Sized job {self.job_name} from similar jobs: {self.cpu_cores} cores, '
+                         f'{self.max_job_time} hours')
 
         max_mem = servers[self.server].get('memory', None)  # max memory per node in GB
         if max_mem is not None and self.total_job_memory_gb > max_mem * 0.9:
@@ -1361,7 +1585,7 @@ $end
 
         # determine amount of memory in submit script based on cluster job scheduling system
         cluster_software = servers[self.server].get('cluster_soft').lower()
-        if cluster_software in ['oge', 'sge']:
+        if cluster_software in ['oge', 'sge', 'local']:
             # In SGE, `-l h_vmem=5000M` specify the amount of maximum memory required per cpu (all cores) to be 5000 MB.
             self.submit_script_memory = math.ceil(total_submit_script_memory)  # MB
         elif cluster_software in ['slurm']:
@@ -1448,3 +1672,43 @@ $end
                                                     'local': os.path.join(arc_path, 'arc', 'scripts', 'conformers',
                                                                           'mdp.mdp'),
                                                     'remote': os.path.join(self.remote_path, 'mdp.mdp')})
+
+
+def stage_job_files(jobs):
+    """
+    Stage the files of several remote jobs, using a single SFTP session per server, and set their initial times.
+    Previous Gaussian check files which remained on the same server are copied there directly.
+
+    Args:
+        jobs (list): Entries are Job objects whose files were already written locally.
+    """
+    jobs_per_server = dict()
+    for job in jobs:
+        if job.server != 'local' and not job.testing:
+            jobs_per_server.setdefault(job.server, list()).append(job)
+    for server, server_jobs in jobs_per_server.items():
+        manifest = list()
+        for job in server_jobs:
+            manifest.extend(job.get_file_manifest())
+        modified_times = SSHClient(server).stage_files(manifest=manifest)
+        for job in server_jobs:
+            job.initial_time = modified_times.get(
+                os.path.join(job.remote_path, submit_filename[servers[server]['cluster_soft']]), None)
+            job.copy_check_file_on_server()
+
+
+def run_jobs(jobs):
+    """
+    Execute several jobs (e.g., all conformer jobs of a species),
+    staging the files of all jobs executed on the same server together before submitting them.
+
+    Args:
+        jobs (list): Entries are Job objects.
+    """
+    for job in jobs:
+        job.log_run()
+        job.write_submit_script()
+        job.write_input_file(stage=False)
+    stage_job_files(jobs)
+    for job in jobs:
+        job.submit_to_queue()
@@ -316,6 +316,24 @@ class TestJob(unittest.TestCase):
         self.assertIn('mdp.mdp', self.job1.additional_files_to_upload[5]['remote'])
         self.assertIn('mdp.mdp', self.job1.additional_files_to_upload[5]['local'])
 
+    def test_get_file_manifest(self):
+        """Test getting the manifest of files to stage on the server"""
+        job = Job(project='project_test', ess_settings=self.ess_settings, species_name='tst_spc', xyz=self.xyz_c,
+                  job_type='onedmin', level_of_theory='b3lyp/6-311++G(d,p)', multiplicity=1, testing=True,
+                  project_directory=os.path.join(arc_path, 'Projects', 'project_test'), job_num=110)
+        job.submit, job.input = 'submit script', 'input file'
+        manifest = job.get_file_manifest()
+        self.assertEqual(len(manifest), 5)
+        self.assertEqual(manifest[0]['content'], 'submit script')
+        self.assertTrue(manifest[0]['remote'].startswith(job.remote_path))
+        self.assertEqual(manifest[1]['content'], 'input file')
+        self.assertIn('geo.xyz', manifest[2]['local'])
+        self.assertIsNone(manifest[2]['mode'])
+        self.assertIn('m.x', manifest[3]['remote'])
+        self.assertIn('content', manifest[3])
+        self.assertEqual(manifest[3]['mode'], 0o755)
+        self.assertIn('qc.mol', manifest[4]['remote'])
+
     @classmethod
     def tearDownClass(cls):
         """
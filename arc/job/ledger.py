@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for the job ledger, an SQLite database recording all jobs initiated and completed by ARC.
+
+The ledger hands out job numbers atomically (so concurrent ARC projects never share a job number),
+and records jobs with indexed columns so they could be efficiently queried.
+The tables could be exported to CSV files (see arc/utils/ledger.py), optionally restricted to the columns of the
+``initiated_jobs.csv`` and ``completed_jobs.csv`` files written by earlier ARC versions.
+"""
+
+import csv
+import os
+import sqlite3
+
+from arc.common import get_logger
+from arc.settings import arc_path, job_ledger_path
+
+
+logger = get_logger()
+
+# Job numbers wrap around, since they are used in the job names on the servers
+max_job_number = 100000
+
+initiated_columns = ['job_num', 'project', 'species_name', 'conformer', 'is_ts', 'charge', 'multiplicity', 'job_type',
+                     'job_name', 'job_id', 'server', 'software', 'memory', 'method', 'basis_set', 'n_atoms',
+                     'n_heavy_atoms', 'cpus', 'comments']
+
+completed_columns = initiated_columns[:-1] + ['initial_time', 'final_time', 'run_time', 'ess_run_time', 'server_status',
+                                              'ess_status', 'ess_trsh_methods', 'comments']
+
+# The columns not recorded in the CSV files written by earlier ARC versions
+added_columns = ['n_atoms', 'n_heavy_atoms', 'cpus', 'ess_run_time']
+
+# The CSV headers used by earlier ARC versions, keyed by the respective table column
+csv_headers = {'server_status': 'job_status_(server)',
+               'ess_status': 'job_status_(ESS)',
+               'ess_trsh_methods': 'ESS troubleshooting methods used',
+               }
+
+indexed_columns = {'initiated_jobs': ['project', 'species_name', 'job_type', 'server', 'method'],
+                   'completed_jobs': ['project', 'species_name', 'job_type', 'server', 'method', 'ess_status'],
+                   }
+
+
+class JobLedger(object):
+    """
+    The job ledger. Each operation uses its own short-lived connection and transaction,
+    so the ledger could be shared by threads and by concurrent ARC processes.
+
+    Args:
+        path (str, optional): The path to the database file.
+
+    Attributes:
+        path (str): The path to the database file.
+        initialized (bool): Whether the database tables were already created in this process.
+    """
+    def __init__(self, path=None):
+        self.path = path if path is not None else job_ledger_path
+        self.initialized = False
+
+    def connect(self):
+        """
+        Open a connection to the database, creating the tables if needed.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        if not self.initialized and not os.path.isdir(os.path.dirname(self.path)):
+            os.makedirs(os.path.dirname(self.path))
+        connection = sqlite3.connect(self.path, timeout=60)
+        if not self.initialized:
+            with connection:
+                self._create_tables(connection)
+            self.initialized = True
+        return connection
+
+    def _create_tables(self, connection):
+        """
+        Create the ledger tables and indices if they don't exist, and add missing columns to existing tables.
+        The job number counter is seeded from a legacy ``initiated_jobs.csv`` file, if it exists,
+        so that job numbering continues where it stopped.
+
+        Args:
+            connection (sqlite3.Connection): The database connection.
+        """
+        connection.execute('CREATE TABLE IF NOT EXISTS counter (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        for table, columns in [('initiated_jobs', initiated_columns), ('completed_jobs', completed_columns)]:
+            connection.execute('CREATE TABLE IF NOT EXISTS {0} (id INTEGER PRIMARY KEY AUTOINCREMENT, {1})'.format(
+                table, ', '.join(columns)))
+            # add columns introduced after the table was created
+            existing_columns = [row[1] for row in connection.execute('PRAGMA table_info({0})'.format(table))]
+            for column in columns:
+                if column not in existing_columns:
+                    connection.execute('ALTER TABLE {0} ADD COLUMN {1}'.format(table, column))
+            for column in indexed_columns[table]:
+                connection.execute('CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})'.format(table, column))
+        if connection.execute("SELECT value FROM counter WHERE name = 'job_num'").fetchone() is None:
+            connection.execute("INSERT OR IGNORE INTO counter (name, value) VALUES ('job_num', ?)",
+                               (count_legacy_jobs(os.path.join(arc_path, 'initiated_jobs.csv')),))
+
+    def get_job_number(self):
+        """
+        Atomically get the next job number.
+
+        Returns:
+            int: The job number.
+        """
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute("UPDATE counter SET value = (value + 1) % ? WHERE name = 'job_num'",
+                                   (max_job_number,))
+                job_num = connection.execute("SELECT value FROM counter WHERE name = 'job_num'").fetchone()[0]
+        finally:
+            connection.close()
+        return job_num
+
+    def record_initiated_job(self, row):
+        """
+        Record an initiated job.
+
+        Args:
+            row (dict): Keys are the ``initiated_columns``.
+        """
+        self._insert(table='initiated_jobs', columns=initiated_columns, row=row)
+
+    def record_completed_job(self, row):
+        """
+        Record a completed job.
+
+        Args:
+            row (dict): Keys are the ``completed_columns``.
+        """
+        self._insert(table='completed_jobs', columns=completed_columns, row=row)
+
+    def _insert(self, table, columns, row):
+        """
+        Insert a row into a ledger table.
+
+        Args:
+            table (str): The table name.
+            columns (list): The table columns.
+            row (dict): Keys are table columns. Values which are not numbers are saved as strings.
+        """
+        values = [row.get(column, None) for column in columns]
+        values = [value if value is None or isinstance(value, (int, float)) else str(value) for value in values]
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute('INSERT INTO {0} ({1}) VALUES ({2})'.format(
+                    table, ', '.join(columns), ', '.join(['?'] * len(columns))), values)
+        finally:
+            connection.close()
+
+    def get_jobs(self, table='completed_jobs', **filters):
+        """
+        Get recorded jobs.
+
+        Args:
+            table (str, optional): Either 'initiated_jobs' or 'completed_jobs'.
+            filters: Column values to filter by, e.g., ``project='arc_demo', server='server1'``.
+
+        Returns:
+            list: Entries are dictionaries representing the recorded jobs, in the order they were recorded.
+        """
+        columns = initiated_columns if table == 'initiated_jobs' else completed_columns
+        for column in filters.keys():
+            if column not in columns:
+                raise ValueError('Cannot filter {0} by {1}, allowed columns are: {2}'.format(table, column, columns))
+        query = 'SELECT {0} FROM {1}'.format(', '.join(columns), table)
+        if filters:
+            query += ' WHERE ' + ' AND '.join('{0} = ?'.format(column) for column in filters.keys())
+        connection = self.connect()
+        try:
+            rows = connection.execute(query + ' ORDER BY id', list(filters.values())).fetchall()
+        finally:
+            connection.close()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def export_csv(self, table='completed_jobs', path=None, legacy=False):
+        """
+        Export a ledger table to a CSV file. Columns also recorded by earlier ARC versions keep their CSV headers.
+
+        Args:
+            table (str, optional): Either 'initiated_jobs' or 'completed_jobs'.
+            path (str, optional): The CSV file path, ``<table>.csv`` next to the ledger database by default.
+            legacy (bool, optional): Whether to only export the columns of the CSV files written by earlier ARC
+                                     versions, so the file could be read by tools expecting their format.
+
+        Returns:
+            str: The CSV file path.
+        """
+        path = path if path is not None else os.path.join(os.path.dirname(self.path), '{0}.csv'.format(table))
+        columns = initiated_columns if table == 'initiated_jobs' else completed_columns
+        if legacy:
+            columns = [column for column in columns if column not in added_columns]
+        with open(path, 'w') as f:
+            writer = csv.writer(f, dialect='excel')
+            writer.writerow([csv_headers.get(column, column) for column in columns])
+            for job in self.get_jobs(table=table):
+                writer.writerow([job[column] for column in columns])
+        return path
+
+
+def count_legacy_jobs(csv_path):
+    """
+    Get the last job number handed out using a legacy ``initiated_jobs.csv`` file.
+
+    Args:
+        csv_path (str): The path to the CSV file.
+
+    Returns:
+        int: The last job number, 0 if the file does not exist.
+    """
+    if not os.path.isfile(csv_path):
+        return 0
+    with open(csv_path, 'r') as f:
+        num_rows = sum(1 for _ in csv.reader(f, dialect='excel'))
+    return max(num_rows - 1, 0) % max_job_number
+
+
+def get_run_time_seconds(run_time):
+    """
+    Convert a run time recorded in the job ledger to seconds.
+
+    Args:
+        run_time (str): The run time, e.g., '3:25:10' or '2 days, 3:25:10'.
+
+    Returns:
+        float: The run time in seconds, ``None`` if it could not be converted.
+    """
+    if not run_time:
+        return None
+    days = 0
+    if 'day' in run_time:
+        days, run_time = run_time.split(',')
+        days = int(days.split()[0])
+    try:
+        hours, minutes, seconds = run_time.split(':')
+        return days * 86400 + int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except ValueError:
+        return None
+
+
+# The process-wide job ledger
+job_ledger = JobLedger()
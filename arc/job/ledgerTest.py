@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.ledger module
+"""
+
+import csv
+import datetime
+import os
+import shutil
+import sqlite3
+import threading
+import unittest
+
+from arc.job.ledger import JobLedger, count_legacy_jobs, get_run_time_seconds, max_job_number
+from arc.settings import arc_path
+
+
+class TestJobLedger(unittest.TestCase):
+    """
+    Contains unit tests for the JobLedger class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.scratch_path = os.path.join(arc_path, 'scratch_ledger')
+        if not os.path.isdir(cls.scratch_path):
+            os.makedirs(cls.scratch_path)
+
+    def setUp(self):
+        """
+        A method that is run before each unit test in this class.
+        """
+        path = os.path.join(self.scratch_path, 'job_ledger.db')
+        if os.path.isfile(path):
+            os.remove(path)
+        self.ledger = JobLedger(path=path)
+
+    def test_get_job_number(self):
+        """Test handing out job numbers, also from several threads"""
+        self.assertEqual(self.ledger.get_job_number(), 1)
+        self.assertEqual(self.ledger.get_job_number(), 2)
+        job_nums = list()
+        threads = [threading.Thread(target=lambda: job_nums.append(self.ledger.get_job_number())) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(job_nums), list(range(3, 13)))
+
+        connection = self.ledger.connect()
+        with connection:
+            connection.execute("UPDATE counter SET value = ? WHERE name = 'job_num'", (max_job_number - 1,))
+        connection.close()
+        self.assertEqual(self.ledger.get_job_number(), 0)
+
+    def test_record_and_export_jobs(self):
+        """Test recording jobs, querying them, and exporting them to a CSV file"""
+        row = {'job_num': 101, 'project': 'project1', 'species_name': 'H2O', 'conformer': '-', 'is_ts': False,
+               'charge': 0, 'multiplicity': 1, 'job_type': 'opt', 'job_name': 'opt_a101', 'job_id': '14428_3',
+               'server': 'server1', 'software': 'gaussian', 'memory': 14, 'method': 'b3lyp', 'basis_set': '6-31g',
+               'comments': ''}
+        self.ledger.record_initiated_job(row)
+        self.ledger.record_initiated_job(dict(row, job_num=102, job_name='freq_a102', job_type='freq'))
+        self.ledger.record_completed_job(dict(row, ess_status='done', ess_trsh_methods=['int=(Acc2E=14)']))
+        self.assertEqual([job['job_name'] for job in self.ledger.get_jobs(table='initiated_jobs', job_type='freq')],
+                         ['freq_a102'])
+        completed_jobs = self.ledger.get_jobs(project='project1', ess_status='done')
+        self.assertEqual(len(completed_jobs), 1)
+        self.assertEqual(completed_jobs[0]['job_id'], '14428_3')
+        self.assertEqual(completed_jobs[0]['ess_trsh_methods'], "['int=(Acc2E=14)']")
+        with self.assertRaises(ValueError):
+            self.ledger.get_jobs(status='done')
+
+        path = self.ledger.export_csv(table='completed_jobs', path=os.path.join(self.scratch_path, 'completed.csv'))
+        with open(path, 'r') as f:
+            rows = list(csv.reader(f, dialect='excel'))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0][:3], ['job_num', 'project', 'species_name'])
+        self.assertIn('job_status_(ESS)', rows[0])
+        self.assertEqual(rows[1][:3], ['101', 'project1', 'H2O'])
+        self.assertIn('cpus', rows[0])
+        path = self.ledger.export_csv(table='initiated_jobs', legacy=True)
+        self.assertEqual(path, os.path.join(self.scratch_path, 'initiated_jobs.csv'))
+        with open(path, 'r') as f:
+            rows = list(csv.reader(f, dialect='excel'))
+        self.assertEqual(rows[0], ['job_num', 'project', 'species_name', 'conformer', 'is_ts', 'charge',
+                                   'multiplicity', 'job_type', 'job_name', 'job_id', 'server', 'software', 'memory',
+                                   'method', 'basis_set', 'comments'])
+        self.assertEqual(len(rows), 3)
+
+    def test_count_legacy_jobs(self):
+        """Test continuing the job numbering of a legacy initiated_jobs.csv file"""
+        csv_path = os.path.join(self.scratch_path, 'initiated_jobs.csv')
+        with open(csv_path, 'w') as f:
+            writer = csv.writer(f, dialect='excel')
+            writer.writerow(['job_num', 'project'])
+            for i in range(1, 6):
+                writer.writerow([i, 'project1'])
+        self.assertEqual(count_legacy_jobs(csv_path), 5)
+        self.assertEqual(count_legacy_jobs(os.path.join(self.scratch_path, 'missing.csv')), 0)
+
+    def test_get_run_time_seconds(self):
+        """Test converting ledger run times to seconds"""
+        self.assertEqual(get_run_time_seconds('3:25:10'), 12310)
+        self.assertEqual(get_run_time_seconds('2 days, 0:00:05'), 172805)
+        self.assertEqual(get_run_time_seconds(str(datetime.timedelta(seconds=90061))), 90061)
+        self.assertIsNone(get_run_time_seconds(None))
+        self.assertIsNone(get_run_time_seconds('None'))
+
+    def test_add_missing_columns(self):
+        """Test adding columns to the tables of a ledger created by an earlier version"""
+        connection = sqlite3.connect(self.ledger.path)
+        with connection:
+            connection.execute('CREATE TABLE completed_jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, job_num, job_type, '
+                               'server, run_time)')
+            connection.execute("INSERT INTO completed_jobs (job_num, job_type) VALUES (100, 'opt')")
+        connection.close()
+        self.ledger.record_completed_job({'job_num': 101, 'job_type': 'opt', 'n_heavy_atoms': 3, 'cpus': 8})
+        jobs = self.ledger.get_jobs(job_type='opt')
+        self.assertEqual([job['job_num'] for job in jobs], [100, 101])
+        self.assertEqual([job['n_heavy_atoms'] for job in jobs], [None, 3])
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        shutil.rmtree(cls.scratch_path)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -16,7 +16,9 @@ import time
 
 from arc.common import get_logger
 from arc.exceptions import SettingsError
-from arc.job.ssh import check_job_status_in_stdout
+from arc.job.executor import is_local_executor, local_executor
+from arc.job.retry import retry_policy
+from arc.job.ssh import check_job_status_in_stdout, format_job_id, parse_running_jobs_ids
 from arc.settings import servers, check_status_command, submit_command, submit_filename, delete_command, output_filename
 
 
@@ -32,10 +34,9 @@ def execute_command(command, shell=True):
     """
     if not isinstance(command, list) and not shell:
         command = [command]
-    i, max_times_to_try = 1, 30
+    i, max_times_to_try = 1, retry_policy.max_attempts
     success = False
-    sleep_time = 60  # seconds
-    while i < max_times_to_try:
+    while i <= max_times_to_try:
         try:
             stdout = subprocess.check_output(command, shell=shell)
         except subprocess.CalledProcessError as e:
@@ -50,10 +51,11 @@ def execute_command(command, shell=True):
             logger.info('\n')
             logger.error(e.returncode)
             logger.info('\n')
-            logger.error(f'ARC is sleeping for {sleep_time * i} seconds before re-trying,'
-                         f' please check if this is a server issue by executing the command manually on server.')
-            logger.info('ZZZZZ..... ZZZZZ.....')
-            time.sleep(sleep_time * i)  # in seconds
+            if i < max_times_to_try:
+                sleep_time = retry_policy.get_delay(i - 1)
+                logger.error(f'ARC is sleeping for {sleep_time:.1f} seconds before re-trying,'
+                             f' please check if this is a server issue by executing the command manually on server.')
+                time.sleep(sleep_time)  # in seconds
             i += 1
         else:
             success = True
@@ -87,6 +89,8 @@ def check_job_status(job_id):
 
     """
     server = 'local'
+    if is_local_executor(server):
+        return local_executor.get_job_status(job_id)
     cmd = check_status_command[servers[server]['cluster_soft']] + ' -u ' + servers[server]['un']
     stdout = execute_command(cmd)[0]
     return check_job_status_in_stdout(job_id=job_id, stdout=stdout, server=server)
@@ -96,7 +100,10 @@ def delete_job(job_id):
     """
     Deletes a running job
     """
-    cmd = delete_command[servers['local']['cluster_soft']] + ' ' + str(job_id)
+    if is_local_executor('local'):
+        local_executor.delete(job_id)
+        return
+    cmd = delete_command[servers['local']['cluster_soft']] + ' ' + format_job_id(job_id, 'local')
     execute_command(cmd)
 
 
@@ -104,30 +111,30 @@ def check_running_jobs_ids():
     """
     Return a list of ``int`` representing job IDs of all jobs submitted by the user on a server
     """
-    running_jobs_ids = list()
+    if is_local_executor('local'):
+        return local_executor.get_running_job_ids()
     cmd = check_status_command[servers['local']['cluster_soft']] + ' -u ' + servers['local']['un']
     stdout = execute_command(cmd)[0]
-    for i, status_line in enumerate(stdout):
-        if (servers['local']['cluster_soft'].lower() == 'slurm' and i > 0)\
-                or (servers['local']['cluster_soft'].lower() == 'oge' and i > 1):
-            running_jobs_ids.append(int(status_line.split()[0]))
-    return running_jobs_ids
+    return parse_running_jobs_ids(stdout=stdout, server='local')
 
 
-def submit_job(path):
+def submit_job(path, cpus=None, memory=None):
     """
     Submit a job
     `path` is the job's folder path, where the submit script is located (without the submit script file name)
+    `cpus` and `memory` (in GB) are the resources requested by the job, only considered by the local executor
     """
     job_status = ''
     job_id = 0
+    if is_local_executor('local'):
+        return 'running', local_executor.submit(path=path, cpus=cpus, memory=memory)
     cmd = 'cd ' + path + '; ' + submit_command[servers['local']['cluster_soft']] + ' '\
         + submit_filename[servers['local']['cluster_soft']]
     stdout = execute_command(cmd)[0]
     if 'submitted' in stdout[0].lower():
         job_status = 'running'
         if servers['local']['cluster_soft'].lower() == 'oge':
-            job_id = int(stdout[0].split()[2])
+            job_id = int(stdout[0].split()[2].split('.')[0])
         elif servers['local']['cluster_soft'].lower() == 'slurm':
             job_id = int(stdout[0].split()[3])
         else:
@@ -144,6 +151,31 @@ def get_last_modified_time(file_path):
     return datetime.datetime.fromtimestamp(timestamp)
 
 
+def read_file_increment(file_path, offset, max_bytes):
+    """
+    Read the part of a local file following an offset (e.g., the part of a growing output file
+    written since it was last read).
+
+    Args:
+        file_path (str): The file path.
+        offset (int): The offset (in bytes) to read from, the file is read from its beginning if it is shorter.
+        max_bytes (int): The maximal number of bytes to read, only the trailing ``max_bytes`` bytes are read
+                         if more were written since ``offset``.
+
+    Raises:
+        IOError: If the file could not be read.
+
+    Returns:
+        tuple: The content read (``bytes``), and the offset (``int``, in bytes) it was read from.
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        start = max(offset if offset <= size else 0, size - max_bytes)
+        f.seek(start)
+        content = f.read(size - start)
+    return content, start
+
+
 def write_file(file_path, file_string):
     """
     Write `file_string` as the file's content in `file_path`
@@ -170,7 +202,9 @@ def delete_all_local_arc_jobs():
     Useful when terminating ARC while some (ghost) jobs are still running.
     """
     server = 'local'
-    if server in servers:
+    if is_local_executor(server):
+        local_executor.delete_all()
+    elif server in servers:
         print('\nDeleting all ARC jobs from local server...')
         cmd = check_status_command[servers[server]['cluster_soft']] + ' -u ' + servers[server]['un']
         stdout = execute_command(cmd)[0]
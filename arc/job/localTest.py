@@ -50,6 +50,22 @@ class TestLocal(unittest.TestCase):
         self.assertTrue(os.path.isfile(path2))
         shutil.rmtree(os.path.join(arc_path, 'scratch'))
 
+    def test_read_file_increment(self):
+        """Test reading the part of a file following an offset"""
+        path = os.path.join(arc_path, 'arc', 'testing', 'C2H6_freq_QChem.out')
+        size = os.path.getsize(path)
+        content, start = local.read_file_increment(file_path=path, offset=0, max_bytes=size)
+        self.assertEqual((len(content), start), (size, 0))
+        content, start = local.read_file_increment(file_path=path, offset=size - 100, max_bytes=size)
+        self.assertEqual((len(content), start), (100, size - 100))
+        content, start = local.read_file_increment(file_path=path, offset=0, max_bytes=50)
+        self.assertEqual((len(content), start), (50, size - 50))
+        content, start = local.read_file_increment(file_path=path, offset=size, max_bytes=size)
+        self.assertEqual((content, start), (b'', size))
+        # a file shorter than the offset was re-written, it is read from its beginning
+        content, start = local.read_file_increment(file_path=path, offset=size + 10, max_bytes=size)
+        self.assertEqual((len(content), start), (size, 0))
+
 
 if __name__ == '__main__':
     unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for monitoring the progress of running jobs.
+
+ARC otherwise only learns that a job failed once the server reports it finished, so an optimization oscillating for
+hundreds of steps, or an SCF which will eventually fail, exhausts its entire walltime first. The job monitor
+periodically reads the part of the output file of each running job written since it was last checked, and tracks
+the SCF cycles and the energy and gradient trajectory of optimizations. Jobs which stall are reported with the
+ESS status (error keywords) their ESS would have eventually terminated with, so the Scheduler can abort them
+and troubleshoot them using the existing ``trsh_ess_job()`` methods.
+"""
+
+import time
+
+from arc.common import get_logger
+from arc.exceptions import ServerUnavailableError
+from arc.settings import job_monitor_interval, job_monitor_max_read, job_monitor_max_scf_cycles, \
+    job_monitor_opt_stall_steps, job_monitor_opt_energy_tolerance
+
+
+logger = get_logger()
+
+# The ESS whose output files the job monitor can follow
+monitored_software = ['gaussian', 'qchem']
+
+# The error keywords of stalled jobs by software, as if the ESS terminated with the respective error
+stall_keywords = {'scf': {'gaussian': ['SCF', 'GL502'],
+                          'qchem': ['SCF'],
+                          },
+                  'opt': {'gaussian': ['Unconverged', 'GL9999'],
+                          'qchem': ['MaxOptCycles'],
+                          },
+                  }
+
+
+class JobProgress(object):
+    """
+    The progress of a running job, tracked from the incrementally read content of its output file.
+
+    Args:
+        software (str): The ESS software.
+
+    Attributes:
+        software (str): The ESS software.
+        offset (int): The number of bytes of the output file read so far.
+        partial_line (bytes): The trailing partial line of the content read so far, completed by the next read,
+                              ``None`` if the next read starts within a line which should be discarded.
+        scf_cycles (int): The number of cycles of the SCF currently in progress.
+        in_scf (bool): Whether the SCF iterations are being read (QChem),
+                       or whether the SCF continues after its first algorithm did not converge (Gaussian).
+        energy (float): The last converged SCF energy in Hartree, ``None`` if not read yet.
+        energies (list): The energies (in Hartree) of the steps of the current optimization.
+        gradients (list): The maximal forces (Gaussian) or gradients (QChem) of the steps of the current optimization.
+        scf_line (str): The last line read reporting an SCF cycle.
+        opt_line (str): The last line read reporting the gradient of an optimization step.
+        last_check (float): The time of the last check, ``None`` if not checked yet.
+    """
+    def __init__(self, software):
+        self.software = software
+        self.last_check = None
+        self.reset()
+
+    def reset(self):
+        """
+        Reset the progress, e.g., if the output file was re-written.
+        """
+        self.offset = 0
+        self.partial_line = b''
+        self.scf_cycles = 0
+        self.in_scf = False
+        self.energy = None
+        self.energies = list()
+        self.gradients = list()
+        self.scf_line = ''
+        self.opt_line = ''
+
+    def update(self, content, start):
+        """
+        Update the progress from content read from the output file.
+
+        Args:
+            content (bytes): The content read.
+            start (int): The offset (in bytes) the content was read from.
+        """
+        if start < self.offset:
+            # the output file was re-written (e.g., the job was restarted)
+            self.reset()
+        if start > self.offset:
+            # the part preceding the content was skipped, discard the (probably partial) first line
+            self.partial_line = None
+        self.offset = start + len(content)
+        if self.partial_line is None:
+            if b'\n' not in content:
+                return
+            content = content[content.index(b'\n') + 1:]
+            self.partial_line = b''
+        lines = (self.partial_line + content).split(b'\n')
+        self.partial_line = lines.pop()
+        for line in lines:
+            try:
+                self.parse_line(line.decode('utf-8', errors='replace'))
+            except (ValueError, IndexError):
+                # an unexpected format, e.g., a line garbled by the ESS
+                continue
+
+    def parse_line(self, line):
+        """
+        Update the progress from a single line of the output file.
+
+        Args:
+            line (str): The line.
+        """
+        if self.software == 'gaussian':
+            if (line.startswith(' Cycle ') and 'Pass' in line) or (line.startswith(' Iteration ') and 'EE=' in line):
+                # DIIS cycles (" Cycle   1  Pass 1  IDiag  1:") or quadratically convergent cycles (scf=xqc)
+                self.scf_cycles += 1
+                self.scf_line = line
+            elif 'Convergence criterion not met' in line:
+                # the SCF continues with another algorithm (e.g., scf=xqc), its cycles are still counted
+                self.in_scf = True
+            elif 'SCF Done:' in line:
+                if self.in_scf:
+                    self.in_scf = False
+                else:
+                    self.scf_cycles = 0
+                    self.energy = float(line.split('=')[1].split()[0])
+            elif 'Maximum Force' in line and len(line.split()) == 5:
+                self.add_opt_step(gradient=float(line.split()[2]), line=line)
+            elif 'Optimization completed' in line:
+                # e.g., a point of a rotor scan, or the optimization step of a composite method
+                self.energies, self.gradients = list(), list()
+        elif self.software == 'qchem':
+            splits = line.split()
+            if splits[:2] == ['Cycle', 'Energy']:
+                self.in_scf, self.scf_cycles = True, 0
+            elif self.in_scf and splits and splits[0].isdigit():
+                self.scf_cycles = int(splits[0])
+                self.scf_line = line
+                if 'Convergence criterion met' in line:
+                    self.in_scf, self.scf_cycles = False, 0
+            elif 'SCF time:' in line or 'SCF failed' in line:
+                self.in_scf, self.scf_cycles = False, 0
+            elif 'Total energy in the final basis set' in line:
+                self.energy = float(line.split('=')[1])
+            elif len(splits) == 4 and splits[0] == 'Gradient' and splits[3] in ['YES', 'NO']:
+                self.add_opt_step(gradient=float(splits[1]), line=line)
+            elif 'OPTIMIZATION CONVERGED' in line:
+                self.energies, self.gradients = list(), list()
+
+    def add_opt_step(self, gradient, line):
+        """
+        Add a step to the trajectory of the current optimization, using the last converged SCF energy.
+
+        Args:
+            gradient (float): The maximal force or gradient of the step.
+            line (str): The line reporting the gradient.
+        """
+        if self.energy is not None:
+            self.energies.append(self.energy)
+            self.gradients.append(gradient)
+            self.opt_line = line
+
+    def get_stall(self, max_scf_cycles=None, opt_stall_steps=None, opt_energy_tolerance=0.0):
+        """
+        Determine whether the job stalled, i.e., whether an SCF exceeded the maximal number of cycles, or whether
+        an optimization lowered neither the energy (by more than the tolerance) nor the gradient in the last steps.
+
+        Args:
+            max_scf_cycles (int, optional): The maximal number of cycles of an SCF, ``None`` to not check SCFs.
+            opt_stall_steps (int, optional): The number of optimization steps without progress,
+                                             ``None`` to not check optimizations.
+            opt_energy_tolerance (float, optional): An energy decrease (in Hartree) smaller than this is no progress.
+
+        Returns:
+            tuple: The (keywords, error, line) ESS status of a stalled job, ``None`` if the job did not stall.
+        """
+        if max_scf_cycles and self.scf_cycles > max_scf_cycles:
+            return stall_keywords['scf'][self.software], \
+                'The SCF did not converge within {0} cycles, the job was aborted.'.format(max_scf_cycles), \
+                self.scf_line.rstrip()
+        if opt_stall_steps and len(self.energies) > opt_stall_steps:
+            if min(self.energies[-opt_stall_steps:]) > min(self.energies[:-opt_stall_steps]) - opt_energy_tolerance \
+                    and min(self.gradients[-opt_stall_steps:]) >= min(self.gradients[:-opt_stall_steps]):
+                return stall_keywords['opt'][self.software], \
+                    'The optimization did not lower the energy or the gradient in its last {0} steps ' \
+                    '(out of {1}), the job was aborted.'.format(opt_stall_steps, len(self.energies)), \
+                    self.opt_line.rstrip()
+        return None
+
+
+class JobMonitor(object):
+    """
+    Monitors the progress of running jobs by incrementally reading their output files.
+    Jobs are checked concurrently (each job is only checked by one thread at a time).
+
+    Args:
+        interval (float, optional): The time (in seconds) between checks of a running job.
+        max_read (float, optional): The maximal increment (in MB) of an output file read per check.
+        max_scf_cycles (int, optional): The maximal number of cycles of an SCF.
+        opt_stall_steps (int, optional): The number of optimization steps without progress before aborting.
+        opt_energy_tolerance (float, optional): An energy decrease (in Hartree) smaller than this is no progress.
+
+    Attributes:
+        interval (float): The time (in seconds) between checks of a running job.
+        max_read (int): The maximal increment (in bytes) of an output file read per check.
+        max_scf_cycles (int): The maximal number of cycles of an SCF.
+        opt_stall_steps (int): The number of optimization steps without progress before aborting.
+        opt_energy_tolerance (float): An energy decrease (in Hartree) smaller than this is no progress.
+        progress (dict): Keys are job names, values are JobProgress objects.
+    """
+    def __init__(self, interval=None, max_read=None, max_scf_cycles=None, opt_stall_steps=None,
+                 opt_energy_tolerance=None):
+        self.interval = interval if interval is not None else job_monitor_interval or 0
+        self.max_read = int((max_read if max_read is not None else job_monitor_max_read) * 1024 ** 2)
+        self.max_scf_cycles = max_scf_cycles if max_scf_cycles is not None else job_monitor_max_scf_cycles
+        self.opt_stall_steps = opt_stall_steps if opt_stall_steps is not None else job_monitor_opt_stall_steps
+        self.opt_energy_tolerance = opt_energy_tolerance if opt_energy_tolerance is not None \
+            else job_monitor_opt_energy_tolerance
+        self.progress = dict()
+
+    def is_due(self, job):
+        """
+        Check whether the progress of a job should be checked now.
+
+        Args:
+            job (Job): The job object.
+
+        Returns:
+            bool: Whether the job is running, monitored, and was not checked within the last interval.
+        """
+        if job.software not in monitored_software or job.job_status[0] != 'running' or job.from_cache:
+            return False
+        progress = self.progress.get(job.job_name, None)
+        return progress is None or progress.last_check is None or time.time() - progress.last_check >= self.interval
+
+    def check_job(self, job):
+        """
+        Read the part of the output file of a running job written since the last check, and determine whether
+        the job stalled. Executed in an I/O thread.
+
+        Args:
+            job (Job): The job object.
+
+        Returns:
+            tuple: The (keywords, error, line) ESS status of a stalled job, ``None`` if the job did not stall
+                   (or if its output file could not be read).
+        """
+        progress = self.progress.get(job.job_name, None)
+        if progress is None:
+            progress = self.progress[job.job_name] = JobProgress(software=job.software)
+        progress.last_check = time.time()
+        try:
+            content, start = job.read_output_increment(offset=progress.offset, max_bytes=self.max_read)
+        except (IOError, ServerUnavailableError) as e:
+            # e.g., the job is still waiting in the queue
+            logger.debug('Could not read the output file of job {0}, got: {1}'.format(job.job_name, e))
+            return None
+        progress.update(content=content, start=start)
+        # the energy along an IRC path doesn't decrease monotonically, only its SCFs are checked
+        return progress.get_stall(max_scf_cycles=self.max_scf_cycles,
+                                  opt_stall_steps=self.opt_stall_steps if job.job_type != 'irc' else None,
+                                  opt_energy_tolerance=self.opt_energy_tolerance)
+
+    def discard(self, job_name):
+        """
+        Stop tracking the progress of a job.
+
+        Args:
+            job_name (str): The job name.
+        """
+        self.progress.pop(job_name, None)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.monitor module
+"""
+
+import os
+import shutil
+import unittest
+from types import SimpleNamespace
+
+from arc.job.local import read_file_increment
+from arc.job.monitor import JobMonitor, JobProgress
+from arc.settings import arc_path
+
+
+def get_opt_steps(energies, software='gaussian'):
+    """A helper function for generating the output of optimization steps with the given energies"""
+    lines = list()
+    for i, energy in enumerate(energies):
+        if software == 'gaussian':
+            lines.append(' SCF Done:  E(RB3LYP) =  {0:.9f}     A.U. after    9 cycles\n'.format(energy))
+            lines.append(' Maximum Force            0.00{0}473     0.000450     NO \n'.format(i % 2 + 1))
+        else:
+            lines.append(' Total energy in the final basis set = {0:.10f}\n'.format(energy))
+            lines.append('         Gradient           0.00{0}107      0.000300      NO\n'.format(i % 2 + 1))
+    return ''.join(lines).encode()
+
+
+class TestJobProgress(unittest.TestCase):
+    """
+    Contains unit tests for the JobProgress class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        with open(os.path.join(arc_path, 'arc', 'testing', 'N2H4_opt_QChem.out'), 'rb') as f:
+            cls.qchem_opt = f.read()
+        with open(os.path.join(arc_path, 'arc', 'testing', 'trsh', 'gaussian', 'l9999.out'), 'rb') as f:
+            cls.gaussian_l9999 = f.read()
+
+    def test_update(self):
+        """Test tracking an optimization from incrementally read content"""
+        content = self.qchem_opt[:self.qchem_opt.index(b'OPTIMIZATION CONVERGED')]
+        progress = JobProgress(software='qchem')
+        for start in range(0, len(content), 1000):
+            progress.update(content=content[start:start + 1000], start=start)
+        self.assertEqual(progress.offset, len(content))
+        self.assertEqual(progress.energies, [-111.8709573076, -111.8709576608, -111.8709577, -111.8709577059])
+        self.assertEqual(progress.gradients, [0.000107, 0.00012, 0.000024, 0.000013])
+        self.assertIn('Gradient', progress.opt_line)
+        # a converged optimization is no longer tracked
+        progress.update(content=self.qchem_opt[len(content):], start=len(content))
+        self.assertEqual(progress.energies, list())
+
+        # a re-written output file is read from scratch
+        progress.update(content=content[:1000], start=0)
+        self.assertEqual((progress.offset, progress.energy), (1000, None))
+        # a skipped part is not parsed, including the partial line following it
+        progress.update(content=b'Total energy in the final basis set = -1.0\n'
+                                b' Total energy in the final basis set = -2.0\n', start=5000)
+        self.assertEqual(progress.energy, -2.0)
+
+    def test_scf_stall(self):
+        """Test detecting an SCF which exceeded the maximal number of cycles"""
+        progress = JobProgress(software='gaussian')
+        progress.update(content=self.gaussian_l9999[:self.gaussian_l9999.index(b'SCF Done')], start=0)
+        self.assertEqual(progress.scf_cycles, 32)
+        self.assertIsNone(progress.get_stall(max_scf_cycles=50))
+        keywords, error, line = progress.get_stall(max_scf_cycles=30)
+        self.assertEqual(keywords, ['SCF', 'GL502'])
+        self.assertIn('30 cycles', error)
+        self.assertIn('Cycle  32', line)
+        # the SCF continues with quadratic convergence after DIIS failed
+        progress.update(content=self.gaussian_l9999[progress.offset:], start=progress.offset)
+        self.assertEqual(progress.scf_cycles, 0)
+        self.assertAlmostEqual(progress.energy, -395.923591389)
+
+    def test_opt_stall(self):
+        """Test detecting an optimization which stopped lowering its energy and gradient"""
+        progress = JobProgress(software='gaussian')
+        progress.update(content=get_opt_steps([-100.0 - 0.001 * i for i in range(20)]), start=0)
+        self.assertEqual(len(progress.energies), 20)
+        self.assertIsNone(progress.get_stall(opt_stall_steps=10, opt_energy_tolerance=1e-6))
+        # an oscillating optimization
+        content = get_opt_steps([-100.019 + 0.0000001 * (i % 2) for i in range(10)])
+        progress.update(content=content, start=progress.offset)
+        self.assertIsNone(progress.get_stall(opt_stall_steps=11, opt_energy_tolerance=1e-6))
+        keywords, error, line = progress.get_stall(opt_stall_steps=10, opt_energy_tolerance=1e-6)
+        self.assertEqual(keywords, ['Unconverged', 'GL9999'])
+        self.assertIn('last 10 steps (out of 30)', error)
+        self.assertIn('Maximum Force', line)
+        progress.update(content=b' Optimization completed.\n', start=progress.offset)
+        self.assertIsNone(progress.get_stall(opt_stall_steps=10, opt_energy_tolerance=1e-6))
+
+        progress = JobProgress(software='qchem')
+        progress.update(content=get_opt_steps([-100.0] * 6, software='qchem'), start=0)
+        self.assertEqual(progress.get_stall(opt_stall_steps=5, opt_energy_tolerance=1e-6)[0], ['MaxOptCycles'])
+
+
+class TestJobMonitor(unittest.TestCase):
+    """
+    Contains unit tests for the JobMonitor class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.scratch_path = os.path.join(arc_path, 'scratch_monitor')
+        if not os.path.isdir(cls.scratch_path):
+            os.makedirs(cls.scratch_path)
+
+    def get_job(self, job_name, path, software='gaussian', job_type='opt'):
+        """A helper function for creating a running job-like object which reads its output file incrementally"""
+        return SimpleNamespace(job_name=job_name, software=software, job_type=job_type, from_cache=False,
+                               job_status=['running', {'status': 'running'}],
+                               read_output_increment=lambda offset, max_bytes: read_file_increment(
+                                   file_path=path, offset=offset, max_bytes=max_bytes))
+
+    def test_check_job(self):
+        """Test incrementally checking the progress of a running job"""
+        monitor = JobMonitor(interval=60, max_read=1, max_scf_cycles=100, opt_stall_steps=10,
+                             opt_energy_tolerance=1e-6)
+        self.assertEqual(monitor.max_read, 1024 ** 2)
+        path = os.path.join(self.scratch_path, 'input.log')
+        job = self.get_job('opt_a1', path)
+        self.assertTrue(monitor.is_due(job))
+        self.assertIsNone(monitor.check_job(job))  # the job did not start yet
+        self.assertFalse(monitor.is_due(job))
+        with open(path, 'wb') as f:
+            f.write(get_opt_steps([-100.0 - 0.001 * i for i in range(20)]))
+        self.assertIsNone(monitor.check_job(job))
+        with open(path, 'ab') as f:
+            f.write(get_opt_steps([-100.019] * 10))
+        self.assertEqual(monitor.check_job(job)[0], ['Unconverged', 'GL9999'])
+        self.assertEqual(monitor.progress['opt_a1'].offset, os.path.getsize(path))
+        # the energy along an IRC path is not expected to decrease
+        self.assertIsNone(monitor.check_job(self.get_job('irc_a2', path, job_type='irc')))
+        monitor.discard('opt_a1')
+        self.assertNotIn('opt_a1', monitor.progress)
+
+        self.assertFalse(monitor.is_due(self.get_job('opt_a3', path, software='molpro')))
+        job = self.get_job('opt_a4', path)
+        job.job_status[0] = 'done'
+        self.assertFalse(monitor.is_due(job))
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        shutil.rmtree(cls.scratch_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
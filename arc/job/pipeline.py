@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for the completion pipeline, which post-processes completed jobs concurrently.
+
+When many jobs complete together (e.g., all conformer jobs of a species), downloading and parsing their outputs one
+by one in the Scheduler loop takes many sweeps. The pipeline determines the status of completed jobs (downloading
+their output files) in a bounded pool of threads, and parses the quantities their completion handlers need in these
+threads, or in an optional bounded pool of processes (see ``scheduler_parse_workers``). Results are handed back to the
+Scheduler thread as soon as each job is ready, and the Scheduler performs all state transitions (updating species,
+spawning and troubleshooting jobs) in its own thread, in the order jobs become ready.
+
+Isomorphism checks are not offloaded to the parsing workers: they compare the perceived geometries with the species'
+RMG molecules and update the species state, both of which are owned by the Scheduler thread.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from arc import parser
+from arc.common import get_logger
+from arc.exceptions import ServerUnavailableError
+from arc.settings import scheduler_async_workers, scheduler_parse_workers
+
+
+logger = get_logger()
+
+# The quantities parsed from the output of a successfully completed job, by the job type of its completion handler
+parsed_quantities = {'conformer': ['xyz', 'e_elect'],
+                     'opt': ['xyz'],
+                     'optfreq': ['xyz', 'frequencies'],
+                     'composite': ['xyz', 'frequencies'],
+                     'freq': ['frequencies'],
+                     'sp': ['e_elect'],
+                     'scan': ['scan_energies'],
+                     }
+
+
+class CompletionPipeline(object):
+    """
+    Post-processes completed jobs concurrently. Used as a context manager, the worker pools are shut down on exit.
+
+    Args:
+        io_workers (int, optional): The number of threads downloading outputs and querying servers.
+        parse_workers (int, optional): The number of processes parsing outputs, 0 to parse in the I/O threads.
+
+    Attributes:
+        io_workers (int): The number of threads downloading outputs and querying servers.
+        parse_workers (int): The number of processes parsing outputs.
+        io_executor (ThreadPoolExecutor): The I/O thread pool, ``None`` before the pipeline is started.
+        parse_executor (ProcessPoolExecutor): The parsing process pool, created on first use.
+    """
+    def __init__(self, io_workers=None, parse_workers=None):
+        self.io_workers = io_workers or scheduler_async_workers
+        self.parse_workers = parse_workers if parse_workers is not None else scheduler_parse_workers
+        self.io_executor = None
+        self.parse_executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def start(self):
+        """
+        Start the I/O thread pool.
+        """
+        if self.io_executor is None:
+            self.io_executor = ThreadPoolExecutor(max_workers=self.io_workers)
+
+    def shutdown(self):
+        """
+        Shut down the worker pools.
+        """
+        if self.io_executor is not None:
+            self.io_executor.shutdown(wait=True)
+            self.io_executor = None
+        if self.parse_executor is not None:
+            self.parse_executor.shutdown(wait=True)
+            self.parse_executor = None
+
+    def get_parse_executor(self):
+        """
+        Get the parsing process pool, creating it if needed.
+        Processes are spawned rather than forked, since forking a process running threads (e.g., SSH sessions)
+        is unsafe.
+
+        Returns:
+            ProcessPoolExecutor: The parsing process pool, ``None`` if parsing is done in the I/O threads.
+        """
+        if self.parse_workers and self.parse_executor is None:
+            self.parse_executor = ProcessPoolExecutor(max_workers=self.parse_workers,
+                                                      mp_context=multiprocessing.get_context('spawn'))
+        return self.parse_executor
+
+    def process_job(self, job):
+        """
+        Determine the status of a completed job (downloading its output file),
+        and parse the quantities needed by its completion handler if it terminated successfully.
+        The parsed quantities are also persisted in a sidecar file next to the output file.
+        Executed in an I/O thread. Determining the job status updates the process-wide queue snapshot
+        and remote artifacts registry, which are shared with the Scheduler thread and are both locked.
+
+        Args:
+            job (Job): The job object.
+
+        Returns:
+            tuple: The error raised while determining the job status (``None`` if the status was determined),
+                   and a dictionary of the parsed quantities.
+        """
+        try:
+            job.determine_job_status()
+        except (IOError, ServerUnavailableError) as e:
+            return e, dict()
+        quantities = parsed_quantities.get('conformer' if job.conformer >= 0 else job.job_type, list())
+        if not quantities or job.job_status[1]['status'] != 'done' \
+                or not os.path.isfile(job.local_path_to_output_file):
+            return None, dict()
+        executor = self.get_parse_executor()
+        if executor is None:
+            return None, parse_output(job.local_path_to_output_file, job.software, quantities, save=True)
+        try:
+            return None, executor.submit(parse_output, job.local_path_to_output_file, job.software,
+                                         quantities, save=True).result()
+        except Exception as e:
+            # e.g., a broken process pool, the handler parses the output itself
+            logger.debug('Could not parse the output of job {0} in a worker process, got: {1}'.format(
+                job.job_name, e))
+            return None, dict()
+
+    def process_jobs(self, jobs):
+        """
+        Concurrently post-process completed jobs, yielding each job as soon as it is ready.
+
+        Args:
+            jobs (list): Entries are (label, job_name, job) tuples.
+
+        Yields:
+            tuple: The label, the job name, the error raised while determining the job status, and the parsed
+                   quantities (see process_job()).
+        """
+        if not jobs:
+            return
+        self.start()
+        futures = {self.io_executor.submit(self.process_job, job): (label, job_name)
+                   for label, job_name, job in jobs}
+        for future in as_completed(futures):
+            label, job_name = futures[future]
+            error, parsed = future.result()
+            yield label, job_name, error, parsed
+
+
+def parse_output(path, software, quantities, raise_errors=False, save=False):
+    """
+    Parse quantities from an ESS output file. Executed in a worker process.
+    Unless ``raise_errors`` is ``True``, quantities which could not be parsed are omitted,
+    so that the consumer parses them again and handles the error.
+
+    Args:
+        path (str): The path to the output file.
+        software (str): The ESS.
+        quantities (list): Entries are 'xyz', 'e_elect', 'frequencies', or 'scan_energies'.
+        raise_errors (bool, optional): Whether to raise errors raised by the parser.
+        save (bool, optional): Whether to persist the parsed quantities in the sidecar file of the output file
+                               (for later sessions, e.g., restarts).
+
+    Returns:
+        dict: Keys are the quantities, values are the values returned by the respective ``parser`` functions.
+    """
+    parsers = {'xyz': lambda: parser.parse_xyz_from_file(path=path),
+               'e_elect': lambda: parser.parse_e_elect(path=path),
+               'frequencies': lambda: parser.parse_frequencies(path=path, software=software),
+               'scan_energies': lambda: parser.parse_scan_energies(path=path),
+               }
+    parsed = dict()
+    for quantity in quantities:
+        try:
+            parsed[quantity] = parsers[quantity]()
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.debug('Could not parse {0} from {1}, got: {2}'.format(quantity, path, e))
+    if save and parsed:
+        parser.save_parsed_output(path)
+    return parsed
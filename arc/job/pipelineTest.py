@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.pipeline module
+"""
+
+import os
+import shutil
+import unittest
+from types import SimpleNamespace
+
+from arc.exceptions import ServerUnavailableError
+from arc.job.pipeline import CompletionPipeline, parse_output
+from arc.parser import get_sidecar_path
+from arc.settings import arc_path
+
+
+class TestCompletionPipeline(unittest.TestCase):
+    """
+    Contains unit tests for the CompletionPipeline class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        # completed jobs' outputs are copied, since sidecar files are saved next to them
+        cls.scratch_path = os.path.join(arc_path, 'scratch_pipeline')
+        if not os.path.isdir(cls.scratch_path):
+            os.makedirs(cls.scratch_path)
+        cls.c2h6_path = os.path.join(cls.scratch_path, 'C2H6_freq_QChem.out')
+        cls.conformer_path = os.path.join(cls.scratch_path, 'methylamine_conformer_0.out')
+        for path in [cls.c2h6_path, cls.conformer_path]:
+            shutil.copyfile(os.path.join(arc_path, 'arc', 'testing', os.path.basename(path)), path)
+
+    def get_job(self, job_name, job_type, path, status='done', conformer=-1, error=None):
+        """A helper function for creating a job-like object which determines its status"""
+        job = SimpleNamespace(job_name=job_name, job_type=job_type, conformer=conformer, software='qchem',
+                              local_path_to_output_file=path, job_status=['initializing', {'status': 'initializing'}])
+
+        def determine_job_status():
+            if error is not None:
+                raise error
+            job.job_status = ['done', {'status': status}]
+
+        job.determine_job_status = determine_job_status
+        return job
+
+    def test_parse_output(self):
+        """Test parsing the quantities needed by completion handlers"""
+        parsed = parse_output(path=self.c2h6_path, software='qchem', quantities=['frequencies'])
+        self.assertEqual(len(parsed['frequencies']), 18)
+        self.assertAlmostEqual(parsed['frequencies'][0], 352.37)
+        # quantities which could not be parsed are omitted, unless errors should be raised
+        parsed = parse_output(path=os.path.join(arc_path, 'no_such_file.out'), software='qchem',
+                              quantities=['xyz', 'frequencies'])
+        self.assertEqual(parsed, dict())
+        with self.assertRaises(Exception):
+            parse_output(path=os.path.join(arc_path, 'no_such_file.out'), software='qchem',
+                         quantities=['frequencies'], raise_errors=True)
+
+    def test_process_job(self):
+        """Test determining the status of a completed job and parsing its output"""
+        with CompletionPipeline(io_workers=2, parse_workers=0) as pipeline:
+            error, parsed = pipeline.process_job(self.get_job('freq_a1', 'freq', self.c2h6_path))
+            self.assertIsNone(error)
+            self.assertEqual(list(parsed.keys()), ['frequencies'])
+            # the parsed quantities are persisted for later sessions
+            self.assertTrue(os.path.isfile(get_sidecar_path(self.c2h6_path)))
+            # a conformer job is parsed by the conformer handler, regardless of its job type
+            error, parsed = pipeline.process_job(self.get_job('opt_a2', 'opt', self.conformer_path, conformer=0))
+            self.assertEqual(sorted(parsed.keys()), ['e_elect', 'xyz'])
+            # errored jobs are not parsed
+            error, parsed = pipeline.process_job(self.get_job('freq_a3', 'freq', self.c2h6_path, status='errored'))
+            self.assertEqual((error, parsed), (None, dict()))
+            # errors determining the job status are handed over to the Scheduler
+            server_error = ServerUnavailableError('server1 is unavailable')
+            error, parsed = pipeline.process_job(self.get_job('freq_a4', 'freq', self.c2h6_path, error=server_error))
+            self.assertIs(error, server_error)
+            self.assertEqual(parsed, dict())
+
+    def test_process_jobs(self):
+        """Test concurrently post-processing completed jobs"""
+        jobs = [('C2H6', 'freq_a{0}'.format(i), self.get_job('freq_a{0}'.format(i), 'freq', self.c2h6_path))
+                for i in range(5)]
+        with CompletionPipeline(io_workers=3, parse_workers=0) as pipeline:
+            results = list(pipeline.process_jobs(jobs))
+            self.assertEqual(list(pipeline.process_jobs(list())), list())
+        self.assertEqual(sorted(result[1] for result in results), ['freq_a{0}'.format(i) for i in range(5)])
+        for label, job_name, error, parsed in results:
+            self.assertEqual(label, 'C2H6')
+            self.assertIsNone(error)
+            self.assertEqual(len(parsed['frequencies']), 18)
+        self.assertIsNone(pipeline.io_executor)
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        shutil.rmtree(cls.scratch_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for placing jobs on servers.
+
+When several servers are listed for an ESS in ``ess_settings``, a job is placed on the server with the lowest expected
+completion time instead of always on the first listed server. The expected completion time of a job on a server is
+its expected turnaround (from submission to termination, i.e., including the typical queue wait) times the number of
+"rounds" the server needs to first drain ARC's pending jobs on it::
+
+    expected completion time = turnaround * (1 + pending / max(running, 1))
+
+The running and pending job counts are taken from the shared queue snapshot (a single queue query per server).
+The turnaround is the mean of recent completed jobs of the same type on that server, recorded in the job ledger.
+Servers without enough history are estimated from the job type's history on all servers (in CPU time, scaled by
+the server's node ``cpus``), or from ``placement_default_run_time`` if the job type was never run.
+Servers whose nodes don't have enough memory for the job, and servers which are currently unavailable, are
+only used if no other server could be used.
+"""
+
+import time
+
+from arc.common import get_logger
+from arc.exceptions import ServerError
+from arc.job.executor import is_local_executor
+from arc.job.ledger import get_run_time_seconds, job_ledger
+from arc.job.retry import circuit_breakers
+from arc.job.snapshot import queue_snapshot
+from arc.settings import servers, load_aware_placement, placement_history_size, placement_min_history, \
+    placement_default_run_time, placement_history_max_age
+
+
+logger = get_logger()
+
+# The number of cpus assumed for servers not specifying 'cpus' (as in Job.set_cpu_and_mem())
+default_cpus = 8
+
+
+class PlacementEngine(object):
+    """
+    Chooses the server on which each job is executed.
+
+    Args:
+        ledger (JobLedger, optional): The job ledger to read the turnaround history from.
+        snapshot (QueueSnapshot, optional): The queue snapshot to read the server loads from.
+
+    Attributes:
+        ledger (JobLedger): The job ledger to read the turnaround history from.
+        snapshot (QueueSnapshot): The queue snapshot to read the server loads from.
+        history (dict): Keys are job types, values are dictionaries with a 'timestamp' (float),
+                        the recent turnaround times (in seconds) per server ('servers', a dictionary),
+                        and the mean turnaround in CPU seconds on all servers ('cpu_seconds', ``None`` if unknown).
+        placed (dict): Keys are servers, values are [snapshot timestamp, number of jobs placed since the snapshot].
+    """
+    def __init__(self, ledger=None, snapshot=None):
+        self.ledger = ledger if ledger is not None else job_ledger
+        self.snapshot = snapshot if snapshot is not None else queue_snapshot
+        self.history = dict()
+        self.placed = dict()
+
+    def get_history(self, job_type):
+        """
+        Get the turnaround statistics of a job type, re-reading the job ledger only if they are stale.
+
+        Args:
+            job_type (str): The job type.
+
+        Returns:
+            dict: The turnaround statistics.
+        """
+        if job_type in self.history and time.time() - self.history[job_type]['timestamp'] <= placement_history_max_age:
+            return self.history[job_type]
+        turnarounds = dict()
+        for row in self.ledger.get_jobs(table='completed_jobs', job_type=job_type, server_status='done',
+                                        ess_status='done'):
+            run_time = get_run_time_seconds(row['run_time'])
+            if run_time:  # jobs hydrated from the computation cache have no run time
+                turnarounds.setdefault(row['server'], list()).append(run_time)
+        turnarounds = {server: times[-placement_history_size:] for server, times in turnarounds.items()}
+        cpu_seconds = [run_time * get_server_cpus(server)
+                       for server, times in turnarounds.items() for run_time in times]
+        self.history[job_type] = {'timestamp': time.time(),
+                                  'servers': turnarounds,
+                                  'cpu_seconds': sum(cpu_seconds) / len(cpu_seconds) if cpu_seconds else None}
+        return self.history[job_type]
+
+    def get_turnaround(self, job_type, server):
+        """
+        Estimate the turnaround time of a job on a server.
+
+        Args:
+            job_type (str): The job type.
+            server (str): The server name.
+
+        Returns:
+            float: The turnaround time in seconds.
+        """
+        history = self.get_history(job_type)
+        times = history['servers'].get(server, list())
+        if len(times) >= placement_min_history:
+            return sum(times) / len(times)
+        cpu_seconds = history['cpu_seconds'] if history['cpu_seconds'] is not None \
+            else placement_default_run_time * default_cpus
+        return cpu_seconds / get_server_cpus(server)
+
+    def get_load(self, server):
+        """
+        Get the number of running and pending jobs on a server,
+        including the jobs placed on it since the queue snapshot was taken.
+
+        Args:
+            server (str): The server name.
+
+        Returns:
+            tuple: The numbers of running and pending jobs, ``None`` if the server queue could not be queried.
+        """
+        load = self.snapshot.get_queue_load(server)
+        if load is None:
+            return None
+        running, pending = load
+        if is_local_executor(server):
+            # the local executor's load is always up to date
+            return running, pending
+        timestamp = self.snapshot.snapshots.get(server, dict()).get('timestamp', None)
+        if server in self.placed and self.placed[server][0] == timestamp:
+            pending += self.placed[server][1]
+        return running, pending
+
+    def get_expected_completion_time(self, job_type, server):
+        """
+        Estimate the time until a job submitted now to a server terminates.
+
+        Args:
+            job_type (str): The job type.
+            server (str): The server name.
+
+        Returns:
+            float: The expected completion time in seconds, ``None`` if the server queue could not be queried.
+        """
+        load = self.get_load(server)
+        if load is None:
+            return None
+        running, pending = load
+        return self.get_turnaround(job_type, server) * (1 + pending / max(running, 1))
+
+    def choose_server(self, job, candidates):
+        """
+        Choose the server with the lowest expected completion time for a job.
+
+        Args:
+            job (Job): The job object, its ``job_type`` and ``total_job_memory_gb`` are considered.
+            candidates (list): The names of the servers on which the job's ESS is available, by preference.
+
+        Returns:
+            str: The chosen server.
+        """
+        if not load_aware_placement or len(candidates) == 1:
+            return candidates[0]
+        memory = job.total_job_memory_gb or 0
+        eligible = [server for server in candidates if servers.get(server, dict()).get('memory', None) is None
+                    or servers[server]['memory'] >= memory] or candidates
+        eligible = [server for server in eligible if circuit_breakers.is_available(server)] or eligible
+        times = dict()
+        for server in eligible:
+            try:
+                expected_time = self.get_expected_completion_time(job.job_type, server)
+            except (IOError, ServerError) as e:
+                logger.debug('Could not query the queue of {0} for placing job {1}, got: {2}'.format(
+                    server, job.job_name, e))
+                continue
+            if expected_time is not None:
+                times[server] = expected_time
+        if not times:
+            return eligible[0]
+        # ties are broken by the order of the candidates
+        server = min(times.keys(), key=lambda s: (times[s], candidates.index(s)))
+        timestamp = self.snapshot.snapshots.get(server, dict()).get('timestamp', None)
+        if server not in self.placed or self.placed[server][0] != timestamp:
+            self.placed[server] = [timestamp, 0]
+        self.placed[server][1] += 1
+        logger.debug('Placing job {0} on {1}, expected completion times: {2}'.format(
+            job.job_name, server, ', '.join('{0}: {1:.0f} s'.format(s, t) for s, t in times.items())))
+        return server
+
+
+def get_server_cpus(server):
+    """
+    Get the number of cpus per node of a server.
+
+    Args:
+        server (str): The server name.
+
+    Returns:
+        int: The number of cpus.
+    """
+    return servers.get(server, dict()).get('cpus', None) or default_cpus
+
+
+# The process-wide placement engine
+placement_engine = PlacementEngine()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.placement module
+"""
+
+import datetime
+import os
+import shutil
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from arc.job.ledger import JobLedger
+from arc.job.placement import PlacementEngine
+from arc.job.snapshot import QueueSnapshot
+from arc.settings import arc_path
+
+
+class TestPlacementEngine(unittest.TestCase):
+    """
+    Contains unit tests for the PlacementEngine class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.scratch_path = os.path.join(arc_path, 'scratch_placement')
+        if not os.path.isdir(cls.scratch_path):
+            os.makedirs(cls.scratch_path)
+        cls.oge_header = ['job-ID  prior   name       user         state submit/start at     queue        slots',
+                          '-------------------------------------------------------------------------------------']
+        cls.slurm_header = ['  JOBID PARTITION     NAME     USER ST       TIME  NODES NODELIST(REASON)']
+
+    def setUp(self):
+        """
+        A method that is run before each unit test in this class.
+        """
+        path = os.path.join(self.scratch_path, 'job_ledger.db')
+        if os.path.isfile(path):
+            os.remove(path)
+        self.ledger = JobLedger(path=path)
+        self.snapshot = QueueSnapshot(max_age=100)
+        self.set_queue(server1_running=0, server1_pending=0, server2_running=0, server2_pending=0)
+        self.engine = PlacementEngine(ledger=self.ledger, snapshot=self.snapshot)
+        self.job = SimpleNamespace(job_name='opt_a100', job_type='opt', total_job_memory_gb=14)
+
+    def set_queue(self, server1_running, server1_pending, server2_running, server2_pending):
+        """A helper function for setting the snapshots of the server queues"""
+        stdout1 = self.oge_header \
+            + [' 5883{0:02d} 0.45451 a{0}  alongd  r   05/07/2019 16:24:31 long3@node67.cluster  48'.format(i)
+               for i in range(server1_running)] \
+            + [' 5884{0:02d} 0.00000 a{0}  alongd  qw  05/07/2019 16:24:30  48'.format(i)
+               for i in range(server1_pending)]
+        stdout2 = self.slurm_header \
+            + ['  143{0:02d}     long    a{0}   alongd  R       0:04      1 node06'.format(i)
+               for i in range(server2_running)] \
+            + ['  144{0:02d}     long    a{0}   alongd PD       0:00      1 (Resources)'.format(i)
+               for i in range(server2_pending)]
+        for server, stdout in [('server1', stdout1), ('server2', stdout2)]:
+            self.snapshot.snapshots[server] = {'timestamp': time.time(), 'stdout': stdout, 'job_ids': set()}
+
+    def record_jobs(self, server, run_time, number=3, job_type='opt'):
+        """A helper function for recording completed jobs in the ledger"""
+        for _ in range(number):
+            self.ledger.record_completed_job({'job_type': job_type, 'server': server, 'server_status': 'done',
+                                              'ess_status': 'done',
+                                              'run_time': datetime.timedelta(seconds=run_time)})
+
+    def test_get_turnaround(self):
+        """Test estimating turnaround times from the ledger history"""
+        # no history: the default run time of an 8-core job, scaled by the node cpus (server2 has 48)
+        self.assertEqual(self.engine.get_turnaround('opt', 'server1'), 3600)
+        self.assertEqual(self.engine.get_turnaround('opt', 'server2'), 600)
+        self.record_jobs(server='server1', run_time=1000)
+        self.record_jobs(server='server1', run_time=2000, number=1, job_type='freq')
+        self.engine.history = dict()
+        self.assertEqual(self.engine.get_turnaround('opt', 'server1'), 1000)
+        # server2 has no history, estimated from the CPU time on server1
+        self.assertEqual(self.engine.get_turnaround('opt', 'server2'), 1000 * 8 / 48)
+        self.record_jobs(server='server2', run_time=5000)
+        # the history is only re-read from the ledger when stale
+        self.assertEqual(self.engine.get_turnaround('opt', 'server2'), 1000 * 8 / 48)
+        self.engine.history = dict()
+        self.assertEqual(self.engine.get_turnaround('opt', 'server2'), 5000)
+
+    @mock.patch('arc.job.placement.load_aware_placement', True)
+    def test_choose_server(self):
+        """Test choosing the server with the lowest expected completion time"""
+        self.record_jobs(server='server1', run_time=1000)
+        self.record_jobs(server='server2', run_time=1000)
+        self.assertEqual(self.engine.choose_server(self.job, ['server1', 'server2']), 'server1')
+        self.assertEqual(self.engine.choose_server(self.job, ['server2', 'server1']), 'server2')
+        self.engine.placed = dict()
+        # a long queue on server1
+        self.set_queue(server1_running=2, server1_pending=10, server2_running=1, server2_pending=0)
+        self.assertEqual(self.engine.get_load('server1'), (2, 10))
+        self.assertEqual(self.engine.get_expected_completion_time('opt', 'server1'), 6000)
+        self.assertEqual(self.engine.choose_server(self.job, ['server1', 'server2']), 'server2')
+        # jobs placed since the snapshot was taken are accounted for
+        self.assertEqual(self.engine.get_load('server2'), (1, 1))
+        placements = [self.engine.choose_server(self.job, ['server1', 'server2']) for _ in range(6)]
+        # server2 is preferred until its expected completion time reaches that of server1 (6000 s)
+        self.assertEqual(placements, ['server2'] * 4 + ['server1', 'server2'])
+        # a new snapshot resets the placed jobs count
+        self.set_queue(server1_running=0, server1_pending=0, server2_running=0, server2_pending=0)
+        self.assertEqual(self.engine.get_load('server2'), (0, 0))
+
+    @mock.patch('arc.job.placement.load_aware_placement', True)
+    def test_choose_server_by_memory(self):
+        """Test that servers with nodes too small for the job are avoided"""
+        self.job.total_job_memory_gb = 200
+        self.assertEqual(self.engine.choose_server(self.job, ['server2', 'server1']), 'server1')
+        self.job.total_job_memory_gb = 14
+        self.assertEqual(self.engine.choose_server(self.job, ['server1', 'server2']), 'server2')
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        shutil.rmtree(cls.scratch_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for predicting the resources of jobs from the history of completed jobs.
+
+Before a job is submitted, its cores, memory, and maximal run time are sized from the successfully completed jobs of
+the same type and ESS recorded in the job ledger, preferably at the same level of theory.
+The CPU time of these jobs (the wall time reported by the ESS, which excludes the time spent in the queue, times the
+cores) is fitted by a power law in the number of heavy atoms,
+``log(cpu_hours) = a + b * log(heavy_atoms + 1)``, and the upper estimate ``exp(fit + 2 * residual_std)`` is used.
+
+- The maximal run time is the upper estimate times ``job_size_prediction_walltime_factor``,
+  but never longer than the requested ``max_job_time``.
+- Jobs expected to be short request fewer cores (down to ``job_size_prediction_min_cpus``),
+  as long as they are expected to finish within ``job_size_prediction_target_run_time``.
+- If similar jobs only succeeded after their memory was increased, the job starts with that memory.
+
+Jobs without enough history keep the requested resources.
+"""
+
+import math
+import time
+
+from arc.common import get_logger
+from arc.job.ledger import job_ledger
+from arc.settings import job_size_prediction, job_size_prediction_min_samples, job_size_prediction_walltime_factor, \
+    job_size_prediction_target_run_time, job_size_prediction_min_cpus, job_size_prediction_history_max_age
+
+
+logger = get_logger()
+
+
+class JobSizePredictor(object):
+    """
+    Predicts the resources of jobs from the job ledger.
+
+    Args:
+        ledger (JobLedger, optional): The job ledger to read the history from.
+
+    Attributes:
+        ledger (JobLedger): The job ledger to read the history from.
+        samples (dict): Keys are (job type, software) tuples, values are dictionaries with a 'timestamp' (float)
+                        and the 'samples' (list) of successfully completed jobs.
+    """
+    def __init__(self, ledger=None):
+        self.ledger = ledger if ledger is not None else job_ledger
+        self.samples = dict()
+
+    def get_samples(self, job_type, software):
+        """
+        Get the successfully completed jobs of a type and ESS, re-reading the job ledger only if they are stale.
+
+        Args:
+            job_type (str): The job type.
+            software (str): The ESS.
+
+        Returns:
+            list: Entries are dictionaries with the 'method', 'basis_set', 'n_heavy_atoms', 'cpu_hours', 'memory',
+                  and whether the memory was increased by troubleshooting ('memory_trsh').
+        """
+        key = (job_type, software)
+        if key in self.samples and time.time() - self.samples[key]['timestamp'] <= job_size_prediction_history_max_age:
+            return self.samples[key]['samples']
+        samples = list()
+        for row in self.ledger.get_jobs(table='completed_jobs', job_type=job_type, software=software,
+                                        server_status='done', ess_status='done'):
+            if not row['ess_run_time'] or row['n_heavy_atoms'] is None or not row['cpus']:
+                # jobs hydrated from the computation cache have no run time, earlier jobs have no size information
+                continue
+            run_time = float(row['ess_run_time'])
+            samples.append({'method': row['method'],
+                            'basis_set': row['basis_set'],
+                            'n_heavy_atoms': int(row['n_heavy_atoms']),
+                            'cpu_hours': run_time * int(row['cpus']) / 3600,
+                            'memory': float(row['memory']) if row['memory'] is not None else None,
+                            'memory_trsh': 'memory' in (row['ess_trsh_methods'] or ''),
+                            })
+        self.samples[key] = {'timestamp': time.time(), 'samples': samples}
+        return samples
+
+    def predict(self, job):
+        """
+        Predict the resources of a job.
+
+        Args:
+            job (Job): The job object.
+
+        Returns:
+            dict: The upper estimate of the 'cpu_hours' and the required 'memory' (in GB, ``None`` if not known).
+                  ``None`` if there isn't enough history or if prediction is disabled.
+        """
+        if not job_size_prediction or job.xyz is None or 'walltime' in job.ess_trsh_methods:
+            # a job which previously exceeded its predicted run time keeps the requested resources
+            return None
+        samples = self.get_samples(job.job_type, job.software)
+        level_samples = [sample for sample in samples
+                         if sample['method'] == job.method and sample['basis_set'] == job.basis_set]
+        samples = level_samples if len(level_samples) >= job_size_prediction_min_samples else samples
+        if len(samples) < job_size_prediction_min_samples:
+            return None
+        cpu_hours = fit_power_law(x=[sample['n_heavy_atoms'] for sample in samples],
+                                  y=[sample['cpu_hours'] for sample in samples],
+                                  x0=get_number_of_heavy_atoms(job.xyz))
+        memories = [sample['memory'] for sample in samples if sample['memory_trsh'] and sample['memory'] is not None]
+        return {'cpu_hours': cpu_hours, 'memory': max(memories) if memories else None}
+
+
+def get_cpu_cores(predicted_size, max_cpu_cores):
+    """
+    Get the number of cores a job should request.
+
+    Args:
+        predicted_size (dict): The predicted resources of the job.
+        max_cpu_cores (int): The number of cores the job would otherwise request.
+
+    Returns:
+        int: The number of cores.
+    """
+    cpu_cores = max_cpu_cores
+    while cpu_cores // 2 >= job_size_prediction_min_cpus \
+            and predicted_size['cpu_hours'] / (cpu_cores // 2) <= job_size_prediction_target_run_time:
+        cpu_cores //= 2
+    return cpu_cores
+
+
+def get_max_job_time(predicted_size, cpu_cores, max_job_time):
+    """
+    Get the maximal run time a job should request.
+
+    Args:
+        predicted_size (dict): The predicted resources of the job.
+        cpu_cores (int): The number of cores the job requests.
+        max_job_time (int): The maximal run time requested for the job in hours.
+
+    Returns:
+        int: The maximal run time in hours.
+    """
+    hours = math.ceil(predicted_size['cpu_hours'] / cpu_cores * job_size_prediction_walltime_factor)
+    return max(min(hours, max_job_time), 1)
+
+
+def fit_power_law(x, y, x0):
+    """
+    Fit ``log(y) = a + b * log(x + 1)`` by least squares and get the upper estimate at ``x0``
+    (the fit plus two residual standard deviations).
+
+    Args:
+        x (list): The numbers of heavy atoms.
+        y (list): The respective positive values.
+        x0 (int): The number of heavy atoms to estimate at.
+
+    Returns:
+        float: The upper estimate.
+    """
+    log_x = [math.log(xi + 1) for xi in x]
+    log_y = [math.log(yi) for yi in y]
+    n = len(log_x)
+    mean_x, mean_y = sum(log_x) / n, sum(log_y) / n
+    variance_x = sum((xi - mean_x) ** 2 for xi in log_x)
+    slope = sum((xi - mean_x) * (yi - mean_y) for xi, yi in zip(log_x, log_y)) / variance_x if variance_x else 0.0
+    intercept = mean_y - slope * mean_x
+    residuals = [yi - (intercept + slope * xi) for xi, yi in zip(log_x, log_y)]
+    std = math.sqrt(sum(r ** 2 for r in residuals) / max(n - 2, 1))
+    return math.exp(intercept + slope * math.log(x0 + 1) + 2 * std)
+
+
+def get_number_of_heavy_atoms(xyz):
+    """
+    Get the number of heavy atoms (non-hydrogen isotopes) in a geometry.
+
+    Args:
+        xyz (dict): The ARC xyz dictionary.
+
+    Returns:
+        int: The number of heavy atoms, ``None`` if the geometry is not known.
+    """
+    if xyz is None:
+        return None
+    return sum(1 for symbol in xyz['symbols'] if symbol not in ['H', 'D', 'T'])
+
+
+# The process-wide job size predictor
+job_size_predictor = JobSizePredictor()
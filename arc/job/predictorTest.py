@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.predictor module
+"""
+
+import datetime
+import os
+import shutil
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from arc.job.ledger import JobLedger
+from arc.job.predictor import JobSizePredictor, fit_power_law, get_cpu_cores, get_max_job_time, \
+    get_number_of_heavy_atoms
+from arc.settings import arc_path
+
+
+class TestJobSizePredictor(unittest.TestCase):
+    """
+    Contains unit tests for the JobSizePredictor class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.scratch_path = os.path.join(arc_path, 'scratch_predictor')
+        if not os.path.isdir(cls.scratch_path):
+            os.makedirs(cls.scratch_path)
+
+    def setUp(self):
+        """
+        A method that is run before each unit test in this class.
+        """
+        path = os.path.join(self.scratch_path, 'job_ledger.db')
+        if os.path.isfile(path):
+            os.remove(path)
+        self.ledger = JobLedger(path=path)
+        self.predictor = JobSizePredictor(ledger=self.ledger)
+
+    def get_job(self, heavy_atoms, method='b3lyp', basis_set='6-31g', ess_trsh_methods=None):
+        """A helper function for creating a job-like object with a number of carbon atoms"""
+        xyz = {'symbols': ('C',) * heavy_atoms + ('H', 'H'), 'isotopes': (12,) * heavy_atoms + (1, 1),
+               'coords': ((0.0, 0.0, 0.0),) * (heavy_atoms + 2)}
+        return SimpleNamespace(job_type='opt', software='gaussian', method=method, basis_set=basis_set, xyz=xyz,
+                               ess_trsh_methods=ess_trsh_methods or list())
+
+    def record_job(self, heavy_atoms, hours, cpus=8, method='b3lyp', memory=14, ess_trsh_methods=None, reported=True):
+        """A helper function for recording a successfully completed job (which waited an hour in the queue)"""
+        self.ledger.record_completed_job({'job_type': 'opt', 'software': 'gaussian', 'method': method,
+                                          'basis_set': '6-31g', 'n_heavy_atoms': heavy_atoms, 'cpus': cpus,
+                                          'memory': memory, 'server_status': 'done', 'ess_status': 'done',
+                                          'run_time': datetime.timedelta(hours=hours + 1),
+                                          'ess_run_time': hours * 3600 if reported else None,
+                                          'ess_trsh_methods': ess_trsh_methods or list()})
+
+    def test_get_number_of_heavy_atoms(self):
+        """Test counting heavy atoms"""
+        self.assertEqual(get_number_of_heavy_atoms(self.get_job(heavy_atoms=3).xyz), 3)
+        self.assertIsNone(get_number_of_heavy_atoms(None))
+
+    def test_fit_power_law(self):
+        """Test fitting the CPU time to the number of heavy atoms"""
+        # cpu_hours = (heavy_atoms + 1) ** 2, an exact fit has no residuals
+        self.assertAlmostEqual(fit_power_law(x=[1, 3, 7], y=[4, 16, 64], x0=15), 256)
+        # a single molecule size gives the mean (in log space) plus the spread
+        self.assertAlmostEqual(fit_power_law(x=[2, 2], y=[1, 1], x0=5), 1)
+        self.assertGreater(fit_power_law(x=[2, 2, 2], y=[1, 2, 4], x0=2), 4)
+
+    @mock.patch('arc.job.predictor.job_size_prediction', True)
+    def test_predict(self):
+        """Test predicting the resources of a job"""
+        self.assertIsNone(self.predictor.predict(self.get_job(heavy_atoms=3)))
+        for heavy_atoms in [1, 3, 7, 1, 3]:
+            # the run time of jobs whose ESS did not report it includes the queue wait, they are not used
+            self.record_job(heavy_atoms=heavy_atoms, hours=1, reported=False)
+        self.assertIsNone(self.predictor.predict(self.get_job(heavy_atoms=3)))
+        for heavy_atoms in [1, 3, 7, 1, 3]:
+            # (heavy_atoms + 1) ** 2 / 8 hours on 8 cores
+            self.record_job(heavy_atoms=heavy_atoms, hours=(heavy_atoms + 1) ** 2 / 8)
+        self.predictor.samples = dict()
+        size = self.predictor.predict(self.get_job(heavy_atoms=15))
+        self.assertAlmostEqual(size['cpu_hours'], 256, places=2)
+        self.assertIsNone(size['memory'])
+        # jobs at another level of theory use all samples of the job type and ESS
+        self.assertAlmostEqual(self.predictor.predict(self.get_job(heavy_atoms=15, method='wb97xd'))['cpu_hours'],
+                               256, places=2)
+        # jobs which previously exceeded their predicted run time are not sized
+        self.assertIsNone(self.predictor.predict(self.get_job(heavy_atoms=15, ess_trsh_methods=['walltime'])))
+
+        for _ in range(5):
+            self.record_job(heavy_atoms=3, hours=4, method='wb97xd', memory=28, ess_trsh_methods=['memory'])
+        self.predictor.samples = dict()
+        size = self.predictor.predict(self.get_job(heavy_atoms=3, method='wb97xd'))
+        self.assertAlmostEqual(size['cpu_hours'], 32, places=2)
+        self.assertEqual(size['memory'], 28)
+
+    def test_get_cpu_cores_and_max_job_time(self):
+        """Test sizing the cores and the maximal run time of a job"""
+        self.assertEqual(get_cpu_cores({'cpu_hours': 4}, max_cpu_cores=48), 6)
+        self.assertEqual(get_cpu_cores({'cpu_hours': 0.1}, max_cpu_cores=48), 6)
+        self.assertEqual(get_cpu_cores({'cpu_hours': 0.1}, max_cpu_cores=8), 4)
+        self.assertEqual(get_cpu_cores({'cpu_hours': 200}, max_cpu_cores=48), 48)
+        self.assertEqual(get_max_job_time({'cpu_hours': 24}, cpu_cores=6, max_job_time=120), 8)
+        self.assertEqual(get_max_job_time({'cpu_hours': 0.1}, cpu_cores=6, max_job_time=120), 1)
+        self.assertEqual(get_max_job_time({'cpu_hours': 4800}, cpu_cores=8, max_job_time=120), 120)
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        shutil.rmtree(cls.scratch_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
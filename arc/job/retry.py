@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for retrying server communication without freezing the Scheduler.
+
+Failed server operations are retried a few times with a jittered exponential backoff (``RetryPolicy``).
+If an operation still fails, the server's circuit breaker opens: further operations on that server fail immediately
+with a ``ServerUnavailableError`` (without waiting), so the Scheduler defers only the jobs of that server and keeps
+working on jobs on other servers. Once the (growing) reset timeout elapses, operations are allowed again;
+the first success closes the breaker, and another failure re-opens it.
+"""
+
+import random
+import threading
+import time
+
+from arc.common import get_logger
+from arc.exceptions import ServerError, ServerUnavailableError
+from arc.settings import server_retry_max_attempts, server_retry_base_delay, server_retry_max_delay, \
+    server_circuit_reset_timeout, server_circuit_max_reset_timeout
+
+
+logger = get_logger()
+
+
+class RetryPolicy(object):
+    """
+    A retry policy with a jittered exponential backoff.
+
+    Args:
+        max_attempts (int, optional): The maximal number of attempts of an operation.
+        base_delay (float, optional): The delay (in seconds) before the first retry, before applying jitter.
+        max_delay (float, optional): The maximal delay (in seconds) between attempts.
+
+    Attributes:
+        max_attempts (int): The maximal number of attempts of an operation.
+        base_delay (float): The delay (in seconds) before the first retry, before applying jitter.
+        max_delay (float): The maximal delay (in seconds) between attempts.
+    """
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None):
+        self.max_attempts = max_attempts if max_attempts is not None else server_retry_max_attempts
+        self.base_delay = base_delay if base_delay is not None else server_retry_base_delay
+        self.max_delay = max_delay if max_delay is not None else server_retry_max_delay
+
+    def get_delay(self, attempt):
+        """
+        Get the delay before the next attempt, doubled after each attempt with a random jitter of up to 50%
+        (so that several operations failing together don't retry in lockstep).
+
+        Args:
+            attempt (int): The 0-indexed number of the attempt that just failed.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+
+class CircuitBreaker(object):
+    """
+    A per-server circuit breaker.
+
+    Args:
+        server (str): The server name.
+        reset_timeout (float, optional): The time (in seconds) the breaker stays open after the first failure.
+        max_reset_timeout (float, optional): The maximal time (in seconds) the breaker stays open,
+                                             the reset timeout doubles after each consecutive failure.
+
+    Attributes:
+        server (str): The server name.
+        reset_timeout (float): The time (in seconds) the breaker stays open after the first failure.
+        max_reset_timeout (float): The maximal time (in seconds) the breaker stays open.
+        failures (int): The number of consecutive failed operations.
+        open_until (float): The time (since the epoch) at which operations are allowed again,
+                            ``None`` if the breaker is closed.
+    """
+    def __init__(self, server, reset_timeout=None, max_reset_timeout=None):
+        self.server = server
+        self.reset_timeout = reset_timeout if reset_timeout is not None else server_circuit_reset_timeout
+        self.max_reset_timeout = max_reset_timeout if max_reset_timeout is not None \
+            else server_circuit_max_reset_timeout
+        self.failures = 0
+        self.open_until = None
+        self.lock = threading.Lock()
+
+    def is_available(self):
+        """
+        Check whether operations on the server are allowed (the breaker is closed, or its reset timeout elapsed).
+
+        Returns:
+            bool: Whether operations are allowed.
+        """
+        return self.open_until is None or time.time() >= self.open_until
+
+    def record_success(self):
+        """
+        Close the breaker after a successful operation.
+        """
+        with self.lock:
+            if self.open_until is not None:
+                logger.info('Server {0} is available again.'.format(self.server))
+            self.failures = 0
+            self.open_until = None
+
+    def record_failure(self):
+        """
+        Open the breaker after a failed operation, for a jittered timeout which doubles with each consecutive failure.
+        """
+        with self.lock:
+            self.failures += 1
+            timeout = min(self.max_reset_timeout, self.reset_timeout * 2 ** (self.failures - 1))
+            timeout *= random.uniform(0.8, 1.2)
+            self.open_until = time.time() + timeout
+            logger.warning('Server {0} is unavailable, deferring its operations for {1:.0f} seconds '
+                           '(consecutive failures: {2}).'.format(self.server, timeout, self.failures))
+
+
+class CircuitBreakerRegistry(object):
+    """
+    The circuit breakers of all servers.
+
+    Attributes:
+        breakers (dict): Keys are server names, values are CircuitBreaker objects.
+    """
+    def __init__(self):
+        self.breakers = dict()
+        self.lock = threading.Lock()
+
+    def get(self, server):
+        """
+        Get the circuit breaker of a server, creating it if needed.
+
+        Args:
+            server (str): The server name.
+
+        Returns:
+            CircuitBreaker: The server's circuit breaker.
+        """
+        with self.lock:
+            if server not in self.breakers:
+                self.breakers[server] = CircuitBreaker(server=server)
+            return self.breakers[server]
+
+    def is_available(self, server):
+        """
+        Check whether operations on a server are allowed.
+
+        Args:
+            server (str): The server name.
+
+        Returns:
+            bool: Whether operations are allowed.
+        """
+        return server not in self.breakers or self.breakers[server].is_available()
+
+
+def call_with_retries(server, func, description, policy=None, exceptions=(IOError, ServerError)):
+    """
+    Call a server operation, retrying it with a jittered exponential backoff if it fails.
+    If all attempts fail, the server's circuit breaker opens.
+
+    Args:
+        server (str): The server name.
+        func (function): The operation, called without arguments.
+        description (str): A description of the operation for logging, e.g., 'download file.out'.
+        policy (RetryPolicy, optional): The retry policy, ``None`` to use the default policy.
+        exceptions (tuple, optional): The exception types considered as a failure of the operation.
+
+    Raises:
+        ServerUnavailableError: If the server's circuit breaker is open, or if all attempts failed.
+
+    Returns:
+        The return value of ``func``.
+    """
+    breaker = circuit_breakers.get(server)
+    if not breaker.is_available():
+        raise ServerUnavailableError('Server {0} is temporarily unavailable, could not {1}.'.format(
+            server, description))
+    policy = policy or retry_policy
+    for attempt in range(policy.max_attempts):
+        try:
+            result = func()
+        except ServerUnavailableError:
+            raise
+        except exceptions as e:
+            if attempt < policy.max_attempts - 1:
+                delay = policy.get_delay(attempt)
+                logger.warning('Could not {0} on {1} (got: {2}), re-trying in {3:.1f} seconds.'.format(
+                    description, server, e, delay))
+                time.sleep(delay)
+            else:
+                logger.error('Could not {0} on {1} after {2} attempts, got: {3}'.format(
+                    description, server, policy.max_attempts, e))
+        else:
+            breaker.record_success()
+            return result
+    breaker.record_failure()
+    raise ServerUnavailableError('Could not {0} on {1}, tried {2} times.'.format(
+        description, server, policy.max_attempts))
+
+
+# The process-wide default retry policy and the circuit breakers of all servers
+retry_policy = RetryPolicy()
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.retry module
+"""
+
+import unittest
+
+from arc.exceptions import ServerError, ServerUnavailableError
+from arc.job.retry import CircuitBreaker, RetryPolicy, call_with_retries, circuit_breakers
+
+
+class TestRetry(unittest.TestCase):
+    """
+    Contains unit tests for the retry policy and the circuit breakers
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.policy = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0)
+
+    def setUp(self):
+        """
+        A method that is run before each unit test in this class.
+        """
+        circuit_breakers.breakers = dict()
+
+    def test_get_delay(self):
+        """Test the jittered exponential backoff"""
+        policy = RetryPolicy(max_attempts=5, base_delay=2, max_delay=10)
+        for _ in range(20):
+            self.assertTrue(1 <= policy.get_delay(0) <= 2)
+            self.assertTrue(4 <= policy.get_delay(2) <= 8)
+            self.assertTrue(5 <= policy.get_delay(4) <= 10)
+
+    def test_circuit_breaker(self):
+        """Test opening and closing a circuit breaker"""
+        breaker = CircuitBreaker(server='server1', reset_timeout=100, max_reset_timeout=300)
+        self.assertTrue(breaker.is_available())
+        breaker.record_failure()
+        self.assertFalse(breaker.is_available())
+        self.assertEqual(breaker.failures, 1)
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.failures, 3)
+        breaker.open_until = 0  # the reset timeout elapsed
+        self.assertTrue(breaker.is_available())
+        breaker.record_success()
+        self.assertEqual(breaker.failures, 0)
+        self.assertIsNone(breaker.open_until)
+
+    def test_call_with_retries(self):
+        """Test retrying a failing server operation"""
+        attempts = list()
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ServerError('connection error')
+            return 'done'
+
+        self.assertEqual(call_with_retries(server='server1', func=flaky, description='run', policy=self.policy),
+                         'done')
+        self.assertEqual(len(attempts), 2)
+        self.assertTrue(circuit_breakers.is_available('server1'))
+
+        def failing():
+            attempts.append(1)
+            raise IOError('connection error')
+
+        attempts = list()
+        with self.assertRaises(ServerUnavailableError):
+            call_with_retries(server='server1', func=failing, description='run', policy=self.policy)
+        self.assertEqual(len(attempts), 3)
+        self.assertFalse(circuit_breakers.is_available('server1'))
+        self.assertTrue(circuit_breakers.is_available('server2'))
+
+        # the breaker is open, the operation should not be attempted at all
+        attempts = list()
+        with self.assertRaises(ServerUnavailableError):
+            call_with_retries(server='server1', func=flaky, description='run', policy=self.policy)
+        self.assertEqual(len(attempts), 0)
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        """
+        circuit_breakers.breakers = dict()
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for simulating a cluster, used to measure the Scheduler's performance offline.
+
+A ``SimulatedCluster`` replaces the SSH connection to a server: once attached, ``SSHClient`` objects of that server
+talk to the simulated cluster through the very same code paths (command execution, SFTP staging and downloads,
+queue status parsing), so every server operation ARC performs is exercised and counted.
+The cluster keeps the remote file system in a local folder, accepts submissions, and runs jobs in virtual time:
+a job waits ``queue_latency`` seconds in the queue, runs for a random time within ``runtime``, and then a
+pre-recorded output file is written to its folder. A ``failure_rate`` fraction of the jobs produce an errored output
+instead (a recorded errored output if available, otherwise a truncated output), exercising the troubleshooting methods.
+Virtual time advances only when ``sleep()`` (or ``advance()``) is called, e.g., instead of the Scheduler's sleep
+between polls.
+"""
+
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+
+from arc.common import get_logger
+from arc.job.ssh import connection_pool, simulated_clusters
+from arc.settings import arc_path, servers, check_status_command, submit_command, delete_command, \
+    list_available_nodes_command, submit_filename, output_filename, array_task_id_variable, array_tasks_filename
+
+
+logger = get_logger()
+
+testing_path = os.path.join(arc_path, 'arc', 'testing')
+
+# Pre-recorded outputs of successful jobs (methylamine), keyed by ESS (and optionally by job type)
+default_outputs = {'gaussian': os.path.join(testing_path, 'trsh', 'gaussian', 'converged.out'),
+                   'qchem': os.path.join(testing_path, 'methylamine_conformer_0.out'),
+                   'molpro': os.path.join(testing_path, 'mehylamine_CCSD(T).out'),
+                   }
+
+# Pre-recorded outputs of errored jobs, keyed by ESS
+default_errored_outputs = {'gaussian': [os.path.join(testing_path, 'trsh', 'gaussian', name)
+                                        for name in ['l301.out', 'l913.out', 'l9999.out', 'syntax.out']],
+                           'molpro': [os.path.join(testing_path, 'trsh', 'molpro', name)
+                                      for name in ['insufficient_memory.out', 'unrecognized_basis_set.out']],
+                           }
+
+
+class SimulatedJob(object):
+    """
+    A job (or an array job task) on the simulated cluster.
+
+    Args:
+        job_id (int, str): The job ID, '<array job ID>_<task ID>' for array job tasks.
+        name (str): The job name on the cluster.
+        folders (list): The remote folders of the ARC jobs executed by this job (several for a packed job).
+        submitted (float): The virtual submission time.
+        start (float): The virtual start time.
+        end (float): The virtual termination time.
+
+    Attributes:
+        job_id (int, str): The job ID, '<array job ID>_<task ID>' for array job tasks.
+        name (str): The job name on the cluster.
+        folders (list): The remote folders of the ARC jobs executed by this job (several for a packed job).
+        submitted (float): The virtual submission time.
+        start (float): The virtual start time.
+        end (float): The virtual termination time.
+        finished (bool): Whether the job terminated and its outputs were written.
+    """
+    def __init__(self, job_id, name, folders, submitted, start, end):
+        self.job_id = job_id
+        self.name = name
+        self.folders = folders
+        self.submitted = submitted
+        self.start = start
+        self.end = end
+        self.finished = False
+
+
+class SimulatedCluster(object):
+    """
+    A simulated cluster standing in for a server.
+
+    Args:
+        server (str): The server name as specified in ARCs's settings file under ``servers`` as a key.
+        queue_latency (float, optional): The time (in virtual seconds) a job waits in the queue.
+        runtime (tuple, optional): The minimal and maximal run time (in virtual seconds) of a job.
+        failure_rate (float, optional): The fraction of jobs which produce an errored output.
+        outputs (dict, optional): Pre-recorded outputs of successful jobs. Keys are ESS, values are either file paths
+                                  or dictionaries with job types (or 'default') as keys and file paths as values.
+        errored_outputs (dict, optional): Pre-recorded outputs of errored jobs. Keys are ESS, values are lists of
+                                          file paths.
+        seed (int, optional): The random seed, for reproducible simulations.
+        root (str, optional): The local folder holding the simulated remote file system,
+                              a temporary folder by default.
+
+    Attributes:
+        server (str): The server name.
+        cluster_soft (str): The simulated cluster software ('OGE' or 'Slurm').
+        queue_latency (float): The time (in virtual seconds) a job waits in the queue.
+        runtime (tuple): The minimal and maximal run time (in virtual seconds) of a job.
+        failure_rate (float): The fraction of jobs which produce an errored output.
+        outputs (dict): Pre-recorded outputs of successful jobs.
+        errored_outputs (dict): Pre-recorded outputs of errored jobs.
+        root (str): The local folder holding the simulated remote file system.
+        clock (float): The virtual time in seconds.
+        jobs (dict): Keys are job IDs, values are SimulatedJob objects.
+        statistics (dict): Counters of the operations performed on the cluster.
+        completion_times (dict): Keys are remote output file paths, values are the virtual termination times of the
+                                 respective jobs.
+        fetch_latencies (list): The virtual times between jobs terminating and first reading their output files.
+    """
+    def __init__(self, server, queue_latency=60, runtime=(600, 3600), failure_rate=0.0, outputs=None,
+                 errored_outputs=None, seed=0, root=None):
+        self.server = server
+        self.cluster_soft = servers[server]['cluster_soft']
+        self.queue_latency = queue_latency
+        self.runtime = runtime
+        self.failure_rate = failure_rate
+        self.outputs = outputs if outputs is not None else default_outputs
+        self.errored_outputs = errored_outputs if errored_outputs is not None else default_errored_outputs
+        self.random = random.Random(seed)
+        self.root = root if root is not None else tempfile.mkdtemp(prefix='arc_simulated_{0}_'.format(server))
+        self.clock = 0.0
+        self.jobs = dict()
+        self.next_job_id = 100000
+        self.lock = threading.RLock()
+        self.statistics = {'connections': 0, 'commands': 0, 'sftp_operations': 0, 'status_queries': 0,
+                           'submitted_jobs': 0, 'completed_jobs': 0, 'errored_jobs': 0}
+        self.completion_times = dict()
+        self.fetch_latencies = list()
+
+    def attach(self):
+        """
+        Route all SSH connections to the server to this simulated cluster.
+        """
+        connection_pool.discard(self.server)
+        simulated_clusters[self.server] = self
+
+    def detach(self):
+        """
+        Stop routing SSH connections to the server to this simulated cluster, and delete its file system.
+        """
+        if simulated_clusters.get(self.server, None) is self:
+            del simulated_clusters[self.server]
+            connection_pool.discard(self.server)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def connect(self):
+        """
+        Open a simulated SSH connection.
+
+        Returns:
+            SimulatedSSHConnection: An object implementing the parts of ``paramiko.SSHClient`` used by ARC.
+        """
+        with self.lock:
+            self.statistics['connections'] += 1
+        return SimulatedSSHConnection(self)
+
+    def get_statistics(self):
+        """
+        Get a summary of the operations performed on the cluster.
+
+        Returns:
+            dict: The operation counters, as well as 'ssh_operations' (connections, commands, and SFTP operations),
+                  'ssh_operations_per_completed_job', and 'mean_fetch_latency' (the mean virtual time between a job
+                  terminating and first reading its output file, ``None`` if no output was read).
+        """
+        with self.lock:
+            statistics = dict(self.statistics)
+            statistics['ssh_operations'] = statistics['connections'] + statistics['commands'] \
+                + statistics['sftp_operations']
+            statistics['ssh_operations_per_completed_job'] = \
+                statistics['ssh_operations'] / statistics['completed_jobs'] if statistics['completed_jobs'] else None
+            statistics['mean_fetch_latency'] = sum(self.fetch_latencies) / len(self.fetch_latencies) \
+                if self.fetch_latencies else None
+            return statistics
+
+    def sleep(self, seconds):
+        """
+        Advance the virtual time instead of sleeping.
+
+        Args:
+            seconds (float): The time to advance.
+        """
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        """
+        Advance the virtual time, terminating jobs which ended by then.
+
+        Args:
+            seconds (float): The time to advance.
+        """
+        with self.lock:
+            self.clock += seconds
+            self.update()
+
+    def update(self):
+        """
+        Write the outputs of all jobs which ended by the current virtual time.
+        """
+        with self.lock:
+            for job in self.jobs.values():
+                if not job.finished and job.end <= self.clock:
+                    for folder in job.folders:
+                        self.write_output(folder, end=job.end)
+                    job.finished = True
+
+    def get_local_path(self, remote_path):
+        """
+        Get the path of a remote file in the simulated file system.
+
+        Args:
+            remote_path (str): The remote path.
+
+        Returns:
+            str: The local path.
+        """
+        return os.path.join(self.root, remote_path.lstrip('/'))
+
+    def write_output(self, folder, end):
+        """
+        Write the output of an ARC job to its remote folder.
+
+        Args:
+            folder (str): The remote folder of the job.
+            end (float): The virtual time at which the job terminated.
+        """
+        software = detect_software(self.get_local_path(folder))
+        if software is None:
+            logger.debug('Could not determine the ESS of the simulated job in {0}'.format(folder))
+            return
+        output_path = self.get_output_source(software, get_job_type(folder))
+        if output_path is None:
+            return
+        remote_output_path = os.path.join(folder, output_filename[software])
+        local_output_path = self.get_local_path(remote_output_path)
+        if self.random.random() < self.failure_rate:
+            self.statistics['errored_jobs'] += 1
+            errored_outputs = self.errored_outputs.get(software, list())
+            if errored_outputs:
+                shutil.copyfile(self.random.choice(errored_outputs), local_output_path)
+            else:
+                # a job which crashed mid-way
+                with open(output_path, 'r') as f:
+                    lines = f.readlines()
+                with open(local_output_path, 'w') as f:
+                    f.writelines(lines[:len(lines) // 2])
+        else:
+            shutil.copyfile(output_path, local_output_path)
+        self.statistics['completed_jobs'] += 1
+        self.completion_times[remote_output_path] = end
+
+    def get_output_source(self, software, job_type):
+        """
+        Get the pre-recorded output of a successful job.
+
+        Args:
+            software (str): The ESS.
+            job_type (str): The job type.
+
+        Returns:
+            str: The path to the pre-recorded output, ``None`` if there is no output for this ESS.
+        """
+        outputs = self.outputs.get(software, None)
+        if isinstance(outputs, dict):
+            outputs = outputs.get(job_type, outputs.get('default', None))
+        return outputs
+
+    def record_file_access(self, remote_path):
+        """
+        Record the latency between a job terminating and first reading its output file.
+
+        Args:
+            remote_path (str): The remote path of the accessed file.
+        """
+        with self.lock:
+            completion_time = self.completion_times.pop(remote_path, None)
+            if completion_time is not None:
+                self.fetch_latencies.append(self.clock - completion_time)
+
+    def submit(self, folder):
+        """
+        Submit the submit script in a remote folder.
+
+        Args:
+            folder (str): The remote folder.
+
+        Returns:
+            str: The cluster's response.
+        """
+        local_folder = self.get_local_path(folder)
+        submit_path = os.path.join(local_folder, submit_filename[self.cluster_soft])
+        if not os.path.isfile(submit_path):
+            return ''
+        with open(submit_path, 'r') as f:
+            submit_script = f.read()
+        name = get_job_name(submit_script, self.cluster_soft) or os.path.basename(folder)
+        tasks_path = os.path.join(local_folder, array_tasks_filename)
+        tasks = list()
+        if os.path.isfile(tasks_path):
+            with open(tasks_path, 'r') as f:
+                tasks = [line.strip() for line in f.readlines() if line.strip()]
+        with self.lock:
+            self.statistics['submitted_jobs'] += 1
+            job_id, self.next_job_id = self.next_job_id, self.next_job_id + 1
+            start = self.clock + self.queue_latency
+            if tasks and array_task_id_variable[self.cluster_soft] in submit_script:
+                # an array job, each task is scheduled independently
+                for i, task_folder in enumerate(tasks):
+                    task_id = '{0}_{1}'.format(job_id, i + 1)
+                    self.jobs[task_id] = SimulatedJob(job_id=task_id, name=name, folders=[task_folder],
+                                                      submitted=self.clock, start=start,
+                                                      end=start + self.random.uniform(*self.runtime))
+                if self.cluster_soft.lower() == 'oge':
+                    return 'Your job-array {0}.1-{1}:1 ("{2}") has been submitted'.format(job_id, len(tasks), name)
+            else:
+                # a regular job, or a packed job running several ARC jobs one after the other
+                folders = tasks or [folder]
+                end = start + sum(self.random.uniform(*self.runtime) for _ in folders)
+                self.jobs[job_id] = SimulatedJob(job_id=job_id, name=name, folders=folders, submitted=self.clock,
+                                                 start=start, end=end)
+            if self.cluster_soft.lower() == 'oge':
+                return 'Your job {0} ("{1}") has been submitted'.format(job_id, name)
+            return 'Submitted batch job {0}'.format(job_id)
+
+    def delete(self, job_id):
+        """
+        Delete a job (or an array job task) from the queue without writing its output.
+
+        Args:
+            job_id (str): The job ID, as given to the delete command.
+        """
+        job_id = job_id.strip().replace(' -t ', '_')
+        with self.lock:
+            for key in [key for key in self.jobs.keys() if str(key) == job_id]:
+                del self.jobs[key]
+
+    def get_queue_status(self):
+        """
+        Get the queue status in the format of the cluster software, listing all pending and running jobs.
+
+        Returns:
+            list: The lines of the status check output.
+        """
+        with self.lock:
+            self.statistics['status_queries'] += 1
+            self.update()
+            un = servers[self.server].get('un', 'user')
+            if self.cluster_soft.lower() == 'oge':
+                lines = ['job-ID  prior   name       user         state submit/start at     queue          '
+                         '                slots ja-task-ID\n', '-' * 120 + '\n']
+            else:
+                lines = ['JOBID PARTITION     NAME     USER ST       TIME  NODES NODELIST(REASON)\n']
+            for job in self.jobs.values():
+                if job.finished:
+                    continue
+                running = job.start <= self.clock
+                array_id, task = str(job.job_id).split('_') if '_' in str(job.job_id) else (job.job_id, '')
+                if self.cluster_soft.lower() == 'oge':
+                    state, queue = ('r', 'long1@node18.cluster') if running else ('qw', '')
+                    lines.append('{0} 0.50000 {1} {2} {3} 10/26/2018 11:08:30 {4} 8 {5}\n'.format(
+                        array_id, job.name, un, state, queue, task))
+                else:
+                    # pending jobs are also reported as running ('R'), as ARC treats unknown states as errors
+                    lines.append('{0} long {1} {2} R 0:04 1 node06\n'.format(job.job_id, job.name, un))
+            return lines
+
+    def execute(self, command):
+        """
+        Execute a command on the simulated cluster.
+        Only the commands used by ARC are simulated, other commands succeed with no output.
+
+        Args:
+            command (str): The command.
+
+        Returns:
+            tuple: The stdout and stderr lines.
+        """
+        with self.lock:
+            self.statistics['commands'] += 1
+        cwd = ''
+        match = re.match(r'cd (\S+); (.*)', command, re.DOTALL)
+        if match is not None:
+            cwd, command = match.group(1), match.group(2)
+        cluster_soft = self.cluster_soft
+        if list_available_nodes_command.get(cluster_soft, None) and command.startswith(
+                list_available_nodes_command[cluster_soft]):
+            return [], []
+        if command.startswith(check_status_command[cluster_soft]):
+            return self.get_queue_status(), []
+        if command.startswith(submit_command[cluster_soft]):
+            response = self.submit(cwd)
+            return ([response + '\n'], []) if response else ([], ['submit script not found\n'])
+        if command.startswith(delete_command[cluster_soft]):
+            self.delete(command[len(delete_command[cluster_soft]):])
+            return [], []
+        if command.startswith('cp '):
+            source, destination = command.split()[1:3]
+            try:
+                shutil.copyfile(self.get_local_path(source), self.get_local_path(destination))
+            except IOError as e:
+                return [], ['cp: {0}\n'.format(e)]
+            return [], []
+        if command.startswith('ls'):
+            local_folder = self.get_local_path(cwd)
+            names = sorted(os.listdir(local_folder)) if os.path.isdir(local_folder) else list()
+            return ['-rw-r--r-- 1 user user 0 Jan 1 00:00 {0}\n'.format(name) for name in names], []
+        return [], []
+
+
+class SimulatedSSHConnection(object):
+    """
+    A simulated SSH connection, implementing the parts of ``paramiko.SSHClient`` used by ARC.
+
+    Args:
+        cluster (SimulatedCluster): The simulated cluster.
+    """
+    def __init__(self, cluster):
+        self.cluster = cluster
+        self.active = True
+
+    def get_transport(self):
+        """Return the (simulated) transport"""
+        return self
+
+    def is_active(self):
+        """Whether the connection is open"""
+        return self.active
+
+    def send_ignore(self):
+        """A keep-alive message"""
+        pass
+
+    def set_keepalive(self, interval):
+        """Set a keep-alive interval"""
+        pass
+
+    def close(self):
+        """Close the connection"""
+        self.active = False
+
+    def exec_command(self, command):
+        """
+        Execute a command on the simulated cluster.
+
+        Args:
+            command (str): The command.
+
+        Returns:
+            tuple: stdin, stdout, and stderr objects.
+        """
+        stdout, stderr = self.cluster.execute(command)
+        return None, SimulatedStream(stdout), SimulatedStream(stderr)
+
+    def open_sftp(self):
+        """
+        Open a simulated SFTP session.
+
+        Returns:
+            SimulatedSFTP: The session.
+        """
+        return SimulatedSFTP(self.cluster)
+
+
+class SimulatedStream(object):
+    """
+    The output stream of a simulated command.
+
+    Args:
+        lines (list): The output lines.
+    """
+    def __init__(self, lines):
+        self.lines = lines
+
+    def readlines(self):
+        """Return the output lines"""
+        return self.lines
+
+
+class SimulatedSFTP(object):
+    """
+    A simulated SFTP session, implementing the parts of ``paramiko.SFTPClient`` used by ARC.
+
+    Args:
+        cluster (SimulatedCluster): The simulated cluster.
+    """
+    def __init__(self, cluster):
+        self.cluster = cluster
+
+    def _count(self):
+        """Count an SFTP operation"""
+        with self.cluster.lock:
+            self.cluster.statistics['sftp_operations'] += 1
+
+    def open(self, remote_path, mode='r'):
+        """Open a remote file"""
+        self._count()
+        if 'r' in mode:
+            self.cluster.record_file_access(remote_path)
+        return SimulatedFile(self.cluster.get_local_path(remote_path), mode)
+
+    def put(self, localpath, remotepath):
+        """Upload a file"""
+        self._count()
+        shutil.copyfile(localpath, self.cluster.get_local_path(remotepath))
+
+    def get(self, remotepath, localpath):
+        """Download a file"""
+        self._count()
+        self.cluster.record_file_access(remotepath)
+        shutil.copyfile(self.cluster.get_local_path(remotepath), localpath)
+
+    def stat(self, remote_path):
+        """Get the status of a remote file"""
+        self._count()
+        return os.stat(self.cluster.get_local_path(remote_path))
+
+    def mkdir(self, remote_path):
+        """Create a remote directory"""
+        self._count()
+        os.makedirs(self.cluster.get_local_path(remote_path), exist_ok=True)
+
+    def chmod(self, remote_path, mode):
+        """Change the permissions of a remote file"""
+        self._count()
+        os.chmod(self.cluster.get_local_path(remote_path), mode)
+
+    def close(self):
+        """Close the session"""
+        pass
+
+
+class SimulatedFile(object):
+    """
+    A remote file opened in a simulated SFTP session, implementing the parts of ``paramiko.SFTPFile`` used by ARC.
+
+    Args:
+        path (str): The local path of the file in the simulated file system.
+        mode (str): The mode in which the file is opened.
+    """
+    def __init__(self, path, mode):
+        if 'w' in mode and not os.path.isdir(os.path.dirname(path)):
+            raise IOError('No such file or directory: {0}'.format(os.path.dirname(path)))
+        self.file = open(path, mode.replace('b', '') + 'b')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+
+    def write(self, data):
+        """Write data (a string or bytes) to the file"""
+        self.file.write(data.encode() if isinstance(data, str) else data)
+
+    def read(self):
+        """Read the rest of the file as bytes"""
+        return self.file.read()
+
+    def readlines(self):
+        """Read the rest of the file as lines"""
+        return [line.decode('utf-8', errors='replace') for line in self.file.readlines()]
+
+    def seek(self, offset):
+        """Move to a position in the file"""
+        self.file.seek(offset)
+
+    def stat(self):
+        """Get the status of the file"""
+        return os.fstat(self.file.fileno())
+
+    def prefetch(self):
+        """Prefetching is not needed for a simulated file"""
+        pass
+
+    def set_pipelined(self, pipelined=True):
+        """Pipelining is not needed for a simulated file"""
+        pass
+
+
+def detect_software(local_folder):
+    """
+    Determine the ESS of a job from the input file in its folder.
+
+    Args:
+        local_folder (str): The local path of the job folder in the simulated file system.
+
+    Returns:
+        str: The ESS ('gaussian', 'qchem', or 'molpro'), ``None`` if it could not be determined.
+    """
+    if os.path.isfile(os.path.join(local_folder, 'input.gjf')):
+        return 'gaussian'
+    input_path = os.path.join(local_folder, 'input.in')
+    if os.path.isfile(input_path):
+        with open(input_path, 'r') as f:
+            content = f.read().lower()
+        return 'qchem' if '$molecule' in content else 'molpro'
+    return None
+
+
+def get_job_type(folder):
+    """
+    Determine the job type of an ARC job from its remote folder name.
+
+    Args:
+        folder (str): The remote folder of the job.
+
+    Returns:
+        str: The job type, e.g., 'opt' for 'opt_a123', or 'conformer' for conformer jobs.
+    """
+    if '/conformers/' in folder or 'conformer_a' in os.path.basename(folder):
+        return 'conformer'
+    return re.sub(r'_a\d+$', '', os.path.basename(folder.rstrip('/')))
+
+
+def get_job_name(submit_script, cluster_soft):
+    """
+    Get the job name from a submit script.
+
+    Args:
+        submit_script (str): The submit script.
+        cluster_soft (str): The cluster software.
+
+    Returns:
+        str: The job name, ``None`` if it is not specified.
+    """
+    pattern = r'#\$ -N (\S+)' if cluster_soft.lower() == 'oge' else r'#SBATCH (?:-J|--job-name=) ?(\S+)'
+    match = re.search(pattern, submit_script)
+    return match.group(1) if match is not None else None
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.simulator module
+"""
+
+import os
+import shutil
+import unittest
+
+from arc.job.simulator import SimulatedCluster, detect_software, get_job_type
+from arc.job.ssh import SSHClient, simulated_clusters
+from arc.settings import arc_path
+
+
+class TestSimulatedCluster(unittest.TestCase):
+    """
+    Contains unit tests for the SimulatedCluster class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.scratch_path = os.path.join(arc_path, 'scratch_simulator')
+        if not os.path.isdir(cls.scratch_path):
+            os.makedirs(cls.scratch_path)
+        cls.remote_path = 'runs/ARC_Projects/project/methylamine/opt_a101'
+        cls.qchem_input = '$molecule\n0 1\nN 0.0 0.0 0.0\n$end\n$rem\nJOBTYPE opt\n$end\n'
+
+    def tearDown(self):
+        """
+        A method that is run after each unit test in this class.
+        """
+        for cluster in list(simulated_clusters.values()):
+            cluster.detach()
+
+    def test_run_job(self):
+        """Test staging, submitting, and completing a job on a simulated OGE cluster"""
+        cluster = SimulatedCluster(server='server1', queue_latency=60, runtime=(100, 200),
+                                   root=os.path.join(self.scratch_path, 'server1'))
+        cluster.attach()
+        ssh = SSHClient('server1')
+        ssh.stage_files([{'remote': os.path.join(self.remote_path, 'submit.sh'), 'content': '#$ -N a101\nqchem\n'},
+                         {'remote': os.path.join(self.remote_path, 'input.in'), 'content': self.qchem_input}])
+        status, job_id = ssh.submit_job(remote_path=self.remote_path)
+        self.assertEqual((status, job_id), ('running', 100000))
+        self.assertEqual(ssh.check_running_jobs_ids(), [100000])
+        self.assertEqual(ssh.check_job_status(job_id), 'running')
+
+        cluster.advance(30)
+        self.assertEqual(ssh.check_running_jobs_ids(), [100000])
+        cluster.advance(300)
+        self.assertEqual(ssh.check_running_jobs_ids(), list())
+        self.assertEqual(ssh.check_job_status(job_id), 'done')
+
+        local_path = os.path.join(self.scratch_path, 'output.out')
+        ssh.download_file(remote_file_path=os.path.join(self.remote_path, 'output.out'), local_file_path=local_path)
+        with open(local_path, 'r') as f:
+            self.assertIn('Thank you very much for using Q-Chem', f.read())
+        statistics = cluster.get_statistics()
+        self.assertEqual(statistics['submitted_jobs'], 1)
+        self.assertEqual(statistics['completed_jobs'], 1)
+        self.assertEqual(statistics['connections'], 1)
+        self.assertTrue(70 <= statistics['mean_fetch_latency'] <= 170)
+        self.assertGreater(statistics['ssh_operations_per_completed_job'], 5)
+
+    def test_array_job_and_failures(self):
+        """Test running an array job on a simulated Slurm cluster, with all jobs failing"""
+        cluster = SimulatedCluster(server='server2', queue_latency=0, runtime=(100, 200), failure_rate=1.0,
+                                   root=os.path.join(self.scratch_path, 'server2'))
+        cluster.attach()
+        ssh = SSHClient('server2')
+        array_path = 'runs/ARC_Projects/project/methylamine/opt_array_a101'
+        task_paths = ['runs/ARC_Projects/project/methylamine/opt_a10{0}'.format(i) for i in range(1, 4)]
+        manifest = [{'remote': os.path.join(array_path, 'submit.sl'),
+                     'content': '#SBATCH -J a101\n#SBATCH --array=1-3\ncd $(sed -n "${SLURM_ARRAY_TASK_ID}p" '
+                                'tasks.txt)\n'},
+                    {'remote': os.path.join(array_path, 'tasks.txt'), 'content': '\n'.join(task_paths) + '\n'}]
+        manifest.extend([{'remote': os.path.join(path, 'input.in'), 'content': self.qchem_input}
+                         for path in task_paths])
+        ssh.stage_files(manifest)
+        status, job_id = ssh.submit_job(remote_path=array_path)
+        self.assertEqual(status, 'running')
+        self.assertEqual(sorted(ssh.check_running_jobs_ids()), ['100000_1', '100000_2', '100000_3'])
+        ssh.delete_job('100000_2')
+        self.assertEqual(sorted(ssh.check_running_jobs_ids()), ['100000_1', '100000_3'])
+        cluster.advance(200)
+        self.assertEqual(ssh.check_running_jobs_ids(), list())
+        self.assertEqual(cluster.get_statistics()['errored_jobs'], 2)
+        with open(cluster.get_local_path(os.path.join(task_paths[0], 'output.out')), 'r') as f:
+            self.assertNotIn('Thank you very much for using Q-Chem', f.read())
+        self.assertFalse(os.path.isfile(cluster.get_local_path(os.path.join(task_paths[1], 'output.out'))))
+
+    def test_detect_software_and_job_type(self):
+        """Test determining the ESS and job type of a simulated job"""
+        folder = os.path.join(self.scratch_path, 'sp_a102')
+        os.makedirs(folder)
+        with open(os.path.join(folder, 'input.in'), 'w') as f:
+            f.write('***,name\nmemory,100,m;\ngeometry={angstrom;\nN 0.0 0.0 0.0\n}\n')
+        self.assertEqual(detect_software(folder), 'molpro')
+        self.assertIsNone(detect_software(self.scratch_path))
+        self.assertEqual(get_job_type('runs/ARC_Projects/project/methylamine/sp_a102'), 'sp')
+        self.assertEqual(get_job_type('runs/ARC_Projects/project/methylamine/conformers/3/conformer_a103'),
+                         'conformer')
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        shutil.rmtree(cls.scratch_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for caching the queue status of servers.
+
+Querying a server queue (``qstat`` / ``squeue``) requires opening an SSH session, which is slow.
+A single snapshot of each server queue is taken per Scheduler sweep and shared by all species
+and all jobs checked during that sweep, as long as the snapshot is not older than ``queue_snapshot_max_age``.
+The snapshot is shared by the threads of the completion pipeline, so it is only accessed under a lock.
+"""
+
+import threading
+import time
+
+from arc.common import get_logger
+from arc.job.executor import is_local_executor, local_executor
+from arc.job.local import execute_command
+from arc.job.ssh import SSHClient, check_job_status_in_stdout, parse_queue_load, parse_running_jobs_ids
+from arc.settings import servers, check_status_command, queue_snapshot_max_age
+
+
+logger = get_logger()
+
+
+class QueueSnapshot(object):
+    """
+    A cache of the parsed queue status of the servers.
+
+    Args:
+        max_age (float, optional): The maximal age (in seconds) of a snapshot before it is considered stale.
+
+    Attributes:
+        max_age (float): The maximal age (in seconds) of a snapshot before it is considered stale.
+        snapshots (dict): Keys are server names, values are dictionaries with a 'timestamp' (float),
+                          the raw queue 'stdout' (list), and the parsed 'job_ids' (set).
+        lock (threading.RLock): Guards the snapshots. A server queue is queried by one thread at a time,
+                                and other threads wait for its snapshot instead of querying it again.
+    """
+    def __init__(self, max_age=None):
+        self.max_age = max_age if max_age is not None else queue_snapshot_max_age
+        self.snapshots = dict()
+        self.lock = threading.RLock()
+
+    def is_fresh(self, server):
+        """
+        Check whether a fresh snapshot exists for a server.
+
+        Args:
+            server (str): The server name.
+
+        Returns:
+            bool: Whether the snapshot exists and is not older than ``max_age``.
+        """
+        with self.lock:
+            return server in self.snapshots and time.time() - self.snapshots[server]['timestamp'] <= self.max_age
+
+    def refresh(self, server):
+        """
+        Query the server queue once and store the parsed snapshot.
+        If the query fails, a previous snapshot (if any) is kept.
+
+        Args:
+            server (str): The server name.
+
+        Returns:
+            bool: Whether the snapshot was successfully refreshed.
+        """
+        with self.lock:
+            if is_local_executor(server):
+                self.snapshots[server] = {'timestamp': time.time(),
+                                          'stdout': list(),
+                                          'job_ids': set(local_executor.get_running_job_ids())}
+                return True
+            cmd = check_status_command[servers[server]['cluster_soft']] + ' -u ' + servers[server]['un']
+            if server != 'local':
+                stdout, stderr = SSHClient(server).send_command_to_server(cmd)
+            else:
+                stdout, stderr = execute_command(cmd)
+            if stderr:
+                logger.error(f'Could not check the queue status on {server} due to {stderr}')
+                return False
+            self.snapshots[server] = {'timestamp': time.time(),
+                                      'stdout': stdout,
+                                      'job_ids': set(parse_running_jobs_ids(stdout=stdout, server=server))}
+            return True
+
+    def get_job_ids(self, server, force=False):
+        """
+        Get the IDs of all jobs submitted by the user on a server, refreshing the snapshot only if needed.
+
+        Args:
+            server (str): The server name.
+            force (bool, optional): Whether to refresh the snapshot regardless of its age.
+
+        Returns:
+            set: The job IDs (``int``) currently on the server queue.
+        """
+        if is_local_executor(server):
+            return set(local_executor.get_running_job_ids())
+        with self.lock:
+            if force or not self.is_fresh(server):
+                self.refresh(server)
+            if server in self.snapshots:
+                return set(self.snapshots[server]['job_ids'])
+            return set()
+
+    def get_job_status(self, job_id, server):
+        """
+        Get the status of a job on a server from the snapshot, refreshing the snapshot only if needed.
+
+        Args:
+            job_id (int): The job ID recognized by the server.
+            server (str): The server name.
+
+        Returns:
+            str: The job status on the server ('running', 'done', 'errored', or 'errored on node xx'),
+                 ``None`` if the server queue could not be queried.
+        """
+        if is_local_executor(server):
+            return local_executor.get_job_status(job_id)
+        with self.lock:
+            if not self.is_fresh(server) and not self.refresh(server):
+                return None
+            snapshot = self.snapshots[server]
+            if job_id not in snapshot['job_ids']:
+                return 'done'
+            status = check_job_status_in_stdout(job_id=job_id, stdout=snapshot['stdout'], server=server)
+            if status == 'done':
+                # the job was submitted after the snapshot was taken, it isn't in the queue output yet
+                return 'running'
+            return status
+
+    def get_queue_load(self, server):
+        """
+        Get the number of running and pending jobs of the user on a server, refreshing the snapshot only if needed.
+        Each pending task of an array job is counted as a job.
+
+        Args:
+            server (str): The server name.
+
+        Returns:
+            tuple: The numbers of running and pending jobs, ``None`` if the server queue could not be queried.
+        """
+        if is_local_executor(server):
+            job_ids = local_executor.get_running_job_ids()
+            return len(job_ids) - len(local_executor.pending), len(local_executor.pending)
+        with self.lock:
+            if not self.is_fresh(server) and not self.refresh(server):
+                return None
+            return parse_queue_load(stdout=self.snapshots[server]['stdout'], server=server)
+
+    def add_job(self, job_id, server):
+        """
+        Register a newly submitted job in an existing snapshot,
+        so it is not mistaken for a completed job until the next refresh.
+
+        Args:
+            job_id (int): The job ID recognized by the server.
+            server (str): The server name.
+        """
+        with self.lock:
+            if server in self.snapshots:
+                self.snapshots[server]['job_ids'].add(job_id)
+
+    def invalidate(self, server=None):
+        """
+        Discard the snapshot of a server, or of all servers if ``server`` is not specified.
+
+        Args:
+            server (str, optional): The server name.
+        """
+        with self.lock:
+            if server is None:
+                self.snapshots = dict()
+            else:
+                self.snapshots.pop(server, None)
+
+
+# A process-wide snapshot shared by the Scheduler and all Job objects
+queue_snapshot = QueueSnapshot()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.job.snapshot module
+"""
+
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from arc.job.snapshot import QueueSnapshot
+
+
+class TestQueueSnapshot(unittest.TestCase):
+    """
+    Contains unit tests for the QueueSnapshot class
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.stdout = ['job-ID  prior   name       user         state submit/start at     queue        slots ja-task-ID',
+                      '-------------------------------------------------------------------------------------------',
+                      ' 582682 0.45451 a9654      alongd       e     04/17/2019 16:22:14 long5@node93.cluster    48',
+                      ' 588334 0.45451 pf1005a    alongd       r     05/07/2019 16:24:31 long3@node67.cluster    48']
+
+    def setUp(self):
+        """
+        A method that is run before each unit test in this class.
+        """
+        self.snapshot = QueueSnapshot(max_age=100)
+        self.snapshot.snapshots['server1'] = {'timestamp': time.time(),
+                                              'stdout': self.stdout,
+                                              'job_ids': {582682, 588334}}
+
+    def test_is_fresh(self):
+        """Test determining whether a snapshot is fresh"""
+        self.assertTrue(self.snapshot.is_fresh('server1'))
+        self.assertFalse(self.snapshot.is_fresh('server2'))
+        self.snapshot.snapshots['server1']['timestamp'] -= 101
+        self.assertFalse(self.snapshot.is_fresh('server1'))
+
+    def test_get_job_ids(self):
+        """Test getting the job IDs from a fresh snapshot without querying the server"""
+        self.assertEqual(self.snapshot.get_job_ids('server1'), {582682, 588334})
+
+    def test_get_job_status(self):
+        """Test getting a job status from a snapshot"""
+        self.assertEqual(self.snapshot.get_job_status(job_id=588334, server='server1'), 'running')
+        self.assertEqual(self.snapshot.get_job_status(job_id=582682, server='server1'), 'errored')
+        self.assertEqual(self.snapshot.get_job_status(job_id=582600, server='server1'), 'done')
+
+    def test_add_job(self):
+        """Test registering a newly submitted job in a snapshot"""
+        self.assertEqual(self.snapshot.get_job_status(job_id=590000, server='server1'), 'done')
+        self.snapshot.add_job(job_id=590000, server='server1')
+        self.assertEqual(self.snapshot.get_job_status(job_id=590000, server='server1'), 'running')
+        self.assertIn(590000, self.snapshot.get_job_ids('server1'))
+
+    def test_concurrent_refresh(self):
+        """Test that threads checking a stale snapshot together query the server queue only once"""
+        queries = list()
+
+        def refresh(server):
+            queries.append(server)
+            time.sleep(0.05)
+            self.snapshot.snapshots[server] = {'timestamp': time.time(),
+                                               'stdout': self.stdout,
+                                               'job_ids': {582682, 588334}}
+            return True
+
+        self.snapshot.refresh = refresh
+        self.snapshot.invalidate()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            statuses = list(executor.map(lambda job_id: self.snapshot.get_job_status(job_id=job_id, server='server1'),
+                                         [588334, 582682, 582600, 588334]))
+        self.assertEqual(statuses, ['running', 'errored', 'done', 'running'])
+        self.assertEqual(queries, ['server1'])
+
+    def test_invalidate(self):
+        """Test discarding snapshots"""
+        self.snapshot.snapshots['server2'] = {'timestamp': time.time(), 'stdout': list(), 'job_ids': set()}
+        self.snapshot.invalidate('server1')
+        self.assertNotIn('server1', self.snapshot.snapshots)
+        self.assertIn('server2', self.snapshot.snapshots)
+        self.snapshot.invalidate()
+        self.assertEqual(self.snapshot.snapshots, dict())
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
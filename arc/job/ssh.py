@@ -4,26 +4,35 @@
 """
 A module for SSHing into servers.
 Used for giving commands, uploading, and downloading files.
+Authenticated connections are kept alive in a process-wide pool (``connection_pool``), so that consecutive
+commands and file transfers to the same server share a single SSH transport.
 
 Todo:
     * delete scratch files of a failed job: ssh nodeXX; rm scratch/dhdhdhd/job_number
 """
 
+import atexit
 import datetime
 import logging
 import os
 import re
+import threading
 import time
 
 import paramiko
 
 from arc.common import get_logger
 from arc.exceptions import InputError, ServerError
-from arc.settings import servers, check_status_command, submit_command, submit_filename, delete_command
+from arc.job.retry import call_with_retries, circuit_breakers
+from arc.settings import servers, check_status_command, submit_command, submit_filename, delete_command, \
+    ssh_idle_timeout, ess_executables
 
 
 logger = get_logger()
 
+# Simulated clusters (see arc.job.simulator) standing in for servers, keys are server names
+simulated_clusters = dict()
+
 
 class SSHClient(object):
     """
@@ -55,12 +64,12 @@ class SSHClient(object):
         If remote_path is not an empty string, the command will be executed in the directory path it points to.
         Returns lists of stdout, stderr corresponding to the commands sent.
         """
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.load_system_host_keys(filename=self.key)
+        if not circuit_breakers.is_available(self.server):
+            return '', 'server {0} is temporarily unavailable'.format(self.server)
         try:
-            ssh.connect(hostname=self.address, username=self.un)
+            ssh = connection_pool.get(self.server)
         except:
+            circuit_breakers.get(self.server).record_failure()
             return '', 'paramiko failed to connect'
         if isinstance(command, list):
             command = '; '.join(command)
@@ -71,13 +80,16 @@ class SSHClient(object):
         try:
             _, stdout, stderr = ssh.exec_command(command)
         except:  # SSHException: Timeout opening channel.
-            try:  # try again
+            try:  # try again on a fresh connection
+                connection_pool.discard(self.server)
+                ssh = connection_pool.get(self.server)
                 _, stdout, stderr = ssh.exec_command(command)
             except:
+                circuit_breakers.get(self.server).record_failure()
                 return '', 'ssh timed-out after two trials'
+        circuit_breakers.get(self.server).record_success()
         stdout = stdout.readlines()
         stderr = stderr.readlines()
-        ssh.close()
         return stdout, stderr
 
     def upload_file(self, remote_file_path, local_file_path='', file_string=''):
@@ -88,64 +100,67 @@ class SSHClient(object):
         if local_file_path and not os.path.isfile(local_file_path):
             raise InputError('Cannot upload a non-existing file.'
                              ' Check why file in path {0} is missing.'.format(local_file_path))
-        sftp, ssh = self.connect()
-        i, max_times_to_try = 1, 30
-        success = False
-        sleep_time = 10  # seconds
-        while i < 30:
+        def upload():
+            sftp, ssh = self.try_connecting()
             try:
                 write_file(sftp, remote_file_path, local_file_path, file_string)
-            except IOError:
-                logger.error('Could not upload file {0} to {1}!'.format(local_file_path, self.server))
-                logger.error('ARC is sleeping for {0} seconds before re-trying,'
-                             ' please check your connectivity.'.format(sleep_time * i))
-                logger.info('ZZZZZ..... ZZZZZ.....')
-                time.sleep(sleep_time * i)  # in seconds
-            else:
-                success = True
-                i = 1000
-            i += 1
-        if not success:
-            raise ServerError('Could not write file {0} on {1}. Tried {2} times.'.format(
-                remote_file_path, self.server, max_times_to_try))
-        sftp.close()
-        ssh.close()
+            finally:
+                sftp.close()
+
+        self.call_with_retries(upload, 'write file {0}'.format(remote_file_path))
+
+    def stage_files(self, manifest):
+        """
+        Stage several files on the server in a single SFTP session:
+        Create the remote directory tree, write all files, and set their permissions.
+
+        Args:
+            manifest (list): Entries are dictionaries with a 'remote' file path, either a 'local' file path or a
+                             'content' string, and optionally a 'mode' (the permission bits, e.g., 0o755).
+
+        Raises:
+            InputError: If a local file to upload does not exist.
+            ServerUnavailableError: If the files could not be staged.
+
+        Returns:
+            dict: Keys are the remote file paths, values are their last modified times in a datetime format.
+        """
+        for entry in manifest:
+            if entry.get('content', None) is None and not os.path.isfile(entry.get('local', '')):
+                raise InputError('Cannot upload a non-existing file.'
+                                 ' Check why file in path {0} is missing.'.format(entry.get('local', '')))
+
+        def stage():
+            sftp, ssh = self.try_connecting()
+            try:
+                return stage_files(sftp, manifest)
+            finally:
+                sftp.close()
+
+        return self.call_with_retries(stage, 'stage {0} files'.format(len(manifest)))
 
     def download_file(self, remote_file_path, local_file_path):
         """
         Download a file from `remote_file_path` to `local_file_path`.
         """
-        i, max_times_to_try = 1, 30
-        success = False
-        sleep_time = 10  # seconds
-        while i < 30:
+        def download():
             self._download_file(remote_file_path, local_file_path)
-            if os.path.isfile(local_file_path):
-                success = True
-                i = 1000
-            else:
-                logger.error('Could not download file {0} from {1}!'.format(remote_file_path, self.server))
-                logger.error('ARC is sleeping for {0} seconds before re-trying,'
-                             ' please check your connectivity.'.format(sleep_time * i))
-                logger.info('ZZZZZ..... ZZZZZ.....')
-                time.sleep(sleep_time * i)  # in seconds
-            i += 1
-        if not success:
-            raise ServerError('Could not download file {0} from {1}. Tried {2} times.'.format(
-                remote_file_path, self.server, max_times_to_try))
+            if not os.path.isfile(local_file_path):
+                raise IOError('file {0} was not downloaded'.format(remote_file_path))
+
+        self.call_with_retries(download, 'download file {0}'.format(remote_file_path))
 
     def _download_file(self, remote_file_path, local_file_path):
         """
         Download a file from `remote_file_path` to `local_file_path`.
         """
-        sftp, ssh = self.connect()
+        sftp, ssh = self.try_connecting()
         try:
             sftp.get(remotepath=remote_file_path, localpath=local_file_path)
         except IOError:
             logger.debug('Got an IOError when trying to download file {0} from {1}'.format(remote_file_path,
                                                                                            self.server))
         sftp.close()
-        ssh.close()
 
     def read_remote_file(self, remote_path, filename):
         """
@@ -157,26 +172,80 @@ class SSHClient(object):
         with sftp.open(full_path, 'r') as f_remote:
             content = f_remote.readlines()
         sftp.close()
-        ssh.close()
         return content
 
+    def read_remote_tail(self, remote_file_path, num_bytes):
+        """
+        Read only the trailing part of a remote file, without downloading the entire file.
+
+        Args:
+            remote_file_path (str): The remote file path.
+            num_bytes (int): The maximal number of trailing bytes to read.
+
+        Raises:
+            IOError: If the remote file could not be read.
+
+        Returns:
+            tuple: The trailing lines of the file (``list``, a partial first line is discarded),
+                   and the size of the remote file in bytes.
+        """
+        sftp, ssh = self.connect()
+        try:
+            with sftp.open(remote_file_path, 'r') as f_remote:
+                size = f_remote.stat().st_size
+                start = max(size - num_bytes, 0)
+                f_remote.seek(start)
+                f_remote.prefetch()
+                content = f_remote.read().decode('utf-8', errors='replace')
+        finally:
+            sftp.close()
+        lines = content.splitlines(keepends=True)
+        if start > 0 and lines:
+            # the first line is probably partial
+            lines = lines[1:]
+        return lines, size
+
+    def read_remote_increment(self, remote_file_path, offset, max_bytes):
+        """
+        Read the part of a remote file following an offset (e.g., the part of a growing output file
+        written since it was last read), without downloading the entire file.
+
+        Args:
+            remote_file_path (str): The remote file path.
+            offset (int): The offset (in bytes) to read from, the file is read from its beginning if it is shorter.
+            max_bytes (int): The maximal number of bytes to read, only the trailing ``max_bytes`` bytes are read
+                             if more were written since ``offset``.
+
+        Raises:
+            IOError: If the remote file could not be read.
+
+        Returns:
+            tuple: The content read (``bytes``), and the offset (``int``, in bytes) it was read from.
+        """
+        sftp, ssh = self.connect()
+        try:
+            with sftp.open(remote_file_path, 'rb') as f_remote:
+                size = f_remote.stat().st_size
+                start = max(offset if offset <= size else 0, size - max_bytes)
+                content = b''
+                if size > start:
+                    f_remote.seek(start)
+                    content = f_remote.read(size - start)
+        finally:
+            sftp.close()
+        return content, start
+
     def check_job_status(self, job_id):
         """
         A modulator method of _check_job_status()
         """
-        i = 1
-        sleep_time = 1  # minutes
-        while i < 30:
+        def check():
             result = self._check_job_status(job_id)
             if result == 'connection error':
-                logger.error('ARC is sleeping for {0} min before re-trying,'
-                             ' please check your connectivity.'.format(sleep_time * i))
-                logger.info('ZZZZZ..... ZZZZZ.....')
-                time.sleep(sleep_time * i * 60)  # in seconds
-            else:
-                i = 1000
-            i += 1
-        return result
+                raise ServerError('connection error')
+            return result
+
+        return self.call_with_retries(check, 'check the status of job {0}'.format(job_id))
 
     def _check_job_status(self, job_id):
         """
@@ -197,21 +266,16 @@ class SSHClient(object):
         """
         Deletes a running job
         """
-        cmd = delete_command[servers[self.server]['cluster_soft']] + ' ' + str(job_id)
+        cmd = delete_command[servers[self.server]['cluster_soft']] + ' ' + format_job_id(job_id, self.server)
         self.send_command_to_server(cmd)
 
     def check_running_jobs_ids(self):
         """
         Return a list of ``int`` representing job IDs of all jobs submitted by the user on a server
         """
-        running_jobs_ids = list()
         cmd = check_status_command[servers[self.server]['cluster_soft']] + ' -u ' + servers[self.server]['un']
         stdout = self.send_command_to_server(cmd)[0]
-        for i, status_line in enumerate(stdout):
-            if (servers[self.server]['cluster_soft'].lower() == 'slurm' and i > 0)\
-                    or (servers[self.server]['cluster_soft'].lower() == 'oge' and i > 1):
-                running_jobs_ids.append(int(status_line.split()[0]))
-        return running_jobs_ids
+        return parse_running_jobs_ids(stdout=stdout, server=self.server)
 
     def submit_job(self, remote_path):
         """Submit a job"""
@@ -226,7 +290,8 @@ class SSHClient(object):
         elif 'submitted' in stdout[0].lower():
             job_status = 'running'
             if servers[self.server]['cluster_soft'].lower() == 'oge':
-                job_id = int(stdout[0].split()[2])
+                # an OGE array job is reported as "Your job-array 12345.1-46:1 (...) has been submitted"
+                job_id = int(stdout[0].split()[2].split('.')[0])
             elif servers[self.server]['cluster_soft'].lower() == 'slurm':
                 job_id = int(stdout[0].split()[3])
             else:
@@ -234,38 +299,40 @@ class SSHClient(object):
         return job_status, job_id
 
     def connect(self):
-        """A helper function for calling self.try_connecting until successful"""
-        times_tried = 0
-        max_times_to_try = 1440  # continue trying for 24 hrs...
-        interval = 60  # wait 60 sec between trials
-        while times_tried < max_times_to_try:
-            times_tried += 1
-            try:
-                sftp, ssh = self.try_connecting()
-            except:
-                pass
-            else:
-                logger.debug('Successfully connected to {0} at the {1} trial.'.format(self.server, times_tried))
-                return sftp, ssh
-            if not times_tried % 10:
-                logger.info('Tried connecting to {0} {1} times with no success....'.format(self.server, times_tried))
-            else:
-                print('Tried connecting to {0} {1} times with no success....'.format(self.server, times_tried))
-            time.sleep(interval)
-        raise ServerError('Could not connect to server {0} even after {1} trials.'.format(self.server, times_tried))
+        """A helper function for calling self.try_connecting, retried according to the retry policy"""
+        return self.call_with_retries(self.try_connecting, 'connect')
+
+    def call_with_retries(self, func, description):
+        """
+        Call an operation on the server, retrying it with a jittered exponential backoff if it fails.
+
+        Args:
+            func (function): The operation, called without arguments.
+            description (str): A description of the operation for logging.
+
+        Raises:
+            ServerUnavailableError: If the server is temporarily unavailable, or if all attempts failed.
+
+        Returns:
+            The return value of ``func``.
+        """
+        return call_with_retries(server=self.server, func=func, description=description,
+                                 exceptions=(IOError, ServerError, paramiko.SSHException))
 
     def try_connecting(self):
-        """A helper function for connecting via paramiko, returns the `sftp` and `ssh` objects"""
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.load_system_host_keys(filename=self.key)
+        """
+        A helper function for opening an SFTP session on the pooled connection, returns the `sftp` and `ssh` objects.
+        The `ssh` object is shared and should not be closed by the caller, only the `sftp` session should be closed.
+        """
+        ssh = connection_pool.get(self.server)
         try:
-            ssh.connect(hostname=self.address, username=self.un)
+            sftp = ssh.open_sftp()
         except:
-            # This sometimes gives "SSHException: Error reading SSH protocol banner[Error 104] Connection reset by peer"
-            # Try again:
-            ssh.connect(hostname=self.address, username=self.un)
-        sftp = ssh.open_sftp()
+            # The pooled transport might have been dropped by the server between the health check and now
+            # Try again on a fresh connection:
+            connection_pool.discard(self.server)
+            ssh = connection_pool.get(self.server)
+            sftp = ssh.open_sftp()
         return sftp, ssh
 
     def get_last_modified_time(self, remote_file_path):
@@ -274,12 +341,138 @@ class SSHClient(object):
         try:
             timestamp = sftp.stat(remote_file_path).st_mtime
         except IOError:
+            sftp.close()
             return None
         sftp.close()
-        ssh.close()
         return datetime.datetime.fromtimestamp(timestamp)
 
 
+class SSHConnectionPool(object):
+    """
+    A process-wide pool of authenticated SSH connections, one per server.
+    Connections are health-checked before being handed out, transparently re-established if dropped,
+    and closed after being idle for longer than ``idle_timeout``.
+
+    Args:
+        idle_timeout (float, optional): The time (in seconds) after which an unused connection is closed.
+
+    Attributes:
+        idle_timeout (float): The time (in seconds) after which an unused connection is closed.
+        connections (dict): Keys are server names, values are connected ``paramiko.SSHClient`` objects.
+        last_used (dict): Keys are server names, values are the time stamps of the last use of the connection.
+    """
+    def __init__(self, idle_timeout=None):
+        self.idle_timeout = idle_timeout if idle_timeout is not None else ssh_idle_timeout
+        self.connections = dict()
+        self.last_used = dict()
+        self._lock = threading.RLock()
+
+    def get(self, server):
+        """
+        Get a healthy connection to a server, connecting if needed.
+
+        Args:
+            server (str): The server name as specified in ARCs's settings file under ``servers`` as a key.
+
+        Returns:
+            paramiko.SSHClient: A connected SSH client. It is shared, don't close it.
+        """
+        with self._lock:
+            self.close_idle()
+            ssh = self.connections.get(server, None)
+            if ssh is not None and not is_connection_healthy(ssh):
+                logger.debug('The connection to {0} was dropped, reconnecting...'.format(server))
+                self.discard(server)
+                ssh = None
+            if ssh is None:
+                ssh = open_connection(server)
+                self.connections[server] = ssh
+            self.last_used[server] = time.time()
+            return ssh
+
+    def discard(self, server):
+        """
+        Close and remove the connection to a server (if it exists).
+
+        Args:
+            server (str): The server name.
+        """
+        with self._lock:
+            ssh = self.connections.pop(server, None)
+            self.last_used.pop(server, None)
+            if ssh is not None:
+                try:
+                    ssh.close()
+                except:
+                    pass
+
+    def close_idle(self):
+        """
+        Close all connections which haven't been used for longer than ``idle_timeout``.
+        """
+        with self._lock:
+            now = time.time()
+            for server in [server for server, t in self.last_used.items() if now - t > self.idle_timeout]:
+                logger.debug('Closing the idle connection to {0}'.format(server))
+                self.discard(server)
+
+    def close_all(self):
+        """
+        Close all pooled connections.
+        """
+        with self._lock:
+            for server in list(self.connections.keys()):
+                self.discard(server)
+
+
+def open_connection(server):
+    """
+    Open and authenticate a new SSH connection to a server.
+
+    Args:
+        server (str): The server name as specified in ARCs's settings file under ``servers`` as a key.
+
+    Returns:
+        paramiko.SSHClient: A connected SSH client.
+    """
+    if server in simulated_clusters:
+        return simulated_clusters[server].connect()
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.load_system_host_keys(filename=servers[server]['key'])
+    try:
+        ssh.connect(hostname=servers[server]['address'], username=servers[server]['un'])
+    except:
+        # This sometimes gives "SSHException: Error reading SSH protocol banner[Error 104] Connection reset by peer"
+        # Try again:
+        ssh.connect(hostname=servers[server]['address'], username=servers[server]['un'])
+    transport = ssh.get_transport()
+    if transport is not None:
+        # keep the connection alive while idling between scheduler sweeps
+        transport.set_keepalive(60)
+    return ssh
+
+
+def is_connection_healthy(ssh):
+    """
+    Check whether an SSH connection is still usable.
+
+    Args:
+        ssh (paramiko.SSHClient): The SSH client to check.
+
+    Returns:
+        bool: Whether the connection's transport is active and responsive.
+    """
+    transport = ssh.get_transport()
+    if transport is None or not transport.is_active():
+        return False
+    try:
+        transport.send_ignore()
+    except:
+        return False
+    return True
+
+
 def write_file(sftp, remote_file_path, local_file_path='', file_string=''):
     """
     Write a file. If `file_string` is given, write it as the content of the file.
@@ -303,6 +496,56 @@ def write_file(sftp, remote_file_path, local_file_path='', file_string=''):
                              ' must be specified')
 
 
+def stage_files(sftp, manifest):
+    """
+    Write several files using an open SFTP session, creating their remote directories as needed.
+    Writes are pipelined (not waiting for the server to acknowledge each chunk).
+
+    Args:
+        sftp (paramiko's SFTP): The SFTP object.
+        manifest (list): Entries are dictionaries with a 'remote' file path, either a 'local' file path or a
+                         'content' string, and optionally a 'mode' (the permission bits, e.g., 0o755).
+
+    Returns:
+        dict: Keys are the remote file paths, values are their last modified times in a datetime format.
+    """
+    existing_dirs = set()
+    for remote_dir in sorted(set([os.path.dirname(entry['remote']) for entry in manifest])):
+        make_remote_dirs(sftp, remote_dir, existing_dirs)
+    modified_times = dict()
+    for entry in manifest:
+        if entry.get('content', None) is not None:
+            with sftp.open(entry['remote'], 'w') as f_remote:
+                f_remote.set_pipelined(True)
+                f_remote.write(entry['content'])
+        else:
+            sftp.put(localpath=entry['local'], remotepath=entry['remote'])
+        if entry.get('mode', None) is not None:
+            sftp.chmod(entry['remote'], entry['mode'])
+        modified_times[entry['remote']] = datetime.datetime.fromtimestamp(sftp.stat(entry['remote']).st_mtime)
+    return modified_times
+
+
+def make_remote_dirs(sftp, remote_dir, existing_dirs=None):
+    """
+    Recursively create a remote directory (similar to ``mkdir -p``) using an open SFTP session.
+
+    Args:
+        sftp (paramiko's SFTP): The SFTP object.
+        remote_dir (str): The remote directory path.
+        existing_dirs (set, optional): Remote directories known to exist, updated in place.
+    """
+    existing_dirs = existing_dirs if existing_dirs is not None else set()
+    if not remote_dir or remote_dir in existing_dirs:
+        return
+    try:
+        sftp.stat(remote_dir)
+    except IOError:
+        make_remote_dirs(sftp, os.path.dirname(remote_dir), existing_dirs)
+        sftp.mkdir(remote_dir)
+    existing_dirs.add(remote_dir)
+
+
 def check_job_status_in_stdout(job_id, stdout, server):
     """
     A helper function for checking job status.
@@ -317,8 +560,11 @@ def check_job_status_in_stdout(job_id, stdout, server):
     """
     if not isinstance(stdout, list):
         stdout = stdout.splitlines()
-    for status_line in stdout:
-        if str(job_id) in status_line:
+    for i, status_line in enumerate(stdout):
+        if is_array_task_id(job_id):
+            if _is_queue_status_line(i, server) and job_id in parse_queue_line_ids(status_line, server):
+                break
+        elif str(job_id) in status_line:
             break
     else:
         return 'done'
@@ -340,6 +586,194 @@ def check_job_status_in_stdout(job_id, stdout, server):
             raise ValueError('Unknown cluster software {0}'.format(servers[server]['cluster_soft']))
 
 
+def parse_running_jobs_ids(stdout, server):
+    """
+    A helper function for parsing the IDs of all jobs in a queue status check.
+
+    Args:
+        stdout (list, str): The output of a queue status check.
+        server (str): The server name.
+
+    Returns:
+        list: Entries are ``int`` job IDs.
+    """
+    if not isinstance(stdout, list):
+        stdout = stdout.splitlines()
+    running_jobs_ids = list()
+    for i, status_line in enumerate(stdout):
+        if _is_queue_status_line(i, server):
+            running_jobs_ids.extend(parse_queue_line_ids(status_line, server))
+    return running_jobs_ids
+
+
+def parse_queue_load(stdout, server):
+    """
+    A helper function for counting the running and pending jobs in a queue status check.
+    Each pending task of an array job is counted as a job.
+
+    Args:
+        stdout (list, str): The output of a queue status check.
+        server (str): The server name.
+
+    Returns:
+        tuple: The numbers of running and pending jobs.
+    """
+    if not isinstance(stdout, list):
+        stdout = stdout.splitlines()
+    running, pending = 0, 0
+    for i, status_line in enumerate(stdout):
+        splits = status_line.split()
+        if not _is_queue_status_line(i, server) or len(splits) < 5:
+            continue
+        status = splits[4].lower()
+        if status in ['r', 't', 'cg']:
+            running += len(parse_queue_line_ids(status_line, server))
+        elif status in ['qw', 'hqw', 'pd']:
+            pending += len(parse_queue_line_ids(status_line, server))
+    return running, pending
+
+
+def _is_queue_status_line(index, server):
+    """
+    A helper function for skipping the header lines of a queue status check.
+
+    Args:
+        index (int): The 0-indexed line number in the queue status check output.
+        server (str): The server name.
+
+    Returns:
+        bool: Whether the line describes a job.
+    """
+    return (servers[server]['cluster_soft'].lower() == 'slurm' and index > 0)\
+        or (servers[server]['cluster_soft'].lower() == 'oge' and index > 1)
+
+
+def parse_queue_line_ids(status_line, server):
+    """
+    Parse the job IDs represented by a single line of a queue status check.
+    A regular job is represented by its ``int`` ID. Tasks of an array job are represented by a ``str`` ID of the form
+    '<array job ID>_<task ID>'. A single line might represent several pending tasks of an array job.
+
+    Status line formats::
+
+        OGE:    588334 0.45451 a1005      user_name    r     05/07/2019 16:24:31 long3@node67.cluster  48 7
+                588334 0.00000 a1005      user_name    qw    05/07/2019 16:24:30                       48 8-46:1
+        Slurm:  14428_7        long    a1005   user_name  R       0:04      1 node06
+                14428_[8-46%10] long   a1005   user_name PD       0:00      1 (JobArrayTaskLimit)
+
+    Args:
+        status_line (str): A line from the output of a queue status check.
+        server (str): The server name.
+
+    Returns:
+        list: The job IDs.
+    """
+    splits = status_line.split()
+    if servers[server]['cluster_soft'].lower() == 'slurm':
+        if '_' not in splits[0]:
+            return [int(splits[0])]
+        array_id, tasks = splits[0].split('_', 1)
+        tasks = tasks.strip('[]').split('%')[0]
+    else:
+        # the ja-task-ID column follows the slots column, and is only populated for array jobs
+        num_columns = 9 if '@' in status_line else 8
+        if len(splits) <= num_columns:
+            return [int(splits[0])]
+        array_id, tasks = splits[0], splits[-1].split(':')[0]
+    task_ids = list()
+    for task_range in tasks.split(','):
+        if '-' in task_range:
+            first, last = task_range.split('-')
+            task_ids.extend(range(int(first), int(last) + 1))
+        else:
+            task_ids.append(int(task_range))
+    return ['{0}_{1}'.format(array_id, task_id) for task_id in task_ids]
+
+
+def is_array_task_id(job_id):
+    """
+    Check whether a job ID represents a task of an array job.
+
+    Args:
+        job_id (int, str): The job ID.
+
+    Returns:
+        bool: Whether the job ID represents an array job task.
+    """
+    return isinstance(job_id, str) and '_' in job_id
+
+
+def format_job_id(job_id, server):
+    """
+    Format a job ID as expected by the cluster software commands (e.g., when deleting a job).
+
+    Args:
+        job_id (int, str): The job ID.
+        server (str): The server name.
+
+    Returns:
+        str: The formatted job ID.
+    """
+    if is_array_task_id(job_id) and servers[server]['cluster_soft'].lower() == 'oge':
+        return '{0} -t {1}'.format(*job_id.split('_'))
+    return str(job_id)
+
+
+def get_ess_discovery_command(executables):
+    """
+    Get a single command which locates several executables on a server.
+
+    Args:
+        executables (list): The executable names, e.g., ['g09', 'g16', 'qchem'].
+
+    Returns:
+        str: The command, which prints an ``<executable>=<path>`` line per executable (the path is empty if missing).
+    """
+    probes = ['echo "{0}=$(which {0} 2>/dev/null)"'.format(executable) for executable in executables]
+    return '. ~/.bashrc; ' + '; '.join(probes)
+
+
+def parse_ess_discovery(stdout):
+    """
+    Parse the output of the command generated by get_ess_discovery_command().
+
+    Args:
+        stdout (list): The lines of the command's standard output.
+
+    Returns:
+        dict: Keys are executable names, values are their paths (empty strings for missing executables).
+    """
+    found = dict()
+    for line in stdout:
+        line = line.strip()
+        if '=' in line:
+            executable, path = line.split('=', 1)
+            found[executable] = path
+    return found
+
+
+def discover_ess_on_server(server):
+    """
+    Locate the ESS executables on a server using a single remote command.
+
+    Args:
+        server (str): The server name.
+
+    Returns:
+        dict: Keys are ESS names, values are dictionaries with executable names as keys and their paths as values
+              (empty strings for missing executables). ``None`` if the server could not be reached.
+    """
+    executables = [executable for software_executables in ess_executables.values()
+                   for executable in software_executables]
+    ssh = SSHClient(server)
+    stdout, _ = ssh.send_command_to_server(get_ess_discovery_command(executables))
+    found = parse_ess_discovery(stdout)
+    if not found:
+        return None
+    return {software: {executable: found.get(executable, '') for executable in software_executables}
+            for software, software_executables in ess_executables.items()}
+
+
 def delete_all_arc_jobs(server_list):
     """
     Delete all ARC-spawned jobs (with job name starting with `a` and a digit) from :list:servers
@@ -371,3 +805,8 @@ def delete_all_arc_jobs(server_list):
                     print('deleted job {0}'.format(job_id))
     if server_list:
         print('\ndone.')
+
+
+# A process-wide pool of SSH connections shared by all SSHClient objects
+connection_pool = SSHConnectionPool()
+atexit.register(connection_pool.close_all)
@@ -5,9 +5,13 @@
 This module contains unit tests of the arc.job.ssh module
 """
 
+import os
+import shutil
+import time
 import unittest
 
 import arc.job.ssh as ssh
+from arc.settings import arc_path
 
 
 class TestSSH(unittest.TestCase):
@@ -29,6 +33,182 @@ class TestSSH(unittest.TestCase):
         status3 = ssh.check_job_status_in_stdout(job_id=582600, stdout=stdout, server='server1')
         self.assertEqual(status3, 'done')
 
+    def test_parse_running_jobs_ids(self):
+        """Test parsing the job IDs from a queue status check"""
+        stdout = """job-ID  prior   name       user         state submit/start at     queue                          slots ja-task-ID 
+-----------------------------------------------------------------------------------------------------------------
+ 582682 0.45451 a9654      alongd       e     04/17/2019 16:22:14 long5@node93.cluster              48
+ 588334 0.45451 pf1005a    alongd       r     05/07/2019 16:24:31 long3@node67.cluster              48"""
+        job_ids = ssh.parse_running_jobs_ids(stdout=stdout, server='server1')
+        self.assertEqual(job_ids, [582682, 588334])
+        stdout = """  JOBID PARTITION     NAME     USER ST       TIME  NODES NODELIST(REASON)
+  14428     debug xq1371m2   alongd  R 50-04:04:46      1 node06"""
+        job_ids = ssh.parse_running_jobs_ids(stdout=stdout, server='server2')
+        self.assertEqual(job_ids, [14428])
+
+    def test_parse_array_job_ids(self):
+        """Test parsing the task IDs of array jobs from a queue status check"""
+        stdout = """job-ID  prior   name       user         state submit/start at     queue                          slots ja-task-ID 
+-----------------------------------------------------------------------------------------------------------------
+ 588334 0.45451 pf1005a    alongd       r     05/07/2019 16:24:31 long3@node67.cluster              48
+ 588350 0.45451 a1005      alongd       r     05/07/2019 16:24:31 long3@node67.cluster              48 1
+ 588350 0.45451 a1005      alongd       e     05/07/2019 16:24:31 long3@node68.cluster              48 2
+ 588350 0.00000 a1005      alongd       qw    05/07/2019 16:24:30                                   48 3-5:1"""
+        job_ids = ssh.parse_running_jobs_ids(stdout=stdout, server='server1')
+        self.assertEqual(job_ids, [588334, '588350_1', '588350_2', '588350_3', '588350_4', '588350_5'])
+        self.assertEqual(ssh.check_job_status_in_stdout(job_id='588350_1', stdout=stdout, server='server1'),
+                         'running')
+        self.assertEqual(ssh.check_job_status_in_stdout(job_id='588350_2', stdout=stdout, server='server1'),
+                         'errored')
+        self.assertEqual(ssh.check_job_status_in_stdout(job_id='588350_4', stdout=stdout, server='server1'),
+                         'running')
+        self.assertEqual(ssh.check_job_status_in_stdout(job_id='588350_6', stdout=stdout, server='server1'), 'done')
+        stdout = """  JOBID PARTITION     NAME     USER ST       TIME  NODES NODELIST(REASON)
+  14428_1    long    a1005   alongd  R       0:04      1 node06
+  14428_[2-3,5%2] long a1005 alongd PD       0:00      1 (JobArrayTaskLimit)"""
+        job_ids = ssh.parse_running_jobs_ids(stdout=stdout, server='server2')
+        self.assertEqual(job_ids, ['14428_1', '14428_2', '14428_3', '14428_5'])
+        self.assertEqual(ssh.check_job_status_in_stdout(job_id='14428_1', stdout=stdout, server='server2'),
+                         'running')
+        self.assertEqual(ssh.check_job_status_in_stdout(job_id='14428_4', stdout=stdout, server='server2'), 'done')
+
+    def test_parse_queue_load(self):
+        """Test counting the running and pending jobs in a queue status check"""
+        stdout = """job-ID  prior   name       user         state submit/start at     queue                          slots ja-task-ID
+-----------------------------------------------------------------------------------------------------------------
+ 588334 0.45451 pf1005a    alongd       r     05/07/2019 16:24:31 long3@node67.cluster              48
+ 588340 0.45451 a1006      alongd       qw    05/07/2019 16:24:31                                   48
+ 588349 0.45451 a1007      alongd       Eqw   05/07/2019 16:24:31                                   48
+ 588350 0.00000 a1005      alongd       qw    05/07/2019 16:24:30                                   48 3-5:1"""
+        self.assertEqual(ssh.parse_queue_load(stdout=stdout, server='server1'), (1, 4))
+        stdout = """  JOBID PARTITION     NAME     USER ST       TIME  NODES NODELIST(REASON)
+  14428_1    long    a1005   alongd  R       0:04      1 node06
+  14429     long    a1006   alongd  R       0:04      1 node07
+  14428_[2-3,5%2] long a1005 alongd PD       0:00      1 (JobArrayTaskLimit)"""
+        self.assertEqual(ssh.parse_queue_load(stdout=stdout, server='server2'), (2, 3))
+
+    def test_format_job_id(self):
+        """Test formatting job IDs for cluster software commands"""
+        self.assertEqual(ssh.format_job_id(588334, 'server1'), '588334')
+        self.assertEqual(ssh.format_job_id('588350_3', 'server1'), '588350 -t 3')
+        self.assertEqual(ssh.format_job_id('14428_3', 'server2'), '14428_3')
+
+    def test_ess_discovery(self):
+        """Test locating several executables on a server using a single command"""
+        command = ssh.get_ess_discovery_command(['g09', 'qchem'])
+        self.assertEqual(command, '. ~/.bashrc; echo "g09=$(which g09 2>/dev/null)"; '
+                                  'echo "qchem=$(which qchem 2>/dev/null)"')
+        stdout = ['Welcome to server1\n', 'g09=/opt/g09/g09\n', 'qchem=\n']
+        self.assertEqual(ssh.parse_ess_discovery(stdout), {'g09': '/opt/g09/g09', 'qchem': ''})
+        self.assertEqual(ssh.parse_ess_discovery(''), dict())
+
+    def test_connection_pool(self):
+        """Test that the connection pool reuses healthy connections and closes idle or dropped ones"""
+        pool = ssh.SSHConnectionPool(idle_timeout=100)
+        client1, client2 = FakeSSHClient(), FakeSSHClient()
+        pool.connections = {'server1': client1, 'server2': client2}
+        pool.last_used = {'server1': time.time(), 'server2': time.time() - 101}
+        self.assertIs(pool.get('server1'), client1)
+        self.assertNotIn('server2', pool.connections)
+        self.assertTrue(client2.closed)
+        self.assertFalse(client1.closed)
+        pool.close_all()
+        self.assertTrue(client1.closed)
+        self.assertEqual(pool.connections, dict())
+        self.assertEqual(pool.last_used, dict())
+
+    def test_is_connection_healthy(self):
+        """Test checking whether a connection is healthy"""
+        client = FakeSSHClient()
+        self.assertTrue(ssh.is_connection_healthy(client))
+        client.close()
+        self.assertFalse(ssh.is_connection_healthy(client))
+
+    def test_stage_files(self):
+        """Test staging several files in a single SFTP session"""
+        scratch = os.path.join(arc_path, 'scratch_ssh')
+        local_path = os.path.join(arc_path, 'ARC.py')
+        manifest = [{'remote': os.path.join(scratch, 'job1', 'submit.sh'), 'content': 'submit script'},
+                    {'remote': os.path.join(scratch, 'job1', 'm.x'), 'content': 'executable', 'mode': 0o755},
+                    {'remote': os.path.join(scratch, 'job2', 'sub', 'ARC.py'), 'local': local_path}]
+        modified_times = ssh.stage_files(sftp=FakeSFTP(), manifest=manifest)
+        self.assertEqual(len(modified_times), 3)
+        with open(os.path.join(scratch, 'job1', 'submit.sh'), 'r') as f:
+            self.assertEqual(f.read(), 'submit script')
+        self.assertTrue(os.access(os.path.join(scratch, 'job1', 'm.x'), os.X_OK))
+        self.assertTrue(os.path.isfile(os.path.join(scratch, 'job2', 'sub', 'ARC.py')))
+        shutil.rmtree(scratch)
+
+
+class FakeSFTP(object):
+    """
+    A stand-in for paramiko's SFTPClient operating on the local file system
+    """
+    def stat(self, path):
+        return os.stat(path)
+
+    def mkdir(self, path):
+        os.mkdir(path)
+
+    def open(self, path, mode):
+        return FakeSFTPFile(path, mode)
+
+    def put(self, localpath, remotepath):
+        shutil.copyfile(localpath, remotepath)
+
+    def chmod(self, path, mode):
+        os.chmod(path, mode)
+
+
+class FakeSFTPFile(object):
+    """
+    A stand-in for paramiko's SFTPFile
+    """
+    def __init__(self, path, mode):
+        self.f = open(path, mode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.f.close()
+
+    def set_pipelined(self, pipelined):
+        pass
+
+    def write(self, data):
+        self.f.write(data)
+
+
+class FakeTransport(object):
+    """
+    A stand-in for paramiko's Transport
+    """
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def send_ignore(self):
+        pass
+
+
+class FakeSSHClient(object):
+    """
+    A stand-in for paramiko's SSHClient
+    """
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.closed = False
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.closed = True
+        self.transport.active = False
+
 
 if __name__ == '__main__':
     unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
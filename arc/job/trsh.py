@@ -5,15 +5,16 @@
 The ARC troubleshooting ("trsh") module
 """
 
+import itertools
 import logging
 import os
 
 import cclib
 import numpy as np
 
-from arc.common import get_logger, determine_ess
+from arc.common import get_logger, determine_ess, read_lines_reversed
 from arc.exceptions import SpeciesError, TrshError
-from arc.job.ssh import SSHClient
+from arc.job.ssh import SSHClient, format_job_id
 from arc.settings import servers, delete_command, list_available_nodes_command, submit_filename, \
     inconsistency_ab, inconsistency_az, maximum_barrier, rotor_scan_resolution
 from arc.species.converter import xyz_from_data
@@ -44,194 +45,289 @@ def determine_ess_status(output_path, species_label, job_type, software=None):
     if software is None:
         software = determine_ess(log_file=output_path)
 
+    # the output file is read lazily from its end, usually only the last few KB are read
+    return determine_ess_status_from_reversed_lines(reversed_lines=read_lines_reversed(output_path),
+                                                    species_label=species_label, job_type=job_type,
+                                                    software=software)
+
+
+def determine_ess_status_from_lines(lines, species_label, job_type, software):
+    """
+    Determine the status of an ESS job from the lines of its output file (or from the trailing lines only).
+
+    Args:
+        lines (list): The lines of the ESS output file.
+        species_label (str): The species label.
+        job_type (str): The job type (e.g., 'opt, 'freq', 'ts', 'sp').
+        software (str): The ESS software.
+
+    Returns:
+        status (str): The status. Either 'done' or 'errored'.
+    Returns:
+        keywords (list): The standardized error keywords.
+    Returns:
+        error (str): A description of the error.
+    Returns:
+        line (str): The parsed line from the ESS output file indicating the error.
+    """
+    return determine_ess_status_from_reversed_lines(reversed_lines=reversed(lines), species_label=species_label,
+                                                    job_type=job_type, software=software)
+
+
+def determine_ess_status_from_reversed_lines(reversed_lines, species_label, job_type, software):
+    """
+    Determine the status of an ESS job from the lines of its output file, consumed lazily from the last line
+    backwards. Lines preceding the one which determines the status are not consumed.
+
+    Args:
+        reversed_lines (iterable): The lines of the ESS output file, from the last line to the first.
+        species_label (str): The species label.
+        job_type (str): The job type (e.g., 'opt, 'freq', 'ts', 'sp').
+        software (str): The ESS software.
+
+    Returns:
+        status (str): The status. Either 'done' or 'errored'.
+    Returns:
+        keywords (list): The standardized error keywords.
+    Returns:
+        error (str): A description of the error.
+    Returns:
+        line (str): The parsed line from the ESS output file indicating the error.
+    """
     keywords, error, = list(), ''
-    with open(output_path, 'r') as f:
-        lines = f.readlines()
-
-        if len(lines) < 5:
-            return 'errored', ['NoOutput'], 'Log file could not be read', ''
-
-        if software == 'gaussian':
-            for line in lines[-1:-20:-1]:
-                if 'Normal termination' in line:
-                    return 'done', list(), '', ''
-            for i, line in enumerate(lines[::-1]):
-                if 'termination' in line:
-                    if 'l9999.exe' in line or 'link 9999' in line:
-                        keywords = ['Unconverged', 'GL9999']  # GL stand for Gaussian Link
-                        error = 'Unconverged'
-                    elif 'l101.exe' in line:
-                        keywords = ['InputError', 'GL101']
-                        error = 'The blank line after the coordinate section is missing, ' \
-                                'or charge/multiplicity was not specified correctly.'
-                    elif 'l103.exe' in line:
-                        keywords = ['InternalCoordinateError', 'GL103']
-                        error = 'Internal coordinate error'
-                    elif 'l108.exe' in line:
-                        keywords = ['InputError', 'GL108']
-                        error = 'There are two blank lines between z-matrix and ' \
-                                'the variables, expected only one.'
-                    elif 'l202.exe' in line:
-                        keywords = ['OptOrientation', 'GL202']
-                        error = 'During the optimization process, either the standard ' \
-                                'orientation or the point group of the molecule has changed.'
-                    elif 'l301.exe' in line:
-                        keywords = ['GL301']
-                    elif 'l401.exe' in line:
-                        keywords = ['GL401']
-                    elif 'l502.exe' in line:
-                        keywords = ['SCF', 'GL502']
-                        error = 'Unconverged SCF.'
-                    elif 'l716.exe' in line:
-                        keywords = ['ZMat', 'GL716']
-                        error = 'Angle in z-matrix outside the allowed range 0 < x < 180.'
-                    elif 'l906.exe' in line:
-                        keywords = ['MP2', 'GL906']
-                        error = 'The MP2 calculation has failed. It may be related to pseudopotential. ' \
-                                'Basis sets (CEP-121G*) that are used with polarization functions, ' \
-                                'where no polarization functions actually exist.'
-                    elif 'l913.exe' in line:
-                        keywords = ['MaxOptCycles', 'GL913']
-                        error = 'Maximum optimization cycles reached.'
-                    if any([keyword in ['GL301', 'GL401'] for keyword in keywords]):
-                        additional_info = lines[len(lines) - i - 2]
-                        if 'No data on chk file' in additional_info \
-                                or 'Basis set data is not on the checkpoint file' in additional_info:
-                            keywords = ['CheckFile']
-                            error = additional_info.rstrip()
-                        elif 'GL301' in keywords:
-                            if 'Atomic number out of range for' in lines[len(lines) - i - 2]:
-                                keywords.append('BasisSet')
-                                error = f'The basis set {lines[len(lines) - i - 2].split()[6]} ' \
-                                        f'is not appropriate for the this chemistry.'
-                            else:
-                                keywords.append('InputError')
-                                error = 'Either charge, multiplicity, or basis set was not ' \
-                                        'specified correctly. Alternatively, a specified atom does not match any ' \
-                                        'standard atomic symbol.'
-                        elif 'GL401' in keywords:
+    reversed_lines = iter(reversed_lines)
+    trailing_lines = list(itertools.islice(reversed_lines, 19))
+    if len(trailing_lines) < 5:
+        return 'errored', ['NoOutput'], 'Log file could not be read', ''
+    reversed_lines = itertools.chain(trailing_lines, reversed_lines)
+
+    if software == 'gaussian':
+        for line in trailing_lines:
+            if 'Normal termination' in line:
+                return 'done', list(), '', ''
+        for line, preceding_line in _with_preceding_lines(reversed_lines):
+            if 'termination' in line:
+                if 'l9999.exe' in line or 'link 9999' in line:
+                    keywords = ['Unconverged', 'GL9999']  # GL stand for Gaussian Link
+                    error = 'Unconverged'
+                elif 'l101.exe' in line:
+                    keywords = ['InputError', 'GL101']
+                    error = 'The blank line after the coordinate section is missing, ' \
+                            'or charge/multiplicity was not specified correctly.'
+                elif 'l103.exe' in line:
+                    keywords = ['InternalCoordinateError', 'GL103']
+                    error = 'Internal coordinate error'
+                elif 'l108.exe' in line:
+                    keywords = ['InputError', 'GL108']
+                    error = 'There are two blank lines between z-matrix and ' \
+                            'the variables, expected only one.'
+                elif 'l202.exe' in line:
+                    keywords = ['OptOrientation', 'GL202']
+                    error = 'During the optimization process, either the standard ' \
+                            'orientation or the point group of the molecule has changed.'
+                elif 'l301.exe' in line:
+                    keywords = ['GL301']
+                elif 'l401.exe' in line:
+                    keywords = ['GL401']
+                elif 'l502.exe' in line:
+                    keywords = ['SCF', 'GL502']
+                    error = 'Unconverged SCF.'
+                elif 'l716.exe' in line:
+                    keywords = ['ZMat', 'GL716']
+                    error = 'Angle in z-matrix outside the allowed range 0 < x < 180.'
+                elif 'l906.exe' in line:
+                    keywords = ['MP2', 'GL906']
+                    error = 'The MP2 calculation has failed. It may be related to pseudopotential. ' \
+                            'Basis sets (CEP-121G*) that are used with polarization functions, ' \
+                            'where no polarization functions actually exist.'
+                elif 'l913.exe' in line:
+                    keywords = ['MaxOptCycles', 'GL913']
+                    error = 'Maximum optimization cycles reached.'
+                if any([keyword in ['GL301', 'GL401'] for keyword in keywords]):
+                    additional_info = preceding_line
+                    if 'No data on chk file' in additional_info \
+                            or 'Basis set data is not on the checkpoint file' in additional_info:
+                        keywords = ['CheckFile']
+                        error = additional_info.rstrip()
+                    elif 'GL301' in keywords:
+                        if 'Atomic number out of range for' in preceding_line:
                             keywords.append('BasisSet')
-                            error = 'The projection from the old to the new basis set has failed.'
-                elif 'Erroneous write' in line or 'Write error in NtrExt1' in line:
-                    keywords = ['DiskSpace']
-                    error = 'Ran out of disk space.'
-                    line = ''
-                elif 'NtrErr' in line:
-                    keywords = ['CheckFile']
-                    error = 'An operation on the check file was specified, but a .chk was not found or is incomplete.'
-                    line = ''
-                elif 'malloc failed' in line or 'galloc' in line:
-                    keywords = ['Memory']
-                    error = 'Memory allocation failed (did you ask for too much?)'
-                    line = ''
-                elif 'PGFIO/stdio: No such file or directory' in line:
-                    keywords = ['Scratch']
-                    error = 'Wrongly specified the scratch directory. Correct the "GAUSS_SCRDIR" ' \
-                            'variable in the submit script, it should point to an existing directory. ' \
-                            'Make sure to add "mkdir -p $GAUSS_SCRDIR" to your submit script.'
-                    line = ''
-                if 'a syntax error was detected' in line.lower():
-                    keywords = ['Syntax']
-                    error = 'There was a syntax error in the Gaussian input file. Check your Gaussian input file ' \
-                            'template under arc/job/inputs.py. Alternatively, perhaps the level of theory is not ' \
-                            'supported by Gaussian in the format it was given.'
-                    line = ''
-                if keywords:
-                    break
-            error = error if error else 'Gaussian job terminated for an unknown reason. ' \
-                                        'It is possible there was a server node failure.'
-            keywords = keywords if keywords else ['Unknown']
-            return 'errored', keywords, error, line
+                            error = f'The basis set {preceding_line.split()[6]} ' \
+                                    f'is not appropriate for the this chemistry.'
+                        else:
+                            keywords.append('InputError')
+                            error = 'Either charge, multiplicity, or basis set was not ' \
+                                    'specified correctly. Alternatively, a specified atom does not match any ' \
+                                    'standard atomic symbol.'
+                    elif 'GL401' in keywords:
+                        keywords.append('BasisSet')
+                        error = 'The projection from the old to the new basis set has failed.'
+            elif 'Erroneous write' in line or 'Write error in NtrExt1' in line:
+                keywords = ['DiskSpace']
+                error = 'Ran out of disk space.'
+                line = ''
+            elif 'NtrErr' in line:
+                keywords = ['CheckFile']
+                error = 'An operation on the check file was specified, but a .chk was not found or is incomplete.'
+                line = ''
+            elif 'malloc failed' in line or 'galloc' in line:
+                keywords = ['Memory']
+                error = 'Memory allocation failed (did you ask for too much?)'
+                line = ''
+            elif 'PGFIO/stdio: No such file or directory' in line:
+                keywords = ['Scratch']
+                error = 'Wrongly specified the scratch directory. Correct the "GAUSS_SCRDIR" ' \
+                        'variable in the submit script, it should point to an existing directory. ' \
+                        'Make sure to add "mkdir -p $GAUSS_SCRDIR" to your submit script.'
+                line = ''
+            if 'a syntax error was detected' in line.lower():
+                keywords = ['Syntax']
+                error = 'There was a syntax error in the Gaussian input file. Check your Gaussian input file ' \
+                        'template under arc/job/inputs.py. Alternatively, perhaps the level of theory is not ' \
+                        'supported by Gaussian in the format it was given.'
+                line = ''
+            if keywords:
+                break
+        error = error if error else 'Gaussian job terminated for an unknown reason. ' \
+                                    'It is possible there was a server node failure.'
+        keywords = keywords if keywords else ['Unknown']
+        return 'errored', keywords, error, line
 
-        elif software == 'qchem':
-            done = False
-            for line in lines[::-1]:
-                if 'Thank you very much for using Q-Chem' in line:
-                    done = True
-                    # if this is an opt job, we must also check that the max num of cycles hasn't been reached,
-                    # so don't break yet
-                    if 'opt' not in job_type and 'conformer' not in job_type and 'ts' not in job_type:
-                        break
-                elif 'SCF failed' in line:
-                    keywords = ['SCF']
-                    error = 'SCF failed'
+    elif software == 'qchem':
+        done = False
+        for line in reversed_lines:
+            if 'Thank you very much for using Q-Chem' in line:
+                done = True
+                # if this is an opt job, we must also check that the max num of cycles hasn't been reached,
+                # so don't break yet
+                if 'opt' not in job_type and 'conformer' not in job_type and 'ts' not in job_type:
                     break
-                elif 'error' in line and 'DIIS' not in line:
-                    # these are **normal** lines that we should not capture:
-                    # "SCF converges when DIIS error is below 1.0E-08", or
-                    # "Cycle       Energy         DIIS Error"
-                    keywords = ['SCF', 'DIIS']
-                    error = 'SCF failed'
+            elif 'SCF failed' in line:
+                keywords = ['SCF']
+                error = 'SCF failed'
+                break
+            elif 'error' in line and 'DIIS' not in line:
+                # these are **normal** lines that we should not capture:
+                # "SCF converges when DIIS error is below 1.0E-08", or
+                # "Cycle       Energy         DIIS Error"
+                keywords = ['SCF', 'DIIS']
+                error = 'SCF failed'
+                break
+            elif 'Invalid charge/multiplicity combination' in line:
+                raise SpeciesError('The multiplicity and charge combination for species {0} are wrong.'.format(
+                    species_label))
+            if 'opt' in job_type or 'conformer' in job_type or 'ts' in job_type:
+                if 'MAXIMUM OPTIMIZATION CYCLES REACHED' in line:
+                    keywords = ['MaxOptCycles']
+                    error = 'Maximum optimization cycles reached.'
+                    break
+                elif 'OPTIMIZATION CONVERGED' in line and done:  # `done` should already be assigned
+                    done = True
                     break
-                elif 'Invalid charge/multiplicity combination' in line:
-                    raise SpeciesError('The multiplicity and charge combination for species {0} are wrong.'.format(
-                        species_label))
-                if 'opt' in job_type or 'conformer' in job_type or 'ts' in job_type:
-                    if 'MAXIMUM OPTIMIZATION CYCLES REACHED' in line:
-                        keywords = ['MaxOptCycles']
-                        error = 'Maximum optimization cycles reached.'
-                        break
-                    elif 'OPTIMIZATION CONVERGED' in line and done:  # `done` should already be assigned
-                        done = True
-                        break
-            if done:
-                return 'done', keywords, '', ''
-            error = error if error else 'QChem job terminated for an unknown reason.'
-            keywords = keywords if keywords else ['Unknown']
+        if done:
+            return 'done', keywords, '', ''
+        error = error if error else 'QChem job terminated for an unknown reason.'
+        keywords = keywords if keywords else ['Unknown']
+        return 'errored', keywords, error, line
+
+    elif software == 'molpro':
+        for line in reversed_lines:
+            if 'molpro calculation terminated' in line.lower() \
+                    or 'variable memory released' in line.lower():
+                return 'done', list(), '', ''
+            elif 'No convergence' in line:
+                keywords = ['Unconverged']
+                error = 'Unconverged'
+                break
+            elif 'A further' in line and 'Mwords of memory are needed' in line and 'Increase memory to' in line:
+                # e.g.: `A further 246.03 Mwords of memory are needed for the triples to run.
+                # Increase memory to 996.31 Mwords.` (w/o the line break)
+                keywords = ['Memory']
+                error = 'Additional memory required: {0} MW'.format(line.split()[2])
+                break
+            elif 'insufficient memory available - require' in line:
+                # e.g.: `insufficient memory available - require              228765625  have
+                #        62928590
+                #        the request was for real words`
+                # add_mem = (float(line.split()[-2]) - float(prev_line.split()[0])) / 1e6
+                keywords = ['Memory']
+                error = 'Additional memory required: {0} MW'.format(float(line.split()[-2]) / 1e6)
+                break
+            elif 'Basis library exhausted' in line:
+                # e.g.:
+                # ` SETTING BASIS          =    6-311G**
+                #
+                #
+                #  Using spherical harmonics
+                #
+                #  LIBRARY EXHAUSTED
+                #   Searching for I  S 6-311G
+                #   Library contains the following bases:
+                #  ? Error
+                #  ? Basis library exhausted
+                #  ? The problem occurs in Binput`
+                keywords = ['BasisSet']
+                basis_set = None
+                # the basis set is set earlier in the file, keep the first setting
+                for line0 in reversed_lines:
+                    if 'SETTING BASIS' in line0:
+                        basis_set = line0.split()[-1]
+                error = f'Unrecognized basis set {basis_set}'
+                break
+            elif 'the problem occurs' in line:
+                keywords = ['Unknown']
+                error = 'Unknown'
+                break
+        error = error if error else 'Molpro job terminated for an unknown reason.'
+        keywords = keywords if keywords else ['Unknown']
+        if keywords:
             return 'errored', keywords, error, line
+        return 'done', list(), '', ''
 
-        elif software == 'molpro':
-            for line in lines[::-1]:
-                if 'molpro calculation terminated' in line.lower() \
-                        or 'variable memory released' in line.lower():
-                    return 'done', list(), '', ''
-                elif 'No convergence' in line:
-                    keywords = ['Unconverged']
-                    error = 'Unconverged'
-                    break
-                elif 'A further' in line and 'Mwords of memory are needed' in line and 'Increase memory to' in line:
-                    # e.g.: `A further 246.03 Mwords of memory are needed for the triples to run.
-                    # Increase memory to 996.31 Mwords.` (w/o the line break)
-                    keywords = ['Memory']
-                    error = 'Additional memory required: {0} MW'.format(line.split()[2])
-                    break
-                elif 'insufficient memory available - require' in line:
-                    # e.g.: `insufficient memory available - require              228765625  have
-                    #        62928590
-                    #        the request was for real words`
-                    # add_mem = (float(line.split()[-2]) - float(prev_line.split()[0])) / 1e6
-                    keywords = ['Memory']
-                    error = 'Additional memory required: {0} MW'.format(float(line.split()[-2]) / 1e6)
-                    break
-                elif 'Basis library exhausted' in line:
-                    # e.g.:
-                    # ` SETTING BASIS          =    6-311G**
-                    #
-                    #
-                    #  Using spherical harmonics
-                    #
-                    #  LIBRARY EXHAUSTED
-                    #   Searching for I  S 6-311G
-                    #   Library contains the following bases:
-                    #  ? Error
-                    #  ? Basis library exhausted
-                    #  ? The problem occurs in Binput`
-                    keywords = ['BasisSet']
-                    basis_set = None
-                    for line0 in lines[::-1]:
-                        if 'SETTING BASIS' in line0:
-                            basis_set = line0.split()[-1]
-                    error = f'Unrecognized basis set {basis_set}'
-                    break
-                elif 'the problem occurs' in line:
-                    keywords = ['Unknown']
-                    error = 'Unknown'
-                    break
-            error = error if error else 'Molpro job terminated for an unknown reason.'
-            keywords = keywords if keywords else ['Unknown']
-            if keywords:
-                return 'errored', keywords, error, line
-            return 'done', list(), '', ''
+
+def _with_preceding_lines(reversed_lines):
+    """
+    A helper function for pairing each line of reversed lines with the line preceding it in the file.
+
+    Args:
+        reversed_lines (iterable): Lines from the last line to the first.
+
+    Yields:
+        tuple: The line and the preceding line (an empty string for the first line of the file).
+    """
+    reversed_lines = iter(reversed_lines)
+    line = next(reversed_lines, None)
+    while line is not None:
+        preceding_line = next(reversed_lines, None)
+        yield line, preceding_line if preceding_line is not None else ''
+        line = preceding_line
+
+
+def is_tail_ess_status_conclusive(status, keywords, lines, job_type, software):
+    """
+    Determine whether an ESS status deduced from only the trailing lines of an output file
+    is identical to the status that would have been deduced from the entire file.
+    The output file is scanned backwards, so the status is conclusive if the pattern that determined it
+    was found within the trailing lines.
+
+    Args:
+        status (str): The status deduced from the trailing lines, either 'done' or 'errored'.
+        keywords (list): The standardized error keywords deduced from the trailing lines.
+        lines (list): The trailing lines of the ESS output file.
+        job_type (str): The job type (e.g., 'opt, 'freq', 'ts', 'sp').
+        software (str): The ESS software.
+
+    Returns:
+        bool: Whether the status is conclusive.
+    """
+    if len(lines) < 5 or software not in ['gaussian', 'qchem', 'molpro']:
+        return False
+    if status == 'errored':
+        return keywords != ['Unknown']
+    if software == 'qchem' and ('opt' in job_type or 'conformer' in job_type or 'ts' in job_type):
+        # an optimization might have reached the maximum number of cycles before Q-Chem terminated normally
+        return any(['OPTIMIZATION CONVERGED' in line for line in lines])
+    return True
 
 
 def trsh_negative_freq(label, log_file, neg_freqs_trshed=None, job_types=None):
@@ -710,7 +806,8 @@ def trsh_job_on_server(server, job_name, job_id, job_server_status, remote_path,
 
         logger.error('Troubleshooting by changing node.')
         ssh = SSHClient(server)
-        ssh.send_command_to_server(command=delete_command[servers[server]['cluster_soft']] + ' ' + str(job_id))
+        ssh.send_command_to_server(command=delete_command[servers[server]['cluster_soft']] + ' '
+                                   + format_job_id(job_id, server))
         # find available nodes
         stdout = ssh.send_command_to_server(command=list_available_nodes_command[servers[server]['cluster_soft']])[0]
         for line in stdout:
@@ -744,7 +841,8 @@ def trsh_job_on_server(server, job_name, job_id, job_server_status, remote_path,
         logger.error('Re-submitting job {0} on {1}'.format(job_name, server))
         # delete current server run
         ssh = SSHClient(server)
-        ssh.send_command_to_server(command=delete_command[servers[server]['cluster_soft']] + ' ' + str(job_id))
+        ssh.send_command_to_server(command=delete_command[servers[server]['cluster_soft']] + ' '
+                                   + format_job_id(job_id, server))
         return None, True
 
 
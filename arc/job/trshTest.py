@@ -96,6 +96,45 @@ class TestTrsh(unittest.TestCase):
         self.assertEqual(error, 'Unrecognized basis set 6-311G**')
         self.assertIn(' ? Basis library exhausted', line)  # line includes '\n'
 
+    def test_determine_ess_status_from_tail(self):
+        """Test determining the ESS status from the tail of an output file"""
+        for software, file_name, job_type in [('gaussian', 'converged.out', 'opt'),
+                                              ('gaussian', 'l913.out', 'composite'),
+                                              ('gaussian', 'l9999.out', 'opt'),
+                                              ('molpro', 'insufficient_memory.out', 'sp')]:
+            path = os.path.join(self.base_path[software], file_name)
+            with open(path, 'r') as f:
+                lines = f.readlines()
+            tail = lines[-40:]
+            full_status = trsh.determine_ess_status_from_lines(lines=lines, species_label='tst', job_type=job_type,
+                                                               software=software)
+            tail_status = trsh.determine_ess_status_from_lines(lines=tail, species_label='tst', job_type=job_type,
+                                                               software=software)
+            self.assertTrue(trsh.is_tail_ess_status_conclusive(status=tail_status[0], keywords=tail_status[1],
+                                                               lines=tail, job_type=job_type, software=software))
+            self.assertEqual(tail_status, full_status)
+
+        # the convergence message of a Q-Chem optimization is not in the tail, a larger window should be read
+        path = os.path.join(self.base_path['qchem'], 'H2_opt.out')
+        with open(path, 'r') as f:
+            lines = f.readlines()
+        status, keywords = trsh.determine_ess_status_from_lines(lines=lines[-40:], species_label='H2', job_type='opt',
+                                                                software='qchem')[:2]
+        self.assertFalse(trsh.is_tail_ess_status_conclusive(status=status, keywords=keywords, lines=lines[-40:],
+                                                            job_type='opt', software='qchem'))
+        self.assertTrue(trsh.is_tail_ess_status_conclusive(status=status, keywords=keywords, lines=lines,
+                                                           job_type='opt', software='qchem'))
+
+        self.assertFalse(trsh.is_tail_ess_status_conclusive(status='errored', keywords=['Unknown'], lines=['\n'] * 10,
+                                                            job_type='opt', software='gaussian'))
+        self.assertFalse(trsh.is_tail_ess_status_conclusive(status='done', keywords=list(), lines=['\n'] * 3,
+                                                            job_type='opt', software='gaussian'))
+        self.assertFalse(trsh.is_tail_ess_status_conclusive(status='done', keywords=list(),
+                                                            lines=[' Thank you very much for using Q-Chem\n'] * 10,
+                                                            job_type='opt', software='qchem'))
+        self.assertTrue(trsh.is_tail_ess_status_conclusive(status='done', keywords=list(),
+                                                           lines=[' Thank you very much for using Q-Chem\n'] * 10,
+                                                           job_type='sp', software='qchem'))
 
     def test_trsh_ess_job(self):
         """Test the trsh_ess_job() function"""
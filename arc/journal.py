@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+A module for the restart journal, an append-only log of the Scheduler's state changes.
+
+Instead of rewriting the entire ``restart.yml`` file whenever the state of the Scheduler changes, only the parts which
+changed (the output dictionary, the species dictionary, or the running jobs of a species, and the remote artifacts
+registry) are appended to a ``restart.journal`` file next to it, so the cost of a checkpoint is proportional to what
+changed rather than to the size of the project. Every ``restart_journal_compaction_interval`` records the journal is
+compacted, i.e., a complete ``restart.yml`` snapshot is written and the journal is started over.
+
+Each line in the journal is a JSON object, so a record partially written when ARC crashed is detected and ignored.
+The record content is serialized as YAML, exactly like the restart file. The first line is a header with the ID of
+the snapshot the journal applies to, and records are only replayed on top of the snapshot with the same ID.
+"""
+
+import copy
+import json
+import os
+import uuid
+
+import yaml
+
+from arc.common import get_logger, save_yaml_file, string_representer
+from arc.settings import restart_journal_compaction_interval
+
+
+logger = get_logger()
+
+
+class RestartJournal(object):
+    """
+    The restart journal of an ARC project.
+
+    Args:
+        restart_path (str): The path to the ``restart.yml`` snapshot.
+        compaction_interval (int, optional): The number of records after which the journal is compacted.
+
+    Attributes:
+        restart_path (str): The path to the ``restart.yml`` snapshot.
+        journal_path (str): The path to the ``restart.journal`` file.
+        compaction_interval (int): The number of records after which the journal is compacted.
+        journal_id (str): The ID of the current snapshot, ``None`` before the first snapshot was written.
+        records (int): The number of records appended since the last snapshot.
+        last_content (dict): Keys are (op, label) tuples, values are the last recorded content.
+    """
+    def __init__(self, restart_path, compaction_interval=None):
+        self.restart_path = restart_path
+        self.journal_path = get_journal_path(restart_path)
+        self.compaction_interval = compaction_interval or restart_journal_compaction_interval
+        self.journal_id = None
+        self.records = 0
+        self.last_content = dict()
+
+    @property
+    def needs_compaction(self):
+        """
+        Whether a complete snapshot should be written instead of appending records.
+        """
+        return self.journal_id is None or self.records >= self.compaction_interval
+
+    def compact(self, restart_dict):
+        """
+        Write a complete restart snapshot and start a new (empty) journal.
+        The snapshot and the journal are each atomically replaced, and since the journal header holds the ID of its
+        snapshot, a crash in between leaves a consistent state.
+
+        Args:
+            restart_dict (dict): The complete restart dictionary.
+        """
+        self.journal_id = uuid.uuid4().hex
+        restart_dict['journal_id'] = self.journal_id
+        tmp_path = self.restart_path + '.tmp'
+        save_yaml_file(path=tmp_path, content=restart_dict)
+        os.replace(tmp_path, self.restart_path)
+        with open(self.journal_path + '.tmp', 'w') as f:
+            f.write(json.dumps({'op': 'header', 'journal_id': self.journal_id}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.journal_path + '.tmp', self.journal_path)
+        self.records = 0
+        self.last_content = dict()
+        for label, output in restart_dict.get('output', dict()).items():
+            self.last_content[('output', label)] = copy.deepcopy(output)
+            self.last_content[('running_jobs', label)] = copy.deepcopy(restart_dict.get('running_jobs',
+                                                                                        dict()).get(label, list()))
+        for species_dict in restart_dict.get('species', list()):
+            self.last_content[('species', species_dict['label'])] = copy.deepcopy(species_dict)
+        self.last_content[('remote_artifacts', None)] = copy.deepcopy(restart_dict.get('remote_artifacts', list()))
+
+    def append(self, updates):
+        """
+        Append the updates which changed since they were last recorded to the journal.
+        All records are written at once and flushed to the disk.
+
+        Args:
+            updates (list): Entries are (op, label, content) tuples. ``op`` is either 'output', 'species',
+                            'running_jobs', or 'remote_artifacts' (whose label is ``None``).
+
+        Returns:
+            int: The number of appended records.
+        """
+        lines = list()
+        yaml.add_representer(str, string_representer)
+        for op, label, content in updates:
+            if self.last_content.get((op, label), None) == content:
+                continue
+            self.last_content[(op, label)] = copy.deepcopy(content)
+            lines.append(json.dumps({'op': op, 'label': label, 'content': yaml.dump(data=content)}) + '\n')
+        if lines:
+            with open(self.journal_path, 'a') as f:
+                f.write(''.join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            self.records += len(lines)
+        return len(lines)
+
+
+def get_journal_path(restart_path):
+    """
+    Get the path of the restart journal corresponding to a restart file.
+
+    Args:
+        restart_path (str): The path to the ``restart.yml`` snapshot.
+
+    Returns:
+        str: The path to the ``restart.journal`` file.
+    """
+    return os.path.splitext(restart_path)[0] + '.journal'
+
+
+def replay_restart_journal(restart_dict, restart_path):
+    """
+    Apply the records of a restart journal to the restart dictionary read from its snapshot.
+    The journal is ignored if it belongs to a different snapshot (e.g., if ARC is restarted from an input file).
+
+    Args:
+        restart_dict (dict): The restart dictionary read from the snapshot, modified in place.
+        restart_path (str): The path to the ``restart.yml`` snapshot.
+
+    Returns:
+        int: The number of replayed records.
+    """
+    journal_path = get_journal_path(restart_path)
+    if 'journal_id' not in restart_dict or not os.path.isfile(journal_path):
+        return 0
+    replayed = 0
+    with open(journal_path, 'r') as f:
+        for i, line in enumerate(f):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning('Ignoring a partially written record in the restart journal {0}'.format(journal_path))
+                break
+            if i == 0:
+                if record.get('op', None) != 'header' or record.get('journal_id', None) != restart_dict['journal_id']:
+                    logger.debug('The restart journal {0} does not belong to this restart file'.format(journal_path))
+                    return 0
+                continue
+            op, label = record['op'], record['label']
+            content = yaml.load(stream=record['content'], Loader=yaml.FullLoader)
+            if op == 'output':
+                restart_dict.setdefault('output', dict())[label] = content
+            elif op == 'species':
+                species_list = restart_dict.setdefault('species', list())
+                for j, species_dict in enumerate(species_list):
+                    if species_dict['label'] == label:
+                        species_list[j] = content
+                        break
+                else:
+                    species_list.append(content)
+            elif op == 'running_jobs':
+                if content:
+                    restart_dict.setdefault('running_jobs', dict())[label] = content
+                elif label in restart_dict.get('running_jobs', dict()):
+                    del restart_dict['running_jobs'][label]
+            elif op == 'remote_artifacts':
+                restart_dict['remote_artifacts'] = content
+            replayed += 1
+    if replayed:
+        logger.info('Replayed {0} records from the restart journal'.format(replayed))
+    return replayed
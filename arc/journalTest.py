@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests for ARC's journal module
+"""
+
+import os
+import shutil
+import unittest
+
+from arc.common import read_yaml_file
+from arc.journal import RestartJournal, get_journal_path, replay_restart_journal
+from arc.settings import arc_path
+
+
+class TestRestartJournal(unittest.TestCase):
+    """
+    Contains unit tests for the RestartJournal class
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method that is run before all unit tests in this class.
+        """
+        cls.maxDiff = None
+        cls.project_directory = os.path.join(arc_path, 'Projects', 'arc_project_for_testing_delete_after_usage8')
+        cls.restart_path = os.path.join(cls.project_directory, 'restart.yml')
+
+    def setUp(self):
+        """
+        A method that is run before each unit test in this class.
+        """
+        if os.path.isdir(self.project_directory):
+            shutil.rmtree(self.project_directory)
+        os.makedirs(self.project_directory)
+        self.restart_dict = {'project': 'arc_project_for_testing_delete_after_usage8',
+                             'output': {'H2O': {'job_types': {'opt': False, 'sp': False}, 'info': ''},
+                                        'NH3': {'job_types': {'opt': False, 'sp': False}, 'info': ''}},
+                             'species': [{'label': 'H2O', 'multiplicity': 1}, {'label': 'NH3', 'multiplicity': 1}],
+                             'running_jobs': {'H2O': [{'job_name': 'opt_a1', 'job_id': 101}]},
+                             }
+        self.journal = RestartJournal(restart_path=self.restart_path, compaction_interval=5)
+
+    def test_compact_and_replay(self):
+        """Test writing a snapshot, appending records, and replaying them on the snapshot"""
+        self.assertTrue(self.journal.needs_compaction)
+        self.journal.compact(restart_dict=self.restart_dict)
+        self.assertFalse(self.journal.needs_compaction)
+        self.assertEqual(self.journal.journal_path, os.path.join(self.project_directory, 'restart.journal'))
+
+        # unchanged content is not recorded
+        self.assertEqual(self.journal.append([('output', 'H2O', {'job_types': {'opt': False, 'sp': False},
+                                                                 'info': ''})]), 0)
+        h2o_output = {'job_types': {'opt': True, 'sp': False}, 'info': 'opt converged; '}
+        self.assertEqual(self.journal.append([('output', 'H2O', h2o_output),
+                                              ('species', 'H2O', {'label': 'H2O', 'multiplicity': 1,
+                                                                  'final_xyz': 'O 0.0 0.0 0.0\nH 0.0 0.0 1.0'}),
+                                              ('running_jobs', 'H2O', list()),
+                                              ('running_jobs', 'NH3', [{'job_name': 'opt_a2', 'job_id': 102}])]), 4)
+        h2o_output['info'] += 'modified in place; '
+        self.assertEqual(self.journal.append([('output', 'H2O', h2o_output)]), 1)
+        self.assertEqual(self.journal.records, 5)
+        self.assertTrue(self.journal.needs_compaction)
+
+        restart_dict = read_yaml_file(self.restart_path)
+        self.assertEqual(restart_dict['running_jobs'], {'H2O': [{'job_name': 'opt_a1', 'job_id': 101}]})
+        self.assertEqual(replay_restart_journal(restart_dict=restart_dict, restart_path=self.restart_path), 5)
+        self.assertEqual(restart_dict['output']['H2O'], {'job_types': {'opt': True, 'sp': False},
+                                                         'info': 'opt converged; modified in place; '})
+        self.assertEqual(restart_dict['output']['NH3'], self.restart_dict['output']['NH3'])
+        self.assertEqual(restart_dict['species'][0]['final_xyz'], 'O 0.0 0.0 0.0\nH 0.0 0.0 1.0')
+        self.assertEqual(restart_dict['running_jobs'], {'NH3': [{'job_name': 'opt_a2', 'job_id': 102}]})
+
+    def test_partial_record(self):
+        """Test that a partially written record (e.g., if ARC crashed) is ignored"""
+        self.journal.compact(restart_dict=self.restart_dict)
+        self.journal.append([('running_jobs', 'NH3', [{'job_name': 'opt_a2', 'job_id': 102}])])
+        with open(self.journal.journal_path, 'a') as f:
+            f.write('{"op": "output", "label": "H2O", "cont')
+        restart_dict = read_yaml_file(self.restart_path)
+        self.assertEqual(replay_restart_journal(restart_dict=restart_dict, restart_path=self.restart_path), 1)
+        self.assertEqual(restart_dict['output']['H2O'], self.restart_dict['output']['H2O'])
+        self.assertIn('NH3', restart_dict['running_jobs'])
+
+    def test_stale_journal(self):
+        """Test that a journal is only replayed on top of its own snapshot"""
+        self.journal.compact(restart_dict=self.restart_dict)
+        self.journal.append([('running_jobs', 'H2O', list())])
+        restart_dict = read_yaml_file(self.restart_path)
+        # a snapshot written by a later compaction, the journal of which was not written (e.g., if ARC crashed)
+        restart_dict['journal_id'] = 'a_newer_snapshot'
+        self.assertEqual(replay_restart_journal(restart_dict=restart_dict, restart_path=self.restart_path), 0)
+        self.assertIn('H2O', restart_dict['running_jobs'])
+        # an input file
+        del restart_dict['journal_id']
+        self.assertEqual(replay_restart_journal(restart_dict=restart_dict, restart_path=self.restart_path), 0)
+
+    def test_get_journal_path(self):
+        """Test getting the journal path"""
+        self.assertEqual(get_journal_path('/home/user/project/restart.yml'), '/home/user/project/restart.journal')
+        self.assertEqual(get_journal_path('restart.old.101010_Jan01_2020.yml'), 'restart.old.101010_Jan01_2020.journal')
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A function that is run ONCE after all unit tests in this class.
+        Delete all project directories created during these unit tests
+        """
+        if os.path.isdir(cls.project_directory):
+            shutil.rmtree(cls.project_directory)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
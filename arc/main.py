@@ -12,10 +12,13 @@ Where ``spc0``, ``spc1``, and ``spc2`` in the above example are :ref:`ARCSpecies
 """
 
 import datetime
+import hashlib
+import json
 import logging
 import os
 import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
 from distutils.spawn import find_executable
 from IPython.display import display
 
@@ -27,11 +30,14 @@ import arc.rmgdb as rmgdb
 from arc.common import VERSION, read_yaml_file, time_lapse, check_ess_settings, initialize_log, log_footer, get_logger,\
     save_yaml_file, initialize_job_types
 from arc.exceptions import InputError, SettingsError, SpeciesError
-from arc.job.ssh import SSHClient
+from arc.job.artifacts import remote_artifacts
+from arc.job.ssh import discover_ess_on_server
+from arc.journal import get_journal_path, replay_restart_journal
 from arc.processor import Processor
 from arc.reaction import ARCReaction
 from arc.scheduler import Scheduler
-from arc.settings import arc_path, default_levels_of_theory, servers, valid_chars, default_job_types
+from arc.settings import arc_path, default_levels_of_theory, servers, valid_chars, default_job_types, \
+    ess_settings_cache_path, ess_settings_cache_ttl
 from arc.species.species import ARCSpecies
 from arc.utils.scale import determine_scaling_factors
 
@@ -43,6 +49,8 @@ except ImportError:
 
 logger = get_logger()
 
+ess_names = {'gaussian': 'Gaussian', 'qchem': 'QChem', 'orca': 'Orca', 'molpro': 'Molpro'}
+
 
 class ARC(object):
     """
@@ -95,6 +103,8 @@ class ARC(object):
                                       default is False.
         dont_gen_confs (list, optional): A list of species labels for which conformer generation should be avoided
                                          if xyz is given.
+        scheduler_mode (str, optional): Either 'sync' (default) to sequentially poll the servers and handle completed
+                                        jobs, or 'async' to use the event-driven scheduler.
 
     Attributes:
         project (str): The project's name. Used for naming the working directory.
@@ -128,6 +138,7 @@ class ARC(object):
         execution_time (str): Overall execution time.
         lib_long_desc (str): A multiline description of levels of theory for the outputted RMG libraries.
         running_jobs (dict): A dictionary of jobs submitted in a precious ARC instance, used for restarting ARC.
+        remote_artifacts (list): Files left on the servers by a precious ARC instance, used for restarting ARC.
         t_min (tuple): The minimum temperature for kinetics computations, e.g., (500, str('K')).
         t_max (tuple): The maximum temperature for kinetics computations, e.g., (3000, str('K')).
         t_count (int): The number of temperature points between t_min and t_max for kinetics computations.
@@ -143,6 +154,7 @@ class ARC(object):
         keep_checks (bool): Whether to keep all Gaussian checkfiles when ARC terminates. True to keep, default is False.
         dont_gen_confs (list): A list of species labels for which conformer generation should be avoided
                                if xyz is given.
+        scheduler_mode (str): Either 'sync' or 'async', the scheduler mode.
 
     """
 
@@ -152,11 +164,12 @@ class ARC(object):
                  t_max=None, t_count=None, verbose=logging.INFO, project_directory=None, max_job_time=120,
                  allow_nonisomorphic_2d=False, job_memory=14, ess_settings=None, bath_gas=None,
                  adaptive_levels=None, freq_scale_factor=None, calc_freq_factor=True, confs_to_dft=5,
-                 keep_checks=False, dont_gen_confs=None, specific_job_type=''):
+                 keep_checks=False, dont_gen_confs=None, specific_job_type='', scheduler_mode='sync'):
         self.__version__ = VERSION
         self.verbose = verbose
         self.output = dict()
         self.running_jobs = dict()
+        self.remote_artifacts = list()
         self.lib_long_desc = ''
         self.unique_species_labels = list()
         self.rmgdb = rmgdb.make_rmg_database_object()
@@ -167,6 +180,7 @@ class ARC(object):
         self.ess_settings = dict()
         self.calc_freq_factor = calc_freq_factor
         self.keep_checks = keep_checks
+        self.scheduler_mode = scheduler_mode
 
         if input_dict is None:
             if project is None:
@@ -412,6 +426,10 @@ class ARC(object):
             restart_backup_name = 'restart.old.' + local_time + '.yml'
             shutil.copy(os.path.join(self.project_directory, 'restart.yml'),
                         os.path.join(self.project_directory, 'log_and_restart_archive', restart_backup_name))
+            journal_path = get_journal_path(os.path.join(self.project_directory, 'restart.yml'))
+            if os.path.isfile(journal_path):
+                shutil.copy(journal_path, os.path.join(self.project_directory, 'log_and_restart_archive',
+                                                       get_journal_path(restart_backup_name)))
 
     def as_dict(self):
         """
@@ -445,6 +463,8 @@ class ARC(object):
         restart_dict['reactions'] = [rxn.as_dict() for rxn in self.arc_rxn_list]
         restart_dict['output'] = self.output  # if read from_dict then it has actual values
         restart_dict['running_jobs'] = self.running_jobs  # if read from_dict then it has actual values
+        if self.remote_artifacts:
+            restart_dict['remote_artifacts'] = self.remote_artifacts
         restart_dict['t_min'] = self.t_min
         restart_dict['t_max'] = self.t_max
         restart_dict['t_count'] = self.t_count
@@ -456,6 +476,8 @@ class ARC(object):
         restart_dict['specific_job_type'] = self.specific_job_type
         if self.keep_checks:
             restart_dict['keep_checks'] = self.keep_checks
+        if self.scheduler_mode != 'sync':
+            restart_dict['scheduler_mode'] = self.scheduler_mode
         return restart_dict
 
     def from_dict(self, input_dict, project=None, project_directory=None):
@@ -475,6 +497,9 @@ class ARC(object):
             os.makedirs(self.project_directory)
         initialize_log(log_file=os.path.join(self.project_directory, 'arc.log'), project=self.project,
                        project_directory=self.project_directory, verbose=self.verbose)
+        # apply the changes saved in the restart journal since the restart file was last written
+        replay_restart_journal(restart_dict=input_dict,
+                               restart_path=os.path.join(self.project_directory, 'restart.yml'))
         self.t0 = time.time()  # init time
         self.execution_time = None
         self.verbose = input_dict['verbose'] if 'verbose' in input_dict else self.verbose
@@ -484,6 +509,7 @@ class ARC(object):
         self.confs_to_dft = input_dict['confs_to_dft'] if 'confs_to_dft' in input_dict else 5
         self.adaptive_levels = input_dict['adaptive_levels'] if 'adaptive_levels' in input_dict else None
         self.keep_checks = input_dict['keep_checks'] if 'keep_checks' in input_dict else False
+        self.scheduler_mode = input_dict['scheduler_mode'] if 'scheduler_mode' in input_dict else 'sync'
         self.allow_nonisomorphic_2d = input_dict['allow_nonisomorphic_2d']\
             if 'allow_nonisomorphic_2d' in input_dict else False
         self.output = input_dict['output'] if 'output' in input_dict else dict()
@@ -505,6 +531,7 @@ class ARC(object):
                                     raise SpeciesError('Could not find {0} output file for species {1}: {2}'.format(
                                         key, label, val))
         self.running_jobs = input_dict['running_jobs'] if 'running_jobs' in input_dict else dict()
+        self.remote_artifacts = input_dict['remote_artifacts'] if 'remote_artifacts' in input_dict else list()
         logger.debug('output dictionary successfully parsed:\n{0}'.format(self.output))
         self.t_min = input_dict['t_min'] if 't_min' in input_dict else None
         self.t_max = input_dict['t_max'] if 't_max' in input_dict else None
@@ -717,11 +744,13 @@ class ARC(object):
                                    max_job_time=self.max_job_time, allow_nonisomorphic_2d=self.allow_nonisomorphic_2d,
                                    memory=self.memory, orbitals_level=self.orbitals_level,
                                    adaptive_levels=self.adaptive_levels, confs_to_dft=self.confs_to_dft,
-                                   dont_gen_confs=self.dont_gen_confs)
+                                   dont_gen_confs=self.dont_gen_confs, scheduler_mode=self.scheduler_mode)
 
         save_yaml_file(path=os.path.join(self.project_directory, 'output', 'status.yml'), content=self.scheduler.output)
 
-        if not self.keep_checks:
+        if self.keep_checks:
+            self.fetch_check_files()
+        else:
             self.delete_check_files()
 
         self.save_project_info_file()
@@ -871,8 +900,10 @@ class ARC(object):
         """
         Determine where each ESS is available, locally (in running on a server) and/or on remote servers.
         if `diagnostics` is True, this method will not raise errors, and will print its findings.
+        All remote servers are probed concurrently, and the mapped settings are cached for ``ess_settings_cache_ttl``
+        seconds (the cache is not used when running diagnostics).
         """
-        if self.ess_settings is not None and not diagnostics:
+        if self.ess_settings and not diagnostics:
             self.ess_settings = check_ess_settings(self.ess_settings)
             return
 
@@ -882,6 +913,14 @@ class ARC(object):
 
         # os.system('. ~/.bashrc')  # TODO This might be a security risk - rethink it
 
+        if not diagnostics:
+            cached_ess_settings = read_ess_settings_cache()
+            if cached_ess_settings:
+                self.ess_settings = cached_ess_settings
+                logger.info('Using the ESS settings cached in {0}: {1}\n'.format(ess_settings_cache_path,
+                                                                                 self.ess_settings))
+                return
+
         for software in ['gaussian', 'molpro', 'qchem', 'orca', 'onedmin']:
             self.ess_settings[software] = list()
 
@@ -916,54 +955,34 @@ class ARC(object):
         else:
             logger.info("\nNot searching for ESS locally ('local' wasn't specified in the servers dictionary)\n")
 
-        # look for ESS on remote servers ARC has access to
+        # look for ESS on remote servers ARC has access to, probing all servers concurrently
         logger.info('\n\nMapping servers...\n')
-        for server in servers.keys():
-            if server == 'local':
-                continue
+        remote_servers = [server for server in servers.keys() if server != 'local']
+        if remote_servers:
+            with ThreadPoolExecutor(max_workers=len(remote_servers)) as executor:
+                discovered = list(executor.map(discover_ess_on_server, remote_servers))
+        else:
+            discovered = list()
+        cacheable = True
+        for server, server_ess in zip(remote_servers, discovered):
             if diagnostics:
                 logger.info('\nTrying {0}'.format(server))
-            ssh = SSHClient(server)
-
-            cmd = '. ~/.bashrc; which g03'
-            g03 = ssh.send_command_to_server(cmd)[0]
-            cmd = '. ~/.bashrc; which g09'
-            g09 = ssh.send_command_to_server(cmd)[0]
-            cmd = '. ~/.bashrc; which g16'
-            g16 = ssh.send_command_to_server(cmd)[0]
-            if g03 or g09 or g16:
-                if diagnostics:
-                    logger.info('  Found Gaussian on {3}: g03={0}, g09={1}, g16={2}'.format(g03, g09, g16, server))
-                self.ess_settings['gaussian'].append(server)
-            elif diagnostics:
-                logger.info('  Did NOT find Gaussian on {0}'.format(server))
-
-            cmd = '. ~/.bashrc; which qchem'
-            qchem = ssh.send_command_to_server(cmd)[0]
-            if qchem:
-                if diagnostics:
-                    logger.info('  Found QChem on {0}'.format(server))
-                self.ess_settings['qchem'].append(server)
-            elif diagnostics:
-                logger.info('  Did NOT find QChem on {0}'.format(server))
-
-            cmd = '. ~/.bashrc; which orca'
-            orca = ssh.send_command_to_server(cmd)[0]
-            if orca:
-                if diagnostics:
-                    logger.info('  Found Orca on {0}'.format(server))
-                self.ess_settings['orca'].append(server)
-            elif diagnostics:
-                logger.info('  Did NOT find Orca on {0}'.format(server))
-
-            cmd = '. .bashrc; which molpro'
-            molpro = ssh.send_command_to_server(cmd)[0]
-            if molpro:
-                if diagnostics:
-                    logger.info('  Found Molpro on {0}'.format(server))
-                self.ess_settings['molpro'].append(server)
-            elif diagnostics:
-                logger.info('  Did NOT find Molpro on {0}'.format(server))
+            if server_ess is None:
+                cacheable = False
+                logger.warning('Could not map the ESS on {0}'.format(server))
+                continue
+            for software, executables in server_ess.items():
+                name = ess_names.get(software, software)
+                if any(executables.values()):
+                    if diagnostics:
+                        logger.info('  Found {0} on {1}: {2}'.format(
+                            name, server, ', '.join('{0}={1}'.format(executable, path)
+                                                    for executable, path in executables.items())))
+                    self.ess_settings[software].append(server)
+                elif diagnostics:
+                    logger.info('  Did NOT find {0} on {1}'.format(name, server))
+        if cacheable and any(self.ess_settings.values()):
+            save_ess_settings_cache(self.ess_settings)
         if diagnostics:
             logger.info('\n\n')
         if 'gaussian' in self.ess_settings.keys():
@@ -1018,6 +1037,16 @@ class ARC(object):
                 else:
                     logger.info('Not calculating it, assuming a frequencies scaling factor of 1.')
 
+    def fetch_check_files(self):
+        """
+        Download the Gaussian checkfiles left on the servers by completed jobs into the project directory.
+        Check files are otherwise only fetched on demand, so this is done when the keep_checks flag is True.
+        """
+        calcs_path = os.path.join(self.project_directory, 'calcs')
+        fetched = remote_artifacts.fetch_all(directory=calcs_path, file_name='check.chk')
+        if fetched:
+            logger.info('Kept {0} Gaussian check files in {1}'.format(fetched, calcs_path))
+
     def delete_check_files(self):
         """
         Delete the Gaussian checkfiles, the usually take up lots of space and are not needed after ARC terminates.
@@ -1064,3 +1093,52 @@ class ARC(object):
                 # no H species defined, make one
                 h = ARCSpecies(label='H', smiles='[H]', generate_thermo=False)
                 self.arc_species_list.append(h)
+
+
+def read_ess_settings_cache():
+    """
+    Read the ESS settings mapped by a previous ARC run.
+
+    Returns:
+        dict: The cached ESS settings, ``None`` if there is no cache, if it expired,
+              or if it was mapped for different servers.
+    """
+    if ess_settings_cache_ttl is None or not os.path.isfile(ess_settings_cache_path):
+        return None
+    try:
+        cache = read_yaml_file(ess_settings_cache_path)
+        if time.time() - cache['timestamp'] > ess_settings_cache_ttl or cache['servers'] != get_servers_hash():
+            return None
+        return check_ess_settings(cache['ess_settings'])
+    except Exception as e:
+        logger.debug('Could not read the ESS settings cache {0}, got: {1}'.format(ess_settings_cache_path, e))
+        return None
+
+
+def get_servers_hash():
+    """
+    Get a hash of the servers definition, so that ESS settings are only reused for the exact same servers
+    (the same names, addresses, usernames, cluster software, etc.).
+
+    Returns:
+        str: The SHA-256 hex digest of the servers definition.
+    """
+    return hashlib.sha256(json.dumps(servers, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def save_ess_settings_cache(ess_settings):
+    """
+    Cache mapped ESS settings on disk for later ARC runs.
+
+    Args:
+        ess_settings (dict): The mapped ESS settings.
+    """
+    if ess_settings_cache_ttl is None:
+        return
+    content = {'timestamp': time.time(),
+               'servers': get_servers_hash(),
+               'ess_settings': {software: server_list for software, server_list in ess_settings.items() if server_list}}
+    try:
+        save_yaml_file(path=ess_settings_cache_path, content=content)
+    except OSError as e:
+        logger.debug('Could not save the ESS settings cache {0}, got: {1}'.format(ess_settings_cache_path, e))
@@ -16,7 +16,7 @@ from rmgpy.species import Species
 
 from arc.common import read_yaml_file
 from arc.exceptions import InputError
-from arc.main import ARC
+from arc.main import ARC, get_servers_hash
 from arc.settings import arc_path, servers
 from arc.species.species import ARCSpecies
 
@@ -356,6 +356,22 @@ class TestARC(unittest.TestCase):
         self.assertEqual(len(arc1.arc_species_list), 2)
         self.assertIn('H', [spc.label for spc in arc1.arc_species_list])
 
+    def test_get_servers_hash(self):
+        """Test that the ESS settings cache key changes with any attribute of the servers"""
+        servers_hash = get_servers_hash()
+        self.assertEqual(get_servers_hash(), servers_hash)
+        server = list(servers.keys())[0]
+        original_un = servers[server].get('un', None)
+        servers[server]['un'] = 'another_user'
+        try:
+            self.assertNotEqual(get_servers_hash(), servers_hash)
+        finally:
+            if original_un is None:
+                del servers[server]['un']
+            else:
+                servers[server]['un'] = original_un
+        self.assertEqual(get_servers_hash(), servers_hash)
+
     @classmethod
     def tearDownClass(cls):
         """
@@ -5,8 +5,14 @@
 A module for parsing information from various files.
 """
 
+import copy
+import json
+import mmap
 import numpy as np
 import os
+import re
+import threading
+from collections import OrderedDict
 
 from arkane.exceptions import LogError
 from arkane.gaussian import GaussianLog
@@ -16,47 +22,456 @@ from arkane.util import determine_qm_software
 
 from arc.common import get_logger
 from arc.exceptions import InputError, ParserError
+from arc.settings import parsed_outputs_cache_size, parsed_output_sidecars
 from arc.species.converter import xyz_from_data, str_to_xyz
 
 
 logger = get_logger()
 
+# Markers identifying the ESS which generated an output file, in the order Arkane checks them
+software_markers = ['gaussian', 'qchem', 'molpro', 'orca', 'terachem']
 
-def parse_frequencies(path, software):
+# The version of the sidecar files format, sidecar files of other versions are ignored
+sidecar_version = 1
+
+# The parsed output files, keys are absolute paths, values are ParsedOutput objects (least recently used first)
+_parsed_outputs = OrderedDict()
+_parsed_outputs_lock = threading.Lock()
+
+
+class ParsedOutput(object):
     """
-    Parse the frequencies from a freq job output file.
+    The quantities parsed from an ESS output file.
+    The file is read once (memory-mapped) to identify the ESS and parse the frequencies, the dipole moment,
+    and the polarizability. Quantities loaded via Arkane (e.g., energies, geometries, scans) are loaded on first
+    request and memoized. Use load_output() rather than instantiating this class directly.
+
+    The parsed quantities of job outputs are persisted in a JSON sidecar file next to the output file
+    (see get_sidecar_path()), so that later sessions (e.g., a restarted project) don't parse the output again.
+    Once a sidecar was saved, quantities loaded later are added to it.
+
+    Args:
+        path (str): The path to the output file.
+        key (tuple): The size and the modification time (in ns) of the file when it was parsed.
+        content (dict, optional): The content of a valid sidecar file to restore the parsed quantities from,
+                                  the output file is scanned if not given.
+
+    Attributes:
+        path (str): The path to the output file.
+        key (tuple): The size and the modification time (in ns) of the file when it was parsed.
+        software (str): The ESS which generated the file (lower case), ``None`` if it could not be identified.
+        frequencies (dict): Keys are ESS names, values are the frequencies parsed as if the file was generated by the
+                            respective ESS, or the error raised while parsing them.
+        dipole_moments (dict): Keys are ESS names, values are the dipole moments (in Debye) parsed as if the file was
+                               generated by the respective ESS, or the error raised while parsing them.
+        polarizability (float): The polarizability in Angstrom^3 (or the error raised while parsing it).
+        log (Log): The Arkane log object of the file, created on first use.
+        results (dict): The memoized quantities loaded via Arkane, keys are (method name, arguments) tuples,
+                        values are the loaded quantities or the errors raised while loading them.
+        sidecar (bool): Whether the parsed quantities are persisted in a sidecar file.
+        saved (bool): Whether the sidecar file is up to date.
     """
-    lines = _get_lines_from_file(path)
-    freqs = np.array([], np.float64)
-    if software.lower() == 'qchem':
-        for line in lines:
-            if ' Frequency:' in line:
-                items = line.split()
-                for i, item in enumerate(items):
-                    if i:
-                        freqs = np.append(freqs, [(float(item))])
-    elif software.lower() == 'gaussian':
-        with open(path, 'r') as f:
-            line = f.readline()
-            while line != '':
-                if 'Frequencies --' in line:
-                    freqs = np.append(freqs, [float(frq) for frq in line.split()[2:]])
-                line = f.readline()
-    elif software.lower() == 'molpro':
-        read = False
-        for line in lines:
-            if 'Nr' in line and '[1/cm]' in line:
+    def __init__(self, path, key=None, content=None):
+        self.path = path
+        self.key = key
+        self.software = None
+        self.frequencies = {'gaussian': list(), 'molpro': list(), 'qchem': list()}
+        self.dipole_moments = {'gaussian': None, 'molpro': None, 'qchem': None}
+        self.polarizability = None
+        self.log = None
+        self.results = dict()
+        self.sidecar = content is not None
+        self.saved = content is not None
+        if content is not None:
+            self.from_dict(content)
+        else:
+            self.scan()
+
+    def scan(self):
+        """
+        Read the output file once, and parse all quantities which are not loaded via Arkane.
+        The file is memory-mapped, and the lines relevant to each quantity are located by searching for literal
+        markers instead of iterating over all lines in Python, so scanning large outputs (e.g., the normal mode
+        displacements of large molecules) is fast and doesn't load the file into memory.
+        """
+        if not os.path.getsize(self.path):
+            return
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            match = re.search(b'|'.join(marker.encode() for marker in software_markers), data, re.IGNORECASE)
+            if match is not None:
+                # the first line mentioning an ESS, checked in the order Arkane checks them
+                line = next(_read_lines(data, data.rfind(b'\n', 0, match.start()) + 1))[0].lower()
+                self.software = next(software for software in software_markers if software in line)
+            self.scan_frequencies(data)
+            self.scan_dipole_moments(data)
+            for start in _find_lines(data, [b'Isotropic polarizability for W']):
+                # example:  Isotropic polarizability for W=    0.000000       11.49 Bohr**3.
+                # 1 Bohr = 0.529177 Angstrom
+                line = next(_read_lines(data, start))[0]
+                try:
+                    self.polarizability = float(line.split()[-2]) * 0.529177 ** 3
+                except (ValueError, IndexError) as e:
+                    self.polarizability = e
+                    break
+
+    def scan_frequencies(self, data):
+        """
+        Parse the frequencies from a memory-mapped output file as if it was generated by each supported ESS.
+        The frequency tokens are collected and converted into an array at once.
+
+        Args:
+            data (mmap.mmap): The memory-mapped output file.
+        """
+        for software, marker, skip in [('qchem', b' Frequency:', 1), ('gaussian', b'Frequencies --', 2)]:
+            tokens = list()
+            for start in _find_lines(data, [marker]):
+                end = data.find(b'\n', start)
+                tokens.extend(data[start:end if end != -1 else len(data)].split()[skip:])
+            try:
+                self.frequencies[software] = np.array(tokens, np.float64)
+            except ValueError as e:
+                self.frequencies[software] = e
+
+        # Molpro frequencies are listed in blocks following a 'Vibration ... Wavenumber' header until a blank line
+        freqs, read, position = list(), False, 0
+        for start in _find_lines(data, [b'Wavenumber']):
+            if start < position:
+                # already read as part of a preceding block
+                continue
+            for line, position in _read_lines(data, start):
+                if not ('Nr' in line and '[1/cm]' in line):
+                    if read and line == os.linesep:
+                        read = False
+                    else:
+                        if read:
+                            try:
+                                freqs.append(float(line.split()[-1]))
+                            except (ValueError, IndexError) as e:
+                                self.frequencies['molpro'] = e
+                                return
+                        if 'Low' not in line and 'Vibration' in line and 'Wavenumber' in line:
+                            read = True
+                if not read:
+                    break
+        self.frequencies['molpro'] = np.array(freqs, np.float64)
+
+    def scan_dipole_moments(self, data):
+        """
+        Parse the dipole moment from a memory-mapped output file as if it was generated by each supported ESS.
+
+        Args:
+            data (mmap.mmap): The memory-mapped output file.
+        """
+        dipoles = self.dipole_moments
+        read_gaussian_dipole = skip_qchem_dipole = read_qchem_dipole = False
+        position = 0
+        # the header is matched case insensitively in each candidate line
+        for start in _find_lines(data, [b'ipole', b'IPOLE']):
+            if start < position:
                 continue
-            if read:
-                if line == os.linesep:
-                    read = False
+            for line, position in _read_lines(data, start):
+                lower = line.lower()
+                header = 'dipole moment' in lower and 'debye' in lower
+                if not isinstance(dipoles['gaussian'], Exception):
+                    # Dipole moment (field-independent basis, Debye):
+                    # X=     -0.0000    Y=     -0.0000    Z=     -1.8320  Tot=      1.8320
+                    if header:
+                        read_gaussian_dipole = True
+                    elif read_gaussian_dipole:
+                        read_gaussian_dipole = False
+                        try:
+                            dipoles['gaussian'] = float(line.split()[-1])
+                        except (ValueError, IndexError) as e:
+                            dipoles['gaussian'] = e
+                if not isinstance(dipoles['qchem'], Exception):
+                    #     Dipole Moment (Debye)
+                    #          X       0.0000      Y       0.0000      Z       2.0726
+                    #        Tot       2.0726
+                    if header:
+                        skip_qchem_dipole = True
+                    elif skip_qchem_dipole:
+                        skip_qchem_dipole, read_qchem_dipole = False, True
+                    elif read_qchem_dipole:
+                        read_qchem_dipole = False
+                        try:
+                            dipoles['qchem'] = float(line.split()[-1])
+                        except (ValueError, IndexError) as e:
+                            dipoles['qchem'] = e
+                if header and '/debye' in lower and not isinstance(dipoles['molpro'], Exception):
+                    #  Dipole moment /Debye                   2.96069859     0.00000000     0.00000000
+                    try:
+                        splits = line.split()
+                        dm_x, dm_y, dm_z = float(splits[-3]), float(splits[-2]), float(splits[-1])
+                        dipoles['molpro'] = (dm_x ** 2 + dm_y ** 2 + dm_z ** 2) ** 0.5
+                    except (ValueError, IndexError) as e:
+                        dipoles['molpro'] = e
+                if not (read_gaussian_dipole or skip_qchem_dipole or read_qchem_dipole):
+                    break
+
+    def get(self, quantity, software=None):
+        """
+        Get a quantity parsed when the file was scanned.
+
+        Args:
+            quantity (str): Either 'frequencies', 'dipole_moments', or 'polarizability'.
+            software (str, optional): The ESS to interpret the file as (for frequencies and dipole moments).
+
+        Returns:
+            The parsed quantity.
+
+        Raises:
+            ValueError, IndexError: If the quantity could not be parsed.
+        """
+        value = getattr(self, quantity)
+        if software is not None:
+            value = value[software]
+        if isinstance(value, Exception):
+            raise value
+        return copy.copy(value)
+
+    def get_log(self):
+        """
+        Get the Arkane log object of the file, avoiding re-reading the file to identify the ESS where possible.
+
+        Returns:
+            Log: The Arkane log object.
+        """
+        if self.log is None:
+            log_class = {'gaussian': GaussianLog, 'molpro': MolproLog, 'qchem': QChemLog}.get(self.software, None)
+            self.log = log_class(self.path) if log_class is not None else determine_qm_software(fullpath=self.path)
+        return self.log
+
+    def load(self, method, *args):
+        """
+        Load a quantity via a method of the Arkane log object, memoizing the result (or the error raised).
+
+        Args:
+            method (str): The name of the Arkane log method, e.g., 'load_energy'.
+            args: The arguments to pass to the method.
+
+        Returns:
+            A copy of the loaded quantity.
+        """
+        key = (method,) + args
+        if key not in self.results:
+            try:
+                self.results[key] = getattr(self.get_log(), method)(*args)
+            except Exception as e:
+                self.results[key] = e
+            else:
+                self.saved = False
+                if self.sidecar:
+                    self.save()
+        if isinstance(self.results[key], Exception):
+            raise self.results[key]
+        return copy.deepcopy(self.results[key])
+
+    def as_dict(self):
+        """
+        A helper function for dumping this object as a dictionary in a JSON sidecar file.
+        Errors raised by Arkane are not persisted, such quantities are loaded again if requested.
+
+        Returns:
+            dict: The JSON-serializable content of the sidecar file.
+        """
+        results = list()
+        for key, value in self.results.items():
+            if not isinstance(value, Exception):
+                try:
+                    results.append({'key': _encode(list(key)), 'value': _encode(value)})
+                except TypeError:
+                    # not a plain (numeric) quantity
                     continue
-                freqs = np.append(freqs, [float(line.split()[-1])])
-            if 'Low' not in line and 'Vibration' in line and 'Wavenumber' in line:
-                read = True
-    else:
+        return {'version': sidecar_version,
+                'size': self.key[0],
+                'mtime_ns': self.key[1],
+                'software': self.software,
+                'frequencies': {software: _encode(value) for software, value in self.frequencies.items()},
+                'dipole_moments': {software: _encode(value) for software, value in self.dipole_moments.items()},
+                'polarizability': _encode(self.polarizability),
+                'results': results,
+                }
+
+    def from_dict(self, content):
+        """
+        A helper function for restoring the parsed quantities from the content of a sidecar file.
+
+        Args:
+            content (dict): The content of the sidecar file.
+        """
+        self.software = content['software']
+        self.frequencies = {software: _decode(value) for software, value in content['frequencies'].items()}
+        self.dipole_moments = {software: _decode(value) for software, value in content['dipole_moments'].items()}
+        self.polarizability = _decode(content['polarizability'])
+        self.results = {tuple(_decode(result['key'])): _decode(result['value']) for result in content['results']}
+
+    def save(self):
+        """
+        Save the parsed quantities in the sidecar file of the output file, if they changed since last saved.
+        The file is replaced atomically, since it might be concurrently saved by another (worker) process.
+        """
+        self.sidecar = True
+        if self.saved or self.key is None:
+            return
+        sidecar_path = get_sidecar_path(self.path)
+        temp_path = '{0}.{1}.tmp'.format(sidecar_path, os.getpid())
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(self.as_dict(), f)
+            os.replace(temp_path, sidecar_path)
+        except OSError as e:
+            logger.debug('Could not save the parsed quantities of {0}, got: {1}'.format(self.path, e))
+        else:
+            self.saved = True
+
+
+def get_sidecar_path(path):
+    """
+    Get the path of the sidecar file persisting the parsed quantities of an output file
+    (e.g., ``output.parsed.json`` next to ``output.out``).
+
+    Args:
+        path (str): The path to the output file.
+
+    Returns:
+        str: The path to the sidecar file.
+    """
+    return os.path.splitext(path)[0] + '.parsed.json'
+
+
+def save_parsed_output(path):
+    """
+    Persist the quantities parsed from an output file (so far, and later) in its sidecar file.
+    Called for outputs of completed jobs.
+
+    Args:
+        path (str): The path to the output file.
+    """
+    if parsed_output_sidecars:
+        load_output(path).save()
+
+
+def _load_sidecar(path, key):
+    """
+    A helper function for reading the sidecar file of an output file.
+
+    Args:
+        path (str): The path to the output file.
+        key (tuple): The current size and modification time (in ns) of the output file.
+
+    Returns:
+        dict: The content of the sidecar file, ``None`` if it doesn't exist, is corrupt,
+              or if the output file changed since the sidecar file was saved.
+    """
+    sidecar_path = get_sidecar_path(path)
+    if not parsed_output_sidecars or not os.path.isfile(sidecar_path):
+        return None
+    try:
+        with open(sidecar_path, 'r') as f:
+            content = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.debug('Could not read the sidecar file {0}, got: {1}'.format(sidecar_path, e))
+        return None
+    if not isinstance(content, dict) or content.get('version') != sidecar_version \
+            or (content.get('size'), content.get('mtime_ns')) != key:
+        return None
+    return content
+
+
+def _encode(value):
+    """
+    A helper function for converting a parsed quantity into a JSON-serializable object.
+
+    Args:
+        value: The parsed quantity (numbers, strings, numpy arrays, and tuples or lists thereof),
+               or an error raised while parsing it.
+
+    Returns:
+        The JSON-serializable object.
+
+    Raises:
+        TypeError: If the quantity is of an unsupported type.
+    """
+    if isinstance(value, np.ndarray):
+        return {'ndarray': value.tolist(), 'dtype': str(value.dtype)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return {'tuple': [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, (ValueError, IndexError)):
+        return {'error': type(value).__name__, 'message': str(value)}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError('Cannot encode {0} of type {1}'.format(value, type(value)))
+
+
+def _decode(value):
+    """
+    A helper function for converting an object read from a JSON sidecar file back into a parsed quantity.
+
+    Args:
+        value: The JSON object.
+
+    Returns:
+        The parsed quantity.
+    """
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, dict):
+        if 'ndarray' in value:
+            return np.array(value['ndarray'], dtype=value['dtype'])
+        if 'tuple' in value:
+            return tuple(_decode(item) for item in value['tuple'])
+        if 'error' in value:
+            return (IndexError if value['error'] == 'IndexError' else ValueError)(value['message'])
+    return value
+
+
+def load_output(path):
+    """
+    Get a parsed ESS output file, reading the file only if it wasn't read yet or if it changed since
+    (files are identified by their path, size, and modification time).
+    Quantities persisted in a sidecar file of the output file (in this or a previous session) are used if valid.
+
+    Args:
+        path (str): The path to the output file.
+
+    Returns:
+        ParsedOutput: The parsed output file.
+
+    Raises:
+        InputError: If the file could not be found.
+    """
+    path = os.path.abspath(str(path))
+    if not os.path.isfile(path):
+        raise InputError('Could not find file {0}'.format(path))
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns)
+    with _parsed_outputs_lock:
+        output = _parsed_outputs.get(path, None)
+        if output is not None and output.key == key:
+            _parsed_outputs.move_to_end(path)
+            return output
+    output = ParsedOutput(path=path, key=key, content=_load_sidecar(path, key))
+    with _parsed_outputs_lock:
+        _parsed_outputs[path] = output
+        _parsed_outputs.move_to_end(path)
+        while len(_parsed_outputs) > parsed_outputs_cache_size:
+            _parsed_outputs.popitem(last=False)
+    return output
+
+
+def parse_frequencies(path, software):
+    """
+    Parse the frequencies from a freq job output file.
+    """
+    output = load_output(path)
+    if software.lower() not in ['qchem', 'gaussian', 'molpro']:
         raise ParserError('parse_frequencies() can currently only parse Molpro, QChem and Gaussian files,'
                           ' got {0}'.format(software))
+    freqs = np.array(output.get('frequencies', software=software.lower()), np.float64)
     logger.debug('Using parser.parse_frequencies. Determined frequencies are: {0}'.format(freqs))
     return freqs
 
@@ -65,11 +480,9 @@ def parse_t1(path):
     """
     Parse the T1 parameter from a Molpro coupled cluster calculation.
     """
-    if not os.path.isfile(path):
-        raise InputError('Could not find file {0}'.format(path))
-    log = determine_qm_software(fullpath=path)
+    output = load_output(path)
     try:
-        t1 = log.get_T1_diagnostic()
+        t1 = output.load('get_T1_diagnostic')
     except (LogError, NotImplementedError):
         logger.warning('Could not read t1 from {0}'.format(path))
         t1 = None
@@ -87,11 +500,9 @@ def parse_e_elect(path, zpe_scale_factor=1.):
     Returns:
         e_elect (float): The electronic energy in kJ/mol
     """
-    if not os.path.isfile(path):
-        raise InputError('Could not find file {0}'.format(path))
-    log = determine_qm_software(fullpath=path)
+    output = load_output(path)
     try:
-        e_elect = log.load_energy(zpe_scale_factor) * 0.001  # convert to kJ/mol
+        e_elect = output.load('load_energy', zpe_scale_factor) * 0.001  # convert to kJ/mol
     except (LogError, NotImplementedError):
         logger.warning('Could not read e_elect from {0}'.format(path))
         e_elect = None
@@ -108,11 +519,9 @@ def parse_zpe(path):
     Returns:
         float: The calculated zero point energy in kJ/mol.
     """
-    if not os.path.isfile(path):
-        raise InputError('Could not find file {0}'.format(path))
-    log = determine_qm_software(fullpath=path)
+    output = load_output(path)
     try:
-        zpe = log.load_zero_point_energy() * 0.001  # convert to kJ/mol
+        zpe = output.load('load_zero_point_energy') * 0.001  # convert to kJ/mol
     except (LogError, NotImplementedError):
         logger.warning('Could not read zpe from {0}'.format(path))
         zpe = None
@@ -130,11 +539,9 @@ def parse_scan_energies(path):
         energies (list): The electronic energy in kJ/mol.
         angles (list): The scan angles in degrees.
     """
-    if not os.path.isfile(path):
-        raise InputError('Could not find file {0}'.format(path))
-    log = determine_qm_software(fullpath=path)
+    output = load_output(path)
     try:
-        energies, angles = log.load_scan_energies()
+        energies, angles = output.load('load_scan_energies')
         energies *= 0.001  # convert to kJ/mol
         angles *= 180 / np.pi  # convert to degrees
     except (LogError, NotImplementedError):
@@ -160,9 +567,16 @@ def parse_xyz_from_file(path):
     Raises:
         ParserError: If the coordinates could not be parsed.
     """
-    lines = _get_lines_from_file(path)
     file_extension = os.path.splitext(path)[1]
+    if 'out' in file_extension or 'log' in file_extension:
+        output = load_output(path)
+        try:
+            coords, number, _ = output.load('load_geometry')
+            return xyz_from_data(coords=coords, numbers=number)
+        except LogError:
+            return None
 
+    lines = _get_lines_from_file(path)
     xyz = None
     relevant_lines = list()
 
@@ -188,13 +602,6 @@ def parse_xyz_from_file(path):
                 splits = line.split()
                 if len(splits) == 2 and all([s.isdigit() for s in splits]):
                     start_parsing = True
-    elif 'out' in file_extension or 'log' in file_extension:
-        log = determine_qm_software(fullpath=path)
-        try:
-            coords, number, _ = log.load_geometry()
-            xyz = xyz_from_data(coords=coords, numbers=number)
-        except LogError:
-            xyz = None
     else:
         record = False
         for line in lines:
@@ -217,47 +624,11 @@ def parse_dipole_moment(path):
     """
     Parse the dipole moment in Debye from an opt job output file.
     """
-    lines = _get_lines_from_file(path)
-    log = determine_qm_software(path)
-    dipole_moment = None
-    if isinstance(log, GaussianLog):
-        # example:
-        # Dipole moment (field-independent basis, Debye):
-        # X=             -0.0000    Y=             -0.0000    Z=             -1.8320  Tot=              1.8320
-        read = False
-        for line in lines:
-            if 'dipole moment' in line.lower() and 'debye' in line.lower():
-                read = True
-            elif read:
-                dipole_moment = float(line.split()[-1])
-                read = False
-    elif isinstance(log, QChemLog):
-        # example:
-        #     Dipole Moment (Debye)
-        #          X       0.0000      Y       0.0000      Z       2.0726
-        #        Tot       2.0726
-        skip = False
-        read = False
-        for line in lines:
-            if 'dipole moment' in line.lower() and 'debye' in line.lower():
-                skip = True
-            elif skip:
-                skip = False
-                read = True
-            elif read:
-                dipole_moment = float(line.split()[-1])
-                read = False
-    elif isinstance(log, MolproLog):
-        # example:
-        #  Dipole moment /Debye                   2.96069859     0.00000000     0.00000000
-        for line in lines:
-            if 'dipole moment' in line.lower() and '/debye' in line.lower():
-                splits = line.split()
-                dm_x, dm_y, dm_z = float(splits[-3]), float(splits[-2]), float(splits[-1])
-                dipole_moment = (dm_x ** 2 + dm_y ** 2 + dm_z ** 2) ** 0.5
-    else:
+    output = load_output(path)
+    if output.software not in ['gaussian', 'molpro', 'qchem']:
         raise ParserError('Currently dipole moments can only be parsed from either Gaussian, Molpro, or QChem '
                           'optimization output files')
+    dipole_moment = output.get('dipole_moments', software=output.software)
     if dipole_moment is None:
         raise ParserError('Could not parse the dipole moment')
     return dipole_moment
@@ -267,14 +638,84 @@ def parse_polarizability(path):
     """
     Parse the polarizability from a freq job output file, returns the value in Angstrom^3.
     """
-    lines = _get_lines_from_file(path)
-    polarizability = None
-    for line in lines:
-        if 'Isotropic polarizability for W' in line:
-            # example:  Isotropic polarizability for W=    0.000000       11.49 Bohr**3.
-            # 1 Bohr = 0.529177 Angstrom
-            polarizability = float(line.split()[-2]) * 0.529177 ** 3
-    return polarizability
+    return load_output(path).get('polarizability')
+
+
+def parse_ess_run_time(path):
+    """
+    Parse the wall time reported by the ESS in an output file. Unlike the run time ARC measures from the submission,
+    it doesn't include the time the job waited in the queue.
+
+    Args:
+        path (str): The path to the output file.
+
+    Returns:
+        float: The wall time in seconds, ``None`` if it was not reported (e.g., by Gaussian 09, or by a crashed job).
+    """
+    if not os.path.isfile(path) or not os.path.getsize(path):
+        return None
+    gaussian_time, qchem_time, molpro_time = None, None, None
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for start in _find_lines(data, [b' Elapsed time:', b'Total job time:', b' REAL TIME  *']):
+            splits = next(_read_lines(data, start))[0].split()
+            try:
+                if splits[:2] == ['Elapsed', 'time:'] and len(splits) >= 9 and splits[3] == 'days':
+                    # Gaussian 16, once per job step:  Elapsed time:       0 days  0 hours  1 minutes 18.2 seconds.
+                    gaussian_time = (gaussian_time or 0) + float(splits[2]) * 86400 + float(splits[4]) * 3600 \
+                        + float(splits[6]) * 60 + float(splits[8])
+                elif splits[:3] == ['Total', 'job', 'time:']:
+                    # QChem, once per job:  Total job time:  112.19s(wall), 141.49s(cpu)
+                    qchem_time = (qchem_time or 0) + float(splits[3].split('s(wall)')[0])
+                elif splits[:3] == ['REAL', 'TIME', '*']:
+                    # Molpro, cumulative after each program:  REAL TIME  *        21.54 SEC
+                    molpro_time = float(splits[3])
+            except (ValueError, IndexError):
+                continue
+    return next((run_time for run_time in [gaussian_time, qchem_time, molpro_time] if run_time is not None), None)
+
+
+def _find_lines(data, markers):
+    """
+    A helper function for locating the lines of a memory-mapped file containing any of several (literal) markers.
+    Searching for literal markers (rather than regular expressions) runs at the speed of memory scans.
+
+    Args:
+        data (mmap.mmap): The memory-mapped file.
+        markers (list): Entries are the bytes to search for (case sensitive).
+
+    Returns:
+        list: The offsets of the beginnings of the matching lines, in order.
+    """
+    starts = set()
+    for marker in markers:
+        position = data.find(marker)
+        while position != -1:
+            starts.add(data.rfind(b'\n', 0, position) + 1)
+            end = data.find(b'\n', position)
+            position = data.find(marker, end + 1) if end != -1 else -1
+    return sorted(starts)
+
+
+def _read_lines(data, start):
+    """
+    A helper function for reading the lines of a memory-mapped file from an offset onwards.
+
+    Args:
+        data (mmap.mmap): The memory-mapped file.
+        start (int): The offset of the beginning of the first line to read.
+
+    Yields:
+        tuple: The line (with its line ending, as returned by readlines()) and the offset of the next line.
+    """
+    size = len(data)
+    while start < size:
+        end = data.find(b'\n', start)
+        if end == -1:
+            yield data[start:].decode('utf-8', errors='replace'), size
+            return
+        line = data[start:end - 1] if end > start and data[end - 1:end] == b'\r' else data[start:end]
+        yield line.decode('utf-8', errors='replace') + '\n', end + 1
+        start = end + 1
 
 
 def _get_lines_from_file(path):
@@ -7,6 +7,8 @@ This module contains unit tests for the parser functions
 
 import numpy as np
 import os
+import shutil
+import tempfile
 import unittest
 
 import arc.parser as parser
@@ -146,6 +148,67 @@ H       1.32677989   -0.80557411    0.33156013"""
         polar1 = parser.parse_polarizability(path1)
         self.assertAlmostEqual(polar1, 3.99506, 4)
 
+    def test_parse_ess_run_time(self):
+        """Test parsing the wall time reported by the ESS"""
+        path1 = os.path.join(arc_path, 'arc', 'testing', 'trsh', 'gaussian', 'converged.out')
+        self.assertAlmostEqual(parser.parse_ess_run_time(path1), 57.0)
+        path2 = os.path.join(arc_path, 'arc', 'testing', 'C2H6_freq_QChem.out')
+        self.assertAlmostEqual(parser.parse_ess_run_time(path2), 128.55)
+        path3 = os.path.join(arc_path, 'arc', 'testing', 'CH2O_freq_molpro.out')
+        self.assertAlmostEqual(parser.parse_ess_run_time(path3), 52.94)
+        self.assertIsNone(parser.parse_ess_run_time(os.path.join(arc_path, 'arc', 'testing', 'missing.out')))
+
+    def test_load_output(self):
+        """Test that output files are read once and re-read only if they changed"""
+        path = os.path.join(arc_path, 'arc', 'testing', 'C2H6_freq_QChem.out')
+        output = parser.load_output(path)
+        self.assertEqual(output.software, 'qchem')
+        self.assertIs(parser.load_output(path), output)
+        freqs = parser.parse_frequencies(path=path, software='QChem')
+        freqs[0] = 0.0  # the cached frequencies are not modified by callers
+        self.assertEqual(parser.parse_frequencies(path=path, software='QChem')[0], 352.37)
+        self.assertEqual(len(parser.parse_frequencies(path=path, software='Gaussian')), 0)
+        zpe = parser.parse_zpe(path)
+        self.assertIn(('load_zero_point_energy',), output.results)
+        self.assertEqual(parser.parse_zpe(path), zpe)
+
+        scratch_path = tempfile.mkdtemp(prefix='scratch_parser_')
+        self.addCleanup(shutil.rmtree, scratch_path, True)
+        copied_path = os.path.join(scratch_path, 'output.out')
+        shutil.copyfile(path, copied_path)
+        copied_output = parser.load_output(copied_path)
+        self.assertIsNot(copied_output, output)
+        with open(copied_path, 'a') as f:
+            f.write(' Frequency:    4000.00\n')
+        self.assertIsNot(parser.load_output(copied_path), copied_output)
+        self.assertEqual(parser.parse_frequencies(path=copied_path, software='QChem')[-1], 4000.0)
+
+    def test_sidecar(self):
+        """Test persisting parsed quantities next to an output file"""
+        scratch_path = tempfile.mkdtemp(prefix='scratch_sidecar_')
+        self.addCleanup(shutil.rmtree, scratch_path, True)
+        path = os.path.join(scratch_path, 'output.out')
+        shutil.copyfile(os.path.join(arc_path, 'arc', 'testing', 'C2H6_freq_QChem.out'), path)
+        sidecar_path = parser.get_sidecar_path(path)
+        self.assertEqual(sidecar_path, os.path.join(scratch_path, 'output.parsed.json'))
+        zpe = parser.parse_zpe(path)
+        freqs = parser.parse_frequencies(path=path, software='QChem')
+        parser.save_parsed_output(path)
+        self.assertTrue(os.path.isfile(sidecar_path))
+
+        parser._parsed_outputs.clear()  # emulate a new session
+        output = parser.load_output(path)
+        self.assertTrue(output.sidecar)
+        self.assertIn(('load_zero_point_energy',), output.results)
+        self.assertEqual(parser.parse_zpe(path), zpe)
+        np.testing.assert_array_equal(parser.parse_frequencies(path=path, software='QChem'), freqs)
+
+        # a sidecar of a modified output file is ignored
+        with open(path, 'a') as f:
+            f.write('\n')
+        parser._parsed_outputs.clear()
+        self.assertFalse(parser.load_output(path).sidecar)
+
     def test_process_conformers_file(self):
         """Test processing ARC conformer files"""
         path1 = os.path.join(arc_path, 'arc', 'testing', 'xyz', 'conformers_before_optimization.txt')
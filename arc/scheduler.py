@@ -6,12 +6,17 @@ A module for scheduling jobs
 Includes spawning, terminating, checking, and troubleshooting various jobs
 """
 
+import asyncio
+import collections
 import datetime
+import functools
+import heapq
 import itertools
 import logging
 import os
 import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
 from IPython.display import display
 
 from rmgpy.reaction import Reaction
@@ -20,16 +25,24 @@ from arc.common import get_logger, read_yaml_file, save_yaml_file, get_ordinal_i
     calculate_dihedral_angle, sort_two_lists_by_the_first
 from arc import plotter
 from arc import parser
-from arc.job.job import Job
-from arc.exceptions import SpeciesError, SchedulerError, TSError, SanitizationError, InputError
-from arc.job.local import check_running_jobs_ids
-from arc.job.ssh import SSHClient
+from arc.job.job import Job, run_jobs
+from arc.job.array import run_array_jobs, run_packed_jobs
+from arc.job.artifacts import remote_artifacts
+from arc.job.cache import computation_cache
+from arc.job.monitor import JobMonitor
+from arc.job.pipeline import CompletionPipeline, parse_output
+from arc.exceptions import SpeciesError, SchedulerError, TSError, SanitizationError, InputError, \
+    ServerUnavailableError
+from arc.job.retry import circuit_breakers
+from arc.job.snapshot import queue_snapshot
+from arc.journal import RestartJournal
 from arc.job.trsh import trsh_negative_freq, trsh_scan_job, trsh_ess_job, trsh_conformer_isomorphism, scan_quality_check
 from arc.species.species import ARCSpecies, TSGuess, determine_rotor_symmetry
 from arc.species.converter import molecules_from_xyz, check_isomorphism, standardize_xyz_string, \
     str_to_xyz, xyz_to_str, xyz_to_coords_list
 from arc.ts.atst import autotst
-from arc.settings import default_job_types, rotor_scan_resolution
+from arc.settings import default_job_types, rotor_scan_resolution, scheduler_poll_interval, servers, \
+    ess_max_jobs, job_type_priorities, job_monitor_interval
 import arc.rmgdb as rmgdb
 import arc.species.conformers as conformers  # import after importing plotter to avoid circular import
 from arc.species.vectors import get_angle
@@ -117,6 +130,8 @@ class Scheduler(object):
         dont_gen_confs (list, optional): A list of species labels for which conformer jobs were loaded from a restart
                                          file, or user-requested. Additional conformer generation should be avoided.
         confs_to_dft (int, optional): The number of lowest MD conformers to DFT at the conformers_level.
+        scheduler_mode (str, optional): Either 'sync' (default) to sequentially poll the servers and handle completed
+                                        jobs, or 'async' to use the event-driven scheduler.
 
     Attributes:
         project (str): The project's name. Used for naming the working directory.
@@ -132,8 +147,10 @@ class Scheduler(object):
                          values are dictionaries where keys are job names (corresponding to
                          'running_jobs' if job is running) and values are the Job objects.
         running_jobs (dict): A dictionary of currently running jobs (a subset of `job_dict`).
-                             Keys are species/TS label, values are lists of job names (e.g. 'conformer3', 'opt_a123').
-        servers_jobs_ids (list): A list of relevant job IDs currently running on the server.
+                             Keys are species/TS label, values are sets of job names (e.g. 'conformer3', 'opt_a123').
+        job_completion_handlers (dict): Keys are job types, values are the methods handling completed jobs of the
+                                        respective type, called by _handle_job_completion().
+        servers_jobs_ids (set): A set of relevant job IDs currently running on the servers.
         output (dict): Output dictionary with status per job type and final QM file paths for all species.
         ess_settings (dict): A dictionary of available ESS and a corresponding server list.
         initial_trsh (dict): Troubleshooting methods to try by default. Keys are ESS software, values are trshs.
@@ -142,6 +159,7 @@ class Scheduler(object):
         save_restart (bool): Whether to start saving a restart file. ``True`` only after all species are loaded
                              (otherwise saves a partial file and may cause loss of information).
         restart_path (str): Path to the `restart.yml` file to be saved.
+        restart_journal (RestartJournal): The journal the changes of the restart dictionary are appended to.
         max_job_time (int): The maximal allowed job time on the server in hours.
         testing (bool): Used for internal ARC testing (generating the object w/o executing it).
         rmgdb (RMGDatabase): The RMG database object.
@@ -155,13 +173,49 @@ class Scheduler(object):
         bath_gas (str): A bath gas. Currently used in OneDMin to calc L-J parameters.
                         Allowed values are He, Ne, Ar, Kr, H2, N2, O2.
         composite_method (str): A composite method to use.
+        scheduler_mode (str): Either 'sync' or 'async', the scheduler mode.
+        prefetched_job_statuses (dict): Keys are job names of completed jobs whose status was concurrently determined
+                                        by the completion pipeline, values are the raised IOError or ``None``.
+        parsed_outputs (dict): Keys are job names of completed jobs whose output was concurrently parsed by the
+                               completion pipeline, values are dictionaries of the parsed quantities.
+        job_batch (list): Jobs spawned by run_job() but not yet executed, ``None`` if jobs are not being batched.
+        deferred_jobs (list): Jobs which could not be executed since their server was temporarily unavailable,
+                              executed once the server is available again.
+        held_jobs (list): A heap of jobs held back since their server or ESS reached its maximal number of jobs,
+                          entries are (priority, sequence number, label, job) tuples.
+        held_job_names (set): The names of the held jobs.
+        job_monitor (JobMonitor): Monitors the progress of running jobs, ``None`` if jobs are not monitored.
 
     """
     def __init__(self, project, ess_settings, species_list, project_directory, composite_method='', conformer_level='',
                  opt_level='', freq_level='', sp_level='', scan_level='', ts_guess_level='', orbitals_level='',
                  adaptive_levels=None, rmgdatabase=None, job_types=None, initial_trsh=None, rxn_list=None, bath_gas=None,
                  restart_dict=None, max_job_time=120, allow_nonisomorphic_2d=False, memory=14, testing=False,
-                 dont_gen_confs=None, confs_to_dft=5):
+                 dont_gen_confs=None, confs_to_dft=5, scheduler_mode='sync'):
+        if scheduler_mode not in ['sync', 'async']:
+            raise InputError("The scheduler mode must be either 'sync' or 'async', got: {0}".format(scheduler_mode))
+        self.scheduler_mode = scheduler_mode
+        self.prefetched_job_statuses = dict()
+        self.parsed_outputs = dict()
+        self.job_batch = None
+        self.deferred_jobs = list()
+        self.held_jobs = list()
+        self.held_job_names = set()
+        self.held_jobs_counter = itertools.count()
+        self.job_monitor = JobMonitor() if job_monitor_interval else None
+        self.job_completion_handlers = {'conformer': self._handle_conformer_job_completion,
+                                        'opt': self._handle_opt_job_completion,
+                                        'optfreq': self._handle_opt_job_completion,
+                                        'freq': self._handle_freq_job_completion,
+                                        'sp': self._handle_sp_job_completion,
+                                        'composite': self._handle_composite_job_completion,
+                                        'directed_scan': self._handle_directed_scan_job_completion,
+                                        'scan': self._handle_scan_job_completion,
+                                        'orbitals': self._handle_orbitals_job_completion,
+                                        'onedmin': self._handle_onedmin_job_completion,
+                                        'ff_param_fit': self._handle_ff_param_fit_job_completion,
+                                        'gromacs': self._handle_gromacs_job_completion,
+                                        }
         self.rmgdb = rmgdatabase
         self.restart_dict = restart_dict
         self.species_list = species_list
@@ -171,7 +225,7 @@ class Scheduler(object):
         self.ess_settings = ess_settings
         self.project_directory = project_directory
         self.job_dict = dict()
-        self.servers_jobs_ids = list()
+        self.servers_jobs_ids = set()
         self.running_jobs = dict()
         self.allow_nonisomorphic_2d = allow_nonisomorphic_2d
         self.testing = testing
@@ -190,9 +244,12 @@ class Scheduler(object):
             self.output = self.restart_dict['output']
             if 'running_jobs' in self.restart_dict:
                 self.restore_running_jobs()
+            if 'remote_artifacts' in self.restart_dict:
+                remote_artifacts.from_dict(self.restart_dict['remote_artifacts'])
         self.initialize_output_dict()
 
         self.restart_path = os.path.join(self.project_directory, 'restart.yml')
+        self.restart_journal = RestartJournal(restart_path=self.restart_path)
         self.report_time = time.time()  # init time for reporting status every 1 hr
         self.servers = list()
         self.composite_method = composite_method
@@ -324,7 +381,7 @@ class Scheduler(object):
                     # opt wasn't asked for, and it's not needed, declare it as converged
                     self.output[species.label]['job_types']['opt'] = True
                 if species.label not in self.running_jobs:
-                    self.running_jobs[species.label] = list()  # initialize before running the first job
+                    self.running_jobs[species.label] = set()  # initialize before running the first job
                 if species.number_of_atoms == 1:
                     logger.debug('Species {0} is monoatomic'.format(species.label))
                     if not self.species_dict[species.label].initial_xyz:
@@ -415,225 +472,570 @@ class Scheduler(object):
                     else:
                         self.run_opt_job(species.label)
         self.run_conformer_jobs()
-        while self.running_jobs != {}:  # loop while jobs are still running
-            logger.debug('Currently running jobs:\n{0}'.format(self.running_jobs))
-            self.timer = True
-            for label in self.unique_species_labels:
-                # look for completed jobs and decide what jobs to run next
-                self.get_servers_jobs_ids()  # updates `self.servers_jobs_ids`
-                try:
-                    job_list = self.running_jobs[label]
-                except KeyError:
-                    continue
-                for job_name in job_list:
-                    if 'conformer' in job_name:
-                        i = int(job_name[9:])  # the conformer number. parsed from a string like 'conformer12'.
-                        job = self.job_dict[label]['conformers'][i]
-                        if self.job_dict[label]['conformers'][i].job_id not in self.servers_jobs_ids:
-                            # this is a completed conformer job
-                            successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                            if successful_server_termination:
-                                self.parse_conformer(job=job, label=label, i=i)
-                            # Just terminated a conformer job.
-                            # Are there additional conformer jobs currently running for this species?
-                            for spec_jobs in job_list:
-                                if 'conformer' in spec_jobs and spec_jobs != job_name:
-                                    break
-                            else:
-                                # All conformer jobs terminated.
-                                # Check isomorphism and run opt on most stable conformer geometry.
-                                logger.info('\nConformer jobs for {0} successfully terminated.\n'.format(label))
-                                if self.species_dict[label].is_ts:
-                                    self.determine_most_likely_ts_conformer(label)
-                                else:
-                                    self.determine_most_stable_conformer(label)  # also checks isomorphism
-                                if self.species_dict[label].initial_xyz is not None:
-                                    # if initial_xyz is None, then we're probably troubleshooting conformers, don't opt
-                                    if not self.composite_method:
-                                        self.run_opt_job(label)
-                                    else:
-                                        self.run_composite_job(label)
-                            self.timer = False
-                            break
-                    elif 'opt' in job_name \
-                            and self.job_dict[label]['opt'][job_name].job_id not in self.servers_jobs_ids:
-                        # val is 'opt1', 'opt2', etc., or 'optfreq1', optfreq2', etc.
-                        job = self.job_dict[label]['opt'][job_name]
-                        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                        if successful_server_termination:
-                            success = self.parse_opt_geo(label=label, job=job)
-                            if success:
-                                self.spawn_post_opt_jobs(label=label, job_name=job_name)
-                        self.timer = False
-                        break
-                    elif 'freq' in job_name \
-                            and self.job_dict[label]['freq'][job_name].job_id not in self.servers_jobs_ids:
-                        # this is NOT an 'optfreq' job
-                        job = self.job_dict[label]['freq'][job_name]
-                        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                        if successful_server_termination:
-                            self.check_freq_job(label=label, job=job)
-                        self.timer = False
-                        break
-                    elif 'sp' in job_name \
-                            and self.job_dict[label]['sp'][job_name].job_id not in self.servers_jobs_ids:
-                        job = self.job_dict[label]['sp'][job_name]
-                        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                        if successful_server_termination:
-                            self.check_sp_job(label=label, job=job)
-                        self.timer = False
-                        break
-                    elif 'composite' in job_name \
-                            and self.job_dict[label]['composite'][job_name].job_id not in self.servers_jobs_ids:
-                        job = self.job_dict[label]['composite'][job_name]
-                        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                        if successful_server_termination:
-                            success = self.parse_composite_geo(label=label, job=job)
-                            if success:
-                                if not self.composite_method:
-                                    # This wasn't originally a composite method, probably troubleshooted as such
-                                    self.run_opt_job(label)
-                                else:
-                                    if self.species_dict[label].is_ts\
-                                            or self.species_dict[label].number_of_atoms > 1:
-                                        self.run_freq_job(label)
-                                    self.run_scan_jobs(label)
-                                    if self.job_types['onedmin'] and not self.species_dict[label].is_ts\
-                                            and self.composite_method:
-                                        self.run_onedmin_job(label)
-                        self.timer = False
-                        break
-                    elif 'directed_scan' in job_name \
-                            and self.job_dict[label]['directed_scan'][job_name].job_id not in self.servers_jobs_ids:
-                        job = self.job_dict[label]['directed_scan'][job_name]
-                        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                        if successful_server_termination:
-                            self.check_directed_scan_job(label=label, job=job)
-                            if 'cont' in job.directed_scan_type and job.job_status[1]['status'] == 'done':
-                                # this is a continuous restricted optimization, spawn the next job in the scan
-                                xyz = parser.parse_xyz_from_file(job.local_path_to_output_file)
-                                self.spawn_directed_scan_jobs(label=label, rotor_index=job.rotor_index, xyz=xyz)
-                        if 'brute_force' in job.directed_scan_type:
-                            # Just terminated a brute_force directed scan job.
-                            # Are there additional jobs of the same type currently running for this species?
-                            self.species_dict[label].rotors_dict[job.rotor_index]['number_of_running_jobs'] -= 1
-                            if not self.species_dict[label].rotors_dict[job.rotor_index]['number_of_running_jobs']:
-                                # All brute force scan jobs for these pivots terminated.
-                                pivots = [scan[1:3] for scan in job.directed_scans]
-                                logger.info('\nAll brute force directed scan jobs for species {0} between pivots {1} '
-                                            'successfully terminated.\n'.format(label, pivots))
-                                self.process_directed_scans(label, pivots=job.pivots)
-                        self.timer = False
-                        break
-                    elif 'scan' in job_name and 'directed' not in job_name \
-                            and self.job_dict[label]['scan'][job_name].job_id not in self.servers_jobs_ids:
-                        job = self.job_dict[label]['scan'][job_name]
-                        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                        if successful_server_termination:
-                            self.check_scan_job(label=label, job=job)
-                        self.timer = False
-                        break
-                    elif 'orbitals' in job_name \
-                            and self.job_dict[label]['orbitals'][job_name].job_id not in self.servers_jobs_ids:
-                        job = self.job_dict[label]['orbitals'][job_name]
-                        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                        if successful_server_termination:
-                            # copy the orbitals file to the species / TS output folder
-                            folder_name = 'rxns' if self.species_dict[label].is_ts else 'Species'
-                            orbitals_path = os.path.join(self.project_directory, 'output', folder_name, label,
-                                                         'geometry', 'orbitals.fchk')
-                            if os.path.isfile(job.local_path_to_orbitals_file):
-                                shutil.copyfile(job.local_path_to_orbitals_file, orbitals_path)
-                        self.timer = False
-                        break
-                    elif 'onedmin' in job_name \
-                            and self.job_dict[label]['onedmin'][job_name].job_id not in self.servers_jobs_ids:
-                        job = self.job_dict[label]['onedmin'][job_name]
-                        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                        if successful_server_termination:
-                            # copy the lennard_jones file to the species output folder (TS's don't have L-J data)
-                            lj_output_path = os.path.join(self.project_directory, 'output', 'Species', label,
-                                                          'lennard_jones.dat')
-                            if os.path.isfile(job.local_path_to_lj_file):
-                                shutil.copyfile(job.local_path_to_lj_file, lj_output_path)
-                                self.output[label]['job_types']['onedmin'] = True
-                                self.species_dict[label].set_transport_data(
-                                    lj_path=os.path.join(self.project_directory, 'output', 'Species', label,
-                                                         'lennard_jones.dat'),
-                                    opt_path=self.output[label]['paths']['geo'], bath_gas=job.bath_gas,
-                                    opt_level=self.opt_level)
-                        self.timer = False
-                        break
-                    elif 'ff_param_fit' in job_name \
-                            and self.job_dict[label]['ff_param_fit'][job_name].job_id not in self.servers_jobs_ids:
-                        job = self.job_dict[label]['ff_param_fit'][job_name]
-                        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                        mmff94_fallback = False
-                        if successful_server_termination and job.job_status[1]['status'] == 'done':
-                            # copy the fitting file to the species output folder
-                            ff_param_fit_path = os.path.join(self.project_directory, 'calcs', 'Species', label,
-                                                             'ff_param_fit')
-                            if not os.path.isdir(ff_param_fit_path):
-                                os.makedirs(ff_param_fit_path)
-                            ff_param_fit_path = os.path.join(ff_param_fit_path, 'gaussian.out')
-                            if os.path.isfile(job.local_path_to_output_file):
-                                shutil.copyfile(job.local_path_to_output_file, ff_param_fit_path)
-                                self.output[label]['job_types']['ff_param_fit'] = True
-                                self.spawn_md_jobs(label)
-                            else:
-                                mmff94_fallback = True
-                        else:
-                            mmff94_fallback = True
-                        if mmff94_fallback:
-                            logger.error('Force field parameter fitting job in Gaussian failed. Generating standard '
-                                         'MMFF94s conformers instead of fitting a force field for species {0}, '
-                                         'although its force_field attribute was set to "fit".'.format(label))
-                            self.species_dict[label].force_field = 'MMFF94s'
-                            self.species_dict[label].generate_conformers(confs_to_dft=self.confs_to_dft,
-                                                                         plot_path=os.path.join(self.project_directory,
-                                                                                                'output', 'Species',
-                                                                                                label, 'geometry',
-                                                                                                'conformers'))
-                            self.process_conformers(label)
-                        self.timer = False
-                        break
-                    elif 'gromacs' in job_name \
-                            and self.job_dict[label]['gromacs'][job_name].job_id not in self.servers_jobs_ids:
-                        job = self.job_dict[label]['gromacs'][job_name]
-                        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
-                        if successful_server_termination:
-                            self.check_md_job(label=label, job=job)
-                        self.timer = False
-                        break
-
-                if self.species_dict[label].is_ts and not self.species_dict[label].ts_conf_spawned\
-                        and not any([tsg.success is None for tsg in self.species_dict[label].ts_guesses]):
-                    # This is a TS Species for which conformers haven't been spawned, and all .success flags
-                    # contain a values (whether ``True`` or ``False``)
-                    # We're ready to spawn conformers for this TS Species
-                    self.species_dict[label].generate_conformers()
-                    self.run_ts_conformer_jobs(label=label)
-                    self.species_dict[label].ts_conf_spawned = True
-
-                if not job_list and not(self.species_dict[label].is_ts
-                                        and not self.species_dict[label].ts_conf_spawned):
-                    self.check_all_done(label)
-                    if not self.running_jobs[label]:
-                        # delete the label only if it represents an empty dictionary
-                        del self.running_jobs[label]
-
-            if self.timer and job_list:
-                time.sleep(30)  # wait 30 sec before bugging the servers again.
-            t = time.time() - self.report_time
-            if t > 3600:
-                self.report_time = time.time()
-                logger.info('Currently running jobs:\n{0}'.format(self.running_jobs))
+        if self.scheduler_mode == 'async':
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                asyncio.run(self.schedule_jobs_async())
+            else:
+                # an event loop is already running in this thread (e.g., in a Jupyter notebook)
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    executor.submit(asyncio.run, self.schedule_jobs_async()).result()
+        else:
+            self.schedule_jobs_sync()
 
+        self.save_restart_dict(compact=True)
         # After exiting the Scheduler while loop, append all YAML species not directly calculated to the species_dict:
         for spc in self.species_list:
             if spc.yml_path is not None:
                 self.species_dict[spc.label] = spc
 
+    def schedule_jobs_sync(self):
+        """
+        The job scheduling loop of the synchronous scheduler mode.
+        The servers are polled once per sweep, and the jobs which completed since the last sweep are handled.
+        """
+        with CompletionPipeline() as pipeline:
+            while self.running_jobs != {}:  # loop while jobs are still running
+                logger.debug('Currently running jobs:\n{0}'.format(self.running_jobs))
+                self.timer = True
+                self.run_deferred_jobs()
+                self.release_held_jobs()
+                self.get_servers_jobs_ids()  # updates `self.servers_jobs_ids`, queries each server once per sweep
+                # handle all jobs which completed since the last sweep and decide what jobs to run next
+                self.handle_completed_jobs(pipeline=pipeline)
+                self.monitor_running_jobs(executor=pipeline.io_executor)
+                for label in self.unique_species_labels:
+                    if label in self.running_jobs:
+                        self._check_species_progress(label=label)
+
+                if self.timer and self.running_jobs:
+                    time.sleep(30)  # wait 30 sec before bugging the servers again.
+                t = time.time() - self.report_time
+                if t > 3600:
+                    self.report_time = time.time()
+                    logger.info('Currently running jobs:\n{0}'.format(self.running_jobs))
+
+    async def schedule_jobs_async(self):
+        """
+        The event-driven job scheduling block (the asynchronous scheduler mode).
+        All server queues are polled concurrently, and the output files of all jobs which completed since the last
+        poll are downloaded and parsed concurrently by the completion pipeline. Each completed job is handled as soon as
+        it is ready, immediately spawning its follow-up jobs. The servers are polled again right away if any job
+        completed, otherwise only after ``scheduler_poll_interval`` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        with CompletionPipeline() as pipeline:
+            while self.running_jobs != {}:  # loop while jobs are still running
+                logger.debug('Currently running jobs:\n{0}'.format(self.running_jobs))
+                self.timer = True
+                self.run_deferred_jobs()
+                self.release_held_jobs()
+                await self.get_servers_jobs_ids_async(loop=loop, executor=pipeline.io_executor)
+                futures = [loop.run_in_executor(pipeline.io_executor, self._prefetch_job_status, pipeline, label,
+                                                job_name)
+                           for label, job_name in self.get_completed_jobs()]
+                for future in asyncio.as_completed(futures):
+                    label, job_name = await future
+                    if label in self.running_jobs and job_name in self.running_jobs[label]:
+                        self._try_handle_job_completion(label=label, job_name=job_name)
+                self.prefetched_job_statuses, self.parsed_outputs = dict(), dict()
+                await self.monitor_running_jobs_async(loop=loop, executor=pipeline.io_executor)
+                for label in self.unique_species_labels:
+                    if label in self.running_jobs:
+                        self._check_species_progress(label=label)
+
+                if self.timer and self.running_jobs:
+                    await asyncio.sleep(scheduler_poll_interval)
+                t = time.time() - self.report_time
+                if t > 3600:
+                    self.report_time = time.time()
+                    logger.info('Currently running jobs:\n{0}'.format(self.running_jobs))
+
+    async def get_servers_jobs_ids_async(self, loop, executor):
+        """
+        Concurrently check status on all active servers, update the set of relevant running job IDs.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The running event loop.
+            executor (ThreadPoolExecutor): The executor to run the blocking server queries in.
+        """
+        servers_jobs_ids = await asyncio.gather(*[loop.run_in_executor(
+            executor, functools.partial(queue_snapshot.get_job_ids, server=server, force=True))
+            for server in set(self.servers)])
+        self.servers_jobs_ids = set().union(*servers_jobs_ids)
+
+    def get_completed_jobs(self):
+        """
+        Get all running jobs which are no longer in the servers' queues.
+
+        Returns:
+            list: Entries are (label, job_name) tuples, job_name is the name used in the running_jobs dict.
+        """
+        completed_jobs = list()
+        for label in self.unique_species_labels:
+            if label in self.running_jobs:
+                for job_name in self.running_jobs[label]:
+                    job = self.get_job(label=label, job_name=job_name)
+                    if job is not None and job.job_id not in self.servers_jobs_ids and self.is_job_available(job):
+                        completed_jobs.append((label, job_name))
+        return completed_jobs
+
+    def get_job(self, label, job_name):
+        """
+        Get a Job object by its name in the running_jobs dict.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'conformer3', 'opt_a123').
+
+        Returns:
+            Job: The respective Job object, ``None`` if it could not be found.
+        """
+        if 'conformer' in job_name:
+            return self.job_dict[label]['conformers'].get(int(job_name[9:]), None)
+        # job names are '<job type>_<job server name>'
+        return self.job_dict[label].get(job_name.rsplit('_', 1)[0], dict()).get(job_name, None)
+
+    def _prefetch_job_status(self, pipeline, label, job_name):
+        """
+        Determine the status of a completed job (including downloading its output file), and parse its output.
+        Executed concurrently in a worker thread in the asynchronous scheduler mode,
+        the results are later consumed by end_job() and the job's completion handler.
+
+        Args:
+            pipeline (CompletionPipeline): The completion pipeline.
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict.
+
+        Returns:
+            tuple: The label and the job name.
+        """
+        job = self.get_job(label=label, job_name=job_name)
+        self.prefetched_job_statuses[job.job_name], self.parsed_outputs[job.job_name] = pipeline.process_job(job)
+        return label, job_name
+
+    def handle_completed_jobs(self, pipeline):
+        """
+        Handle all jobs which completed since the last sweep.
+        The completed jobs are downloaded and parsed concurrently by the completion pipeline, and each job is handled
+        in this thread as soon as it is ready, so all state transitions remain in the Scheduler thread.
+
+        Args:
+            pipeline (CompletionPipeline): The completion pipeline.
+        """
+        jobs = [(label, job_name, self.get_job(label=label, job_name=job_name))
+                for label, job_name in self.get_completed_jobs()]
+        for label, job_name, error, parsed in pipeline.process_jobs(jobs):
+            job = self.get_job(label=label, job_name=job_name)
+            if job is None or label not in self.running_jobs or job_name not in self.running_jobs[label]:
+                continue
+            self.prefetched_job_statuses[job.job_name], self.parsed_outputs[job.job_name] = error, parsed
+            self._try_handle_job_completion(label=label, job_name=job_name)
+        self.prefetched_job_statuses, self.parsed_outputs = dict(), dict()
+
+    def get_monitored_jobs(self):
+        """
+        Get the running jobs whose progress should be checked now by the job monitor.
+        Jobs packed into a single submission with other jobs are not monitored, since they cannot be aborted alone.
+
+        Returns:
+            list: Entries are (label, job_name, job) tuples, job_name is the name used in the running_jobs dict.
+        """
+        running_jobs = list()
+        for label in self.unique_species_labels:
+            if label in self.running_jobs:
+                for job_name in self.running_jobs[label]:
+                    job = self.get_job(label=label, job_name=job_name)
+                    if job is not None and job.job_id in self.servers_jobs_ids:
+                        running_jobs.append((label, job_name, job))
+        job_ids = collections.Counter(job.job_id for _, _, job in running_jobs)
+        return [(label, job_name, job) for label, job_name, job in running_jobs
+                if job_ids[job.job_id] == 1 and self.is_job_available(job) and self.job_monitor.is_due(job)]
+
+    def monitor_running_jobs(self, executor):
+        """
+        Concurrently check the progress of running jobs, and abort and troubleshoot jobs which stalled.
+
+        Args:
+            executor (ThreadPoolExecutor): The executor to read the output files of the jobs in.
+        """
+        if self.job_monitor is None:
+            return
+        jobs = self.get_monitored_jobs()
+        stalls = list(executor.map(self.job_monitor.check_job, [job for _, _, job in jobs]))
+        for (label, job_name, _), stall in zip(jobs, stalls):
+            if stall is not None:
+                self.abort_stalled_job(label, job_name, *stall)
+
+    async def monitor_running_jobs_async(self, loop, executor):
+        """
+        Concurrently check the progress of running jobs, and abort and troubleshoot jobs which stalled
+        (the asynchronous scheduler mode).
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The running event loop.
+            executor (ThreadPoolExecutor): The executor to read the output files of the jobs in.
+        """
+        if self.job_monitor is None:
+            return
+        jobs = self.get_monitored_jobs()
+        stalls = await asyncio.gather(*[loop.run_in_executor(executor, self.job_monitor.check_job, job)
+                                        for _, _, job in jobs])
+        for (label, job_name, _), stall in zip(jobs, stalls):
+            if stall is not None:
+                self.abort_stalled_job(label, job_name, *stall)
+
+    def abort_stalled_job(self, label, job_name, keywords, error, line):
+        """
+        Abort a running job whose progress stalled, and hand it over to its completion handler,
+        which troubleshoots it as if the ESS terminated with the given error.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict.
+            keywords (list): The standardized error keywords.
+            error (str): The error message.
+            line (str): The line from the output file indicating the error.
+        """
+        job = self.get_job(label=label, job_name=job_name)
+        logger.warning('Aborting job {0} of {1}: {2}'.format(job.job_name, label, error))
+        try:
+            job.abort(keywords=keywords, error=error, line=line)
+        except ServerUnavailableError as e:
+            logger.warning('Could not abort job {0} of {1}, will try again later. Got: {2}'.format(
+                job.job_name, label, e))
+            return
+        self.servers_jobs_ids.discard(job.job_id)
+        self.prefetched_job_statuses[job.job_name] = None  # the ESS status was already set
+        self._try_handle_job_completion(label=label, job_name=job_name)
+        self.prefetched_job_statuses.pop(job.job_name, None)
+
+    def get_parsed_output(self, job, quantity):
+        """
+        Get a quantity parsed from the output file of a job,
+        preferably as already (concurrently) parsed by the completion pipeline.
+
+        Args:
+            job (Job): The job object.
+            quantity (str): Either 'xyz', 'e_elect', 'frequencies', or 'scan_energies'.
+
+        Returns:
+            The parsed quantity, as returned by the respective ``parser`` function.
+        """
+        parsed = self.parsed_outputs.get(job.job_name, dict())
+        if quantity in parsed:
+            return parsed[quantity]
+        return parse_output(path=job.local_path_to_output_file, software=job.software, quantities=[quantity],
+                            raise_errors=True)[quantity]
+
+    def is_job_available(self, job):
+        """
+        Check whether a job can be handled now, i.e., it is not deferred and its server is not temporarily unavailable.
+
+        Args:
+            job (Job): The job object.
+
+        Returns:
+            bool: Whether the job can be handled.
+        """
+        return job.from_cache or job not in self.deferred_jobs and job.job_name not in self.held_job_names \
+            and circuit_breakers.is_available(job.server)
+
+    def _try_handle_job_completion(self, label, job_name):
+        """
+        Handle a possibly completed job, unless its server is temporarily unavailable.
+        If the server becomes unavailable while handling the job, the job is left in running_jobs
+        and is handled again in a later sweep, so jobs on other servers are not held back.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'conformer3', 'opt_a123').
+
+        Returns:
+            bool: Whether the job has completed and was handled.
+        """
+        job = self.get_job(label=label, job_name=job_name)
+        if job is not None and not self.is_job_available(job):
+            return False
+        try:
+            return self._handle_job_completion(label=label, job_name=job_name)
+        except ServerUnavailableError as e:
+            logger.warning('Could not handle job {0} of {1}, will try again later. Got: {2}'.format(
+                job_name, label, e))
+            return False
+
+    def _handle_job_completion(self, label, job_name):
+        """
+        Check whether a running job has completed, and if so, end it and decide what jobs to run next
+        using the completion handler registered for its job type in ``job_completion_handlers``.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'conformer3', 'opt_a123').
+
+        Returns:
+            bool: Whether the job has completed and was handled.
+        """
+        job = self.get_job(label=label, job_name=job_name)
+        if job is None or job.job_id in self.servers_jobs_ids:
+            return False
+        handler = self.job_completion_handlers.get('conformer' if job.conformer >= 0 else job.job_type, None)
+        if handler is None:
+            return False
+        successful_server_termination = self.end_job(job=job, label=label, job_name=job_name)
+        if self.job_monitor is not None:
+            self.job_monitor.discard(job.job_name)
+        handler(label=label, job_name=job_name, job=job, successful_server_termination=successful_server_termination)
+        self.timer = False
+        return True
+
+    def _handle_conformer_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed conformer job. Once all conformer jobs of the species terminated,
+        determine the most stable conformer (or most likely TS conformer) and optimize it.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'conformer3').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        if successful_server_termination:
+            self.parse_conformer(job=job, label=label, i=job.conformer)
+        # Just terminated a conformer job.
+        # Are there additional conformer jobs currently running for this species?
+        if not any('conformer' in spec_job for spec_job in self.running_jobs[label] if spec_job != job_name):
+            # All conformer jobs terminated.
+            # Check isomorphism and run opt on most stable conformer geometry.
+            logger.info('\nConformer jobs for {0} successfully terminated.\n'.format(label))
+            if self.species_dict[label].is_ts:
+                self.determine_most_likely_ts_conformer(label)
+            else:
+                self.determine_most_stable_conformer(label)  # also checks isomorphism
+            if self.species_dict[label].initial_xyz is not None:
+                # if initial_xyz is None, then we're probably troubleshooting conformers, don't opt
+                if not self.composite_method:
+                    self.run_opt_job(label)
+                else:
+                    self.run_composite_job(label)
+
+    def _handle_opt_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed opt or optfreq job.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'opt_a123').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        if successful_server_termination:
+            success = self.parse_opt_geo(label=label, job=job)
+            if success:
+                self.spawn_post_opt_jobs(label=label, job_name=job_name)
+
+    def _handle_freq_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed freq job.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'freq_a123').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        if successful_server_termination:
+            self.check_freq_job(label=label, job=job)
+
+    def _handle_sp_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed sp job.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'sp_a123').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        if successful_server_termination:
+            self.check_sp_job(label=label, job=job)
+
+    def _handle_composite_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed composite job.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'composite_a123').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        if successful_server_termination:
+            success = self.parse_composite_geo(label=label, job=job)
+            if success:
+                if not self.composite_method:
+                    # This wasn't originally a composite method, probably troubleshooted as such
+                    self.run_opt_job(label)
+                else:
+                    if self.species_dict[label].is_ts\
+                            or self.species_dict[label].number_of_atoms > 1:
+                        self.run_freq_job(label)
+                    self.run_scan_jobs(label)
+                    if self.job_types['onedmin'] and not self.species_dict[label].is_ts\
+                            and self.composite_method:
+                        self.run_onedmin_job(label)
+
+    def _handle_directed_scan_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed directed scan job.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'directed_scan_a123').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        if successful_server_termination:
+            self.check_directed_scan_job(label=label, job=job)
+            if 'cont' in job.directed_scan_type and job.job_status[1]['status'] == 'done':
+                # this is a continuous restricted optimization, spawn the next job in the scan
+                xyz = parser.parse_xyz_from_file(job.local_path_to_output_file)
+                self.spawn_directed_scan_jobs(label=label, rotor_index=job.rotor_index, xyz=xyz)
+        if 'brute_force' in job.directed_scan_type:
+            # Just terminated a brute_force directed scan job.
+            # Are there additional jobs of the same type currently running for this species?
+            self.species_dict[label].rotors_dict[job.rotor_index]['number_of_running_jobs'] -= 1
+            if not self.species_dict[label].rotors_dict[job.rotor_index]['number_of_running_jobs']:
+                # All brute force scan jobs for these pivots terminated.
+                pivots = [scan[1:3] for scan in job.directed_scans]
+                logger.info('\nAll brute force directed scan jobs for species {0} between pivots {1} '
+                            'successfully terminated.\n'.format(label, pivots))
+                self.process_directed_scans(label, pivots=job.pivots)
+
+    def _handle_scan_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed rotor scan job.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'scan_a123').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        if successful_server_termination:
+            self.check_scan_job(label=label, job=job)
+
+    def _handle_orbitals_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed orbitals job, copy the orbitals file to the species / TS output folder.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'orbitals_a123').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        if successful_server_termination:
+            folder_name = 'rxns' if self.species_dict[label].is_ts else 'Species'
+            orbitals_path = os.path.join(self.project_directory, 'output', folder_name, label,
+                                         'geometry', 'orbitals.fchk')
+            if remote_artifacts.fetch(job.local_path_to_orbitals_file):
+                shutil.copyfile(job.local_path_to_orbitals_file, orbitals_path)
+
+    def _handle_onedmin_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed OneDMin job, copy the lennard_jones file to the species output folder
+        (TS's don't have L-J data).
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'onedmin_a123').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        if successful_server_termination:
+            lj_output_path = os.path.join(self.project_directory, 'output', 'Species', label, 'lennard_jones.dat')
+            if os.path.isfile(job.local_path_to_lj_file):
+                shutil.copyfile(job.local_path_to_lj_file, lj_output_path)
+                self.output[label]['job_types']['onedmin'] = True
+                self.species_dict[label].set_transport_data(
+                    lj_path=os.path.join(self.project_directory, 'output', 'Species', label, 'lennard_jones.dat'),
+                    opt_path=self.output[label]['paths']['geo'], bath_gas=job.bath_gas, opt_level=self.opt_level)
+
+    def _handle_ff_param_fit_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed force field parameter fitting job,
+        falling back to MMFF94s conformers if the fitting failed.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'ff_param_fit_a123').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        mmff94_fallback = False
+        if successful_server_termination and job.job_status[1]['status'] == 'done':
+            # copy the fitting file to the species output folder
+            ff_param_fit_path = os.path.join(self.project_directory, 'calcs', 'Species', label, 'ff_param_fit')
+            if not os.path.isdir(ff_param_fit_path):
+                os.makedirs(ff_param_fit_path)
+            ff_param_fit_path = os.path.join(ff_param_fit_path, 'gaussian.out')
+            if os.path.isfile(job.local_path_to_output_file):
+                shutil.copyfile(job.local_path_to_output_file, ff_param_fit_path)
+                self.output[label]['job_types']['ff_param_fit'] = True
+                self.spawn_md_jobs(label)
+            else:
+                mmff94_fallback = True
+        else:
+            mmff94_fallback = True
+        if mmff94_fallback:
+            logger.error('Force field parameter fitting job in Gaussian failed. Generating standard '
+                         'MMFF94s conformers instead of fitting a force field for species {0}, '
+                         'although its force_field attribute was set to "fit".'.format(label))
+            self.species_dict[label].force_field = 'MMFF94s'
+            self.species_dict[label].generate_conformers(confs_to_dft=self.confs_to_dft,
+                                                         plot_path=os.path.join(self.project_directory, 'output',
+                                                                                'Species', label, 'geometry',
+                                                                                'conformers'))
+            self.process_conformers(label)
+
+    def _handle_gromacs_job_completion(self, label, job_name, job, successful_server_termination):
+        """
+        Handle a completed Gromacs MD job.
+
+        Args:
+            label (str): The species label.
+            job_name (str): The job name from the running_jobs dict (e.g., 'gromacs_a123').
+            job (Job): The job object.
+            successful_server_termination (bool): Whether the job terminated successfully on the server.
+        """
+        if successful_server_termination:
+            self.check_md_job(label=label, job=job)
+
+    def _check_species_progress(self, label):
+        """
+        Spawn TS conformers if all TS guesses were generated, and check whether all jobs of a species are done.
+
+        Args:
+            label (str): The species label.
+        """
+        if self.species_dict[label].is_ts and not self.species_dict[label].ts_conf_spawned\
+                and not any([tsg.success is None for tsg in self.species_dict[label].ts_guesses]):
+            # This is a TS Species for which conformers haven't been spawned, and all .success flags
+            # contain a values (whether ``True`` or ``False``)
+            # We're ready to spawn conformers for this TS Species
+            self.species_dict[label].generate_conformers()
+            self.run_ts_conformer_jobs(label=label)
+            self.species_dict[label].ts_conf_spawned = True
+
+        if not self.running_jobs[label] and not(self.species_dict[label].is_ts
+                                                and not self.species_dict[label].ts_conf_spawned):
+            self.check_all_done(label)
+            if not self.running_jobs[label]:
+                # delete the label only if it represents an empty dictionary
+                del self.running_jobs[label]
+
     def run_job(self, label, xyz, level_of_theory, job_type, fine=False, software=None, shift='', trsh='', memory=None,
                 conformer=-1, ess_trsh_methods=None, scan='', pivots=None, occ=None, scan_trsh='', scan_res=None,
                 max_job_time=None, confs=None, radius=None, directed_scan_type=None, directed_scans=None,
@@ -689,21 +1091,185 @@ class Scheduler(object):
         if job.software is not None:
             if conformer < 0:
                 # this is NOT a conformer DFT job
-                self.running_jobs[label].append(job.job_name)  # mark as a running job
+                self.running_jobs[label].add(job.job_name)  # mark as a running job
                 if job_type not in self.job_dict[label]:
                     # Jobs of this type haven't been spawned for label
                     self.job_dict[label][job_type] = dict()
                 self.job_dict[label][job_type][job.job_name] = job
-                self.job_dict[label][job_type][job.job_name].run()
             else:
                 # Running a conformer DFT job. Append differently to job_dict.
-                self.running_jobs[label].append('conformer{0}'.format(conformer))  # mark as a running job
+                self.running_jobs[label].add('conformer{0}'.format(conformer))  # mark as a running job
                 self.job_dict[label]['conformers'][conformer] = job  # save job object
-                self.job_dict[label]['conformers'][conformer].run()  # run the job
-            self.save_restart_dict()
+            if computation_cache.hydrate(job):
+                # the job is handled (and its output parsed) in the next sweep, as if it terminated on the server
+                self.save_restart_dict(label=label)
+            elif not self.has_free_slot(job):
+                # the job will be submitted by release_held_jobs() once a slot frees up
+                self.hold_job(label=label, job=job)
+            elif self.job_batch is not None:
+                # the job will be executed together with the rest of the batch in run_job_batch()
+                self.job_batch.append(job)
+            else:
+                try:
+                    job.run()
+                except ServerUnavailableError as e:
+                    logger.warning('Deferring job {0} of {1}: {2}'.format(job.job_name, label, e))
+                    self.deferred_jobs.append(job)
+                self.save_restart_dict(label=label)
             if job.server not in self.servers:
                 self.servers.append(job.server)
 
+    def start_job_batch(self):
+        """
+        Start collecting jobs spawned by run_job() into a batch instead of executing them one by one.
+        """
+        self.job_batch = list()
+
+    def run_job_batch(self, array=False, pack=False):
+        """
+        Execute all jobs collected since start_job_batch(),
+        staging the files of all jobs sent to the same server in a single session.
+
+        Args:
+            array (bool, optional): Whether to submit jobs with identical resources as the tasks of array jobs.
+            pack (bool, optional): Whether to pack short jobs with identical resources into single submissions.
+        """
+        jobs, self.job_batch = self.job_batch or list(), None
+        if jobs:
+            try:
+                if array:
+                    run_array_jobs(jobs)
+                elif pack:
+                    run_packed_jobs(jobs)
+                else:
+                    run_jobs(jobs)
+            except ServerUnavailableError as e:
+                unsubmitted_jobs = [job for job in jobs if job.job_id == 0 and job.job_status[0] == 'initializing']
+                logger.warning('Deferring {0} jobs: {1}'.format(len(unsubmitted_jobs), e))
+                self.deferred_jobs.extend(unsubmitted_jobs)
+            self.save_restart_dict()
+
+    def run_deferred_jobs(self):
+        """
+        Execute the deferred jobs whose server is available again.
+        Jobs whose server is still unavailable (or became unavailable again) remain deferred.
+        """
+        if not self.deferred_jobs:
+            return
+        jobs = [job for job in self.deferred_jobs if circuit_breakers.is_available(job.server)]
+        self.deferred_jobs = [job for job in self.deferred_jobs if job not in jobs]
+        for job in jobs:
+            try:
+                job.run()
+            except ServerUnavailableError as e:
+                logger.warning('Deferring job {0} again: {1}'.format(job.job_name, e))
+                self.deferred_jobs.append(job)
+        if jobs:
+            self.save_restart_dict()
+
+    def count_submitted_jobs(self, excluded_job=None):
+        """
+        Count the running jobs (including jobs waiting in a batch or deferred, but not held jobs)
+        per server and per ESS.
+
+        Args:
+            excluded_job (Job, optional): A job not to count.
+
+        Returns:
+            tuple: Two dictionaries, keys are servers and ESS, respectively, values are the numbers of jobs.
+        """
+        server_counts, ess_counts = dict(), dict()
+        for label, job_names in self.running_jobs.items():
+            for job_name in job_names:
+                job = self.get_job(label=label, job_name=job_name)
+                if job is None or job is excluded_job or job.from_cache or job.job_name in self.held_job_names:
+                    continue
+                server_counts[job.server] = server_counts.get(job.server, 0) + 1
+                ess_counts[job.software] = ess_counts.get(job.software, 0) + 1
+        return server_counts, ess_counts
+
+    @staticmethod
+    def is_below_job_caps(job, server_counts, ess_counts):
+        """
+        Check whether another job could be submitted to the job's server and ESS.
+
+        Args:
+            job (Job): The job object.
+            server_counts (dict): The numbers of running jobs per server.
+            ess_counts (dict): The numbers of running jobs per ESS.
+
+        Returns:
+            bool: Whether neither the server nor the ESS reached its maximal number of jobs.
+        """
+        max_server_jobs = servers[job.server].get('max_jobs', None) if job.server in servers else None
+        max_ess_jobs = ess_max_jobs.get(job.software, None)
+        return (max_server_jobs is None or server_counts.get(job.server, 0) < max_server_jobs) \
+            and (max_ess_jobs is None or ess_counts.get(job.software, 0) < max_ess_jobs)
+
+    def has_free_slot(self, job):
+        """
+        Check whether a job could be submitted now, or should be held until a slot of its server or ESS frees up.
+        Jobs are also held if other jobs are already held for the same server or ESS, so they keep their priority.
+
+        Args:
+            job (Job): The job object.
+
+        Returns:
+            bool: Whether the job could be submitted.
+        """
+        server_capped = servers.get(job.server, dict()).get('max_jobs', None) is not None
+        ess_capped = ess_max_jobs.get(job.software, None) is not None
+        if not server_capped and not ess_capped:
+            return True
+        if any(server_capped and held_job.server == job.server or ess_capped and held_job.software == job.software
+               for _, _, _, held_job in self.held_jobs):
+            return False
+        server_counts, ess_counts = self.count_submitted_jobs(excluded_job=job)
+        return self.is_below_job_caps(job, server_counts, ess_counts)
+
+    def hold_job(self, label, job):
+        """
+        Hold a job until a slot of its server or ESS frees up.
+
+        Args:
+            label (str): The species label.
+            job (Job): The job object.
+        """
+        priority = job_type_priorities.get(job.job_type, max(job_type_priorities.values()) + 1)
+        heapq.heappush(self.held_jobs, (priority, next(self.held_jobs_counter), label, job))
+        self.held_job_names.add(job.job_name)
+        logger.debug('Holding job {0} of {1} ({2} jobs are held)'.format(job.job_name, label, len(self.held_jobs)))
+
+    def release_held_jobs(self):
+        """
+        Submit held jobs, by priority, as long as their servers and ESS have free slots.
+        """
+        if not self.held_jobs:
+            return
+        server_counts, ess_counts = self.count_submitted_jobs()
+        released, still_held = list(), list()
+        while self.held_jobs:
+            entry = heapq.heappop(self.held_jobs)
+            job = entry[3]
+            if self.is_below_job_caps(job, server_counts, ess_counts):
+                server_counts[job.server] = server_counts.get(job.server, 0) + 1
+                ess_counts[job.software] = ess_counts.get(job.software, 0) + 1
+                self.held_job_names.discard(job.job_name)
+                released.append(job)
+            else:
+                still_held.append(entry)
+        for entry in still_held:
+            heapq.heappush(self.held_jobs, entry)
+        if released:
+            logger.debug('Releasing {0} held jobs'.format(len(released)))
+            for job in released:
+                try:
+                    job.run()
+                except ServerUnavailableError as e:
+                    logger.warning('Deferring job {0}: {1}'.format(job.job_name, e))
+                    self.deferred_jobs.append(job)
+            self.save_restart_dict()
+
     def end_job(self, job, label, job_name):
         """
         A helper function for checking job status, saving in csv file, and downloading output files.
@@ -717,14 +1283,19 @@ class Scheduler(object):
              bool: `True` if job terminated successfully on the server, `False` otherwise.
         """
         try:
-            job.determine_job_status()  # also downloads output file
+            if job.job_name in self.prefetched_job_statuses:
+                # the status was already determined concurrently by the completion pipeline
+                error = self.prefetched_job_statuses.pop(job.job_name)
+                if error is not None:
+                    raise error
+            else:
+                job.determine_job_status()  # also downloads output file
         except IOError:
             if job.job_type not in ['orbitals']:
                 logger.warning('Tried to determine status of job {0}, but it seems like the job never ran.'
                                ' Re-running job.'.format(job.job_name))
                 self._run_a_job(job=job, label=label)
-            if job_name in self.running_jobs[label]:
-                self.running_jobs[label].pop(self.running_jobs[label].index(job_name))
+            self.running_jobs[label].discard(job_name)
 
         if not os.path.exists(job.local_path_to_output_file):
             if 'restart_due_to_file_not_found' in job.ess_trsh_methods:
@@ -737,26 +1308,23 @@ class Scheduler(object):
                 logger.warning('Did not find the output file of job {0} with path {1}. Maybe the job never ran.'
                                ' Re-running job.'.format(job.job_name, job.local_path_to_output_file))
                 self._run_a_job(job=job, label=label)
-            if job_name in self.running_jobs[label]:
-                self.running_jobs[label].pop(self.running_jobs[label].index(job_name))
+            self.running_jobs[label].discard(job_name)
             return False
 
         if job.job_status[0] != 'running' and job.job_status[1]['status'] != 'running':
-            if job_name in self.running_jobs[label]:
-                self.running_jobs[label].pop(self.running_jobs[label].index(job_name))
+            self.running_jobs[label].discard(job_name)
             self.timer = False
             job.write_completed_job_to_csv_file()
             logger.info('  Ending job {name} for {label} (run time: {time})'.format(name=job.job_name, label=label,
                                                                                     time=job.run_time))
             if job.job_status[0] != 'done':
                 return False
-            self.save_restart_dict()
-            if job.software.lower() == 'gaussian' and os.path.isfile(os.path.join(job.local_path, 'check.chk'))\
-                    and job.job_type in ['conformer', 'opt', 'optfreq', 'composite']:
-                check_path = os.path.join(job.local_path, 'check.chk')
-                if os.path.isfile(check_path):
-                    if job.job_type != 'conformer':
-                        self.species_dict[label].checkfile = check_path
+            computation_cache.store(job)
+            self.save_restart_dict(label=label)
+            if job.software.lower() == 'gaussian' and remote_artifacts.exists(job.local_path_to_check_file)\
+                    and job.job_type in ['opt', 'optfreq', 'composite']:
+                # the check file might still be on the server, it is only fetched when a consumer needs it
+                self.species_dict[label].checkfile = job.local_path_to_check_file
             return True
 
     def _run_a_job(self, job, label):
@@ -842,9 +1410,11 @@ class Scheduler(object):
         successful_tsgs = [tsg for tsg in self.species_dict[label].ts_guesses if tsg.success]
         if len(successful_tsgs) > 1:
             self.job_dict[label]['conformers'] = dict()
+            self.start_job_batch()
             for i, tsg in enumerate(successful_tsgs):
                 self.run_job(label=label, xyz=tsg.initial_xyz, level_of_theory=self.ts_guess_level, job_type='conformer',
                              conformer=i)
+            self.run_job_batch(pack=True)
         elif len(successful_tsgs) == 1:
             if 'opt' not in self.job_dict[label] and 'composite' not in self.job_dict[label]:
                 # proceed only if opt (/composite) not already spawned
@@ -1126,7 +1696,7 @@ class Scheduler(object):
                     self.unique_species_labels.append(bde_species.label)
                     self.initialize_output_dict(label=bde_species.label)
                     self.job_dict[bde_species.label] = dict()
-                    self.running_jobs[bde_species.label] = list()
+                    self.running_jobs[bde_species.label] = set()
                     if bde_species.number_of_atoms == 1:
                         logger.debug('Species {0} is monoatomic'.format(bde_species.label))
                         # No need to run opt/freq jobs for a monoatomic species, only run sp (or composite if relevant)
@@ -1163,7 +1733,8 @@ class Scheduler(object):
                 directed_scan_type))
         increment = rotor_scan_resolution
         if 'brute' in directed_scan_type:
-            # spawn jobs all at once
+            # spawn jobs all at once, submitted as a single array job
+            self.start_job_batch()
             dihedrals = dict()
             for scan in scans:
                 original_dihedral = calculate_dihedral_angle(coords=xyz['coords'], torsion=scan)
@@ -1199,6 +1770,7 @@ class Scheduler(object):
                                  job_type='directed_scan', directed_scan_type=directed_scan_type,
                                  directed_scans=scans, directed_dihedrals=directed_dihedrals,
                                  rotor_index=rotor_index, pivots=pivots)
+            self.run_job_batch(array=True)
         elif 'cont' in directed_scan_type:
             # spawn jobs one by one
             rotor_dict = self.species_dict[label].rotors_dict[rotor_index]
@@ -1415,9 +1987,11 @@ class Scheduler(object):
                 and not self.testing:
             if len(self.species_dict[label].conformers) > 1:
                 self.job_dict[label]['conformers'] = dict()
+                self.start_job_batch()
                 for i, xyz in enumerate(self.species_dict[label].conformers):
                     self.run_job(label=label, xyz=xyz, level_of_theory=self.conformer_level,
                                  job_type='conformer', conformer=i)
+                self.run_job_batch(pack=True)
             elif len(self.species_dict[label].conformers) == 1:
                 logger.info('Only one conformer is available for species {0}, '
                             'using it as initial xyz'.format(label))
@@ -1505,8 +2079,8 @@ class Scheduler(object):
             i (int): The conformer index.
         """
         if job.job_status[1]['status'] == 'done':
-            xyz = parser.parse_xyz_from_file(path=job.local_path_to_output_file)
-            energy = parser.parse_e_elect(path=job.local_path_to_output_file)
+            xyz = self.get_parsed_output(job=job, quantity='xyz')
+            energy = self.get_parsed_output(job=job, quantity='e_elect')
             if self.species_dict[label].is_ts:
                 self.species_dict[label].ts_guesses[i].energy = energy
                 self.species_dict[label].ts_guesses[i].opt_xyz = xyz
@@ -1739,7 +2313,7 @@ class Scheduler(object):
         logger.debug('parsing composite geo for {0}'.format(job.job_name))
         freq_ok = False
         if job.job_status[1]['status'] == 'done':
-            self.species_dict[label].final_xyz = parser.parse_xyz_from_file(path=job.local_path_to_output_file)
+            self.species_dict[label].final_xyz = self.get_parsed_output(job=job, quantity='xyz')
             self.output[label]['job_types']['composite'] = True
             self.output[label]['job_types']['opt'] = True
             self.output[label]['job_types']['sp'] = True
@@ -1760,11 +2334,11 @@ class Scheduler(object):
                 plotter.draw_structure(species=self.species_dict[label], project_directory=self.project_directory,
                                        method='draw_3d')
             # Check frequencies (using cclib crashes for CBS-QB3 output, so using an explicit parser here)
-            frequencies = parser.parse_frequencies(job.local_path_to_output_file, job.software)
+            frequencies = self.get_parsed_output(job=job, quantity='frequencies')
             freq_ok = self.check_negative_freq(label=label, job=job, vibfreqs=frequencies)
             if freq_ok:
                 # Update restart dictionary and save the yaml restart file:
-                self.save_restart_dict()
+                self.save_restart_dict(label=label)
                 success = True  # run freq / scan jobs on this optimized geometry
                 if not self.species_dict[label].is_ts:
                     is_isomorphic = self.species_dict[label].check_xyz_isomorphism(
@@ -1795,7 +2369,7 @@ class Scheduler(object):
         success = False
         logger.debug('parsing opt geo for {0}'.format(job.job_name))
         if job.job_status[1]['status'] == 'done':
-            self.species_dict[label].final_xyz = parser.parse_xyz_from_file(path=job.local_path_to_output_file)
+            self.species_dict[label].final_xyz = self.get_parsed_output(job=job, quantity='xyz')
             if not job.fine and self.job_types['fine'] and not job.software == 'molpro':
                 # Run opt again using a finer grid.
                 xyz = self.species_dict[label].final_xyz
@@ -1837,7 +2411,7 @@ class Scheduler(object):
                 logger.info('\nOptimized geometry for {label}{rxn} at {level}:\n{xyz}'.format(
                     label=label, rxn=rxn_str, level=job.level_of_theory,
                     xyz=xyz_to_str(self.species_dict[label].final_xyz)))
-                self.save_restart_dict()
+                self.save_restart_dict(label=label)
                 self.output[label]['paths']['geo'] = job.local_path_to_output_file  # will be overwritten with freq
                 if not self.species_dict[label].is_ts:
                     plotter.draw_structure(species=self.species_dict[label], project_directory=self.project_directory)
@@ -1871,7 +2445,7 @@ class Scheduler(object):
         if job.job_status[1]['status'] == 'done':
             if not os.path.isfile(job.local_path_to_output_file):
                 raise SchedulerError('Called check_freq_job with no output file')
-            vibfreqs = parser.parse_frequencies(path=str(job.local_path_to_output_file), software=job.software)
+            vibfreqs = self.get_parsed_output(job=job, quantity='frequencies')
             freq_ok = self.check_negative_freq(label=label, job=job, vibfreqs=vibfreqs)
             if not self.species_dict[label].is_ts and not freq_ok:
                 self.troubleshoot_negative_freq(label=label, job=job)
@@ -1928,7 +2502,7 @@ class Scheduler(object):
             self.output[label]['paths']['freq'] = job.local_path_to_output_file
             if not self.testing:
                 # Update restart dictionary and save the yaml restart file:
-                self.save_restart_dict()
+                self.save_restart_dict(label=label)
             return True
 
     def check_sp_job(self, label, job):
@@ -1960,7 +2534,7 @@ class Scheduler(object):
                     label, self.species_dict[label].t1, txt))
                 self.output[label]['info'] += 'T1 = {0}; '.format(self.species_dict[label].t1)
             # Update restart dictionary and save the yaml restart file:
-            self.save_restart_dict()
+            self.save_restart_dict(label=label)
             if self.species_dict[label].number_of_atoms == 1:
                 # save the geometry from the sp job for monoatomic species for which no opt/freq jobs will be spawned
                 self.output[label]['paths']['geo'] = job.local_path_to_output_file
@@ -2005,7 +2579,7 @@ class Scheduler(object):
         invalidate, actions, energies = False, list(), list()
         for i in range(self.species_dict[label].number_of_rotors):
             if self.species_dict[label].rotors_dict[i]['pivots'] == job.pivots:
-                energies, angles = parser.parse_scan_energies(path=job.local_path_to_output_file)
+                energies, angles = self.get_parsed_output(job=job, quantity='scan_energies')
                 if energies is None:
                     invalidate = True
                     invalidation_reason = 'Could not read energies'
@@ -2083,7 +2657,7 @@ class Scheduler(object):
             plotter.plot_1d_rotor_scan(angles=angles, energies=energies, path=rotor_path,
                                        pivots=job.pivots, comment=message)
         # Save the Restart dictionary
-        self.save_restart_dict()
+        self.save_restart_dict(label=label)
 
     def check_directed_scan(self, label, pivots, scan, energies):
         """
@@ -2152,7 +2726,7 @@ class Scheduler(object):
                 else:
                     rotor_dict['success'] = False
         # Save the Restart dictionary
-        self.save_restart_dict()
+        self.save_restart_dict(label=label)
 
     def check_directed_scan_job(self, label, job):
         """
@@ -2304,19 +2878,16 @@ class Scheduler(object):
                                if key in self.job_types and self.job_types[key]}
             logger.error(f'Species {label} did not converge. Job type status is: {job_type_status}')
         # Update restart dictionary and save the yaml restart file:
-        self.save_restart_dict()
+        self.save_restart_dict(label=label)
 
     def get_servers_jobs_ids(self):
         """
-        Check status on all active servers, return a list of relevant running job IDs
+        Check status on all active servers, update the set of relevant running job IDs.
+        Each server is queried once, and the snapshot is shared with all Job objects checked during this sweep.
         """
-        self.servers_jobs_ids = list()
-        for server in self.servers:
-            if server != 'local':
-                ssh = SSHClient(server)
-                self.servers_jobs_ids.extend(ssh.check_running_jobs_ids())
-            else:
-                self.servers_jobs_ids.extend(check_running_jobs_ids())
+        self.servers_jobs_ids = set()
+        for server in set(self.servers):
+            self.servers_jobs_ids.update(queue_snapshot.get_job_ids(server=server, force=True))
 
     def troubleshoot_negative_freq(self, label, job):
         """
@@ -2342,9 +2913,11 @@ class Scheduler(object):
             self.species_dict[label].conformers = confs
             self.species_dict[label].conformer_energies = [None] * len(confs)
             self.job_dict[label]['conformers'] = dict()  # initialize the conformer job dictionary
+            self.start_job_batch()
             for i, xyz in enumerate(self.species_dict[label].conformers):
                 self.run_job(label=label, xyz=xyz, level_of_theory=self.conformer_level, job_type='conformer',
                              conformer=i)
+            self.run_job_batch(pack=True)
 
     def troubleshoot_scan_job(self, job, methods=None):
         """
@@ -2442,8 +3015,7 @@ class Scheduler(object):
         if 'Unknown' in job.job_status[1]['keywords'] and 'change_node' not in job.ess_trsh_methods:
             job.ess_trsh_methods.append('change_node')
             job.troubleshoot_server()
-            if job.job_name not in self.running_jobs[label]:
-                self.running_jobs[label].append(job.job_name)  # mark as a running job
+            self.running_jobs[label].add(job.job_name)  # mark as a running job
         if job.software == 'gaussian':
             if self.species_dict[label].checkfile is None:
                 self.species_dict[label].checkfile = job.checkfile
@@ -2468,7 +3040,7 @@ class Scheduler(object):
                          job_type=job_type, fine=fine, ess_trsh_methods=ess_trsh_methods, trsh=trsh_keyword,
                          conformer=conformer, scan=job.scan, pivots=job.pivots, scan_res=job.scan_res, shift=shift,
                          directed_dihedrals=job.directed_dihedrals)
-        self.save_restart_dict()
+        self.save_restart_dict(label=label)
 
     def troubleshoot_conformer_isomorphism(self, label):
         """
@@ -2522,12 +3094,18 @@ class Scheduler(object):
             label (str): The species label.
         """
         logger.debug('Deleting all jobs for species {0}'.format(label))
+        held_jobs = [entry for entry in self.held_jobs if entry[2] == label]
+        if held_jobs:
+            self.held_jobs = [entry for entry in self.held_jobs if entry[2] != label]
+            heapq.heapify(self.held_jobs)
+            self.held_job_names -= set(entry[3].job_name for entry in held_jobs)
+        self.deferred_jobs = [job for job in self.deferred_jobs if job.species_name != label]
         for job_dict in self.job_dict[label].values():
             for job_name, job in job_dict.items():
-                if job_name in self.running_jobs[label]:
+                if job_name in self.running_jobs[label] and job.job_id:
                     logger.debug('Deleted job {0}'.format(job_name))
                     job.delete()
-        self.running_jobs[label] = list()
+        self.running_jobs[label] = set()
 
     def restore_running_jobs(self):
         """
@@ -2537,12 +3115,12 @@ class Scheduler(object):
         jobs = self.restart_dict['running_jobs']
         for spc_label in jobs.keys():
             if spc_label not in self.running_jobs:
-                self.running_jobs[spc_label] = list()
+                self.running_jobs[spc_label] = set()
             for job_description in jobs[spc_label]:
                 if 'conformer' not in job_description or job_description['conformer'] < 0:
-                    self.running_jobs[spc_label].append(job_description['job_name'])
+                    self.running_jobs[spc_label].add(job_description['job_name'])
                 else:
-                    self.running_jobs[spc_label].append('conformer{0}'.format(job_description['conformer']))
+                    self.running_jobs[spc_label].add('conformer{0}'.format(job_description['conformer']))
                 for species in self.species_list:
                     if species.label == spc_label:
                         break
@@ -2562,7 +3140,7 @@ class Scheduler(object):
                     self.job_dict[spc_label]['conformers'][int(job_description['conformer'])] = job
                     # don't generate additional conformers for this species
                     self.dont_gen_confs.append(spc_label)
-                self.servers_jobs_ids.append(job.job_id)
+                self.servers_jobs_ids.add(job.job_id)
         if self.job_dict:
             content = 'Restarting ARC, tracking the following jobs spawned in a previous session:'
             for spc_label in self.job_dict.keys():
@@ -2577,24 +3155,55 @@ class Scheduler(object):
             content += '\n\n'
             logger.info(content)
 
-    def save_restart_dict(self):
+    def save_restart_dict(self, label=None, compact=False):
         """
-        Update the restart_dict and save the restart.yml file.
+        Save the changes of the restart dictionary in the restart journal,
+        or update the restart_dict and save the entire restart.yml file once the journal is due for compaction.
+
+        Args:
+            label (str, optional): The label of the only species whose state changed. If not given, the state of all
+                                   species is compared to the journal, and only what changed is saved.
+            compact (bool, optional): Whether to save the entire restart.yml file regardless of the journal.
         """
         if self.save_restart and self.restart_dict is not None:
-            logger.debug('Creating a restart file...')
-            self.restart_dict['output'] = self.output
-            self.restart_dict['species'] = [spc.as_dict() for spc in self.species_dict.values()]
-            self.restart_dict['running_jobs'] = dict()
-            for spc in self.species_dict.values():
-                if spc.label in self.running_jobs:
-                    self.restart_dict['running_jobs'][spc.label] =\
-                        [self.job_dict[spc.label][job_name.rsplit('_', 1)[0]][job_name].as_dict()
-                         for job_name in self.running_jobs[spc.label] if 'conformer' not in job_name]\
-                        + [self.job_dict[spc.label]['conformers'][int(job_name.split('mer')[1])].as_dict()
-                           for job_name in self.running_jobs[spc.label] if 'conformer' in job_name]
-            logger.debug('Dumping restart dictionary:\n{0}'.format(self.restart_dict))
-            save_yaml_file(path=self.restart_path, content=self.restart_dict)
+            if compact or self.restart_journal.needs_compaction:
+                logger.debug('Creating a restart file...')
+                self.restart_dict['output'] = self.output
+                self.restart_dict['species'] = [spc.as_dict() for spc in self.species_dict.values()]
+                self.restart_dict['remote_artifacts'] = remote_artifacts.as_dict()
+                self.restart_dict['running_jobs'] = dict()
+                for spc in self.species_dict.values():
+                    if spc.label in self.running_jobs:
+                        self.restart_dict['running_jobs'][spc.label] = self.get_running_jobs_dicts(spc.label)
+                logger.debug('Dumping restart dictionary:\n{0}'.format(self.restart_dict))
+                self.restart_journal.compact(restart_dict=self.restart_dict)
+            else:
+                labels = [label] if label is not None else list(self.species_dict.keys())
+                updates = list()
+                for spc_label in labels:
+                    if spc_label in self.output:
+                        updates.append(('output', spc_label, self.output[spc_label]))
+                    updates.append(('species', spc_label, self.species_dict[spc_label].as_dict()))
+                    updates.append(('running_jobs', spc_label, self.get_running_jobs_dicts(spc_label)))
+                updates.append(('remote_artifacts', None, remote_artifacts.as_dict()))
+                self.restart_journal.append(updates)
+
+    def get_running_jobs_dicts(self, label):
+        """
+        Get the running jobs of a species, represented as dictionaries for restarting ARC.
+
+        Args:
+            label (str): The species label.
+
+        Returns:
+            list: Entries are Job dictionaries.
+        """
+        if label not in self.running_jobs:
+            return list()
+        return [self.job_dict[label][job_name.rsplit('_', 1)[0]][job_name].as_dict()
+                for job_name in self.running_jobs[label] if 'conformer' not in job_name]\
+            + [self.job_dict[label]['conformers'][int(job_name.split('mer')[1])].as_dict()
+               for job_name in self.running_jobs[label] if 'conformer' in job_name]
 
     def make_reaction_labels_info_file(self):
         """A helper function for creating the `reactions labels.info` file"""
@@ -8,10 +8,14 @@ This module contains unit tests for the arc.scheduler module
 import unittest
 import os
 import shutil
+import time
+from unittest import mock
 
 import arc.rmgdb as rmgdb
+from arc.exceptions import ServerUnavailableError
 from arc.scheduler import Scheduler
 from arc.job.job import Job
+from arc.job.monitor import JobMonitor, JobProgress
 from arc.species.species import ARCSpecies
 import arc.parser as parser
 from arc.plotter import save_conformers_file
@@ -274,6 +278,134 @@ H      -1.82570782    0.42754384   -0.56130718"""
                          'not a torsional mode (angles = 179.91, 110.38 degrees)')
         self.assertFalse(self.sched1.species_dict['CtripCO'].rotors_dict[0]['success'])
 
+    def test_get_completed_jobs(self):
+        """Test the get_job() and get_completed_jobs() methods"""
+        sched3 = Scheduler(project='project_test', ess_settings=self.ess_settings, species_list=[self.spc1, self.spc2],
+                           composite_method='', conformer_level=default_levels_of_theory['conformer'],
+                           opt_level=default_levels_of_theory['opt'], freq_level=default_levels_of_theory['freq'],
+                           sp_level=default_levels_of_theory['sp'], scan_level=default_levels_of_theory['scan'],
+                           ts_guess_level=default_levels_of_theory['ts_guesses'], rmgdatabase=self.rmgdb,
+                           project_directory=self.project_directory, testing=True, job_types=self.job_types1,
+                           orbitals_level=default_levels_of_theory['orbitals'], scheduler_mode='async')
+        self.assertEqual(sched3.scheduler_mode, 'async')
+        job1 = Job(project='project_test', ess_settings=self.ess_settings, species_name='methylamine',
+                   xyz=self.job1.xyz, job_type='conformer', conformer=0, level_of_theory='b97-d3/6-311+g(d,p)',
+                   multiplicity=1, project_directory=self.project_directory, job_num=104)
+        job2 = Job(project='project_test', ess_settings=self.ess_settings, species_name='C2H6', xyz=self.job1.xyz,
+                   job_type='freq', level_of_theory='wb97x-d3/6-311+g(d,p)', multiplicity=1,
+                   project_directory=self.project_directory, software='qchem', job_num=105)
+        job1.job_id, job2.job_id = 582682, 588334
+        sched3.job_dict['methylamine'] = {'conformers': {0: job1}}
+        sched3.job_dict['C2H6'] = {'freq': {job2.job_name: job2}}
+        sched3.running_jobs = {'methylamine': {'conformer0'}, 'C2H6': {job2.job_name}}
+        self.assertIs(sched3.get_job(label='methylamine', job_name='conformer0'), job1)
+        self.assertIs(sched3.get_job(label='C2H6', job_name=job2.job_name), job2)
+        self.assertIsNone(sched3.get_job(label='C2H6', job_name='opt_a1'))
+        sched3.servers_jobs_ids = {582682, 588334}
+        self.assertEqual(sched3.get_completed_jobs(), list())
+        sched3.servers_jobs_ids = {582682}
+        self.assertEqual(sched3.get_completed_jobs(), [('C2H6', job2.job_name)])
+
+        # completion handlers are dispatched by job type
+        self.assertEqual(sched3.job_completion_handlers['freq'], sched3._handle_freq_job_completion)
+        self.assertEqual(sched3.job_completion_handlers['optfreq'], sched3.job_completion_handlers['opt'])
+        self.assertFalse(sched3._handle_job_completion(label='methylamine', job_name='conformer0'))  # still running
+        self.assertFalse(sched3._handle_job_completion(label='C2H6', job_name='sp_a1'))  # not a job of C2H6
+
+    def test_get_monitored_jobs(self):
+        """Test getting the running jobs whose progress should be checked by the job monitor"""
+        sched5 = Scheduler(project='project_test', ess_settings=self.ess_settings, species_list=[self.spc1, self.spc2],
+                           composite_method='', conformer_level=default_levels_of_theory['conformer'],
+                           opt_level=default_levels_of_theory['opt'], freq_level=default_levels_of_theory['freq'],
+                           sp_level=default_levels_of_theory['sp'], scan_level=default_levels_of_theory['scan'],
+                           ts_guess_level=default_levels_of_theory['ts_guesses'], rmgdatabase=self.rmgdb,
+                           project_directory=self.project_directory, testing=True, job_types=self.job_types1,
+                           orbitals_level=default_levels_of_theory['orbitals'])
+        sched5.job_monitor = JobMonitor(interval=60)
+        jobs = [Job(project='project_test', ess_settings=self.ess_settings, species_name='C2H6', xyz=self.job1.xyz,
+                    job_type='opt', level_of_theory='wb97x-d3/6-311+g(d,p)', multiplicity=1,
+                    project_directory=self.project_directory, software='qchem', job_num=107 + i) for i in range(3)]
+        for job, job_id in zip(jobs, [590001, 590002, 590002]):
+            # the last two jobs are packed into a single submission
+            job.job_id, job.job_status[0] = job_id, 'running'
+        sched5.job_dict['C2H6'] = {'opt': {job.job_name: job for job in jobs}}
+        sched5.running_jobs = {'C2H6': {job.job_name for job in jobs}}
+        sched5.servers_jobs_ids = {590001, 590002}
+        self.assertEqual(sched5.get_monitored_jobs(), [('C2H6', jobs[0].job_name, jobs[0])])
+        sched5.job_monitor.progress[jobs[0].job_name] = JobProgress(software='qchem')
+        sched5.job_monitor.progress[jobs[0].job_name].last_check = time.time()
+        self.assertEqual(sched5.get_monitored_jobs(), list())  # checked within the interval
+
+    def test_get_parsed_output(self):
+        """Test getting quantities parsed from job outputs, preferably by the completion pipeline"""
+        job = Job(project='project_test', ess_settings=self.ess_settings, species_name='C2H6', xyz=self.job1.xyz,
+                  job_type='freq', level_of_theory='wb97x-d3/6-311+g(d,p)', multiplicity=1,
+                  project_directory=self.project_directory, software='qchem', job_num=106)
+        job.local_path_to_output_file = os.path.join(arc_path, 'arc', 'testing', 'C2H6_freq_QChem.out')
+        frequencies = self.sched1.get_parsed_output(job=job, quantity='frequencies')
+        self.assertEqual(len(frequencies), 18)
+        self.sched1.parsed_outputs[job.job_name] = {'frequencies': [100.0]}
+        self.assertEqual(self.sched1.get_parsed_output(job=job, quantity='frequencies'), [100.0])
+        self.sched1.parsed_outputs = dict()
+
+    def test_held_jobs(self):
+        """Test holding jobs exceeding the maximal number of jobs of an ESS and releasing them by priority"""
+        sched4 = Scheduler(project='project_test', ess_settings=self.ess_settings, species_list=[self.spc1, self.spc2],
+                           composite_method='', conformer_level=default_levels_of_theory['conformer'],
+                           opt_level=default_levels_of_theory['opt'], freq_level=default_levels_of_theory['freq'],
+                           sp_level=default_levels_of_theory['sp'], scan_level=default_levels_of_theory['scan'],
+                           ts_guess_level=default_levels_of_theory['ts_guesses'], rmgdatabase=self.rmgdb,
+                           project_directory=self.project_directory, testing=True, job_types=self.job_types1,
+                           orbitals_level=default_levels_of_theory['orbitals'])
+        level = 'wb97x-d3/6-311+g(d,p)'
+        sched4.job_dict['methylamine']['conformers'] = dict()
+        with mock.patch.dict('arc.scheduler.ess_max_jobs', {'qchem': 1}), mock.patch.object(Job, 'run') as run:
+            sched4.run_job(label='C2H6', xyz=self.job1.xyz, level_of_theory=level, job_type='sp', software='qchem')
+            sched4.run_job(label='methylamine', xyz=self.job1.xyz, level_of_theory=level, job_type='conformer',
+                           software='qchem', conformer=0)
+            sched4.run_job(label='C2H6', xyz=self.job1.xyz, level_of_theory=level, job_type='freq', software='qchem')
+            self.assertEqual(run.call_count, 1)
+            self.assertEqual(len(sched4.held_jobs), 2)
+            self.assertEqual([entry[3].job_type for entry in sorted(sched4.held_jobs)], ['freq', 'conformer'])
+            conformer_job = sched4.job_dict['methylamine']['conformers'][0]
+            self.assertFalse(sched4.is_job_available(conformer_job))
+
+            sched4.release_held_jobs()
+            self.assertEqual(run.call_count, 1)  # the qchem slot is still taken by the sp job
+            sp_job_name = list(sched4.job_dict['C2H6']['sp'].keys())[0]
+            sched4.running_jobs['C2H6'].discard(sp_job_name)  # the sp job terminated
+            sched4.release_held_jobs()
+            self.assertEqual(run.call_count, 2)
+            self.assertEqual([entry[3] for entry in sched4.held_jobs], [conformer_job])
+            self.assertEqual(sched4.held_job_names, {conformer_job.job_name})
+
+            sched4.delete_all_species_jobs(label='methylamine')
+            self.assertEqual(sched4.held_jobs, list())
+            self.assertEqual(run.call_count, 2)
+
+    def test_delete_deferred_jobs(self):
+        """Test that the deferred jobs of a deleted species are not executed once their server is available"""
+        sched5 = Scheduler(project='project_test', ess_settings=self.ess_settings, species_list=[self.spc1, self.spc2],
+                           composite_method='', conformer_level=default_levels_of_theory['conformer'],
+                           opt_level=default_levels_of_theory['opt'], freq_level=default_levels_of_theory['freq'],
+                           sp_level=default_levels_of_theory['sp'], scan_level=default_levels_of_theory['scan'],
+                           ts_guess_level=default_levels_of_theory['ts_guesses'], rmgdatabase=self.rmgdb,
+                           project_directory=self.project_directory, testing=True, job_types=self.job_types1,
+                           orbitals_level=default_levels_of_theory['orbitals'])
+        level = 'wb97x-d3/6-311+g(d,p)'
+        with mock.patch.object(Job, 'run', side_effect=ServerUnavailableError('server1 is unavailable')):
+            sched5.run_job(label='C2H6', xyz=self.job1.xyz, level_of_theory=level, job_type='sp', software='qchem')
+            sched5.run_job(label='methylamine', xyz=self.job1.xyz, level_of_theory=level, job_type='sp',
+                           software='qchem')
+        self.assertEqual([job.species_name for job in sched5.deferred_jobs], ['C2H6', 'methylamine'])
+
+        sched5.delete_all_species_jobs(label='methylamine')
+        self.assertEqual([job.species_name for job in sched5.deferred_jobs], ['C2H6'])
+        with mock.patch.object(Job, 'run', autospec=True) as run:
+            sched5.run_deferred_jobs()
+        self.assertEqual([call[0][0].species_name for call in run.call_args_list], ['C2H6'])
+        self.assertEqual(sched5.deferred_jobs, list())
+
     @classmethod
     def tearDownClass(cls):
         """
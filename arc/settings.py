@@ -27,12 +27,16 @@ import string
 #         'address': 'rmg.mit.edu',
 #         'un': '<username>',
 #         'key': '/home/<username>/.ssh/id_rsa',
+#         'max_jobs': 200,  # the maximal number of ARC jobs in the queue, optional (default: unlimited)
 #     },
 #    'local': {
 #        'cluster_soft': 'OGE',
 #        'un': '<username>',
 #    },
 # }
+# If the local machine has no queue system, set the 'cluster_soft' of the 'local' server to 'Local'. ARC will then
+# execute the submit scripts itself, running as many jobs concurrently as the local 'cpus' and 'memory' allow
+# (by default, all cores and the physical memory of the machine).
 servers = {
     'server1': {
         'cluster_soft': 'OGE',
@@ -64,6 +68,35 @@ global_ess_settings = {
     'onedmin': 'server1',
 }
 
+# ARC holds back jobs to keep at most 'max_jobs' of its jobs in a server's queue (see the servers dictionary above),
+# and at most ess_max_jobs[ess] jobs of an ESS submitted at once (e.g., if the number of licenses is limited).
+# Held jobs are submitted as slots free up, in the order of job_type_priorities (a lower value is submitted first),
+# so that critical-path jobs are not stuck behind large conformer or rotor scan fan-outs.
+ess_max_jobs = dict()  # e.g., {'molpro': 4}
+job_type_priorities = {'opt': 0, 'optfreq': 0, 'composite': 0, 'freq': 1, 'sp': 2, 'orbitals': 3, 'onedmin': 3,
+                       'bde': 3, 'scan': 4, 'directed_scan': 4, 'irc': 4, 'ts_guess': 5, 'conformer': 5,
+                       'ff_param_fit': 5, 'gromacs': 5, 'gsm': 5}
+
+# If several servers are listed for an ESS (in ess_settings), each job is placed on the server with the lowest expected
+# completion time, estimated from the server's current queue load, the turnaround times of similar jobs on it recorded
+# in the job ledger, and its node 'cpus' and 'memory'. If False, jobs are always placed on the first listed server.
+load_aware_placement = False  # Default: False
+placement_history_size = 50  # the number of recent completed jobs per server and job type considered. Default: 50
+placement_min_history = 3  # the minimal number of completed jobs for trusting a server's own history. Default: 3
+placement_default_run_time = 3600  # seconds, the assumed turnaround of an 8-core job with no history. Default: 3600
+placement_history_max_age = 600  # seconds, the turnaround statistics are re-read from the ledger after. Default: 600
+
+# Before submission, the cores, memory, and maximal run time of each job are sized from similar completed jobs recorded
+# in the job ledger (same job type and ESS, preferably the same level of theory), by fitting their CPU time (from the
+# wall time reported by the ESS) to the number of heavy atoms. Jobs without enough history keep the requested
+# (max_job_time and memory) resources.
+job_size_prediction = False  # Default: False
+job_size_prediction_min_samples = 5  # the minimal number of similar completed jobs for a prediction. Default: 5
+job_size_prediction_walltime_factor = 2  # the safety factor applied to the predicted run time. Default: 2
+job_size_prediction_target_run_time = 2  # hours, short jobs request fewer cores if still expected to finish within
+job_size_prediction_min_cpus = 4  # the minimal number of cores requested by short jobs. Default: 4
+job_size_prediction_history_max_age = 600  # seconds, the history is re-read from the ledger after. Default: 600
+
 # List here job types to execute by default
 default_job_types = {'conformers': True,      # defaults to True if not specified
                      'opt': True,             # defaults to True if not specified
@@ -100,10 +133,92 @@ list_available_nodes_command = {'OGE': 'export SGE_ROOT=/opt/sge; /opt/sge/bin/l
                                 'Slurm': 'sinfo'}
 
 submit_filename = {'OGE': 'submit.sh',
-                   'Slurm': 'submit.sl'}
+                   'Slurm': 'submit.sl',
+                   'Local': 'submit.sh'}
 
 t_max_format = {'OGE': 'hours',
-                'Slurm': 'days'}
+                'Slurm': 'days',
+                'Local': 'hours'}
+
+# Array jobs: several jobs with identical resources (e.g., the points of a brute force directed scan)
+# are submitted as the tasks of a single array job
+array_job_directive = {'OGE': '#$ -t 1-{num_tasks}',
+                       'Slurm': '#SBATCH --array=1-{num_tasks}'}
+
+array_task_id_variable = {'OGE': 'SGE_TASK_ID',
+                          'Slurm': 'SLURM_ARRAY_TASK_ID'}
+
+array_tasks_filename = 'tasks.txt'  # maps the array task IDs to the job folders
+array_job_min_tasks = None  # the minimal number of jobs to submit as an array job (e.g., 4), None to disable.
+                            # Default: None
+
+# Job packing: many short jobs of a small species (e.g., conformer optimizations) are bundled into a single submission
+# which runs them one after the other (or concurrently, requesting the CPUs of all packed jobs) on one node
+job_packing_max_tasks = None  # the maximal number of jobs per submission (e.g., 8), None to disable. Default: None
+job_packing_max_runtime = 1  # hours, the maximal total estimated run time of the packed jobs. Default: 1
+job_packing_parallel = False  # whether to run the packed jobs concurrently. Default: False
+packed_job_minutes_per_heavy_atom = 5  # a rough run time estimate of a packed job per heavy atom. Default: 5
+
+# The maximal age (in seconds) of a cached server queue status (the output of `check_status_command`).
+# The Scheduler queries each server once per sweep, and all species and jobs checked within this window
+# share that single query instead of separately querying the server.
+queue_snapshot_max_age = 300  # seconds. Default: 300
+
+# SSH connections to servers are kept alive and reused by all commands and file transfers.
+# A connection which wasn't used for longer than this time is closed (it is transparently re-opened when needed).
+ssh_idle_timeout = 600  # seconds. Default: 600
+
+# Failed server operations are retried with a jittered exponential backoff. If all attempts fail, operations on that
+# server are deferred (without blocking operations on other servers) for a reset timeout, doubled on each failure
+server_retry_max_attempts = 3  # Default: 3
+server_retry_base_delay = 2  # seconds, the delay before the first retry. Default: 2
+server_retry_max_delay = 30  # seconds. Default: 30
+server_circuit_reset_timeout = 60  # seconds, the first deferral of a server's operations. Default: 60
+server_circuit_max_reset_timeout = 3600  # seconds. Default: 3600
+
+# The executables probed (in a single remote command per server, all servers concurrently)
+# when ARC maps the ESS available on the servers (if ``global_ess_settings`` and ``ess_settings`` are not given)
+ess_executables = {'gaussian': ['g03', 'g09', 'g16'],
+                   'qchem': ['qchem'],
+                   'orca': ['orca'],
+                   'molpro': ['molpro'],
+                   }
+
+# The mapped ESS settings are cached on disk, and reused by later ARC runs if the servers didn't change
+ess_settings_cache_path = os.path.join(os.path.expanduser('~'), '.arc', 'ess_settings.yml')
+ess_settings_cache_ttl = 86400  # seconds, set to None to disable the cache. Default: 86400 (one day)
+
+# The asynchronous ('async') scheduler mode parameters
+scheduler_poll_interval = 10  # seconds between polling the servers when no job completed. Default: 10
+# Completed jobs are post-processed concurrently (in both scheduler modes): their output files are downloaded by a pool
+# of threads, and the quantities needed to decide on the next jobs are parsed in these threads. Parsing could instead
+# be done by a pool of processes, which pays off only when many large output files complete together,
+# since each process imports ARC and its dependencies before parsing its first file
+scheduler_async_workers = 8  # maximal number of concurrent server queries and job output downloads. Default: 8
+scheduler_parse_workers = 0  # processes parsing output files, 0 to parse in the download threads. Default: 0
+
+# The ESS status of a remote job is determined by reading only the tail of its output file
+# The window read from the end of the file grows (8-fold) until the status is conclusively determined
+ess_tail_window = 8192  # bytes, the initial window. Default: 8192 (8 KB)
+ess_tail_max_window = 4194304  # bytes, above which the entire output file is downloaded. Default: 4194304 (4 MB)
+errored_output_max_download = 50  # MB, only the tail of larger outputs of errored jobs is downloaded. Default: 50
+
+# The progress of running Gaussian and QChem jobs can be monitored by periodically reading the part of their output
+# files written since the last check. Jobs which stall (an SCF exceeding the maximal number of cycles, or an
+# optimization which stopped lowering its energy and gradient) are aborted and troubleshot right away,
+# instead of exhausting their walltime
+job_monitor_interval = None  # seconds between checks of a running job, set to None to disable. Default: None
+job_monitor_max_read = 10  # MB, only the trailing part of larger increments of an output file is read. Default: 10
+job_monitor_max_scf_cycles = 300  # SCF cycles above which a job is aborted, None to disable. Default: 300
+job_monitor_opt_stall_steps = 50  # optimization steps without progress before aborting, None to disable. Default: 50
+job_monitor_opt_energy_tolerance = 1e-6  # Hartree, an energy decrease smaller than this is no progress. Default: 1e-6
+
+# Output files are scanned once for all quantities ARC parses, and the results are cached in memory
+# by the file path, size, and modification time, so that handlers and the Processor don't re-read the same file
+parsed_outputs_cache_size = 256  # the maximal number of cached output files. Default: 256
+# The parsed quantities of completed jobs are also saved in a sidecar file next to their output files
+# (e.g., output.parsed.json), and reused by later sessions (restarts, post-processing) instead of parsing again
+parsed_output_sidecars = True
 
 input_filename = {'gaussian': 'input.gjf',
                   'qchem': 'input.in',
@@ -135,8 +250,22 @@ default_ts_methods = ['AutoTST']
 
 arc_path = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))  # absolute path to the ARC folder
 
+# The job ledger (an SQLite database) which hands out job numbers and records all initiated and completed jobs
+# of all ARC projects run by this user. Export it to CSV files using arc/utils/ledger.py
+job_ledger_path = os.path.join(os.path.expanduser('~'), '.arc', 'job_ledger.db')
+
+# The computation cache, where outputs of successful jobs are stored and reused by all projects
+# (identical calculations are hydrated from the cache instead of being executed). Set a path to enable it,
+# e.g., os.path.join(os.path.expanduser('~'), '.arc', 'computation_cache'). Default: None (disabled)
+computation_cache_path = None
+computation_cache_max_size = 5  # GB, the least recently used outputs are evicted first. Default: 5
+
 valid_chars = "-_()[]=., %s%s" % (string.ascii_letters, string.digits)
 
+# Changes of the Scheduler's state are appended to a restart journal (restart.journal) next to restart.yml,
+# which is compacted into a complete restart.yml file after this many records
+restart_journal_compaction_interval = 500
+
 # A scan with better resolution (lower number here) takes more time to compute,
 # but the automatically-derived rotor symmetry number is more likely to be correct.
 rotor_scan_resolution = 8.0  # degrees. Default: 8.0
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+ARC - Automatic Rate Calculator
+
+A benchmark of the Scheduler's throughput on a simulated cluster (see arc.job.simulator).
+Each project consists of copies of methylamine (for which pre-recorded outputs exist), optimized using QChem and
+followed by a Molpro single point calculation. The Scheduler's sleeps between polls advance the simulated cluster's
+virtual time instead of the wall time, so only ARC's own overhead is measured.
+
+A second benchmark measures the cost of a Scheduler sweep (finding the jobs which completed since the last poll)
+as a function of the number of running jobs.
+
+A third benchmark measures the time to parse frequencies from synthetic freq job outputs of large molecules.
+
+Usage::
+
+    python arc/utils/benchmark.py --species 10 100 1000 --mode sync --latency 60 --failure-rate 0.1
+    python arc/utils/benchmark.py --sweep --jobs 100 1000 10000
+    python arc/utils/benchmark.py --parse --atoms 10 100 1000
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import shutil
+import time
+from unittest import mock
+
+from arc.job.job import Job
+from arc.job.simulator import SimulatedCluster
+from arc.parser import ParsedOutput, _read_lines
+from arc.scheduler import Scheduler
+from arc.settings import arc_path
+from arc.species.species import ARCSpecies
+
+
+methylamine_xyz = """N       0.82740246   -0.13591675   -0.34672402
+C      -0.57138432    0.05987426   -0.01017382
+H      -1.15625132   -0.81695692   -0.30151723
+H      -0.96892325    0.93030290   -0.53941865
+H      -0.68974235    0.21900925    1.06539087
+H       1.36551510    0.67460227   -0.04307980
+H       1.19338368   -0.93091501    0.17552266"""
+
+benchmark_job_types = {'conformers': False, 'opt': True, 'fine_grid': False, 'freq': False, 'sp': True,
+                       'rotors': False, 'orbitals': False, 'lennard_jones': False, 'bde': False}
+
+
+class CountingDict(dict):
+    """
+    A dictionary counting the entries it accesses, a machine independent measure of the cost of the Scheduler's
+    bookkeeping. A lookup counts as one operation, and iterating over the dictionary counts one operation per entry.
+
+    Args:
+        counter (collections.Counter): The counter of operations, shared by nested dictionaries.
+
+    Attributes:
+        counter (collections.Counter): The counter of operations (its 'operations' entry).
+    """
+    def __init__(self, counter, *args, **kwargs):
+        super(CountingDict, self).__init__(*args, **kwargs)
+        self.counter = counter
+
+    def __getitem__(self, key):
+        self.counter['operations'] += 1
+        return super(CountingDict, self).__getitem__(key)
+
+    def __contains__(self, key):
+        self.counter['operations'] += 1
+        return super(CountingDict, self).__contains__(key)
+
+    def get(self, key, default=None):
+        self.counter['operations'] += 1
+        return super(CountingDict, self).get(key, default)
+
+    def __iter__(self):
+        self.counter['operations'] += len(self)
+        return super(CountingDict, self).__iter__()
+
+    def keys(self):
+        self.counter['operations'] += len(self)
+        return super(CountingDict, self).keys()
+
+    def values(self):
+        self.counter['operations'] += len(self)
+        return super(CountingDict, self).values()
+
+    def items(self):
+        self.counter['operations'] += len(self)
+        return super(CountingDict, self).items()
+
+
+def run_scheduler_benchmark(num_species, server='server1', scheduler_mode='sync', queue_latency=60,
+                            runtime=(600, 3600), failure_rate=0.0, seed=0):
+    """
+    Run an ARC project on a simulated cluster and measure the Scheduler's throughput.
+
+    Args:
+        num_species (int): The number of species in the project.
+        server (str, optional): The server to simulate.
+        scheduler_mode (str, optional): The scheduler mode, either 'sync' or 'async'.
+        queue_latency (float, optional): The time (in virtual seconds) a job waits in the queue.
+        runtime (tuple, optional): The minimal and maximal run time (in virtual seconds) of a job.
+        failure_rate (float, optional): The fraction of jobs which produce an errored output.
+        seed (int, optional): The random seed of the simulation.
+
+    Returns:
+        dict: The benchmark results, including 'sweeps_per_second' (queue status queries per wall second),
+              'dispatch_latency' (the mean virtual time between a job terminating on the cluster and ARC fetching
+              its output to dispatch the follow-up jobs), and 'ssh_operations_per_completed_job'.
+    """
+    project = 'arc_scheduler_benchmark_{0}'.format(num_species)
+    project_directory = os.path.join(arc_path, 'Projects', project)
+    species_list = [ARCSpecies(label='methylamine_{0}'.format(i), smiles='CN', xyz=methylamine_xyz)
+                    for i in range(num_species)]
+    cluster = SimulatedCluster(server=server, queue_latency=queue_latency, runtime=runtime,
+                               failure_rate=failure_rate, seed=seed)
+    cluster.attach()
+
+    async def virtual_async_sleep(seconds):
+        cluster.sleep(seconds)
+        await real_async_sleep(0)
+
+    real_async_sleep = asyncio.sleep
+    t0 = time.time()
+    try:
+        with mock.patch('arc.scheduler.time.sleep', cluster.sleep), \
+                mock.patch('arc.scheduler.asyncio.sleep', virtual_async_sleep):
+            Scheduler(project=project, ess_settings={'qchem': [server], 'molpro': [server]},
+                      species_list=species_list, project_directory=project_directory,
+                      opt_level='wb97x-d3/6-311+g(d,p)', sp_level='ccsd(t)-f12/cc-pvtz-f12',
+                      job_types=benchmark_job_types, scheduler_mode=scheduler_mode)
+    finally:
+        wall_time = time.time() - t0
+        statistics = cluster.get_statistics()
+        cluster.detach()
+        shutil.rmtree(project_directory, ignore_errors=True)
+    return {'species': num_species,
+            'scheduler_mode': scheduler_mode,
+            'wall_time': wall_time,
+            'virtual_time': cluster.clock,
+            'completed_jobs': statistics['completed_jobs'],
+            'errored_jobs': statistics['errored_jobs'],
+            'sweeps_per_second': statistics['status_queries'] / wall_time if wall_time else None,
+            'dispatch_latency': statistics['mean_fetch_latency'],
+            'ssh_operations_per_completed_job': statistics['ssh_operations_per_completed_job'],
+            }
+
+
+def run_sweep_benchmark(num_jobs, jobs_per_species=10, completed_fraction=0.1, sweeps=20):
+    """
+    Measure the cost of finding the completed jobs among the running jobs in a Scheduler sweep.
+    Besides the time, the entries of the Scheduler's job_dict accessed per sweep are counted (see CountingDict).
+
+    Args:
+        num_jobs (int): The number of running jobs.
+        jobs_per_species (int, optional): The number of running jobs per species.
+        completed_fraction (float, optional): The fraction of running jobs which are no longer in the queue.
+        sweeps (int, optional): The number of sweeps to average over.
+
+    Returns:
+        dict: The benchmark results, including 'sweep_time' (seconds per sweep), 'time_per_job'
+              (microseconds per running job per sweep), and 'operations_per_job' (job_dict entries accessed
+              per running job per sweep).
+    """
+    project = 'arc_sweep_benchmark'
+    project_directory = os.path.join(arc_path, 'Projects', project)
+    species = ARCSpecies(label='methylamine', smiles='CN', xyz=methylamine_xyz)
+    counter = collections.Counter()
+    try:
+        scheduler = Scheduler(project=project, ess_settings={'gaussian': ['server1']}, species_list=[species],
+                              project_directory=project_directory, job_types=benchmark_job_types, testing=True)
+        scheduler.job_dict = CountingDict(counter, scheduler.job_dict)
+        completed = list()
+        for i in range(num_jobs):
+            # only the Scheduler's bookkeeping is measured, so all jobs are associated with copies of the same species
+            label = 'methylamine_{0}'.format(i // jobs_per_species)
+            if label not in scheduler.job_dict:
+                scheduler.unique_species_labels.append(label)
+                scheduler.job_dict[label] = CountingDict(counter, {'sp': CountingDict(counter)})
+                scheduler.running_jobs[label] = set()
+            job = Job(project=project, ess_settings=scheduler.ess_settings, species_name=label, xyz=species.get_xyz(),
+                      job_type='sp', level_of_theory='wb97x-d3/6-311+g(d,p)', multiplicity=1, job_num=i,
+                      job_id=i + 1, project_directory=project_directory, testing=True)
+            scheduler.job_dict[label]['sp'][job.job_name] = job
+            scheduler.running_jobs[label].add(job.job_name)
+            if i % int(round(1 / completed_fraction)) == 0:
+                completed.append(job.job_id)
+        scheduler.servers_jobs_ids = set(range(1, num_jobs + 1)) - set(completed)
+        counter.clear()
+        t0 = time.perf_counter()
+        for _ in range(sweeps):
+            completed_jobs = scheduler.get_completed_jobs()
+        sweep_time = (time.perf_counter() - t0) / sweeps
+    finally:
+        shutil.rmtree(project_directory, ignore_errors=True)
+    return {'running_jobs': num_jobs,
+            'completed_jobs': len(completed_jobs),
+            'sweep_time': sweep_time,
+            'time_per_job': sweep_time / num_jobs * 1e6,
+            'operations_per_job': counter['operations'] / sweeps / num_jobs,
+            }
+
+
+def write_synthetic_freq_output(path, num_atoms, software):
+    """
+    Write a synthetic freq job output file of a nonlinear molecule, listing the frequencies and the normal mode
+    displacements in the format of the respective ESS.
+
+    Args:
+        path (str): The path of the output file.
+        num_atoms (int): The number of atoms.
+        software (str): The ESS, either 'gaussian', 'qchem', or 'molpro'.
+
+    Returns:
+        list: The frequencies written.
+    """
+    frequencies = [round(100.0 + 3500.0 * i / (3 * num_atoms - 6), 2) for i in range(3 * num_atoms - 6)]
+    displacements = ''.join(['   0.01   0.02   0.03' if software != 'gaussian' else '    0.01  0.02  0.03'
+                             for _ in range(3)])
+    with open(path, 'w') as f:
+        if software == 'gaussian':
+            f.write(' Entering Gaussian System, Link 0=g16\n Copyright (c) 1988-2017, Gaussian, Inc.\n')
+        elif software == 'qchem':
+            f.write('                  Welcome to Q-Chem\n qchem freq job\n')
+        else:
+            f.write(' ***  PROGRAM SYSTEM MOLPRO  ***\n')
+        for i in range(0, len(frequencies), 3):
+            group = frequencies[i:i + 3]
+            if software == 'gaussian':
+                f.write(' Frequencies --' + ''.join('{0:>23.4f}'.format(frq) for frq in group) + '\n')
+                f.write(' Red. masses --' + ''.join('{0:>23.4f}'.format(1.0) for _ in group) + '\n')
+                f.write('  Atom  AN      X      Y      Z        X      Y      Z        X      Y      Z\n')
+                for j in range(num_atoms):
+                    f.write('{0:>6}{1:>4}{2}\n'.format(j + 1, 6, displacements))
+            elif software == 'qchem':
+                f.write(' Frequency:' + ''.join('{0:>18.2f}'.format(frq) for frq in group) + '\n')
+                f.write(' Force Cnst:' + ''.join('{0:>17.4f}'.format(1.0) for _ in group) + '\n')
+                f.write('               X      Y      Z        X      Y      Z        X      Y      Z\n')
+                for _ in range(num_atoms):
+                    f.write(' C    {0}\n'.format(displacements))
+            else:
+                f.write('  Wavenumbers [cm-1]' + ''.join('{0:>14.2f}'.format(frq) for frq in group) + '\n')
+                for j in range(3 * num_atoms):
+                    f.write('  C{0:<5} X{1}\n'.format(j // 3 + 1, displacements))
+        if software == 'molpro':
+            f.write('\n Vibration           Wavenumber\n      Nr                 [1/cm]\n')
+            for i, frq in enumerate(frequencies):
+                f.write('{0:>8}{1:>23.2f}\n'.format(i + 7, frq))
+            f.write('\n')
+    return frequencies
+
+
+def run_parse_benchmark(num_atoms, software='gaussian', repeats=3):
+    """
+    Measure the time to parse the frequencies from a synthetic freq job output file.
+    The output file is scanned anew in each repetition (the parsed outputs cache is bypassed).
+    The time to merely read the lines of the file is measured as a reference, being the lower bound of the time
+    a parser iterating over the lines in Python takes. The lines the parser reads in Python are also counted.
+
+    Args:
+        num_atoms (int): The number of atoms of the molecule.
+        software (str, optional): The ESS, either 'gaussian', 'qchem', or 'molpro'.
+        repeats (int, optional): The number of repetitions to average over.
+
+    Returns:
+        dict: The benchmark results, including the 'file_size' (MB), the 'parse_time' (seconds),
+              the 'throughput' (MB per second), the 'readlines_time' (seconds), the number of 'lines' of the file,
+              and the number of 'parsed_lines' (the lines read in Python per repetition).
+    """
+    directory = os.path.join(arc_path, 'Projects', 'arc_parse_benchmark')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'output_{0}_{1}.out'.format(software, num_atoms))
+    try:
+        frequencies = write_synthetic_freq_output(path=path, num_atoms=num_atoms, software=software)
+        file_size = os.path.getsize(path) / 1024 ** 2
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            parsed_frequencies = ParsedOutput(path=path).get('frequencies', software=software)
+        parse_time = (time.perf_counter() - t0) / repeats
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            with open(path, 'r') as f:
+                lines = len(f.readlines())
+        readlines_time = (time.perf_counter() - t0) / repeats
+
+        counter = collections.Counter()
+
+        def counting_read_lines(data, start):
+            for line in _read_lines(data, start):
+                counter['lines'] += 1
+                yield line
+
+        with mock.patch('arc.parser._read_lines', counting_read_lines):
+            ParsedOutput(path=path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {'atoms': num_atoms,
+            'software': software,
+            'frequencies': len(parsed_frequencies),
+            'correct': list(parsed_frequencies) == frequencies,
+            'file_size': file_size,
+            'parse_time': parse_time,
+            'throughput': file_size / parse_time if parse_time else None,
+            'readlines_time': readlines_time,
+            'lines': lines,
+            'parsed_lines': counter['lines'],
+            }
+
+
+def main():
+    """
+    Run the Scheduler benchmark for projects of several sizes and report the results.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the ARC Scheduler on a simulated cluster')
+    parser.add_argument('--species', type=int, nargs='+', default=[10, 100, 1000],
+                        help='the project sizes (number of species) to benchmark')
+    parser.add_argument('--server', type=str, default='server1', help='the server to simulate')
+    parser.add_argument('--mode', type=str, default='sync', choices=['sync', 'async'], help='the scheduler mode')
+    parser.add_argument('--latency', type=float, default=60, help='the queue latency in virtual seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='the fraction of errored jobs')
+    parser.add_argument('--seed', type=int, default=0, help='the random seed of the simulation')
+    parser.add_argument('--sweep', action='store_true', help='benchmark the cost of a Scheduler sweep instead')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='the numbers of running jobs for the sweep benchmark')
+    parser.add_argument('--parse', action='store_true', help='benchmark parsing frequencies from outputs instead')
+    parser.add_argument('--atoms', type=int, nargs='+', default=[10, 100, 1000],
+                        help='the molecule sizes (number of atoms) for the parse benchmark')
+    args = parser.parse_args()
+
+    if args.parse:
+        print('{0:>8} {1:>10} {2:>12} {3:>10} {4:>16} {5:>14} {6:>20}'.format(
+            'atoms', 'ESS', 'frequencies', 'size [MB]', 'parse time [ms]', 'MB/second', 'readlines time [ms]'))
+        for num_atoms in args.atoms:
+            for software in ['gaussian', 'qchem', 'molpro']:
+                results = run_parse_benchmark(num_atoms=num_atoms, software=software)
+                print('{0:>8} {1:>10} {2:>12} {3:>10.1f} {4:>16.1f} {5:>14.1f} {6:>20.1f}'.format(
+                    results['atoms'], results['software'], results['frequencies'], results['file_size'],
+                    results['parse_time'] * 1e3, results['throughput'] or 0, results['readlines_time'] * 1e3))
+        return
+
+    if args.sweep:
+        print('{0:>12} {1:>10} {2:>16} {3:>22} {4:>22}'.format('running jobs', 'completed', 'sweep time [ms]',
+                                                               'time per job [us]', 'operations per job'))
+        for num_jobs in args.jobs:
+            results = run_sweep_benchmark(num_jobs=num_jobs)
+            print('{0:>12} {1:>10} {2:>16.2f} {3:>22.2f} {4:>22.2f}'.format(
+                results['running_jobs'], results['completed_jobs'], results['sweep_time'] * 1e3,
+                results['time_per_job'], results['operations_per_job']))
+        return
+
+    print('{0:>8} {1:>10} {2:>14} {3:>18} {4:>22}'.format(
+        'species', 'wall [s]', 'sweeps/second', 'dispatch lat. [s]', 'SSH ops/completed job'))
+    for num_species in args.species:
+        results = run_scheduler_benchmark(num_species=num_species, server=args.server, scheduler_mode=args.mode,
+                                          queue_latency=args.latency, failure_rate=args.failure_rate, seed=args.seed)
+        print('{0:>8} {1:>10.1f} {2:>14.2f} {3:>18.1f} {4:>22.1f}'.format(
+            results['species'], results['wall_time'], results['sweeps_per_second'] or 0,
+            results['dispatch_latency'] or 0, results['ssh_operations_per_completed_job'] or 0))
+
+
+if __name__ == '__main__':
+    main()
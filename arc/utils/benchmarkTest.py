@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+This module contains unit tests of the arc.utils.benchmark module
+"""
+
+import unittest
+
+from arc.utils.benchmark import run_parse_benchmark, run_scheduler_benchmark, run_sweep_benchmark
+
+
+class TestSchedulerBenchmark(unittest.TestCase):
+    """
+    Contains unit tests guarding the Scheduler's throughput on a simulated cluster
+    """
+
+    def test_sync_scheduler(self):
+        """Test the synchronous Scheduler's server operations and dispatch latency"""
+        results = run_scheduler_benchmark(num_species=10, server='server1', scheduler_mode='sync')
+        self.assertEqual(results['completed_jobs'], 20)  # an opt and an sp job per species
+        self.assertLessEqual(results['dispatch_latency'], 30)  # detected by the next sweep
+        self.assertLess(results['ssh_operations_per_completed_job'], 40)
+
+    def test_async_scheduler(self):
+        """Test the asynchronous Scheduler's server operations and dispatch latency, also with failing jobs"""
+        results = run_scheduler_benchmark(num_species=10, server='server2', scheduler_mode='async')
+        self.assertEqual(results['completed_jobs'], 20)
+        self.assertLess(results['ssh_operations_per_completed_job'], 40)
+        results = run_scheduler_benchmark(num_species=10, server='server2', scheduler_mode='async', failure_rate=0.2)
+        self.assertGreater(results['errored_jobs'], 0)
+        self.assertGreaterEqual(results['completed_jobs'], 20)
+
+    def test_sweep_cost(self):
+        """Test that the cost of a Scheduler sweep per running job does not grow with the number of running jobs"""
+        small = run_sweep_benchmark(num_jobs=200)
+        large = run_sweep_benchmark(num_jobs=4000)
+        self.assertEqual(small['completed_jobs'], 20)
+        self.assertEqual(large['completed_jobs'], 400)
+        # the job_dict entries accessed per running job are counted, rather than timed, to keep the test robust
+        self.assertLessEqual(large['operations_per_job'], small['operations_per_job'])
+
+    def test_parse_frequencies(self):
+        """Test parsing frequencies from synthetic freq job outputs of a large molecule"""
+        for software in ['gaussian', 'qchem', 'molpro']:
+            results = run_parse_benchmark(num_atoms=300, software=software, repeats=1)
+            self.assertEqual(results['frequencies'], 3 * 300 - 6)
+            self.assertTrue(results['correct'])
+            # only the lines listing frequencies are read in Python, not the normal mode displacements
+            self.assertLess(results['parsed_lines'], 2 * results['frequencies'])
+            self.assertLess(results['parsed_lines'], results['lines'] / 50)
+
+
+if __name__ == '__main__':
+    unittest.main(testRunner=unittest.TextTestRunner(verbosity=2))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+ARC - Automatic Rate Calculator
+
+Inspect and prune the computation cache (see arc.job.cache).
+
+Usage::
+
+    python arc/utils/cache.py list
+    python arc/utils/cache.py prune --older-than 30
+    python arc/utils/cache.py prune --max-size 2
+    python arc/utils/cache.py prune --project my_project
+    python arc/utils/cache.py clear
+"""
+
+import argparse
+
+from arc.job.cache import ComputationCache
+
+
+def main():
+    """
+    Inspect or prune the computation cache.
+    """
+    parser = argparse.ArgumentParser(description='Inspect and prune the ARC computation cache')
+    parser.add_argument('--path', type=str, default=None, help='the cache folder (the ARC settings by default)')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('list', help='list the cache entries')
+    prune_parser = subparsers.add_parser('prune', help='remove cache entries')
+    prune_parser.add_argument('--older-than', type=float, default=None,
+                              help='remove entries not used in the given number of days')
+    prune_parser.add_argument('--max-size', type=float, default=None,
+                              help='remove the least recently used entries until the cache is smaller than this (GB)')
+    prune_parser.add_argument('--project', type=str, default=None, help='remove entries computed in this project')
+    prune_parser.add_argument('--species', type=str, default=None, help='remove entries of this species')
+    subparsers.add_parser('clear', help='remove all cache entries')
+    args = parser.parse_args()
+
+    cache = ComputationCache(path=args.path)
+    if cache.path is None:
+        print('The computation cache is disabled')
+        return
+    if args.command == 'prune':
+        removed = list()
+        if args.older_than is not None or args.project is not None or args.species is not None:
+            removed.extend(cache.prune(older_than=args.older_than, project=args.project, species_name=args.species))
+        if args.max_size is not None:
+            removed.extend(cache.evict(max_size=args.max_size))
+        print('Removed {0} entries'.format(len(removed)))
+    elif args.command == 'clear':
+        print('Removed {0} entries'.format(len(cache.prune())))
+    else:
+        entries = sorted(cache.get_entries(), key=lambda e: e.get('last_used', ''), reverse=True)
+        print('{0:<14} {1:<24} {2:<10} {3:<10} {4:<32} {5:>6} {6:>10} {7:<19}'.format(
+            'key', 'species', 'job type', 'software', 'level of theory', 'hits', 'size [MB]', 'last used'))
+        for entry in entries:
+            print('{0:<14} {1:<24} {2:<10} {3:<10} {4:<32} {5:>6} {6:>10.2f} {7:<19}'.format(
+                entry['key'][:12], entry.get('species_name', ''), entry.get('job_type', ''),
+                entry.get('software', ''), entry.get('level_of_theory', ''), entry.get('hits', 0),
+                entry.get('size', 0) / 1024 ** 2, entry.get('last_used', '')[:19]))
+        print('\n{0} entries, {1:.2f} GB (maximum {2} GB) in {3}'.format(
+            len(entries), cache.get_size(entries) / 1024 ** 3, cache.max_size, cache.path))
+
+
+if __name__ == '__main__':
+    main()
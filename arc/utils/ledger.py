@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+"""
+ARC - Automatic Rate Calculator
+
+Export the job ledger (see arc.job.ledger) to CSV files.
+
+Usage::
+
+    python arc/utils/ledger.py
+    python arc/utils/ledger.py --table completed_jobs --output completed_jobs.csv
+    python arc/utils/ledger.py --legacy
+"""
+
+import argparse
+
+from arc.job.ledger import JobLedger
+
+
+def main():
+    """
+    Export the initiated and completed jobs recorded in the job ledger to CSV files.
+    """
+    parser = argparse.ArgumentParser(description='Export the ARC job ledger to CSV files')
+    parser.add_argument('--path', type=str, default=None, help='the ledger database (the ARC settings by default)')
+    parser.add_argument('--table', type=str, choices=['initiated_jobs', 'completed_jobs'], default=None,
+                        help='the table to export (both tables by default)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='the CSV file path (only with --table, <table>.csv next to the ledger by default)')
+    parser.add_argument('--legacy', action='store_true',
+                        help='only export the columns of the CSV files written by earlier ARC versions')
+    args = parser.parse_args()
+    if args.output is not None and args.table is None:
+        parser.error('--output requires --table')
+
+    ledger = JobLedger(path=args.path)
+    for table in [args.table] if args.table is not None else ['initiated_jobs', 'completed_jobs']:
+        path = ledger.export_csv(table=table, path=args.output, legacy=args.legacy)
+        print('Exported {0} to {1}'.format(table, path))
+
+
+if __name__ == '__main__':
+    main()